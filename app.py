@@ -12,10 +12,16 @@ from sys import argv
 from werkzeug.datastructures import Authorization
 
 from src.server.usage_tracker import get_stats
-from src.rnaprobes.TFOFinder import tfofinder
-from src.rnaprobes.PinMol import pinmol
-from src.rnaprobes.smFISH import smFISH
-from src.server.program_controller import run_program, set_root, query_program
+from src.server.program_controller import run_program, set_root, query_program, download_result as download_program_result, \
+    progress_stream as program_progress_stream, pre_upload as pre_upload_ct_file, result_files as get_result_files, result_table as get_result_table, \
+    result_file as get_result_file, run_batch, batch_status as get_batch_status, download_batch
+from src.rnaprobes.TFOFinder import constants as tfofinder_constants #not the programs, which import pandas and Biopython
+from src.rnaprobes.PinMol import constants as pinmol_constants
+from src.rnaprobes.smFISH import constants as smFISH_constants
+from src.server.job_executor import get_executor
+from src.server.job_store import get_job_store
+from src.server.Program import recover_interrupted_jobs, start_work_stealing, start_janitor, get_metrics_text
+from src.server import metrics, janitor
 from werkzeug.utils import secure_filename
 
 program_names = ["TFOFinder", "PinMol", "smFISH"]
@@ -23,6 +29,11 @@ IS_WEB_APP = os.environ.get("IS_WEB_APP")
 
 AUTH = os.environ.get("AUTH")
 set_root(Path(__file__).parent)
+if not os.environ.get("RNAPROBES_RECOVER_AFTER_FORK"): #gunicorn.conf.py recovers in each worker instead, the preloading parent process must not start jobs
+    metrics.clear_directory()
+    recover_interrupted_jobs()
+    start_work_stealing()
+    start_janitor()
 def create_app():
     app = Flask(__name__)
     app.config['TEMPLATES_AUTO_RELOAD'] = True
@@ -65,7 +76,7 @@ def design():
     return redirect(url_for('index'))
 
 def get_exports():
-    return {"TFOFinder": tfofinder.exported_values, "PinMol": pinmol.exported_values, "smFISH": smFISH.exported_values}
+    return {"TFOFinder": tfofinder_constants.exported_values, "PinMol": pinmol_constants.exported_values, "smFISH": smFISH_constants.exported_values}
 
 @app.route('/send-request', methods=['POST'])
 def send_request():
@@ -73,12 +84,66 @@ def send_request():
     return run_program(program, g.visitor_id, "The given arguments are invalid",
                          "Something went wrong when calculating your result")
 
+@app.route('/pre-upload', methods=['POST'])
+def pre_upload():
+    return pre_upload_ct_file()
+
 @app.route('/query-result', methods=['GET'])
 def query_result():
     program_name = secure_filename(request.args.get("program")) #prevents injection attacks
     id = uuid.UUID(request.args.get("id")) #prevents injection attacks
     return query_program(program_name, id)
 
+@app.route('/download-result', methods=['GET'])
+def download_result():
+    id = uuid.UUID(request.args.get("id")) #prevents injection attacks
+    return download_program_result(id)
+
+@app.route('/result-files', methods=['GET'])
+def result_files():
+    id = uuid.UUID(request.args.get("id")) #prevents injection attacks
+    return get_result_files(id)
+
+@app.route('/result-table', methods=['GET'])
+def result_table():
+    id = uuid.UUID(request.args.get("id")) #prevents injection attacks
+    return get_result_table(id, request.args.get("file", ""), request.args.get("page", 1, type=int),
+                            request.args.get("per_page", 100, type=int), request.args.get("sort") or None,
+                            request.args.get("order") == "desc", request.args.get("q") or None, request.args.get("column") or None)
+
+@app.route('/result-file', methods=['GET'])
+def result_file():
+    id = uuid.UUID(request.args.get("id")) #prevents injection attacks
+    return get_result_file(id, request.args.get("file", ""))
+
+@app.route('/progress-stream', methods=['GET'])
+def progress_stream():
+    id = uuid.UUID(request.args.get("id")) #prevents injection attacks
+    return program_progress_stream(id)
+
+@app.route('/send-batch', methods=['POST'])
+def send_batch():
+    return run_batch(g.visitor_id, "The given arguments are invalid", "Something went wrong when calculating your result")
+
+@app.route('/batch-status', methods=['GET'])
+def batch_status():
+    id = uuid.UUID(request.args.get("id")) #prevents injection attacks
+    return get_batch_status(id)
+
+@app.route('/batch-download', methods=['GET'])
+def batch_download():
+    id = uuid.UUID(request.args.get("id")) #prevents injection attacks
+    return download_batch(id)
+
+@app.route('/queue-status', methods=['GET'])
+def queue_status():
+    return jsonify(**get_executor().get_status(), jobs=get_job_store().count_by_state())
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    if AUTH and not matches_AUTH(request.authorization, AUTH): abort(401) #scrape with the same credentials as /getstatistics
+    return Response(get_metrics_text(), content_type=metrics.CONTENT_TYPE)
+
 @app.route('/legal')
 def legal():
     return render_template('legal.html')
@@ -103,7 +168,7 @@ def get_statistics():
     pwd = request.authorization
     if not AUTH: return "Error: no password found in server to compare against", 500
     if matches_AUTH(pwd, AUTH):
-        return get_stats()
+        return get_stats() + "\n" + janitor.get_stats_text()
     abort(401)
 
 if __name__ == '__main__':
@@ -0,0 +1,33 @@
+# gunicorn settings for the web app, used with: python -m gunicorn -c gunicorn.conf.py app:app
+import gc
+import os
+
+bind = os.environ.get("RNAPROBES_BIND", "0.0.0.0:8080")
+workers = int(os.environ.get("WEB_CONCURRENCY", 4))
+worker_class = "gthread"
+threads = int(os.environ.get("RNAPROBES_THREADS", 8)) #per worker. An open progress stream holds a thread, so at most half of them stream,
+#and programs ran while the user waits still run one at a time per worker (see Program.MAX_INLINE_RUNS)
+preload_app = True #import the app once in the parent process. Workers are forked from it and share its memory copy-on-write
+
+os.environ.setdefault("RNAPROBES_RECOVER_AFTER_FORK", "1") #see post_fork
+os.environ.setdefault("RNAPROBES_RECORD_TIMINGS", "1") #the runs of the webserver calibrate the runtime model (see runtime_model.refresh)
+#import the programs before forking, so the workers share them. Turn off for scale-to-zero machines, whose first / then
+#doesn't wait for pandas and Biopython (the first request of each program imports them in its worker instead)
+PRELOAD_PROGRAMS = os.environ.get("RNAPROBES_PRELOAD_PROGRAMS", "1") != "0"
+
+def when_ready(server):
+    #ran in the parent process before the workers are forked, so the programs (and pandas) are only imported once
+    from src.server.program_controller import preload_programs
+    from src.server.metrics import clear_directory
+    from src.server.progress import get_max_streams, stream_slots
+    if PRELOAD_PROGRAMS: preload_programs()
+    stream_slots.limit = get_max_streams(server.cfg.threads) #threads may also be set on the command line
+    clear_directory() #counts start from zero with each server run, like any Prometheus target
+    gc.freeze() #keep the garbage collector from touching (and so copying) the shared objects in each worker
+
+def post_fork(server, worker):
+    #jobs must be started by a worker, since the parent process never runs the job executor
+    from src.server.Program import recover_interrupted_jobs, start_work_stealing, start_janitor
+    recover_interrupted_jobs()
+    start_work_stealing()
+    start_janitor()
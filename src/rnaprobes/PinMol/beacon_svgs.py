@@ -0,0 +1,118 @@
+# Draw the svg files of PinMol's beacons when they're wanted instead of during the run. PinMol saves the folded structure
+# of each beacon that gets an svg file (its sequence and base pairs) in [fname]_beacon_structures.json, next to where the
+# svg files go. The webserver draws an svg file the first time it's viewed or downloaded, and the CLI draws them all with
+# python -m rnaprobes pinmol-svgs <json file> (or with pinmol --render-svgs, during the run)
+from __future__ import annotations
+
+import argparse
+import json
+import shlex
+import sys
+from argparse import Namespace
+from collections import namedtuple
+from pathlib import Path
+from typing import IO
+
+from ..RNAProbesUtil import run_command_line
+from ..RNAUtil import RNAStructureWrapper
+from ..util import path_arg, remove_files
+from .. import hairpin_svg
+
+STRUCTURES_FILE_SUFFIX = "_beacon_structures.json"
+FORMAT_VERSION = 1
+
+BeaconStructure = namedtuple("BeaconStructure", ["title", "sequence", "pairs"]) #pairs are (i, j) with 1 <= i < j, like in a ct file
+
+def read_ct(file: IO[str]) -> BeaconStructure:
+    """:return: the first structure of a ct file (e.g. from RNAStructureWrapper.fold)"""
+    header = file.readline().split(maxsplit=1)
+    length, title = int(header[0]), header[1].strip() if len(header) > 1 else ""
+    bases, pairs = [], []
+    for _ in range(length):
+        columns = file.readline().split()
+        bases.append(columns[1])
+        index, pair = int(columns[0]), int(columns[4])
+        if index < pair: pairs.append((index, pair))
+    return BeaconStructure(title, "".join(bases), pairs)
+
+def to_ct(structure: BeaconStructure) -> str:
+    """:return: the structure as a ct file, formatted like RNAstructure's"""
+    length = len(structure.sequence)
+    partners = [0] * (length + 1)
+    for i, j in structure.pairs:
+        partners[i], partners[j] = j, i
+    lines = [f"{length:5d}  {structure.title}"]
+    lines.extend(f"{index:5d} {base}{index - 1:8d}{index + 1 if index < length else 0:5d}{partners[index]:5d}{index:5d}"
+                 for index, base in enumerate(structure.sequence, start=1))
+    return "\n".join(lines) + "\n"
+
+def dump(structures: dict[str, BeaconStructure], file: IO[str]):
+    """:param structures: the structure of each svg file, by its name (relative to the structures file)"""
+    json.dump(dict(version=FORMAT_VERSION, structures={name: dict(title=structure.title, sequence=structure.sequence,
+                                                                  pairs=[list(pair) for pair in structure.pairs])
+                                                       for name, structure in structures.items()}), file, separators=(",", ":"))
+
+def load(file: IO[str] | IO[bytes]) -> dict[str, BeaconStructure]:
+    """:return: the structure of each svg file, by its name (relative to the structures file)"""
+    structures = json.load(file)["structures"]
+    return {name: BeaconStructure(value["title"], value["sequence"], [tuple(pair) for pair in value["pairs"]])
+            for name, value in structures.items()}
+
+def is_structures_file(name: str) -> bool:
+    return name.endswith(STRUCTURES_FILE_SUFFIX)
+
+def render_svg(structure: BeaconStructure, svg_path: Path) -> Path:
+    """
+    Draw a structure as an svg file, in-process if it's a simple stem-loop (see hairpin_svg), or with RNAstructure's draw
+    :return: the path of the svg file
+    """
+    svg = hairpin_svg.draw_svg(structure.sequence, structure.pairs, structure.title)
+    if svg is not None:
+        with open(svg_path, "w") as file:
+            file.write(svg)
+        return svg_path
+    ct_path = svg_path.with_suffix(".ct")
+    try:
+        with open(ct_path, "w") as file:
+            file.write(to_ct(structure))
+        RNAStructureWrapper.draw(ct_path, svg_path, arguments="--svg -n 1")
+    finally:
+        remove_files(ct_path)
+    return svg_path
+
+def render_all(structures_path: Path, overwrite: bool = False) -> list[Path]:
+    """
+    Draw every svg file of a structures file, next to it
+    :param overwrite: draw the svg files that already exist again
+    :return: the paths of the svg files that were drawn
+    """
+    with open(structures_path, "r") as file:
+        structures = load(file)
+    svg_paths = [(structures_path.parent / name, structure) for name, structure in structures.items()]
+    return [render_svg(structure, svg_path) for svg_path, structure in svg_paths if overwrite or not svg_path.exists()]
+
+def parse_arguments(args: str | list, from_command_line = True) -> Namespace:
+    args = create_arg_parser().parse_args(args if isinstance(args, list) else shlex.split(args))
+    args.from_command_line = from_command_line
+    return args
+
+def run(args="", from_command_line = True):
+    arguments = parse_arguments(args, from_command_line=from_command_line)
+    rendered = render_all(arguments.file, arguments.overwrite)
+    if not arguments.quiet:
+        print(f"Drew {len(rendered)} svg files in {arguments.file.parent}")
+    return rendered
+
+def create_arg_parser():
+    import functools
+    parser = argparse.ArgumentParser(
+        prog='PinMol svgs',
+        description="Draw the svg files of PinMol's beacons from the structures it saved.")
+    parser.add_argument("file", type=functools.partial(path_arg, suffix=".json"),
+                        help=f"The [fname]{STRUCTURES_FILE_SUFFIX} file in PinMol's svg folder")
+    parser.add_argument("-w", "--overwrite", action="store_true", help="Draw the svg files that already exist again")
+    parser.add_argument("-q", "--quiet", action="store_true")
+    return parser
+
+if __name__ == "__main__":
+    run_command_line(run, sys.argv[1:])
@@ -0,0 +1,9 @@
+# PinMol's limits, which the web app shows in its forms. Kept apart from pinmol.py so reading them doesn't import pandas or Biopython
+
+probeMin = 18
+probeMax = 26
+probesToSaveMin = 2
+probesToSaveMax = 50
+valid_blast_databases = ["refseq_rna", "nr", "nt"]
+
+exported_values = {"probeMin": probeMin, "probeMax": probeMax, "probesToSaveMin": probesToSaveMin, "probesToSaveMax": probesToSaveMax, 'validBlastDatabases': valid_blast_databases}
@@ -0,0 +1,266 @@
+# A local alternative to running blast for PinMol's cross homology. PinMol only uses, for each pick, the most positives
+# of its ungapped hits on the minus strand (see pinmol.use_blast). Those are found here with an on-disk k-mer index of a
+# transcriptome FASTA file: the reverse complement of each probe is seeded with its k-mers (k = 7, like blast's word
+# size), and each hit diagonal is extended without gaps, scoring like blastn's reward and penalty (1 and -3). Build an
+# index with python -m rnaprobes pinmol-homology-index <fasta file>, and use it with pinmol --homology-index <index>
+#
+# An index is a folder of .npy files, memory-mapped when it's opened so only the pages a query reads are loaded:
+# sequence.npy: every sequence, encoded as 0-3 (ACGT, U is read as T). Sequences are separated by SEPARATOR, as are
+#               unknown bases (e.g. N), so that no k-mer or hit crosses them
+# offsets.npy: where the positions of each k-mer start in positions.npy (4^k + 1 values)
+# positions.npy: the positions of every k-mer in sequence.npy, grouped by k-mer (counting sorted)
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shlex
+import shutil
+import sys
+import tempfile
+from argparse import Namespace
+from pathlib import Path
+from typing import IO, Iterable, Iterator
+
+import numpy as np
+from pandas import DataFrame
+
+from ..RNAProbesUtil import run_command_line
+from ..util import path_arg
+
+FORMAT_VERSION = 1
+DEFAULT_K = 7 #blast's word size for PinMol
+MATCH_SCORE, MISMATCH_SCORE = 1, -3 #blastn's reward and penalty for PinMol
+SEPARATOR = 4
+INDEX_SUFFIX = ".kmer-index" #of an index built next to its FASTA file
+INFO_FILE_NAME = "index.json"
+FASTA_SUFFIXES = (".fa", ".fasta", ".fna", ".ffn", ".frn")
+CHUNK_SIZE = 16 * 1024 * 1024 #k-mers sorted at a time while building
+DIAGONAL_CHUNK_SIZE = 64 * 1024 #hit diagonals extended at a time
+RESULT_COLUMNS = ["Pick#", "Positives", "Gaps"] #like pinmol.get_blast_results
+
+_encoding = bytearray([SEPARATOR]) * 256
+for _bases, _code in (("Aa", 0), ("Cc", 1), ("Gg", 2), ("TtUu", 3)):
+    for _base in _bases: _encoding[ord(_base)] = _code
+_encoding = bytes(_encoding)
+
+def encode(sequence: str | bytes) -> np.ndarray:
+    """:return: the sequence as 0-3 codes, with SEPARATOR for unknown bases"""
+    sequence = sequence.encode() if isinstance(sequence, str) else sequence
+    return np.frombuffer(sequence.translate(_encoding), dtype=np.uint8)
+
+def reverse_complement(codes: np.ndarray) -> np.ndarray:
+    return np.where(codes < SEPARATOR, 3 - codes, codes)[::-1].astype(np.uint8)
+
+def read_fasta(file: IO[bytes]) -> Iterator[bytes]:
+    """:return: the sequence of each record, encoded (see encode)"""
+    lines = []
+    for line in file:
+        if line.startswith(b">"):
+            if lines: yield b"".join(lines).translate(_encoding)
+            lines = []
+        else:
+            lines.append(line.strip())
+    if lines: yield b"".join(lines).translate(_encoding)
+
+def get_kmers(sequence: np.ndarray, k: int, start: int = 0, end: int = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    :param start, end: the range of k-mer positions to get
+    :return: the positions of the k-mers that don't include a separator, and their codes
+    """
+    end = len(sequence) - k + 1 if end is None else end
+    if end <= start: return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    window = np.asarray(sequence[start:end + k - 1])
+    separators = np.concatenate(([0], np.cumsum(window >= SEPARATOR, dtype=np.int64)))
+    valid = separators[k:] == separators[:-k]
+    codes = np.zeros(end - start, dtype=np.int64)
+    for offset in range(k):
+        codes = (codes << 2) | (window[offset:offset + end - start] & 3)
+    return np.flatnonzero(valid) + start, codes[valid]
+
+def write_positions(sequence: np.ndarray, k: int, directory: Path) -> int:
+    """
+    Write offsets.npy and positions.npy, counting sorting the k-mers a chunk at a time so they're never all in memory
+    :return: the number of k-mers
+    """
+    bucket_count = 4 ** k
+    counts = np.zeros(bucket_count, dtype=np.int64)
+    chunks = [(start, min(start + CHUNK_SIZE, len(sequence) - k + 1)) for start in range(0, max(len(sequence) - k + 1, 0), CHUNK_SIZE)]
+    for start, end in chunks:
+        counts += np.bincount(get_kmers(sequence, k, start, end)[1], minlength=bucket_count)
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    np.save(directory / "offsets.npy", offsets)
+    positions = np.lib.format.open_memmap(directory / "positions.npy", mode="w+", shape=(int(offsets[-1]),),
+                                          dtype=np.uint32 if len(sequence) < 2 ** 32 else np.int64)
+    cursors = offsets[:-1].copy()
+    for start, end in chunks:
+        kmer_positions, codes = get_kmers(sequence, k, start, end)
+        order = np.argsort(codes, kind="stable")
+        codes = codes[order]
+        chunk_counts = np.bincount(codes, minlength=bucket_count)
+        chunk_starts = np.concatenate(([0], np.cumsum(chunk_counts)[:-1]))
+        positions[cursors[codes] + np.arange(len(codes)) - chunk_starts[codes]] = kmer_positions[order]
+        cursors += chunk_counts
+    positions.flush()
+    del positions
+    return int(offsets[-1])
+
+def get_fasta_info(fasta_path: Path) -> dict:
+    stat = fasta_path.stat()
+    return dict(path=str(fasta_path.resolve()), size=stat.st_size, modified=stat.st_mtime_ns)
+
+def build_index(fasta_path: Path, index_path: Path = None, k: int = DEFAULT_K) -> Path:
+    """
+    Build the index of a FASTA file. It's written apart and moved into place once it's complete
+    :param index_path: where to write it, next to the FASTA file by default (see get_index_path)
+    :return: the index's path
+    """
+    fasta_path = Path(fasta_path)
+    index_path = Path(index_path) if index_path else get_index_path(fasta_path)
+    with open(fasta_path, "rb") as file:
+        records = list(read_fasta(file))
+    separator = bytes([SEPARATOR])
+    sequence = np.frombuffer(separator + separator.join(records) + separator, dtype=np.uint8)
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    directory = Path(tempfile.mkdtemp(dir=index_path.parent, prefix=f".{index_path.name}."))
+    try:
+        np.save(directory / "sequence.npy", sequence)
+        kmer_count = write_positions(sequence, k, directory)
+        with open(directory / INFO_FILE_NAME, "w") as file:
+            json.dump(dict(version=FORMAT_VERSION, k=k, sequences=len(records), bases=len(sequence) - len(records) - 1,
+                           kmers=kmer_count, fasta=get_fasta_info(fasta_path)), file)
+        if index_path.exists(): shutil.rmtree(index_path)
+        os.replace(directory, index_path)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return index_path
+
+def get_index_path(fasta_path: Path) -> Path:
+    return fasta_path.with_name(fasta_path.name + INDEX_SUFFIX)
+
+def is_fasta(path: Path) -> bool:
+    return path.suffix.lower() in FASTA_SUFFIXES
+
+class HomologyIndex:
+    def __init__(self, path: Path, info: dict, sequence: np.ndarray, offsets: np.ndarray, positions: np.ndarray):
+        """Use open instead"""
+        self.path = path
+        self.info = info
+        self.k = info["k"]
+        self.sequence = sequence
+        self.offsets = offsets
+        self.positions = positions
+
+    @staticmethod
+    def open(path: Path) -> HomologyIndex:
+        """Open a built index, memory-mapping its arrays"""
+        path = Path(path)
+        with open(path / INFO_FILE_NAME, "r") as file:
+            info = json.load(file)
+        if info.get("version") != FORMAT_VERSION: raise ValueError(f"{path} was built by another version, build it again")
+        return HomologyIndex(path, info, *(np.load(path / name, mmap_mode="r") for name in ("sequence.npy", "offsets.npy", "positions.npy")))
+
+    def get_diagonals(self, query: np.ndarray) -> np.ndarray:
+        """:return: the offsets in the sequence that the query's k-mers were found at, minus their offsets in the query"""
+        query_positions, codes = get_kmers(query, self.k)
+        hits = [np.asarray(self.positions[self.offsets[code]:self.offsets[code + 1]], dtype=np.int64) - position
+                for position, code in zip(query_positions, codes)]
+        return np.unique(np.concatenate(hits)) if hits else np.empty(0, dtype=np.int64)
+
+    def get_max_positives(self, probe: str) -> int:
+        """
+        :return: the most positives of the ungapped minus strand hits of a probe, besides ones across its whole length
+        (e.g. of its target). 0 if it has none
+        """
+        query = reverse_complement(encode(probe))
+        diagonals = self.get_diagonals(query)
+        max_positives = 0
+        for start in range(0, len(diagonals), DIAGONAL_CHUNK_SIZE):
+            positives = extend(self.sequence, query, diagonals[start:start + DIAGONAL_CHUNK_SIZE])
+            positives = positives[positives < len(query)]
+            if len(positives): max_positives = max(max_positives, int(positives.max()))
+        return max_positives
+
+def extend(sequence: np.ndarray, query: np.ndarray, diagonals: np.ndarray) -> np.ndarray:
+    """
+    Find the best scoring ungapped hit on each diagonal (at most the query's length, so it's scored all at once instead
+    of with blast's drop-off)
+    :return: the positives (matching bases) of each diagonal's hit
+    """
+    columns = diagonals[:, None] + np.arange(len(query))
+    in_range = (columns >= 0) & (columns < len(sequence))
+    subject = np.asarray(sequence[np.clip(columns, 0, len(sequence) - 1).ravel()]).reshape(columns.shape)
+    matches = in_range & (subject == query) & (subject < SEPARATOR)
+    scores = np.where(matches, MATCH_SCORE, MISMATCH_SCORE)
+    score, positives = np.zeros(len(diagonals), dtype=np.int64), np.zeros(len(diagonals), dtype=np.int64)
+    best_score, best_positives = np.zeros(len(diagonals), dtype=np.int64), np.zeros(len(diagonals), dtype=np.int64)
+    for column in range(len(query)): #maximum scoring segment, the shortest if there's a tie (like blast's extension)
+        restart = score <= 0
+        score = np.where(restart, 0, score) + scores[:, column]
+        positives = np.where(restart, 0, positives) + matches[:, column]
+        better = score > best_score
+        best_score, best_positives = np.where(better, score, best_score), np.where(better, positives, best_positives)
+    return best_positives
+
+def get_homology_results(probes: Iterable[str], index: HomologyIndex, progress=lambda done, total: None) -> DataFrame:
+    """
+    :param progress: called with the number of probes done so far and the total
+    :return: the Pick# (starting from 1) and Positives of each probe, like pinmol.get_blast_results. A probe without hits
+    has 0 positives
+    """
+    probes = list(probes)
+    rows = []
+    for pick, probe in enumerate(probes, start=1):
+        rows.append([pick, index.get_max_positives(probe), 0])
+        progress(pick, len(probes))
+    return DataFrame(rows, columns=RESULT_COLUMNS)
+
+def get_index(path: Path, k: int = DEFAULT_K, verbose: bool = False) -> HomologyIndex:
+    """
+    :param path: an index, or a FASTA file. The index of a FASTA file is built next to it unless it's already up to date
+    :return: the opened index
+    """
+    path = Path(path)
+    if not is_fasta(path): return HomologyIndex.open(path)
+    index_path = get_index_path(path)
+    try:
+        index = HomologyIndex.open(index_path)
+        if index.k == k and index.info["fasta"] == get_fasta_info(path): return index
+    except (OSError, ValueError, KeyError):
+        pass
+    if verbose: print(f"Building the k-mer index of {path.name}. It's kept in {index_path.name} for the next runs")
+    return HomologyIndex.open(build_index(path, index_path, k))
+
+def index_arg(string: str) -> Path:
+    path = Path(string).resolve()
+    if path.exists() and (is_fasta(path) or (path / INFO_FILE_NAME).exists()):
+        return path
+    raise argparse.ArgumentTypeError(f"Invalid index given. It must be an existing FASTA ({', '.join(FASTA_SUFFIXES)}) file, or a folder built by pinmol-homology-index")
+
+def parse_arguments(args: str | list, from_command_line = True) -> Namespace:
+    args = create_arg_parser().parse_args(args if isinstance(args, list) else shlex.split(args))
+    args.from_command_line = from_command_line
+    return args
+
+def run(args="", from_command_line = True):
+    arguments = parse_arguments(args, from_command_line=from_command_line)
+    index_path = build_index(arguments.file, arguments.output, arguments.k)
+    if not arguments.quiet:
+        info = HomologyIndex.open(index_path).info
+        print(f"Indexed {info['sequences']} sequences ({info['bases']} bases) in {index_path}. Use it with pinmol --homology-index {index_path}")
+    return index_path
+
+def create_arg_parser():
+    import functools
+    parser = argparse.ArgumentParser(
+        prog='PinMol homology index',
+        description="Build the k-mer index of a transcriptome FASTA file, for PinMol to find cross homology without blast.")
+    parser.add_argument("file", type=functools.partial(path_arg, suffix=FASTA_SUFFIXES), help="The FASTA file")
+    parser.add_argument("-o", "--output", type=Path, help=f"Where to build the index. Default is next to the FASTA file, as <file>{INDEX_SUFFIX}")
+    parser.add_argument("-k", type=int, default=DEFAULT_K, choices=range(4, 14), metavar="4-13",
+                        help=f"The k-mer (seed) length. Default is {DEFAULT_K}, blast's word size for PinMol")
+    parser.add_argument("-q", "--quiet", action="store_true")
+    return parser
+
+if __name__ == "__main__":
+    run_command_line(run, sys.argv[1:])
@@ -13,8 +13,6 @@ import pandas as pd
 from Bio.SeqUtils import MeltingTemp as mt
 import shlex
 from pathlib import Path
-from Bio.Blast import NCBIXML
-from Bio import Blast
 from pandas import DataFrame
 
 from ..RNAProbesUtil import ProgramObject, run_command_line
@@ -22,7 +20,10 @@ from ..util import (input_int_in_range, bounded_int, path_string, path_arg, remo
                     remove_files, validate_arg, validate_range_arg, parse_file_input, ValidationError, input_value,
                     input_path_string, input_path, email_arg, input_bool, input_email, input_value_set,
                     validate_doesnt_throw, value_set_arg, value_set_mapper, directory_arg)
-from ..RNAUtil import CT_to_sscount_df, RNAStructureWrapper
+from ..RNAUtil import CT_to_sscount_df, RNAStructureWrapper, CTStats
+from .. import runtime_model
+from . import beacon_svgs, homology_index
+from .constants import probeMin, probeMax, probesToSaveMin, probesToSaveMax, valid_blast_databases, exported_values
 
 undscr = ("->" * 40) + "\n"
 copyright_msg = (("\n" * 6) +
@@ -38,15 +39,8 @@ copyright_msg = (("\n" * 6) +
       "ensure they are not misused (e.g. use probes from a different target).\n" +
       undscr)
 
-probeMin = 18
-probeMax = 26
-probesToSaveMin = 2
-probesToSaveMax = 50
-valid_blast_databases = ["refseq_rna", "nr", "nt"]
-
-exported_values = {"probeMin": probeMin, "probeMax": probeMax, "probesToSaveMin": probesToSaveMin, "probesToSaveMax": probesToSaveMax, 'validBlastDatabases': valid_blast_databases}
-
 svg_dir_name = "[fname]_svg_files"
+OLIGOSCREEN_SHARD_SIZE = 250 #probes per oligoscreen run
 
 match = ["ENERGY", "dG"]  # find header rows in ct file
 
@@ -79,6 +73,7 @@ def validate_blast_arguments(arguments: Namespace, blast_file_stream: IO[bytes]
         validate_range_arg(arguments.tax_id, 1, MAX_TX_ID+1, overwrite_msg="Invalid txid", extra_predicate=lambda x: x== -1)
 
     validate_arg(not (bool(arguments.run_blast) and bool(arguments.blast_file)), "Cannot both run with blast and include a blast file")
+    validate_arg(not (arguments.homology_index and (arguments.run_blast or arguments.blast_file)), "Cannot use a homology index with blast")
 
 
 def calculate_result(filein: IO[str], probe_length: int, filename: str, arguments: Namespace, blast_file_stream: IO[bytes] = None, output_dir: Path = None):
@@ -86,22 +81,23 @@ def calculate_result(filein: IO[str], probe_length: int, filename: str, argument
     if blast_file_stream: arguments.blast_file = blast_file_stream
     program_object = ProgramObject(output, stem, arguments, file_name = filename, probe_length=probe_length)
     with filein as file:
-        sscount_df, structure_count = CT_to_sscount_df(file, True,  program_object.save_buffer(f"[fname]_sscount.csv"))
+        program_object.use_checkpoints("PinMol", [file], resume=arguments.resume)
+        sscount_df, structure_count = program_object.run_stage("ct_parse", lambda: CT_to_sscount_df(file, True,  program_object.save_buffer(f"[fname]_sscount.csv")))
+    program_object.ct_stats = CTStats(len(sscount_df), structure_count)
 
     # get probes within a slice with a %GC >? 30 and < 56
-    GC_probes = get_GC_probes(sscount_df, probe_length, structure_count, program_object=program_object)
-    read_oligosc = oligoscreen(GC_probes["Probe Sequence"], program_object)
+    GC_probes = program_object.run_stage("probe_selection", lambda: get_GC_probes(sscount_df, probe_length, structure_count, program_object=program_object))
     # new file with only sequences of probes for calculating free energies using oligoscreen
-    DG_probes = get_DG_probes(GC_probes, read_oligosc, program_object)
+    DG_probes = program_object.run_stage("oligoscreen", lambda: get_DG_probes(GC_probes, oligoscreen(GC_probes["Probe Sequence"], program_object), program_object))
 
     # write the fasta file containing the final sequences for blast
     save_to_fasta(DG_probes["Probe Sequence"], program_object)
-    DG_probes_sorted = try_use_blast(DG_probes, probe_length, program_object)
+    DG_probes_sorted = program_object.run_stage("blast", lambda: try_use_blast(DG_probes, probe_length, program_object))
 
-    
-    calculate_beacons(DG_probes_sorted[["Base Number", "Probe Sequence"]].copy(), probe_length, program_object)
+    program_object.run_stage("beacons", lambda: calculate_beacons(DG_probes_sorted[["Base Number", "Probe Sequence"]].copy(), probe_length, program_object))
 
     write_result_string(program_object, arguments=arguments)
+    runtime_model.record_run("PinMol", program_object)
     return program_object
 
 def parse_arguments(args: list | str, from_command_line = True):
@@ -121,10 +117,15 @@ def run(args: str | list="", from_command_line: bool = True):
                                                           msg=f"Enter the length of a probe; a number between {probeMin} and {probeMax} inclusive: ",
                                                           fail_message=f'You must type a number between {probeMin} and {probeMax}, try again: ')
 
-    calculate_result(open(file_name, "r"), probe_length, file_name, arguments)
+    program_object = calculate_result(open(file_name, "r"), probe_length, file_name, arguments)
+    program_object.remove_checkpoints()
 
     if should_print(arguments):
         print("\n" + "This information can be also be found in the file Final_molecular_beacons.txt" + "\n")
+        structures_path = program_object.file_path(f"{svg_dir_name}/[fname]{beacon_svgs.STRUCTURES_FILE_SUFFIX}")
+        if structures_path.exists():
+            print("\n" + f'Draw the SVG files of the selected probes with: python -m rnaprobes pinmol-svgs "{structures_path}"'
+                         "\n(or run with --render-svgs to draw them during the run)")
         print(
             "\n" + "Check the structure for the selected probes using your favorite browser by opening the corresponding SVG files!")
         print("\n" + "If no SVG files are found, increase the number of probes and/or target region!")
@@ -218,7 +219,13 @@ def seqProbes(sscount_df: DataFrame, probe_length: int, structure_count: int, st
     return df #put together all data as indicated in header
 
 def oligoscreen(probes: pd.Series, program_object: ProgramObject) -> DataFrame:
-    return RNAStructureWrapper.oligoscreen(probes, "[fname]", program_object.file_path)
+    #each probe is screened by itself, so running oligoscreen in shards gives the same result, with progress in between
+    shards = [probes[start:start + OLIGOSCREEN_SHARD_SIZE] for start in range(0, len(probes), OLIGOSCREEN_SHARD_SIZE)] or [probes]
+    results = []
+    for index, shard in enumerate(shards, start=1):
+        results.append(RNAStructureWrapper.oligoscreen(shard, "[fname]", program_object.file_path))
+        program_object.progress("oligoscreen", index, len(shards))
+    return pd.concat(results, ignore_index=True)
 
 
 def get_DG_probes(GC_probes: DataFrame, read_oligosc: DataFrame,  program_object: ProgramObject) -> DataFrame:  #how many probes should be retained; limited to range [2, 50]
@@ -263,14 +270,15 @@ def try_use_blast(DG_probes: DataFrame, probe_length: int, program_object: Progr
     arguments = program_object.arguments
     #todo: change blast workings
     blast_default = None if arguments.from_command_line else "n" #default value if not from cmd_line
-    cmd_line_blast = 'y' if arguments.blast_file or arguments.run_blast else None
+    cmd_line_blast = 'y' if arguments.blast_file or arguments.run_blast or arguments.homology_index else None
     program_object.set_result_args(blastm =
                                    cmd_line_blast or arguments.no_blast
                                      or ('y' if input_bool(msg='Do you want to use blast alignment information to determine cross homology? y/n: ', initial_value=blast_default) else "n"))
     return use_blast(DG_probes, probe_length, program_object) if program_object.get_result_arg("blastm") == "y" else DG_probes
 
 def use_blast(DG_probes: DataFrame, probe_length: int, program_object: ProgramObject) -> DataFrame:
-    blast_results = get_blast_results(DG_probes, probe_length, program_object)
+    blast_results = (get_homology_results(DG_probes, program_object) if program_object.arguments.homology_index
+                     else get_blast_results(DG_probes, probe_length, program_object))
 
     df_grouped = blast_results.groupby(['Pick#']).agg({'Positives': 'max'})
     df_grouped = df_grouped.reset_index()
@@ -309,6 +317,7 @@ def run_blast_prep(program_object: ProgramObject) -> IO[bytes]:
     return xml_file
 
 def run_blast(program_object: ProgramObject, email: str, database="refseq_rna", organism_id=None) -> bytes:
+    from Bio import Blast #imported here since it's slow to import and only needed when running blast
     Blast.email = email
     if should_print(program_object.arguments): print(f"Running blast with parameters: email={email}, database={database}, organism tax ID={organism_id}. This might take a while.")
     result_stream : HTTPResponse = Blast.qblast("blastn", database, program_object.get_result_arg("fasta_output"), megablast=False,
@@ -341,6 +350,7 @@ def get_blast_results(DG_probes: DataFrame, probe_length: int, program_object: P
     first_query = None
     temp_df = []
     query1 = []
+    from Bio.Blast import NCBIXML #imported here since it's slow to import and only needed with blast
     with get_blast_xml_file(program_object) as xml_file:
         records = NCBIXML.parse(xml_file)
         for record in records:
@@ -362,6 +372,14 @@ def get_blast_results(DG_probes: DataFrame, probe_length: int, program_object: P
     validate_xml_file(pick, first_query, last_query, DG_probes, program_object)
     return blast_results
 
+def get_homology_results(DG_probes: DataFrame, program_object: ProgramObject) -> DataFrame:
+    """Find the cross homology of the probes with a local k-mer index instead of blast (see homology_index)"""
+    index = homology_index.get_index(program_object.arguments.homology_index, verbose=should_print(program_object))
+    results = homology_index.get_homology_results(DG_probes["Probe Sequence"], index,
+                                                  progress=lambda done, total: program_object.progress("blast", done, total))
+    results.to_csv(program_object.save_buffer("[fname]_homology_hits.csv"), index=False)
+    return results
+
 def validate_xml_file(pick: int, first_query: str, last_query: str, DG_probes: DataFrame, program_object: ProgramObject):
     first_probe = DG_probes["Probe Sequence"][0].replace('U', 'T')
     last_probe = DG_probes["Probe Sequence"].iat[-1].replace('U', 'T')
@@ -376,10 +394,15 @@ def calculate_beacons(mb_pick: DataFrame, probe_length: int, program_object: Pro
     program_object.create_dir(svg_dir_name)  # make sure the directory exists
     initialize_molecular_beacon_file(program_object)
 
+    structures = dict() #of the svg files that aren't drawn yet, see beacon_svgs
     for i in range(len(mb_pick)):  # remove results that are highly structured
         beacon = design_beacon(mb_pick, i, probe_length, program_object)
-        has_svg = try_create_svg(i, program_object)
+        has_svg = try_create_svg(i, program_object, structures)
         save_beacon(i, mb_pick, beacon, program_object, has_svg=has_svg)
+        program_object.progress("beacons", i + 1, len(mb_pick))
+    if structures:
+        with program_object.open_buffer(f"{svg_dir_name}/[fname]{beacon_svgs.STRUCTURES_FILE_SUFFIX}") as file:
+            beacon_svgs.dump(structures, file)
 
 def initialize_molecular_beacon_file(program_object):
     if program_object.get_arg("overwrite"):
@@ -484,7 +507,12 @@ def itersplit_into_x_chunks(argum, chunksize, start=0, end=None): #split sequenc
     for pos in range(start, end-chunksize+1):
         yield argum[pos:pos+chunksize]
 
-def try_create_svg(index: int, program_object: ProgramObject) -> bool:
+def try_create_svg(index: int, program_object: ProgramObject, structures: dict[str, beacon_svgs.BeaconStructure]) -> bool:
+    """
+    Fold the beacon, and draw its svg file if it isn't too structured. Unless --render-svgs is given, its structure is
+    added to structures instead, to draw it later
+    :return: whether the beacon has an svg file
+    """
     seq_path, ct_path, svg_path = [f"{svg_dir_name}/[fname]_{str(index+1)}.seq", f"{svg_dir_name}/[fname]_{str(index+1)}.ct",
                                    f"{svg_dir_name}/[fname]_{str(index+1)}.svg"]
     RNAStructureWrapper.fold(seq_path, ct_path, program_object.file_path, remove_input=True)
@@ -495,10 +523,15 @@ def try_create_svg(index: int, program_object: ProgramObject) -> bool:
         no_bs = int(linesa[0][3:5])
         paired = int(linesa[1][23:26])
         create_svg = -7.2 <= egdraw <= -2.5 and no_bs == paired
+        if create_svg:
+            gin.seek(0)
+            structure = beacon_svgs.read_ct(gin)
 
-    if create_svg:
-        RNAStructureWrapper.draw(ct_path, svg_path, program_object.file_path, arguments="--svg -n 1")
+    if create_svg and program_object.get_arg("render_svgs"):
+        beacon_svgs.render_svg(structure, program_object.file_path(svg_path))
         program_object.register_file(svg_path, register_to_delete=True)
+    elif create_svg:
+        structures[Path(svg_path).name.replace("[fname]", program_object.file_stem)] = structure
     remove_files(ct_file)
 
     return create_svg
@@ -534,6 +567,11 @@ def create_arg_parser():
     parser.add_argument("-s", "--start", type=int, help="The start base to look for probs, min 1")
     parser.add_argument("-e", "--end", type=int,
                         help="The start base to look for probs, must be greater than start (use -1 for the entire sequence)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Resume a stopped run with the same file and arguments, skipping the stages it finished")
+    parser.add_argument("--render-svgs", action="store_true",
+                        help="Draw the svg file of every beacon during the run. Default is to save their structures, "
+                             "to draw later with: python -m rnaprobes pinmol-svgs <file>")
 
     arg_group = parser.add_argument_group('Blast Alignment',
                                           'Blast alignment command line settings. If none given, will ask')
@@ -545,6 +583,9 @@ def create_arg_parser():
                        help="Run blast using a pre-existing blast file")
     group.add_argument("-rb", "--run-blast", action="store_true",
                        help="Run blast during program (extra arguments are needed)")
+    group.add_argument("-hi", "--homology-index", type=homology_index.index_arg,
+                       help="Find cross homology locally instead of with blast, using a transcriptome FASTA file (indexed "
+                            "next to it on the first run) or an index built with: python -m rnaprobes pinmol-homology-index <file>")
 
     run_blast_group = arg_group.add_argument_group('Running blast', 'Command line arguments for running blast during the program.')
     run_blast_group.add_argument('--email', type=email_arg, help="Email to use with Blast (required by the NCBI guidelines)")
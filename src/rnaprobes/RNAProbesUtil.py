@@ -1,18 +1,22 @@
 # A collection of utility methods and classes specifically for this project
 from __future__ import annotations
 
+import os
 import shutil
 import sys
+import time
 import zipfile
 from argparse import Namespace
 from collections import namedtuple
 from collections.abc import Callable
+from contextlib import contextmanager
 from io import UnsupportedOperation
 from pathlib import Path
 import io
+from tempfile import SpooledTemporaryFile
 from typing import IO
 
-from . import util
+from . import util, checkpoints
 from .util import remove_if_exists, ValidationError, safe_remove_tree, is_empty
 
 
@@ -32,6 +36,111 @@ class UnclosableBytesIO(io.BytesIO):
         # Override close so it doesn't actually close the stream
         pass
 
+StageEvent = namedtuple("StageEvent", ["stage", "event", "elapsed", "done", "total"]) #event is started, progress or finished
+global_stage_listeners: list[Callable[[StageEvent], None]] = []
+
+@contextmanager
+def listen_to_stages(listener: Callable[[StageEvent], None]):
+    """
+    Notify the listener of the stages of every ProgramObject while in the with expression, e.g. to report the progress
+    of a job that creates its ProgramObject by itself
+    """
+    global_stage_listeners.append(listener)
+    try:
+        yield
+    finally:
+        global_stage_listeners.remove(listener)
+
+SPOOL_MAX_SIZE = int(os.environ.get("RNAPROBES_SPOOL_MAX_SIZE", 4 * 1024 * 1024)) #a buffer larger than this is moved to disk
+JOB_MEMORY_BUDGET = int(os.environ.get("RNAPROBES_JOB_MEMORY_BUDGET", 16 * 1024 * 1024)) #the most a job's buffers keep in memory
+
+class MemoryBudget:
+    """Keeps the total in-memory size of a job's buffers under a limit by moving the largest buffers to disk"""
+    def __init__(self, limit: int = JOB_MEMORY_BUDGET):
+        self.limit = limit
+        self.buffers: list[SpooledBuffer] = []
+        self.total = 0 #the sum of the in-memory sizes of the buffers, updated as they're written
+
+    def add(self, buffer: SpooledBuffer):
+        self.buffers.append(buffer)
+
+    def in_memory_size(self) -> int:
+        return self.total
+
+    def count(self, size: int):
+        """Count size more in memory, moving buffers to disk if the limit is now exceeded"""
+        self.total += size
+        if self.total > self.limit: self.enforce()
+
+    def release(self, size: int):
+        self.total -= size
+
+    def enforce(self):
+        in_memory = [buffer for buffer in self.buffers if not buffer.is_on_disk()]
+        for buffer in sorted(in_memory, key=SpooledBuffer.in_memory_size, reverse=True):
+            if self.total <= self.limit: break
+            buffer.rollover() #releases its size
+
+class SpooledBuffer(SpooledTemporaryFile):
+    """
+    A buffer kept in memory until it's larger than max_size or its job's memory budget is used up, then moved to a
+    temporary file. Closing it does nothing, so it can be used in a with expression and still be zipped afterward.
+    Use dispose to actually close it
+    """
+    def __init__(self, is_string: bool = True, max_size: int = SPOOL_MAX_SIZE, budget: MemoryBudget = None):
+        text_args = dict(encoding="utf-8", newline="") if is_string else dict() #newline="" writes newlines as given, like StringIO
+        super().__init__(max_size=max_size, mode="w+" if is_string else "w+b", **text_args)
+        self.budget, self.max_size = budget, max_size
+        self.size = 0 #what was written while in memory, the position can't tell it once the buffer is read or rewound
+        self.on_disk = False
+        if budget is not None: budget.add(self)
+
+    def write(self, s):
+        written = super().write(s)
+        self.count(len(s))
+        return written
+
+    def writelines(self, iterable):
+        for line in iterable: self.write(line)
+
+    def count(self, size: int):
+        if self.on_disk: return
+        self.size += size
+        if self.budget is not None: self.budget.count(size)
+        if self.size > self.max_size: self.rollover()
+
+    def rollover(self):
+        if not self.on_disk: self.release()
+        super().rollover()
+        self.on_disk = True
+
+    def release(self):
+        """Stop counting the buffer's size against its budget"""
+        if self.budget is not None: self.budget.release(self.size)
+        self.size = 0
+
+    def is_on_disk(self) -> bool:
+        return self.on_disk
+
+    def in_memory_size(self) -> int:
+        return self.size
+
+    def reset(self):
+        self.seek(0)
+        self.truncate()
+        if not self.on_disk: self.release()
+
+    def close(self):
+        pass
+
+    def __exit__(self, exc, value, tb):
+        pass
+
+    def dispose(self):
+        """Close the buffer, removing its temporary file if it was moved to disk"""
+        if not self.on_disk: self.release()
+        super().close()
+
 class FileManager:
     def __init__(self, output_dir: Path):
         self.output_dir = output_dir
@@ -73,6 +182,12 @@ class ProgramObject:
         self.file_stem = file_stem
         self.arguments = arguments
         self.file_manager = FileManager(output_dir)
+        self.ct_stats = None
+        self.stage_times = dict()
+        self.stage_listeners = []
+        self._stage_starts = dict()
+        self.checkpoints: checkpoints.Checkpoints | None = None
+        self.resumed_stages = [] #loaded from their checkpoints instead of ran
         if output_dir is not None: output_dir.mkdir(parents=True, exist_ok=True)
 
     def save_buffer(self, rel_path: str, register_to_delete=True):
@@ -131,6 +246,78 @@ class ProgramObject:
         for argument, value in kwargs.items():
             setattr(self.arguments, argument, value)
 
+    def add_stage_listener(self, listener: Callable[[StageEvent], None]):
+        """
+        Add a listener that is notified whenever a stage starts, progresses or finishes
+        :param listener: called with a StageEvent. done and total are only set for progress events
+        """
+        self.stage_listeners.append(listener)
+        return self
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Time a stage of the program. Use in a with expression around the stage's code
+        :param name: the name of the stage (e.g. oligowalk). Repeated stages are summed
+        """
+        self._notify_stage(name, "started", 0)
+        start = self._stage_starts[name] = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stage_times[name] = self.stage_times.get(name, 0) + elapsed
+            self._notify_stage(name, "finished", elapsed)
+
+    def use_checkpoints(self, program: str, inputs: list, resume: bool = False, **values):
+        """
+        Save a checkpoint after each stage ran with run_stage (see checkpoints). Does nothing if checkpoints are disabled
+        :param inputs: the input files (paths or streams), fingerprinted with the arguments and the initial result arguments
+        :param resume: load the stages that a previous run with the same inputs finished, instead of running them
+        :param values: other values that change the result
+        """
+        if not checkpoints.CHECKPOINTS_ENABLED or self.output_dir is None: return self
+        fingerprint = checkpoints.get_fingerprint(program, self.arguments, inputs, **vars(self.result_obj), **values)
+        self.checkpoints = checkpoints.Checkpoints.open(self.file_path(checkpoints.DIRECTORY_NAME), fingerprint, resume)
+        return self
+
+    def run_stage(self, name: str, compute: Callable[[], any]):
+        """
+        Run a stage (timed like stage) and save its result, and the result arguments it set, as a checkpoint. If the
+        stage has a valid checkpoint, it's loaded instead. The files the stage wrote are expected to be left from then
+        :param compute: runs the stage, returning its result (which must be picklable)
+        :return: the stage's result
+        """
+        if self.checkpoints is not None:
+            found, value, result_args = self.checkpoints.load(name)
+            if found:
+                self.set_result_args(**result_args)
+                self.resumed_stages.append(name)
+                self._notify_stage(name, "started", 0)
+                self._notify_stage(name, "finished", 0)
+                return value
+        with self.stage(name):
+            value = compute()
+        if self.checkpoints is not None: self.checkpoints.save(name, value, vars(self.result_obj))
+        return value
+
+    def remove_checkpoints(self):
+        """Remove the checkpoints once the result is saved"""
+        if self.checkpoints is not None: self.checkpoints.remove()
+
+    def progress(self, name: str, done: int, total: int):
+        """
+        Report how far along a stage is, e.g. after each of its items
+        :param done: how many items are done, out of total
+        """
+        now = time.perf_counter()
+        self._notify_stage(name, "progress", now - self._stage_starts.get(name, now), done, total)
+
+    def _notify_stage(self, name: str, event: str, elapsed: float, done: int = None, total: int = None):
+        stage_event = StageEvent(name, event, elapsed, done, total)
+        for listener in self.stage_listeners + global_stage_listeners:
+            listener(stage_event)
+
     def get_result_arg(self, argument):
         return getattr(self.result_obj, argument)
 
@@ -138,8 +325,19 @@ class ProgramObject:
         for argument, value in kwargs.items():
             setattr(self.result_obj, argument, value)
     def to_zip(self, name) -> tuple[bytes, str]:
-        archive_name = name.replace("[fname]", self.file_stem)
-        return util.get_folder_as_zip(self.output_dir), archive_name
+        zip_buffer = io.BytesIO()
+        archive_name = self.write_zip(zip_buffer, name)
+        return zip_buffer.getvalue(), archive_name
+
+    def write_zip(self, file: IO[bytes] | Path, name: str) -> str:
+        """
+        Write the result as a zip, one file at a time, without building the whole archive in memory
+        :param file: the path or the binary file object to write the zip to
+        :param name: the name of the archive. Replaces [fname] with the file stem
+        :return: the name of the archive
+        """
+        util.write_folder_to_zip(self.output_dir, file, skip_directories=[self.file_path(checkpoints.DIRECTORY_NAME)])
+        return name.replace("[fname]", self.file_stem)
 
     def validate(self, boolean: bool, msg: str):
         if not boolean:
@@ -161,18 +359,21 @@ class ProgramObject:
 
 #todo: prevent collision in file_dict and buffer_dict
 class BufferedProgramObject(ProgramObject):
-    def __init__(self, output_dir: Path, file_stem: str, arguments: Namespace, **kwargs):
+    def __init__(self, output_dir: Path, file_stem: str, arguments: Namespace, memory_budget: int = JOB_MEMORY_BUDGET, **kwargs):
         ProgramObject.__init__(self, output_dir, file_stem, arguments, **kwargs)
-        self.buffer_dict = dict()
+        self.buffer_dict: dict[Path, SpooledBuffer] = dict()
+        self.memory_budget = MemoryBudget(memory_budget)
     def save_buffer(self, rel_path: str, is_string: bool = True):
         """
-        Returns a string buffer to use to store files
+        Returns a buffer to use to store files. It's kept in memory until it (or all of this job's buffers) gets too large
         :param rel_path: the relative path to store files in. Replaces [fname] with the file stem
-        :param is_string: True if using StringIO, false for BytesIO
+        :param is_string: True for a text buffer, false for a binary buffer
         :return:
         """
         path = Path(self.format_relative_path(rel_path))
-        return self.buffer_dict.setdefault(path, UnclosableStringIO() if is_string else UnclosableBytesIO()) #test
+        if path not in self.buffer_dict:
+            self.buffer_dict[path] = SpooledBuffer(is_string, budget=self.memory_budget)
+        return self.buffer_dict[path]
 
     def open_buffer(self, rel_path: str, mode = "w", register_to_delete=True):
         """
@@ -188,11 +389,17 @@ class BufferedProgramObject(ProgramObject):
 
     def reset_buffer(self, rel_path: str):
         path = self.format_relative_path(rel_path)
-        if path in self.buffer_dict:
-            self.buffer_dict[path].reset()
+        if Path(path) in self.buffer_dict:
+            self.buffer_dict[Path(path)].reset()
         if path in self.file_manager.get_files():
             super().reset_buffer(rel_path)
 
+    def cleanup(self):
+        super().cleanup()
+        for buffer in self.buffer_dict.values():
+            buffer.dispose()
+        self.buffer_dict.clear()
+
     # def register_file(self, rel_path: str, true_path:  Path = None, is_directory=False, register_to_delete=True):
 
     def file_path(self, rel_path: str, register=False, register_to_delete=False, is_directory=False):
@@ -208,16 +415,26 @@ class BufferedProgramObject(ProgramObject):
             raise UnsupportedOperation("Can't get a file path if output_dir is None")
         return super().file_path(rel_path, register=register, is_directory=is_directory, register_to_delete=register_to_delete)
 
-    def to_zip(self, name) -> tuple[bytes, str]:
-        archive_name = name.replace("[fname]", self.file_stem)
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zipf:
+    def write_zip(self, file: IO[bytes] | Path, name: str) -> str:
+        with zipfile.ZipFile(file, 'w', zipfile.ZIP_DEFLATED) as zipf:
             for path, content in self.buffer_dict.items():
-                zipf.writestr(zinfo_or_arcname=str(path), data=content.getvalue())
+                with zipf.open(str(path), "w") as entry:
+                    write_buffer_in_chunks(content, entry)
             for path, abs_path in self.file_manager.get_files().items():
-                zipf.write(filename=abs_path, arcname=path.path)
-        zip_buffer.seek(0)
-        return zip_buffer.getvalue(), archive_name
+                zipf.write(filename=abs_path, arcname=path)
+        return name.replace("[fname]", self.file_stem)
+
+ZIP_CHUNK_SIZE = 1024 * 1024
+
+def write_buffer_in_chunks(buffer: IO, file: IO[bytes], chunk_size: int = ZIP_CHUNK_SIZE):
+    """
+    Copy a buffer's content to a binary file without copying the whole content at once. The buffer's position is kept
+    """
+    position = buffer.tell()
+    buffer.seek(0)
+    while chunk := buffer.read(chunk_size):
+        file.write(chunk.encode() if isinstance(chunk, str) else chunk)
+    buffer.seek(position)
 
 if __name__ == "__main__":
     print("test")
\ No newline at end of file
@@ -1,12 +1,18 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import os
+import pickle
 import platform
 import shlex
 import subprocess
+import time
 from argparse import ArgumentError
+from collections import namedtuple
 from collections.abc import Callable
+from contextlib import contextmanager
+from contextvars import ContextVar
 from os import PathLike
 from platform import architecture
 
@@ -17,15 +23,59 @@ from typing import IO
 
 from pandas._typing import WriteBuffer
 
+from . import util
 from .util import remove_files, ValidationError, read_lines_reversed
 
 match = ["ENERGY", "dG"] #find header rows in ct file
+#see share_parsed_ct. A context variable, so each thread (e.g. concurrent requests) has its own
+parsed_ct_directory: ContextVar[Path | None] = ContextVar("parsed_ct_directory", default=None)
+
+@contextmanager
+def share_parsed_ct(directory: Path):
+    """
+    While in the with expression, CT_to_sscount_df keeps what it parsed in the directory (keyed by the ct file's content)
+    and reuses it for the same ct file, e.g. for several programs ran on one file, even in different processes
+    """
+    token = parsed_ct_directory.set(Path(directory))
+    try:
+        yield
+    finally:
+        parsed_ct_directory.reset(token)
 
 def CT_to_sscount_df(file: IO[str], save_to_file: bool = None, output_file: Path = None) -> tuple[DataFrame, int]:
+    directory = parsed_ct_directory.get()
+    cache_path = get_parsed_ct_path(file, directory) if directory is not None else None
+    if cache_path is not None and cache_path.exists():
+        try:
+            with open(cache_path, "rb") as cache_file:
+                sscount_df, structure_count = pickle.load(cache_file)
+            if save_to_file: sscount_df.to_csv(output_file, index=False, header=False)
+            return sscount_df, structure_count
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            pass #parse it again
     ct_df, structure_count = convert_ct_to_dataframe(file)
     sscount_df = getSSCountDF(ct_df, save_to_file, output_file)
+    if cache_path is not None: save_parsed_ct(cache_path, (sscount_df, structure_count))
     return sscount_df, structure_count
 
+def get_parsed_ct_path(file: IO[str], directory: Path) -> Path:
+    file.seek(0)
+    content = file.read()
+    file.seek(0)
+    digest = hashlib.sha256(content.encode() if isinstance(content, str) else content).hexdigest()
+    return directory / f"{digest}.pickle"
+
+def save_parsed_ct(path: Path, parsed: tuple[DataFrame, int]):
+    """Best effort: the file only gets its name once it's complete, so other processes never read a partial one"""
+    try:
+        path.parent.mkdir(exist_ok=True) #not its parents, which are gone if they expired
+        partial_path = path.with_suffix(f".{os.getpid()}.partial")
+        with open(partial_path, "wb") as cache_file:
+            pickle.dump(parsed, cache_file)
+        os.replace(partial_path, path)
+    except OSError:
+        pass
+
 def convert_ct_to_dataframe(file: IO[str]) -> tuple[DataFrame, int]:
     """
         Convert the ct file to a dataframe. This also gives the number of structures in the ct file.
@@ -76,6 +126,79 @@ def get_ct_nucleotide_length(file: str | Path) -> int:
             except ValueError:
                 pass #try next line, for newlines
 
+CTStats = namedtuple("CTStats", ["nucleotide_length", "structure_count"])
+def get_ct_stats(file: str | Path | IO) -> CTStats:
+    """
+    Get the nucleotide length and the structure count of a ct file in a single pass, without parsing it into a dataframe
+    :param file: the path of the ct file, or a (seekable) file object. A file object is returned to the start when done
+    :return: CTStats(nucleotide_length, structure_count)
+    """
+    if not isinstance(file, (str, PathLike)):
+        try:
+            return _read_ct_stats(file)
+        finally:
+            file.seek(0)
+    with open(file, 'rb') as f:
+        return _read_ct_stats(f)
+
+def _read_ct_stats(file: IO) -> CTStats:
+    scanner = CTScanner()
+    while chunk := file.read(CT_SCAN_CHUNK_SIZE):
+        scanner.feed(chunk)
+    return scanner.get_stats()
+
+CT_SCAN_CHUNK_SIZE = 1024 * 1024
+_header_words = [word.encode() for word in match]
+class CTScanner:
+    """
+    Measures a ct file that is read in chunks (e.g. while it's uploaded), so it doesn't have to be read again: its
+    nucleotide length and structure count, and the first line that can't be part of a ct file
+    """
+    def __init__(self):
+        self.structure_count = 0
+        self.nucleotide_length = None
+        self.invalid_line = None #the number of the first malformed line, if any
+        self._line_number = 0
+        self._rest = b""
+
+    def feed(self, chunk: bytes | str):
+        lines = (self._rest + (chunk.encode() if isinstance(chunk, str) else chunk)).split(b"\n")
+        self._rest = lines.pop()
+        for line in lines:
+            self._read_line(line)
+
+    def _read_line(self, line: bytes):
+        self._line_number += 1
+        parts = line.split(None, 5)
+        if len(parts) < 2: return
+        if parts[1] in _header_words:
+            self.structure_count += 1
+        elif parts[0].isdigit():
+            self.nucleotide_length = int(parts[0])
+            if len(parts) < 6 or not parts[4].isdigit(): self._set_invalid() #index, base, previous, next, pair, natural index
+        elif self._line_number > 1: #the first line is always a header
+            self._set_invalid()
+
+    def _set_invalid(self):
+        if self.invalid_line is None: self.invalid_line = self._line_number
+
+    def finish(self):
+        """Read the last line, if the file doesn't end with a newline"""
+        if self._rest: self._read_line(self._rest)
+        self._rest = b""
+
+    def get_stats(self) -> CTStats:
+        """:raises ValidationError: if the file has no structure or nucleotide"""
+        self.finish()
+        if self.nucleotide_length is None or self.structure_count == 0: raise ValidationError("Can't parse the CT file. Is the CT file invalid?")
+        return CTStats(self.nucleotide_length, self.structure_count)
+
+    def validate(self) -> CTStats:
+        """:raises ValidationError: if the file has no structure or nucleotide, or a malformed line"""
+        stats = self.get_stats()
+        if self.invalid_line is not None: raise ValidationError(f"Can't parse line {self.invalid_line} of the CT file. Is the CT file invalid?")
+        return stats
+
 def _map_all(path_mapper: Callable[[str], Path | str], *files: str | Path) -> tuple[Path | str, ...]:
     return tuple((path_mapper(file) if isinstance(file, str) else file) for file in files)
 
@@ -110,7 +233,9 @@ def _run_program(program, files_in: list | str | Path, file_out: str | Path, arg
     files_in = files_in if isinstance(files_in, list) else [files_in]
     try:
         program_path = get_program(program)
+        start = time.perf_counter()
         subprocess.check_output([program_path, *files_in, file_out, *shlex.split(arguments)])
+        for listener in util.subprocess_listeners: listener(program, time.perf_counter() - start)
         return file_out
     except subprocess.CalledProcessError as e:
         print("SUBPROCESS ERROR:")
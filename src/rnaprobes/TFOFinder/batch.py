@@ -0,0 +1,124 @@
+# Run TFOFinder over many ct files at once, spreading the files across worker processes
+from __future__ import annotations
+
+import argparse
+import os
+import shlex
+import sys
+import time
+from argparse import Namespace
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from pandas import DataFrame
+
+from ..RNAProbesUtil import run_command_line
+from ..util import DiscontinuousRange, validate_arg, directory_arg, parse_file_input
+from . import tfofinder
+
+SUMMARY_FILE_NAME = "TFO_batch_summary.csv"
+SUMMARY_COLUMNS = ["File", "Nucleotides", "Structures", "Probes", "Seconds", "Error"]
+
+def get_ct_files(directory: Path = None, manifest: Path = None) -> list[Path]:
+    """
+    Get the ct files to run on
+    :param directory: a directory to search (recursively) for .ct files
+    :param manifest: a text file with the path of one ct file per line. Relative paths are relative to the manifest
+    :return: the resolved paths of the ct files, in a stable order
+    """
+    if directory is not None:
+        return sorted(path.resolve() for path in Path(directory).rglob("*.ct"))
+    with open(manifest, "r") as file:
+        lines = (line.strip() for line in file)
+        return [(Path(manifest).parent / line).resolve() for line in lines if line and not line.startswith("#")]
+
+def validate_ct_files(files: list[Path], output_dir: Path = None):
+    validate_arg(len(files) > 0, "No ct files were found")
+    missing = [str(file) for file in files if not file.exists() or file.suffix != ".ct"]
+    validate_arg(not missing, "These files don't exist or are not .ct files: " + ", ".join(missing))
+    if output_dir is not None:
+        stems = [file.stem for file in files]
+        duplicates = sorted({stem for stem in stems if stems.count(stem) > 1})
+        validate_arg(not duplicates, "Multiple ct files share a name, so their results would overwrite each other in the output directory: " + ", ".join(duplicates))
+
+def run_file(file: Path, probe_lengths: DiscontinuousRange, output_dir: Path = None) -> dict:
+    """
+    Run TFOFinder on a single file. Ran inside a worker process, so it never throws
+    :return: a row of the summary table
+    """
+    start = time.perf_counter()
+    row = dict(File=str(file), Nucleotides=None, Structures=None, Probes=None, Error="")
+    try:
+        arguments = tfofinder.parse_arguments("-q -w", from_command_line=True)
+        with open(file, "r") as filein:
+            program_object = tfofinder.calculate_result(filein, probe_lengths, filename=str(file), arguments=arguments,
+                                                        output_dir=parse_file_input(file, output_dir).parent)
+        row.update(Nucleotides=program_object.ct_stats.nucleotide_length, Structures=program_object.ct_stats.structure_count,
+                   Probes=program_object.result_obj.probe_count)
+    except Exception as e:
+        row["Error"] = str(e) or type(e).__name__
+    row["Seconds"] = round(time.perf_counter() - start, 3)
+    return row
+
+def calculate_batch(files: list[Path], probe_lengths: DiscontinuousRange, output_dir: Path = None, workers: int = None,
+                    print_progress: bool = False) -> DataFrame:
+    """
+    Run TFOFinder on every file using a pool of worker processes
+    :param workers: the number of worker processes. Defaults to the cpu count
+    :return: the summary table, in the same order as files
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, len(files)))
+    rows = dict()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run_file, file, probe_lengths, output_dir): file for file in files}
+        for finished, future in enumerate(as_completed(futures), start=1):
+            rows[futures[future]] = future.result()
+            if print_progress: print(f"[{finished}/{len(files)}] {futures[future].name}" + (f" failed: {rows[futures[future]]['Error']}" if rows[futures[future]]["Error"] else ""))
+    summary = DataFrame([rows[file] for file in files], columns=SUMMARY_COLUMNS)
+    return summary.astype(dict(Nucleotides="Int64", Structures="Int64", Probes="Int64")) #keep counts integers even with failed files
+
+def get_throughput_string(summary: DataFrame, elapsed: float) -> str:
+    succeeded = summary[summary.Error == ""]
+    nucleotides = int(succeeded.Nucleotides.sum()) if len(succeeded) else 0
+    return (f"Processed {len(succeeded)} of {len(summary)} files ({nucleotides} nucleotides) in {elapsed:.2f} seconds: "
+            f"{len(succeeded) / elapsed:.2f} files/s, {nucleotides / elapsed:.0f} nt/s")
+
+def parse_arguments(args: str | list, from_command_line = True) -> Namespace:
+    args = create_arg_parser().parse_args(args if isinstance(args, list) else shlex.split(args))
+    args.from_command_line = from_command_line
+    return args
+
+def run(args="", from_command_line = True):
+    arguments = parse_arguments(args, from_command_line=from_command_line)
+    files = get_ct_files(arguments.directory, arguments.manifest)
+    validate_ct_files(files, arguments.output_dir)
+
+    start = time.perf_counter()
+    summary = calculate_batch(files, arguments.probe_length, arguments.output_dir, arguments.workers, print_progress=not arguments.quiet)
+    elapsed = time.perf_counter() - start
+
+    summary_path = (arguments.output_dir or Path(os.getcwd())) / SUMMARY_FILE_NAME
+    summary.to_csv(summary_path, index=False)
+    if not arguments.quiet:
+        print(get_throughput_string(summary, elapsed))
+        print(f"Find the summary in {summary_path}")
+    return summary
+
+def create_arg_parser():
+    parser = argparse.ArgumentParser(
+        prog='TFOFinder batch',
+        description='Run TFOFinder on many ct files at once, using multiple processes.')
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("-d", "--directory", type=Path, help="A directory to search (recursively) for .ct files")
+    group.add_argument("-m", "--manifest", type=Path, help="A text file listing one ct file path per line")
+    parser.add_argument("-p", "--probe-length", required=True, type=DiscontinuousRange.template(tfofinder.probeMin, tfofinder.probeMax+1, True),
+                        metavar=f"[{tfofinder.probeMin}-{tfofinder.probeMax}]",
+                        help=f'The length range of TFO probes, {tfofinder.probeMin}-{tfofinder.probeMax} inclusive')
+    parser.add_argument("-o", "--output-dir", type=directory_arg,
+                        help="Where to save the results. Default is next to each ct file (the summary goes in the working directory)")
+    parser.add_argument("-j", "--workers", type=int, help="The number of worker processes. Default is the cpu count")
+    parser.add_argument("-q", "--quiet", action="store_true")
+    return parser
+
+if __name__ == "__main__":
+    run_command_line(run, sys.argv[1:])
@@ -0,0 +1,5 @@
+# TFOFinder's limits, which the web app shows in its forms. Kept apart from tfofinder.py so reading them doesn't import numpy, pandas or Biopython
+
+probeMin = 4
+probeMax = 30 #inclusive
+exported_values = {"probeMin": probeMin, "probeMax": probeMax}
@@ -1,12 +1,15 @@
 from __future__ import annotations
 
 import argparse
+import functools
 import shlex
 import sys
-from collections.abc import Iterable
+from collections import namedtuple
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 from typing import IO
 
+import numpy as np
 from Bio.SeqUtils import MeltingTemp as mt
 from pandas import DataFrame
 
@@ -14,7 +17,9 @@ from ..RNAProbesUtil import BufferedProgramObject, ProgramObject, run_command_li
 from ..util import (path_string, validate_arg, parse_file_input,
                     DiscontinuousRange, input_range, validate_doesnt_throw, input_path, input_path_string, path_arg,
                     directory_arg)
-from ..RNAUtil import CT_to_sscount_df
+from ..RNAUtil import CT_to_sscount_df, CTStats
+from .. import runtime_model
+from .constants import probeMin, probeMax, exported_values
 
 undscr = ("->" * 40)
 copyright_msg = ("\n" * 5) + (" \x1B[3m TFOFinder\x1B[0m  Copyright (C) 2025 Avi Kohn, 2022  Irina E. Catrina\n"
@@ -28,9 +33,8 @@ copyright_msg = ("\n" * 5) + (" \x1B[3m TFOFinder\x1B[0m  Copyright (C) 2025 Avi
       "different location than the current input file, or rename them.\n\n"
       f"{undscr}")
 
-probeMin = 4
-probeMax = 30 #inclusive
-exported_values = {"probeMin": probeMin, "probeMax": probeMax}
+CHUNK_LINE_COUNT = 1000 #probe lines per chunk written to the result file
+VERBOSE_LINE_LIMIT = 50 #lines of the result echoed to the console in verbose mode
 
 
 base_complement = str.maketrans({'A': 'U', 'C': 'G', 'G': 'C', 'U': 'A'})
@@ -56,17 +60,23 @@ def calculate_result(filein: IO[str], probe_lengths: DiscontinuousRange, filenam
 
     fname = parse_file_input(filename).stem
     program_object = get_program_object(fname, arguments, output_dir)
-    sscount_df, structure_count = CT_to_sscount_df(filein, True, program_object.save_buffer("[fname]_sscount.csv"))
+    with program_object.stage("ct_parse"):
+        sscount_df, structure_count = CT_to_sscount_df(filein, True, program_object.save_buffer("[fname]_sscount.csv"))
+    program_object.ct_stats = CTStats(len(sscount_df), structure_count)
     #todo: ask if can get rid of this and place before
 
     if should_print(arguments): print('Number of Structures = ' + str(structure_count) + ' \n\n...Please wait...\n')
     #temp
-    all_probes_by_length = get_consecutive_not_ss(probe_lengths, sscount_df)
-    program_object.set_result_args(final_result=get_final_string(filename, probe_lengths, structure_count, all_probes_by_length, sscount_df))
-
-    # todo: ask if should add extra newline at end (trivial issue)
-    with program_object.open_buffer(f"[fname]_TFO_probes.txt", "w" if arguments.overwrite else 'a') as buffer:
-        buffer.write(program_object.result_obj.final_result)
+    with program_object.stage("probe_search"):
+        all_probes_by_length = list(get_consecutive_not_ss(probe_lengths, sscount_df))
+        program_object.set_result_args(probe_count=sum(len(starts) for _, starts in all_probes_by_length))
+        chunks = get_final_chunks(filename, probe_lengths, structure_count, all_probes_by_length, sscount_df)
+
+        # todo: ask if should add extra newline at end (trivial issue)
+        with program_object.open_buffer(f"[fname]_TFO_probes.txt", "w" if arguments.overwrite else 'a') as buffer:
+            preview, line_count = write_chunks(buffer, chunks, VERBOSE_LINE_LIMIT if should_print(arguments, is_content_verbose=True) else 0)
+        program_object.set_result_args(result_preview=preview, result_line_count=line_count)
+    runtime_model.record_run("TFOFinder", program_object)
     return program_object
 
 def parse_arguments(args: str | list, from_command_line = True):
@@ -98,7 +108,9 @@ def run(args="", from_command_line = True):
 
     if should_print(arguments, is_content_verbose=True):
         from textwrap import indent
-        print("Results: \n" + indent(program_object.result_obj.final_result, " " * 4))
+        hidden_lines = program_object.result_obj.result_line_count - VERBOSE_LINE_LIMIT
+        print("Results: \n" + indent(program_object.result_obj.result_preview, " " * 4) +
+              (f"    ... {hidden_lines} more line(s) in the result file" if hidden_lines > 0 else ""))
     if should_print(arguments):
         print("Calculation complete. Find the result in " + str(mb_userpath / f"{fname}_TFO_probes.txt"))
 
@@ -115,26 +127,69 @@ def get_program_object(file_stem, arguments, output_dir=None):
 def should_print(arguments, is_content_verbose = False):
     return arguments and arguments.from_command_line and not arguments.quiet and (not is_content_verbose or arguments.verbose)
 
-def get_consecutive_not_ss(probe_lengths: DiscontinuousRange, sscount_df : DataFrame) -> Iterable[tuple[int, DataFrame]]:
+def get_consecutive_not_ss(probe_lengths: DiscontinuousRange, sscount_df : DataFrame) -> Iterable[tuple[int, np.ndarray]]:
+    """
+    Find the start of every probe for every length in one pass: a probe can start wherever the run of double stranded
+    purines (A or G) starting at that base is at least as long as the probe
+    :return: (length, indices of the probe starts) for each length, from the longest length to the shortest
+    """
     # get the double stranded elements with bse A or G
-    dscount = sscount_df.loc[(sscount_df.base.isin(["A", "G"]) & (sscount_df.sscount != 20))]
-    dscount = dscount.drop('sscount', axis=1)
-
-    # get the first element of a 9 length probe
-    consec = dscount.loc[dscount.baseno.diff(-1) == -1]  # and the one after
-    return ((length, consec.loc[consec.baseno.diff(-(length - 2)) == -(length - 2)]) for length in reversed(probe_lengths))
-
+    ds_purines = (sscount_df.base.isin(["A", "G"]) & (sscount_df.sscount != 20)).to_numpy()
+    run_lengths = get_run_lengths(ds_purines)
+    return ((length, np.flatnonzero(run_lengths >= length)) for length in reversed(probe_lengths))
 
+def get_run_lengths(mask: np.ndarray) -> np.ndarray:
+    """
+    Run-length encode a boolean mask
+    :return: for each position, the number of consecutive True values starting at that position (0 if it's False)
+    """
+    padded = np.concatenate(([False], mask, [False]))
+    changes = np.flatnonzero(padded[1:] != padded[:-1])
+    starts, ends = changes[::2], changes[1::2]
+    run_lengths = np.zeros(len(mask), dtype=np.int64)
+    run_lengths[mask] = np.repeat(ends, ends - starts) - np.flatnonzero(mask)
+    return run_lengths
+
+ProbeSums = namedtuple("ProbeSums", ["bases", "basenos", "purines", "sscounts"])
+def get_probe_sums(sscount_df: DataFrame) -> ProbeSums:
+    """
+    Get the prefix sums needed to calculate the metrics of any probe in constant time
+    """
+    prefix_sum = lambda values: np.concatenate(([0], np.cumsum(values, dtype=np.int64)))
+    return ProbeSums("".join(sscount_df.base), sscount_df.baseno.to_numpy(),
+                     prefix_sum(sscount_df.base.isin(["A", "G"]).to_numpy()), prefix_sum(sscount_df.sscount.to_numpy()))
 
-def get_final_string(file_name : str, probe_lengths: DiscontinuousRange, structure_count: int, consec: Iterable[tuple[int, DataFrame]], sscount_df):
-    to_return = 'Results for ' + file_name + ' using ' + str(probe_lengths) + ' as parallel TFO probe length(s)\n' + \
-                'Start Position,%GA,sscount,Parallel TFO Probe Sequence,Tm,Probe Length\n'
-    to_return += "\n".join((get_final_string_section(structure_count, df, length, sscount_df) for length, df in consec if len(df) != 0))
-    return to_return + "\n"
-
-def get_final_string_section(structure_count: int, consec: DataFrame, probe_length: int, sscount_df):
-    get_probe_result = lambda baseno: ",".join(map(str, sequence_probe(baseno, probe_length, structure_count, sscount_df))) + f",{probe_length}"
-    return "\n".join(map(get_probe_result, consec.baseno))
+def get_final_chunks(file_name : str, probe_lengths: DiscontinuousRange, structure_count: int, consec: Iterable[tuple[int, np.ndarray]], sscount_df) -> Iterator[str]:
+    """
+    Generate the result file in chunks, so the whole result never has to be held in memory
+    :return: an iterator of strings that together make up the result file
+    """
+    yield ('Results for ' + file_name + ' using ' + str(probe_lengths) + ' as parallel TFO probe length(s)\n' +
+           'Start Position,%GA,sscount,Parallel TFO Probe Sequence,Tm,Probe Length\n')
+    probe_sums = get_probe_sums(sscount_df)
+    found_probe = False
+    for length, starts in consec:
+        for chunk_start in range(0, len(starts), CHUNK_LINE_COUNT):
+            found_probe = True
+            yield get_final_string_section(structure_count, starts[chunk_start:chunk_start + CHUNK_LINE_COUNT], length, probe_sums) + "\n"
+    if not found_probe: yield "\n"
+
+def write_chunks(buffer: IO[str], chunks: Iterable[str], preview_line_limit: int = 0) -> tuple[str, int]:
+    """
+    Write the chunks to the buffer one at a time, keeping only a bounded preview of them
+    :param preview_line_limit: the maximum number of lines to keep in the preview
+    :return: (the first preview_line_limit lines, the total line count)
+    """
+    preview, line_count = [], 0
+    for chunk in chunks:
+        buffer.write(chunk)
+        if line_count < preview_line_limit:
+            preview.extend(chunk.splitlines(keepends=True)[:preview_line_limit - line_count])
+        line_count += chunk.count("\n")
+    return "".join(preview), line_count
+
+def get_final_string_section(structure_count: int, starts: np.ndarray, probe_length: int, probe_sums: ProbeSums):
+    return "\n".join(",".join(map(str, probe)) + f",{probe_length}" for probe in sequence_probes(starts, probe_length, structure_count, probe_sums))
 # def seqTarget(df: DataFrame): #sequence of target & sscount for each probe as fraction (1 for fully single stranded)
 #     max_base = df.base.iat[-1]
 #     seq = ''.join(df.base)
@@ -144,25 +199,24 @@ def get_final_string_section(structure_count: int, consec: DataFrame, probe_leng
 def parallel_complement(seq : str, complement = base_complement): #generate RNA complement
     return seq.translate(complement)[::1]
 
-def sequence_probe(baseno: int, probe_len: int, structure_count: int, sscount_df: DataFrame):
+@functools.lru_cache(maxsize=4096)
+def melting_temperature(complement: str) -> int:
+    return int(mt.Tm_NN(complement, dnac1=50000, dnac2=50000, Na=100, nn_table=mt.RNA_NN1, saltcorr=1))
+
+def sequence_probes(starts: np.ndarray, probe_len: int, structure_count: int, probe_sums: ProbeSums) -> Iterable[tuple]:
     """
-    Sequence one specific probe
-    :param baseno: an integer representing the start of the probe, 1-indexed
-    :param probe_len: the length of the probe
-    :param sscount_df: the sscount dataframe
-    :return:
+    Sequence every probe of one length
+    :param starts: the indices of the start of each probe, 0-indexed
+    :param probe_len: the length of the probes
+    :param probe_sums: the prefix sums of the sscount dataframe
+    :return: (baseno, %GA, average sscount, complement, Tm) for each probe
     """
-    index = baseno - 1
-    probe = "".join(sscount_df.base[index: index + probe_len])
-    complement = parallel_complement(probe)
-
-    tml = int(mt.Tm_NN(complement, dnac1=50000, dnac2=50000, Na=100, nn_table=mt.RNA_NN1, saltcorr=1))
-
-    per = int((probe.count('A') + probe.count('G')) / probe_len * 100)
-
-    probe_sscounts = sscount_df.sscount[index:index + probe_len]
-    avg_sscount = probe_sscounts.sum() / (probe_len * structure_count)
-    return (baseno, per, avg_sscount, complement, tml) #returns baseno so it can easily be written to file
+    ends = starts + probe_len
+    per = ((probe_sums.purines[ends] - probe_sums.purines[starts]) / probe_len * 100).astype(int)
+    avg_sscount = (probe_sums.sscounts[ends] - probe_sums.sscounts[starts]) / (probe_len * structure_count)
+    for baseno, start, probe_per, probe_sscount in zip(probe_sums.basenos[starts].tolist(), starts.tolist(), per.tolist(), avg_sscount.tolist()):
+        complement = parallel_complement(probe_sums.bases[start: start + probe_len])
+        yield baseno, probe_per, probe_sscount, complement, melting_temperature(complement) #returns baseno so it can easily be written to file
 
 argument_parser = None
 def get_argument_parser():
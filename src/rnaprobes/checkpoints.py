@@ -0,0 +1,106 @@
+# Stage checkpoints, so that a long run that was stopped (e.g. its machine was restarted during OligoWalk) resumes where
+# it stopped instead of starting over. After each stage, its result is pickled into the output folder together with the
+# fingerprint of the run's inputs: the content of its input files and the arguments that change its result. A resumed
+# run loads every stage whose checkpoint has the same fingerprint instead of running it (see ProgramObject.run_stage)
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+from argparse import Namespace
+from pathlib import Path
+
+CHECKPOINTS_ENABLED = os.environ.get("RNAPROBES_CHECKPOINTS", "1") != "0"
+FORMAT_VERSION = 1
+DIRECTORY_NAME = ".[fname]_checkpoints" #in the output folder
+FINGERPRINT_FILE_NAME = "fingerprint"
+CHUNK_SIZE = 1024 * 1024
+#arguments that don't change the result. Input files are fingerprinted by their content instead of their path
+IGNORED_ARGUMENTS = {"output_dir", "verbose", "quiet", "resume", "from_command_line", "delete_ct", "file", "csv_file"}
+
+def _canonical_value(value, digest):
+    if isinstance(value, Namespace):
+        return {key: _canonical_value(item, digest) for key, item in sorted(vars(value).items()) if key not in IGNORED_ARGUMENTS}
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_canonical_value(item, digest) for item in value]
+    if hasattr(value, "read"): #a stream, e.g. an uploaded blast file
+        _update_with_stream(digest, value)
+        return "<stream>"
+    return str(value)
+
+def _update_with_stream(digest, stream):
+    """Hash the stream's content, keeping its position"""
+    position = stream.tell()
+    stream.seek(0)
+    while chunk := stream.read(CHUNK_SIZE):
+        digest.update(chunk.encode() if isinstance(chunk, str) else chunk)
+    stream.seek(position)
+
+def get_fingerprint(program: str, arguments: Namespace, inputs: list, **values) -> str | None:
+    """
+    :param inputs: the input files, as paths or streams
+    :param values: other values that change the result (e.g. the probe length)
+    :return: the fingerprint of a run, or None if one of its input files doesn't exist (anymore)
+    """
+    digest = hashlib.sha256()
+    for file in inputs:
+        if hasattr(file, "read"):
+            _update_with_stream(digest, file)
+            continue
+        if not Path(file).exists(): return None
+        with open(file, "rb") as stream:
+            _update_with_stream(digest, stream)
+    canonical = dict(version=FORMAT_VERSION, program=program, arguments=_canonical_value(arguments, digest),
+                     values={key: _canonical_value(value, digest) for key, value in sorted(values.items())})
+    digest.update(json.dumps(canonical, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+class Checkpoints:
+    def __init__(self, directory: Path, fingerprint: str):
+        """Use open instead"""
+        self.directory = directory
+        self.fingerprint = fingerprint
+
+    @staticmethod
+    def open(directory: Path, fingerprint: str | None, resume: bool) -> Checkpoints:
+        """
+        :param fingerprint: the run's fingerprint. If it's None (an input file was removed, e.g. by smFISH's --delete-ct
+        once OligoWalk used it), the fingerprint of the run that removed it is used
+        :param resume: keep the checkpoints of a previous run. Otherwise, they're removed
+        """
+        if not resume: shutil.rmtree(directory, ignore_errors=True)
+        directory.mkdir(parents=True, exist_ok=True)
+        fingerprint_path = directory / FINGERPRINT_FILE_NAME
+        if fingerprint is None:
+            fingerprint = fingerprint_path.read_text() if fingerprint_path.exists() else ""
+        else:
+            fingerprint_path.write_text(fingerprint)
+        return Checkpoints(directory, fingerprint)
+
+    def get_path(self, stage: str) -> Path:
+        return self.directory / f"{stage}.pickle"
+
+    def load(self, stage: str) -> tuple[bool, object, dict]:
+        """:return: whether the stage has a valid checkpoint, and its result and result arguments (see ProgramObject.set_result_args)"""
+        try:
+            with open(self.get_path(stage), "rb") as file:
+                version, fingerprint, value, result_args = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError, AttributeError, ImportError):
+            return False, None, dict()
+        if version != FORMAT_VERSION or not self.fingerprint or fingerprint != self.fingerprint: return False, None, dict()
+        return True, value, result_args
+
+    def save(self, stage: str, value, result_args: dict):
+        """Save a stage's checkpoint. It's written at once, so a run stopped while saving it never leaves a partial one"""
+        path = self.get_path(stage)
+        partial_path = path.with_suffix(".partial")
+        with open(partial_path, "wb") as file:
+            pickle.dump((FORMAT_VERSION, self.fingerprint, value, result_args), file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(partial_path, path)
+
+    def remove(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -0,0 +1,130 @@
+# Draw simple RNA structures as svg files in-process, instead of running RNAstructure's draw for each one. Supports a
+# single stem-loop: nested base pairs with no branches (stems, bulges, internal loops and a hairpin loop), and unpaired
+# ends. Anything else isn't drawn here (draw_svg returns None), so it can be drawn with RNAStructureWrapper.draw instead.
+# The svg files look like draw's: the first path is the bottom pair and the last element is the title (request.html
+# relies on both)
+from __future__ import annotations
+
+import math
+from html import escape
+
+BASE_DISTANCE = 31 #between neighbouring bases of a strand
+PAIR_WIDTH = 55 #between the bases of a pair
+BASE_RADIUS = 12
+LABEL_DISTANCE = 40 #of the base numbers from their bases
+LABEL_INTERVAL = 10
+MARGIN = 36
+TITLE_HEIGHT = 40
+
+def get_stem_loop(length: int, pairs: list[tuple[int, int]]) -> list[tuple[int, int]] | None:
+    """:return: the pairs from the outermost in, if they form a single stem-loop. None otherwise"""
+    pairs = sorted(pairs)
+    if not pairs: return None
+    for (i, j), (inner_i, inner_j) in zip(pairs, pairs[1:]):
+        if not i < inner_i < inner_j < j: return None #a branch or a pseudoknot
+    if not all(1 <= i < j <= length for i, j in pairs): return None
+    return pairs
+
+def get_radius(chords: list[float]) -> float | None:
+    """:return: the radius of the circle that the chords go around exactly once. None if they're too short to"""
+    def get_angle(radius: float) -> float:
+        return sum(2 * math.asin(min(chord / (2 * radius), 1)) for chord in chords)
+    low, high = max(chords) / 2, sum(chords)
+    if get_angle(low) < 2 * math.pi: return None
+    for _ in range(60): #bisection, the angle shrinks as the radius grows
+        middle = (low + high) / 2
+        low, high = (middle, high) if get_angle(middle) > 2 * math.pi else (low, middle)
+    return (low + high) / 2
+
+def add(a: tuple, b: tuple, scale: float = 1) -> tuple[float, float]:
+    return a[0] + b[0] * scale, a[1] + b[1] * scale
+
+def normalize(vector: tuple) -> tuple[float, float]:
+    size = math.hypot(*vector)
+    return vector[0] / size, vector[1] / size
+
+def rotate(vector: tuple, angle: float) -> tuple[float, float]:
+    cos, sin = math.cos(angle), math.sin(angle)
+    return vector[0] * cos - vector[1] * sin, vector[0] * sin + vector[1] * cos
+
+def layout(length: int, pairs: list[tuple[int, int]]) -> tuple[dict, dict] | None:
+    """
+    Lay out a stem-loop, starting from its outermost pair (at the origin, with its stem going up). Coordinates have y up
+    :return: the position of each base, and the direction to put its number in. None if it isn't a supported structure
+    """
+    pairs = get_stem_loop(length, pairs)
+    if pairs is None: return None
+    positions, outwards = dict(), dict()
+    left, right = (-PAIR_WIDTH / 2, 0.0), (PAIR_WIDTH / 2, 0.0)
+    up, across = (0.0, 1.0), (1.0, 0.0)
+    for index, (i, j) in enumerate(pairs):
+        positions[i], positions[j] = left, right
+        outwards[i], outwards[j] = (-across[0], -across[1]), across
+        inner = pairs[index + 1] if index + 1 < len(pairs) else None
+        if inner == (i + 1, j - 1): #stacked
+            left, right = add(left, up, BASE_DISTANCE), add(right, up, BASE_DISTANCE)
+            continue
+        #a loop: its bases go around a circle, from i to j (through the inner pair, if there is one)
+        loop = list(range(i, j + 1)) if inner is None else list(range(i, inner[0] + 1)) + list(range(inner[1], j + 1))
+        chords = [PAIR_WIDTH if inner is not None and (a, b) == inner else BASE_DISTANCE for a, b in zip(loop, loop[1:])] + [PAIR_WIDTH]
+        radius = get_radius(chords)
+        if radius is None: return None #too small a loop
+        middle = add(left, right)
+        center = add((middle[0] / 2, middle[1] / 2), up, math.sqrt(max(radius ** 2 - (PAIR_WIDTH / 2) ** 2, 0)))
+        spoke = (left[0] - center[0], left[1] - center[1])
+        for base, chord in zip(loop[1:], chords):
+            spoke = rotate(spoke, -2 * math.asin(min(chord / (2 * radius), 1))) #clockwise, from the left strand to the right one
+            positions[base], outwards[base] = add(center, spoke), normalize(spoke)
+        if inner is not None:
+            left, right = positions[inner[0]], positions[inner[1]]
+            across = normalize((right[0] - left[0], right[1] - left[1]))
+            up = (-across[1], across[0])
+    first, last = pairs[0]
+    for base in range(first - 1, 0, -1): #the unpaired ends go sideways from the outermost pair
+        positions[base], outwards[base] = add(positions[first], (-1, 0), BASE_DISTANCE * (first - base)), (0.0, -1.0)
+    for base in range(last + 1, length + 1):
+        positions[base], outwards[base] = add(positions[last], (1, 0), BASE_DISTANCE * (base - last)), (0.0, -1.0)
+    return positions, outwards
+
+def draw_svg(sequence: str, pairs: list[tuple[int, int]], title: str = "") -> str | None:
+    """
+    :param pairs: the base pairs (i, j), 1 <= i < j <= len(sequence), like in a ct file
+    :return: the structure as an svg file, or None if it isn't a single stem-loop
+    """
+    result = layout(len(sequence), pairs)
+    if result is None: return None
+    positions, outwards = result
+    labels = {base: add(positions[base], outwards[base], LABEL_DISTANCE) for base in positions
+              if base % LABEL_INTERVAL == 0 or base == len(sequence)}
+    points = list(positions.values()) + list(labels.values())
+    min_x, max_x = min(x for x, y in points) - MARGIN, max(x for x, y in points) + MARGIN
+    min_y, max_y = min(y for x, y in points) - MARGIN, max(y for x, y in points) + MARGIN
+    to_svg = lambda point: (round(point[0] - min_x), round(max_y - point[1])) #svg coordinates have y down
+    width, height = round(max_x - min_x), round(max_y - min_y)
+
+    lines = ['<?xml version="1.0" encoding="UTF-8" standalone="no"?>',
+             '<!DOCTYPE svg PUBLIC "-//W3C//DTD SVG 1.1//EN" "http://www.w3.org/Graphics/SVG/1.1/DTD/svg11.dtd">',
+             f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" xml:space="preserve" '
+             f'font-family="monospace" font-size="24" fill="rgb(255,255,255)" stroke="rgb(0,0,0)" viewBox="0 0 {width} {height + TITLE_HEIGHT}">',
+             '<g transform="scale(1)">']
+    for i, j in sorted(pairs): #the outermost pair first, it's the bottom one
+        (x1, y1), (x2, y2) = to_svg(positions[i]), to_svg(positions[j])
+        lines.append(f'<path style="fill:none;stroke-width:3" stroke="rgb(0,0,0)" d="M{x1},{y1} L{x2},{y2}"/>')
+    for base, letter in enumerate(sequence, start=1):
+        x, y = to_svg(positions[base])
+        elements = []
+        if base < len(sequence):
+            next_x, next_y = to_svg(positions[base + 1])
+            elements.append(f'<line style="fill:none;stroke-width:1" stroke="rgb(0,0,0)" x1="{x}" y1="{y}" x2="{next_x}" y2="{next_y}"/>')
+        if base in labels:
+            label_x, label_y = to_svg(labels[base])
+            elements.append(f'<line style="fill:none;stroke-width:1" stroke="rgb(0,0,0)" x1="{x}" y1="{y}" x2="{label_x}" y2="{label_y}"/>')
+            elements.append(f'<rect x="{label_x - 15}" y="{label_y - 12}" width="30" height="24" fill="rgb(255,255,255)" stroke="rgb(255,255,255)"/>')
+            elements.append(f'<text x="{label_x - 15}" y="{label_y + 8}" fill="rgb(0,0,0)" stroke="rgb(0,0,0)">{base}</text>')
+        elements.append(f'<circle style="stroke-width:1" cx="{x}" cy="{y}" r="{BASE_RADIUS}" fill="rgb(255,255,255)" stroke="rgb(0,0,0)"/>')
+        elements.append(f'<text x="{x - 8}" y="{y + 8}" fill="rgb(0,0,0)" stroke="rgb(0,0,0)">{escape(letter)}</text>')
+        lines.append(" ".join(elements))
+    lines.extend(['</g>', '<g font-size="16">',
+                  f'<text x="{MARGIN}" y="{height + TITLE_HEIGHT - 13}" fill="rgb(0,0,0)" stroke="rgb(0,0,0)">{escape(title)}</text>',
+                  '</g>', '</svg>'])
+    return "\n".join(lines) + "\n"
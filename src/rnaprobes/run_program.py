@@ -4,20 +4,20 @@ from pathlib import Path
 
 #sys.path.append(str(Path(__file__).resolve().parent.parent))
 
-from .PinMol import pinmol
 from .RNAProbesUtil import run_command_line
-from .TFOFinder import tfofinder
-from .smFISH import smFISH
-from .util import input_value
+from .util import input_value, LazyFunction
 
 dummy_program = "skip_run"
-programs = {
-    "tfofinder": tfofinder.run,
-    "pinmol": pinmol.run,
-    "smfish": smFISH.run
+programs = { #only the chosen program (and its dependencies) is imported
+    "tfofinder": LazyFunction(f"{__package__}.TFOFinder.tfofinder", "run"),
+    "tfofinder-batch": LazyFunction(f"{__package__}.TFOFinder.batch", "run"),
+    "pinmol": LazyFunction(f"{__package__}.PinMol.pinmol", "run"),
+    "pinmol-svgs": LazyFunction(f"{__package__}.PinMol.beacon_svgs", "run"),
+    "pinmol-homology-index": LazyFunction(f"{__package__}.PinMol.homology_index", "run"),
+    "smfish": LazyFunction(f"{__package__}.smFISH.smFISH", "run")
 }
 def run(args: list):
-    program = input_value("Input a program (either tfofinder, pinmol, or smfish): ", str.lower,
+    program = input_value("Input a program (either tfofinder, tfofinder-batch, pinmol, pinmol-svgs, pinmol-homology-index, or smfish): ", str.lower,
                           lambda program: program in programs.keys() or program == dummy_program, retry_if_fail=True,
                           initial_value=args[0].lower() if len(args) >= 1 else None)
     if program == dummy_program:
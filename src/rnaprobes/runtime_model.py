@@ -0,0 +1,230 @@
+# Runtime (and memory) prediction for the programs, calibrated from the stage timings of previous runs
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from argparse import Namespace
+from collections.abc import Callable
+from pathlib import Path
+
+from .RNAProbesUtil import ProgramObject
+from .RNAUtil import CTStats
+
+MODEL_DIR = Path(os.environ.get("RNAPROBES_MODEL_DIR", Path.home() / ".rnaprobes"))
+TIMINGS_FILE_NAME = "stage_timings.jsonl"
+COEFFICIENTS_FILE_NAME = "runtime_coefficients.json"
+RECORD_TIMINGS = os.environ.get("RNAPROBES_RECORD_TIMINGS", "0") != "0" #turned on by the webserver, see gunicorn.conf.py
+MAX_RECORDS = 5000 #only the most recent records are kept
+MAX_TIMINGS_BYTES = 4 * 1024 * 1024 #the timings file is trimmed to MAX_RECORDS records when it grows past this (~10000 records)
+MIN_RECORDS_TO_FIT_EXPONENTS = 8
+
+DELAYED_THRESHOLD_SECONDS = 10 #estimated runtime above which the webserver runs the program in the background
+LONG_RUNTIME_WARNING_SECONDS = 60 #estimated runtime above which users are warned
+MEMORY_STAGE = "memory" #peak memory in MB is fitted like a stage
+
+def _intermolecular(args: Namespace) -> bool:
+    return getattr(args, "intermolecular", None) in (True, "y")
+
+def _always(args: Namespace) -> bool:
+    return True
+
+# program -> stage -> whether the stage runs with the given arguments
+PROGRAM_STAGES: dict[str, dict[str, Callable[[Namespace], bool]]] = {
+    "TFOFinder": {"ct_parse": _always, "probe_search": _always},
+    "PinMol": {"ct_parse": _always, "probe_selection": _always, "oligoscreen": _always,
+               "blast": lambda args: bool(getattr(args, "run_blast", False)), "beacons": _always},
+    "smFISH": {"oligowalk": lambda args: not getattr(args, "csv_file", None), "selection": _always, "bifold": _intermolecular},
+}
+
+# seconds (or MB for memory) = coefficient * min(length, max_length)^length_exponent * structure_count^structure_exponent
+DEFAULT_COEFFICIENTS = {
+    "TFOFinder": {"ct_parse": dict(coefficient=2e-6, length_exponent=1, structure_exponent=1),
+                  "probe_search": dict(coefficient=1e-4, length_exponent=1, structure_exponent=0),
+                  MEMORY_STAGE: dict(coefficient=120, length_exponent=0, structure_exponent=0)},
+    "PinMol": {"ct_parse": dict(coefficient=2e-6, length_exponent=1, structure_exponent=1),
+               "probe_selection": dict(coefficient=2e-4, length_exponent=1, structure_exponent=0),
+               "oligoscreen": dict(coefficient=2e-3, length_exponent=1, structure_exponent=0),
+               "blast": dict(coefficient=300, length_exponent=0, structure_exponent=0),
+               "beacons": dict(coefficient=5, length_exponent=0, structure_exponent=0),
+               MEMORY_STAGE: dict(coefficient=150, length_exponent=0, structure_exponent=0)},
+    #calibrated so runs are delayed from the lengths the webserver used before the model: 2500 nucleotides, or 1000 with intermolecular
+    "smFISH": {"oligowalk": dict(coefficient=9.5 / (2500 ** 3), length_exponent=3, structure_exponent=0), #~17 minutes for 12k nucleotides
+               "selection": dict(coefficient=2e-4, length_exponent=1, structure_exponent=0),
+               "bifold": dict(coefficient=9.2e-6, length_exponent=2, structure_exponent=0, max_length=1100), #at most 48 probes (~1100 nucleotides) are paired
+               MEMORY_STAGE: dict(coefficient=150, length_exponent=0, structure_exponent=0)},
+}
+
+coefficients = None
+def get_coefficients() -> dict:
+    global coefficients
+    if coefficients is None:
+        coefficients = _load_coefficients()
+    return coefficients
+
+def _load_coefficients() -> dict:
+    loaded = {program: dict(stages) for program, stages in DEFAULT_COEFFICIENTS.items()}
+    try:
+        with open(MODEL_DIR / COEFFICIENTS_FILE_NAME, "r") as file:
+            for program, stages in json.load(file).items():
+                loaded.setdefault(program, dict()).update(stages)
+    except (OSError, ValueError):
+        pass #use the defaults
+    return loaded
+
+def estimate_stage(program: str, stage: str, ct_stats: CTStats) -> float:
+    model = get_coefficients()[program][stage]
+    length = min(ct_stats.nucleotide_length, model.get("max_length", math.inf))
+    return model["coefficient"] * (length ** model["length_exponent"]) * (ct_stats.structure_count ** model["structure_exponent"])
+
+def estimate(program: str, ct_stats: CTStats, args: Namespace) -> float:
+    """
+    Estimate the runtime of a program
+    :param program: the program name (TFOFinder, PinMol or smFISH)
+    :param ct_stats: the nucleotide length and structure count of the ct file
+    :param args: the program's parsed arguments, used to decide which stages run
+    :return: the estimated runtime in seconds
+    """
+    return sum(estimate_stage(program, stage, ct_stats) for stage, runs in PROGRAM_STAGES[program].items() if runs(args))
+
+def estimate_memory(program: str, ct_stats: CTStats) -> float:
+    """
+    :return: the estimated peak memory in MB
+    """
+    return estimate_stage(program, MEMORY_STAGE, ct_stats)
+
+def is_long_runtime(program: str, ct_stats: CTStats, args: Namespace) -> bool:
+    return estimate(program, ct_stats, args) > DELAYED_THRESHOLD_SECONDS
+
+#region Recording
+def _get_peak_memory_mb() -> float | None:
+    try:
+        import resource
+    except ImportError: #not available on windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024 #bytes on mac, KB on linux
+
+def get_options(args: Namespace) -> dict:
+    return {option: str(getattr(args, option)) for option in ("intermolecular", "prefilter_pairs", "run_blast", "probe_length")
+            if getattr(args, option, None) is not None}
+
+def record_run(program: str, program_object: ProgramObject):
+    """
+    Record the stage timings of a finished run, so they can later be used to refresh the model. Never throws
+    :param program: the program name
+    :param program_object: the finished program's ProgramObject. Nothing is recorded if its ct_stats aren't known, or if
+    it resumed a previous run
+    """
+    if not RECORD_TIMINGS or program_object.ct_stats is None or not program_object.stage_times: return
+    if program_object.resumed_stages: return #its stage timings are incomplete
+    record = dict(program=program, time=time.time(), nucleotide_length=program_object.ct_stats.nucleotide_length,
+                  structure_count=program_object.ct_stats.structure_count, options=get_options(program_object.arguments),
+                  stages=program_object.stage_times)
+    if getattr(program_object.arguments, "from_command_line", False): #peak memory is only meaningful if it's the only run in the process
+        record["peak_memory_mb"] = _get_peak_memory_mb()
+    try:
+        MODEL_DIR.mkdir(parents=True, exist_ok=True)
+        with open(MODEL_DIR / TIMINGS_FILE_NAME, "a") as file:
+            file.write(json.dumps(record) + "\n")
+            size = file.tell()
+        if size > MAX_TIMINGS_BYTES: trim_records(MODEL_DIR / TIMINGS_FILE_NAME)
+    except OSError:
+        pass #recording is best effort
+
+def trim_records(path: Path):
+    """Keep only the most recent MAX_RECORDS records of a timings file"""
+    records = read_records(path)
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}")
+    with open(temp_path, "w") as file:
+        file.writelines(json.dumps(record) + "\n" for record in records)
+    os.replace(temp_path, path) #records appended by other processes meanwhile are lost, which is fine for a sample
+#endregion
+
+#region Fitting
+def read_records(path: Path = None) -> list[dict]:
+    path = path or MODEL_DIR / TIMINGS_FILE_NAME
+    if not path.exists(): return []
+    with open(path, "r") as file:
+        records = []
+        for line in file:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                pass #skip partially written lines
+    return records[-MAX_RECORDS:]
+
+def fit_stage(samples: list[tuple[int, int, float]], default: dict) -> dict:
+    """
+    Fit a stage's model to its samples
+    :param samples: (nucleotide_length, structure_count, value) tuples
+    :param default: the default model, whose exponents are kept if there isn't enough varied data to fit them
+    :return: the fitted model
+    """
+    import numpy as np
+    max_length = default.get("max_length", math.inf)
+    samples = [(min(length, max_length), structures, value) for length, structures, value in samples if value > 0]
+    fitted = dict(default)
+    if len(samples) == 0: return fitted
+    lengths, structures, values = (np.array(column, dtype=float) for column in zip(*samples))
+    if len(samples) >= MIN_RECORDS_TO_FIT_EXPONENTS and len(set(lengths)) > 2:
+        vary_structures = len(set(structures)) > 2
+        features = np.column_stack([np.ones(len(samples)), np.log(lengths)] + ([np.log(structures)] if vary_structures else []))
+        targets = np.log(values) - (0 if vary_structures else default["structure_exponent"] * np.log(structures))
+        solution = np.linalg.lstsq(features, targets, rcond=None)[0]
+        fitted["length_exponent"] = float(solution[1])
+        if vary_structures: fitted["structure_exponent"] = float(solution[2])
+    scale = values / (lengths ** fitted["length_exponent"] * structures ** fitted["structure_exponent"])
+    fitted["coefficient"] = float(np.median(scale))
+    fitted["samples"] = len(samples)
+    return fitted
+
+def fit(records: list[dict]) -> dict:
+    fitted = dict()
+    for program, stages in DEFAULT_COEFFICIENTS.items():
+        program_records = [record for record in records if record.get("program") == program]
+        for stage, default in stages.items():
+            key = "peak_memory_mb" if stage == MEMORY_STAGE else None
+            samples = [(record["nucleotide_length"], record["structure_count"],
+                        record.get(key) if key else record["stages"].get(stage)) for record in program_records]
+            samples = [sample for sample in samples if sample[2] is not None]
+            if samples: fitted.setdefault(program, dict())[stage] = fit_stage(samples, default)
+    return fitted
+
+def refresh(model_dir: Path = None) -> dict:
+    """
+    Refit the model from the recorded timings, store the coefficients and trim the timings file to the most recent records
+    :return: the fitted coefficients
+    """
+    global coefficients
+    model_dir = model_dir or MODEL_DIR
+    records = read_records(model_dir / TIMINGS_FILE_NAME)
+    fitted = fit(records)
+    model_dir.mkdir(parents=True, exist_ok=True)
+    with open(model_dir / COEFFICIENTS_FILE_NAME, "w") as file:
+        json.dump(fitted, file, indent=2)
+    if (model_dir / TIMINGS_FILE_NAME).exists(): trim_records(model_dir / TIMINGS_FILE_NAME)
+    coefficients = None #reload on next use
+    return fitted
+#endregion
+
+def create_arg_parser():
+    parser = argparse.ArgumentParser(prog="runtime_model", description="Refresh or inspect the runtime model used to estimate program runtimes.")
+    parser.add_argument("-r", "--refresh", action="store_true", help="Refit the model from the recorded stage timings")
+    parser.add_argument("-p", "--program", choices=list(PROGRAM_STAGES.keys()), help="Estimate the runtime of this program")
+    parser.add_argument("-l", "--length", type=int, help="The nucleotide length to estimate for")
+    parser.add_argument("-s", "--structures", type=int, default=20, help="The structure count to estimate for")
+    parser.add_argument("-i", "--intermolecular", action="store_true", help="Estimate smFISH with intermolecular")
+    return parser
+
+if __name__ == "__main__":
+    arguments = create_arg_parser().parse_args(sys.argv[1:])
+    if arguments.refresh:
+        print(json.dumps(refresh(), indent=2))
+    if arguments.program and arguments.length:
+        stats = CTStats(arguments.length, arguments.structures)
+        print(f"{arguments.program}: {estimate(arguments.program, stats, arguments):.1f} seconds, "
+              f"{estimate_memory(arguments.program, stats):.0f} MB")
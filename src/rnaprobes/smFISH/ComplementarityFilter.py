@@ -0,0 +1,83 @@
+from __future__ import annotations
+from collections import defaultdict
+from collections.abc import Iterable, Sequence
+
+dna_complement = str.maketrans({'A': 'T', 'C': 'G', 'G': 'C', 'T': 'A'})
+
+def dna_reverse_complement(seq: str) -> str:
+    return seq.translate(dna_complement)[::-1]
+
+#complementarity prefilter for smFISH, so bifold only has to run on pairs that may form a strong duplex
+class ComplementarityFilter:
+
+    def __init__(self, oligos: Sequence[str], seed_length: int = 3, min_score: int = 7,
+                 gc_score: int = 2, at_score: int = 1, mismatch_score: int = -3):
+        """
+        Index the reverse complement k-mers of every oligo, in order to quickly find the pairs of oligos that share a
+        complementary stretch.
+        :param oligos: the DNA oligos (5'->3') to compare against each other
+        :param seed_length: the length of the exact complementary k-mer needed before a pair is scored
+        :param min_score: the minimum ungapped duplex score for a pair to be considered a possible strong duplex.
+            The default is calibrated so that no pair with a bifold DG below -10 kcal/mol is missed on the example files
+        :param gc_score: the score of a G-C base pair
+        :param at_score: the score of an A-T base pair
+        :param mismatch_score: the score of a mismatch (should be negative)
+        """
+        self.oligos = [oligo.upper().replace('U', 'T') for oligo in oligos]
+        self.reverse_complements = [dna_reverse_complement(oligo) for oligo in self.oligos]
+        self.seed_length = seed_length
+        self.min_score = min_score
+        self.gc_score, self.at_score, self.mismatch_score = gc_score, at_score, mismatch_score
+        self.index = self._index_reverse_complements()
+        self._scores = None
+
+    def _index_reverse_complements(self) -> dict[str, list[tuple[int, int]]]:
+        index = defaultdict(list)
+        for oligo_index, rev_comp in enumerate(self.reverse_complements):
+            for pos in range(len(rev_comp) - self.seed_length + 1):
+                index[rev_comp[pos:pos + self.seed_length]].append((oligo_index, pos))
+        return index
+
+    def _get_seed_diagonals(self) -> dict[tuple[int, int], set[int]]:
+        """
+        Get every diagonal (offset of the first oligo relative to the reverse complement of the second) with at least one seed.
+        Only pairs (i, j) with i < j are returned, as a complementary stretch is always found from the oligo with the lower index
+        :return: a dictionary of (i, j) -> offsets
+        """
+        diagonals = defaultdict(set)
+        for i, oligo in enumerate(self.oligos):
+            for pos in range(len(oligo) - self.seed_length + 1):
+                for j, rc_pos in self.index.get(oligo[pos:pos + self.seed_length], ()):
+                    if j > i: diagonals[(i, j)].add(pos - rc_pos)
+        return diagonals
+
+    def _diagonal_score(self, seq: str, rev_comp: str, offset: int) -> int:
+        best = current = 0
+        for i in range(max(0, offset), min(len(seq), len(rev_comp) + offset)):
+            if seq[i] == rev_comp[i - offset]:
+                current += self.gc_score if seq[i] in "GC" else self.at_score
+            else:
+                current += self.mismatch_score
+            current = max(current, 0)
+            best = max(best, current)
+        return best
+
+    def get_scores(self) -> dict[tuple[int, int], int]:
+        """
+        Get the best ungapped duplex score for every pair sharing at least one complementary seed
+        :return: a dictionary of (i, j) -> score, with i < j. Pairs without a seed are left out (a score of 0)
+        """
+        if self._scores is None:
+            self._scores = {pair: max(self._diagonal_score(self.oligos[pair[0]], self.reverse_complements[pair[1]], offset) for offset in offsets)
+                            for pair, offsets in self._get_seed_diagonals().items()}
+        return self._scores
+
+    def is_candidate(self, i: int, j: int) -> bool:
+        """
+        :return: True if oligos i and j share a complementary stretch long enough to possibly form a strong duplex
+        """
+        if i > j: i, j = j, i
+        return self.get_scores().get((i, j), 0) >= self.min_score
+
+    def filter_pairs(self, pairs: Iterable[tuple[int, int]]) -> list[bool]:
+        return [self.is_candidate(i, j) for i, j in pairs]
@@ -0,0 +1,8 @@
+# smFISH's limits, which the web app shows in its forms. Kept apart from smFISH.py so reading them doesn't import pandas
+import os
+
+# so there's a limit on what a webserver will allow
+IS_WEBAPP = os.environ.get("IS_WEB_APP")
+MAX_WEBAPP_NUC_LENGTH = 4 * 1000 if IS_WEBAPP else 50 * 1000 #if > 50k, will take ~10 hours
+
+exported_values = dict(maxWebappLength=MAX_WEBAPP_NUC_LENGTH) #max file size: 2mb if web app. OligoWalk is O(n^3) and bifold is also bad,
@@ -12,10 +12,13 @@ from pathlib import Path
 from pandas import DataFrame, Series
 
 from ..RNAProbesUtil import run_command_line, ProgramObject
-from ..RNAUtil import RNAStructureWrapper, get_ct_nucleotide_length
+from ..RNAUtil import RNAStructureWrapper, get_ct_stats, CTStats
+from .. import runtime_model
 from ..smFISH.ReverseDijkstra import ReverseDijkstra
+from ..smFISH.ComplementarityFilter import ComplementarityFilter
+from .constants import IS_WEBAPP, MAX_WEBAPP_NUC_LENGTH, exported_values
 from ..util import path_string, path_arg, input_bool, validate_arg, parse_file_input, input_path_string, \
-    format_timedelta, validate_doesnt_throw, directory_arg
+    format_timedelta, validate_doesnt_throw, directory_arg, remove_files
 
 undscr = ("->" * 40) + "\n"
 copyright_msg = (("\n" * 6) +
@@ -52,34 +55,38 @@ PRECISION = 10
 CONCENTRATION = 0.25e-6
 GAS_CONSTANT = 0.001987
 TEMP_K = 310.15 #37 C or 98.6 F
-# so there's a limit on what a webserver will allow
-IS_WEBAPP = os.environ.get("IS_WEB_APP")
-MAX_WEBAPP_NUC_LENGTH = 4 * 1000 if IS_WEBAPP else 50 * 1000 #if > 50k, will take ~10 hours
+INTERMOLECULAR_DG_CUTOFF = -10 #kcal/mol, pairs below this should be eliminated
+NOT_EVALUATED = '"not evaluated, above threshold"' #quoted since it's written to a csv
 
 
 COLS_TO_SAVE = ('Pos', "Oligo(5'->3')", 'Overall (kcal/mol)', 'Tm-Dup (degC)', 'Hybeff', 'fGC')
 #endregion
 
-exported_values = dict(maxWebappLength=MAX_WEBAPP_NUC_LENGTH) #max file size: 2mb if web app. OligoWalk is O(n^3) and bifold is also bad,
-
-def validate_arguments(file_path: Path, arguments: Namespace, **ignore) -> dict:
+def validate_arguments(file_path: Path, arguments: Namespace, ct_stats: CTStats = None, **ignore) -> dict:
+    """:param ct_stats: the ct file's stats, if they're already known (e.g. measured while uploading). Read from the file otherwise"""
     validate_arg(parse_file_input(file_path).suffix == ".ct", "The given file must be a valid .ct file")
     validate_arg(Path(file_path).exists(), msg="The ct file must exist")
-    nuc_length = validate_doesnt_throw(get_ct_nucleotide_length, file_path, msg="The given CT file is invalid. Can't read the CT file.")
+    ct_stats = ct_stats or validate_doesnt_throw(get_ct_stats, file_path, msg="The given CT file is invalid. Can't read the CT file.")
+    nuc_length = ct_stats.nucleotide_length
     validate_arg(nuc_length < MAX_WEBAPP_NUC_LENGTH, f"The RNA length must be below {MAX_WEBAPP_NUC_LENGTH} nucleotides "
                                                                               f"{'when using a webapp. Feel free to run the program, downloaded through our GitHub repository, on your own system' if IS_WEBAPP else 'when running the program. Feel free to change it manually, but it may take incredibly long'}")
     validate_arg(hasattr(arguments, 'intermolecular') and arguments.intermolecular is not None, "You must use decide whether to use intermolecular or not")
-    return dict(nucleotide_length=nuc_length)
+    return dict(nucleotide_length=nuc_length, ct_stats=ct_stats)
 
 
-def calculate_result(file_path : str | Path, arguments: Namespace, output_dir: Path = None, **ignore) -> ProgramObject:
+def calculate_result(file_path : str | Path, arguments: Namespace, output_dir: Path = None, ct_stats: CTStats = None, **ignore) -> ProgramObject:
     output_dir, fname, _ = parse_file_input(file_path, output_dir or arguments.output_dir)
     get_missing_arguments(arguments)
     program_object = ProgramObject(output_dir=output_dir, file_stem=fname, arguments=arguments)
+    program_object.use_checkpoints("smFISH", [file_path], resume=arguments.resume)
+    if not arguments.csv_file:
+        program_object.ct_stats = program_object.run_stage("ct_parse", lambda: ct_stats or get_ct_stats(file_path))
     probes = get_best_possible_probe_set(file_path, program_object)
-    best_48 = get_best_probes(probes, program_object, count=PROBE_RETURN_COUNT)
-    try_intermolecular(best_48, program_object)
+    with program_object.stage("selection"):
+        best_48 = get_best_probes(probes, program_object, count=PROBE_RETURN_COUNT)
+    program_object.run_stage("bifold", lambda: try_intermolecular(best_48, program_object))
 
+    runtime_model.record_run("smFISH", program_object)
     return program_object
 
 def parse_arguments(args: str | list, from_command_line = True) -> Namespace:
@@ -96,13 +103,14 @@ def run(args="", from_command_line = True):
                         initial_value= arguments.file, retry_if_fail=arguments.from_command_line)
 
     program_object = calculate_result(ct_filein, arguments)
+    program_object.remove_checkpoints()
 
     if arguments.intermolecular:
         #no filtered_file??
         print(program_object.format_relative_path(f"Check the [fname]_best_{PROBE_RETURN_COUNT}_probes.csv for proposed smFISH probes. However, if not enough probes have been"
               +" selected given the initial selection criteria or only the CDS is targeted, please review the [fname]_best_probes_set.csv and [fname]_possible_matching_probes.csv to "
               +"select additional probes. Moreover, the intermolecular interactions of the probes should be taken into acocunt. Please review the [fname]_combined_output.csv file, and eliminate any probes with "
-              + "intermolecular hybdridization free energy change < -10kcal/mol."))
+              + f"intermolecular hybdridization free energy change < {INTERMOLECULAR_DG_CUTOFF}kcal/mol."))
     else:
         print(program_object.format_relative_path(f"Check the [fname]_best_{PROBE_RETURN_COUNT}_probes.csv for proposed smFISH probes. However, if not enough probes have been "
               "selected given the initial selection criteria or only the CDS is targeted, please review the [fname]_best_probes_set.csv "
@@ -156,13 +164,14 @@ def get_filtered_df(df: DataFrame, program_object: ProgramObject) -> DataFrame:
 
 def get_best_possible_probe_set(filein: str | Path, program_object: ProgramObject) -> DataFrame:
     if not program_object.arguments.csv_file:
-        matching_probes = get_matching_probes(filein, program_object)
+        matching_probes = program_object.run_stage("oligowalk", lambda: get_matching_probes(filein, program_object))
+        if program_object.arguments.delete_ct: remove_files(filein) #only once its checkpoint is saved, so a resumed run doesn't need it
     else:
         matching_probes = pd.read_csv(program_object.arguments.csv_file)
         validate_arg(set(COLS_TO_SAVE).issubset(set(matching_probes.columns)), "The csv file is invalid. It must contain the column(s): " + ", ".join(set(COLS_TO_SAVE).difference(set(matching_probes.columns))))
         #could also verify the datatypes, but this much should be fine. Should just throw if invalid, which is OK
 
-    filtered_df = get_filtered_df(matching_probes, program_object)
+    filtered_df = program_object.run_stage("selection", lambda: get_filtered_df(matching_probes, program_object))
     filtered_df.to_csv(program_object.save_buffer(f"[fname]_best_probes_set.csv"), index=False, float_format=f'%.{PRECISION}g')
 
     return filtered_df
@@ -176,20 +185,18 @@ def get_best_probes(df: DataFrame, program_object: ProgramObject, count=PROBE_RE
 def equilibrium_constant(input):
     return math.e ** (-(input / (GAS_CONSTANT*TEMP_K)))
 
-def get_size_warning(length: int):
-    if length > 4000:
-        estimated_seconds = (10 * 60 / (12000 ** 3) * (length ** 3))
+def get_size_warning(ct_stats: CTStats, arguments: Namespace):
+    estimated_seconds = runtime_model.estimate("smFISH", ct_stats, arguments)
+    if estimated_seconds > runtime_model.LONG_RUNTIME_WARNING_SECONDS:
         return f"Calculation may take a while due to RNA length. Estimated time to completion: {format_timedelta(datetime.timedelta(seconds=estimated_seconds), include_seconds=False)}"
     return ""
 
 def get_matching_probes(filein: str, program_object: ProgramObject):
     if should_print(program_object.arguments):
-        length = get_ct_nucleotide_length(filein)
-        print(get_size_warning(length))
+        print(get_size_warning(program_object.ct_stats, program_object.arguments))
     df = RNAStructureWrapper.oligowalk(Path(filein),
                                        arguments=f"--structure -d -l {probe_length} -c {CONCENTRATION} -m 1 -s 3 --no-header",
-                                       path_mapper=program_object.file_path,
-                                       remove_input=program_object.arguments.delete_ct)
+                                       path_mapper=program_object.file_path)
     # todo: ummm, 0.1 * 10???
     dG1FA, dG2FA, dG3FA = (df['Duplex (kcal/mol)'] + 0.2597 * 10,
                            df['Intra-oligo (kcal/mol)'] + 0.1000 * 10,
@@ -212,20 +219,38 @@ def get_matching_probes(filein: str, program_object: ProgramObject):
     return df_cols_removed
 
 def process_oligos(oligos: list, program_object: ProgramObject):
-    pairs = get_pairs_file(oligos, program_object.file_path("[fname]_pairs.txt"))
-
-    #run bifold with a dummy file
-    energy_values = RNAStructureWrapper.bifold(f"[fname]_pairs.txt", f"[fname]somefile", f"[fname]pairs.out", program_object.file_path,
-                                               remove_input=True)
+    pairs = list(itertools.combinations(oligos, 2))  # Convert to list for indexing
+    evaluated = get_pairs_to_evaluate(oligos, program_object)
+    energy_values = iter(run_bifold([pair for pair, keep in zip(pairs, evaluated) if keep], program_object))
 
     # Combine the pairs with the energy values
     with program_object.open_buffer("[fname]_combined_output.csv", 'w') as f:
         f.write("Seq#1,Seq#2,DG\n")
-        for i in range(len(energy_values)):
-            f.write(f"{pairs[i][0]},{pairs[i][1]},{energy_values[i]}\n")
+        for pair, keep in zip(pairs, evaluated):
+            f.write(f"{pair[0]},{pair[1]},{next(energy_values) if keep else NOT_EVALUATED}\n")
+
+def get_pairs_to_evaluate(oligos: list, program_object: ProgramObject) -> list[bool]:
+    """
+    Get which pairs (in itertools.combinations order) should be sent to bifold. If the prefilter isn't used, every pair is evaluated
+    :return: a list of booleans, one per pair
+    """
+    pair_indices = itertools.combinations(range(len(oligos)), 2)
+    if not getattr(program_object.arguments, "prefilter_pairs", False):
+        return [True for _ in pair_indices]
+    evaluated = ComplementarityFilter(oligos).filter_pairs(pair_indices)
+    if should_print(program_object.arguments):
+        print(f"Running bifold on {sum(evaluated)} of {len(evaluated)} probe pairs. The rest can't form a duplex below {INTERMOLECULAR_DG_CUTOFF} kcal/mol.")
+    return evaluated
 
-def get_pairs_file(oligos: list, path: Path) -> list:
-    pairs = list(itertools.combinations(oligos, 2))  # Convert to list for indexing
+def run_bifold(pairs: list, program_object: ProgramObject) -> list[str]:
+    if len(pairs) == 0: return []
+    get_pairs_file(pairs, program_object.file_path("[fname]_pairs.txt"))
+
+    #run bifold with a dummy file
+    return RNAStructureWrapper.bifold(f"[fname]_pairs.txt", f"[fname]somefile", f"[fname]pairs.out", program_object.file_path,
+                                      remove_input=True)
+
+def get_pairs_file(pairs: list, path: Path) -> list:
     with open(path, "w") as f:
         for a, b in pairs:
             f.write(a + ' ' + b + '\n')
@@ -254,12 +279,17 @@ def create_arg_parser():
     parser.add_argument("-v", "--verbose", action="store_true")
     parser.add_argument("-q", "--quiet", action="store_true")
     parser.add_argument("-d", "--delete-ct", action="store_true", help="Remove the ct input file. Not recommended unless running from a server")
+    parser.add_argument("--resume", action="store_true",
+                        help="Resume a stopped run with the same file and arguments, skipping the stages it finished")
 
     arg_group = parser.add_argument_group('Intermolecular',
                                           'Intermolecular command line settings. If none given, will ask')
     group = arg_group.add_mutually_exclusive_group()
     group.add_argument("-i", "--intermolecular", dest="force_intermolecular", action="store_const", const="y")
     group.add_argument("-ni", "--no-intermolecular", "--hybeff", dest = "hybeff", action="store_const", const="n")
+    arg_group.add_argument("-pf", "--prefilter-pairs", action="store_true",
+                           help="Only run bifold on probe pairs that share a complementary stretch. "
+                                f"Other pairs are reported as not evaluated (they can't reach {INTERMOLECULAR_DG_CUTOFF} kcal/mol)")
 
     return parser
 
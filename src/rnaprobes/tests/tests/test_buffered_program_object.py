@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import io
+import zipfile
+from argparse import Namespace
+from unittest import TestCase
+
+from ...RNAProbesUtil import BufferedProgramObject, listen_to_stages
+
+
+class Test(TestCase):
+    def test_memory_budget_moves_buffers_to_disk(self):
+        program_object = BufferedProgramObject(None, "example", Namespace(), memory_budget=1000)
+        small = program_object.save_buffer("[fname]_small.txt")
+        small.write("a" * 100)
+        large = program_object.save_buffer("[fname]_large.txt")
+        large.write("b" * 2000)
+        self.assertTrue(large.is_on_disk())
+        self.assertFalse(small.is_on_disk())
+        self.assertLessEqual(program_object.memory_budget.in_memory_size(), 1000)
+
+    def test_rewound_buffers_still_count(self):
+        program_object = BufferedProgramObject(None, "example", Namespace(), memory_budget=1000)
+        first = program_object.save_buffer("[fname]_first.txt")
+        first.write("a" * 800)
+        first.seek(0)
+        self.assertEqual(program_object.memory_budget.in_memory_size(), 800)
+        second = program_object.save_buffer("[fname]_second.txt")
+        second.writelines(["b" * 100] * 3)
+        self.assertTrue(first.is_on_disk())
+        self.assertEqual(program_object.memory_budget.in_memory_size(), 300)
+        second.reset()
+        self.assertEqual(program_object.memory_budget.in_memory_size(), 0)
+
+    def test_zip_content(self):
+        program_object = BufferedProgramObject(None, "example", Namespace(), memory_budget=10)
+        with program_object.open_buffer("[fname]_text.txt") as buffer:
+            buffer.write("line 1\nline 2\n")
+        with program_object.open_buffer("[fname]_text.txt", "a") as buffer:
+            buffer.write("line 3\n")
+        program_object.open_buffer("[fname]_binary.bin", "w+b").write(b"\x00\x01")
+
+        zip_bytes, name = program_object.to_zip("resultsFor-[fname].zip")
+        self.assertEqual(name, "resultsFor-example.zip")
+        with zipfile.ZipFile(io.BytesIO(zip_bytes)) as zip_file:
+            self.assertEqual(zip_file.read("example_text.txt"), b"line 1\nline 2\nline 3\n")
+            self.assertEqual(zip_file.read("example_binary.bin"), b"\x00\x01")
+        program_object.cleanup()
+        self.assertEqual(program_object.buffer_dict, dict())
+
+    def test_stage_events(self):
+        program_object = BufferedProgramObject(None, "example", Namespace())
+        own_events, global_events = [], []
+        program_object.add_stage_listener(own_events.append)
+        with listen_to_stages(global_events.append):
+            with program_object.stage("beacons"):
+                program_object.progress("beacons", 1, 2)
+        with program_object.stage("zipping"): pass
+        self.assertListEqual([(event.stage, event.event, event.done, event.total) for event in global_events],
+                             [("beacons", "started", None, None), ("beacons", "progress", 1, 2), ("beacons", "finished", None, None)])
+        self.assertEqual(len(own_events), 5)
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import tempfile
+import zipfile
+from argparse import Namespace
+from pathlib import Path
+from unittest import TestCase, skipUnless
+
+from ... import checkpoints
+from ...RNAProbesUtil import ProgramObject
+
+
+@skipUnless(checkpoints.CHECKPOINTS_ENABLED, "checkpoints are disabled")
+class Test(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.output_dir = Path(self.directory.name) / "output"
+        self.input_path = Path(self.directory.name) / "example.ct"
+        self.input_path.write_text("10 example\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_stages(self, probe_length: int, resume: bool, fail_second: bool = False) -> tuple[ProgramObject, list[str]]:
+        ran = []
+        def stage(name, value):
+            ran.append(name)
+            if fail_second and name == "second": raise KeyboardInterrupt()
+            return value
+        program_object = ProgramObject(self.output_dir, "example", Namespace(probe_length=probe_length, quiet=True))
+        program_object.use_checkpoints("test", [self.input_path], resume=resume)
+        try:
+            first = program_object.run_stage("first", lambda: stage("first", [1, 2]))
+            program_object.set_result_args(first_total=sum(first))
+            program_object.run_stage("second", lambda: stage("second", "done"))
+        except KeyboardInterrupt:
+            pass
+        return program_object, ran
+
+    def test_resume_skips_finished_stages(self):
+        self.run_stages(20, resume=False, fail_second=True)
+        program_object, ran = self.run_stages(20, resume=True)
+        self.assertEqual(ran, ["second"])
+        self.assertEqual(program_object.resumed_stages, ["first"])
+        self.assertEqual(program_object.result_obj.first_total, 3)
+
+    def test_changed_inputs_run_again(self):
+        self.run_stages(20, resume=False)
+        _, ran = self.run_stages(21, resume=True)
+        self.assertEqual(ran, ["first", "second"])
+        self.input_path.write_text("11 example\n")
+        _, ran = self.run_stages(21, resume=True)
+        self.assertEqual(ran, ["first", "second"])
+        _, ran = self.run_stages(21, resume=False) #not resuming removes the checkpoints
+        self.assertEqual(ran, ["first", "second"])
+
+    def test_checkpoints_arent_zipped(self):
+        program_object, _ = self.run_stages(20, resume=False)
+        with program_object.open_buffer("[fname]_result.txt") as file:
+            file.write("result")
+        zip_path = self.output_dir.parent / "result.zip"
+        with open(zip_path, "wb") as file:
+            program_object.write_zip(file, "[fname].zip")
+        with zipfile.ZipFile(zip_path) as zip_file:
+            self.assertEqual(zip_file.namelist(), ["example_result.txt"])
+        program_object.remove_checkpoints()
+        self.assertFalse(program_object.file_path(checkpoints.DIRECTORY_NAME).exists())
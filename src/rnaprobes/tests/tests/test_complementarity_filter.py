@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from pathlib import Path
+from unittest import TestCase
+
+import pandas as pd
+
+from ...smFISH.ComplementarityFilter import ComplementarityFilter
+from ...smFISH.smFISH import INTERMOLECULAR_DG_CUTOFF
+
+test_dir = Path(__file__).parent.parent
+test_file_path = test_dir / "test_example_files" / "smFISH" / "intermolecular"
+
+COMBINED_OUTPUTS = ("large/example_large_combined_output.csv",
+                    "super_large/example_super_large_possible_matching_probes_combined_output.csv")
+
+class Test(TestCase):
+    def test_no_strong_pair_missed(self):
+        for file in COMBINED_OUTPUTS:
+            with self.subTest(file=file):
+                df = pd.read_csv(test_file_path / file)
+                evaluated = get_evaluated(df)
+                missed = df[(df.DG < INTERMOLECULAR_DG_CUTOFF) & ~evaluated]
+                self.assertEqual(len(missed), 0, f"Pairs below {INTERMOLECULAR_DG_CUTOFF} kcal/mol were filtered out:\n{missed}")
+                self.assertLess(evaluated.sum(), len(df) / 2) #make sure the prefilter actually removes pairs
+
+    def test_complementary_pair(self):
+        oligo = "GGCGCGCACCTCACTATCTA"
+        complement = "TAGATAGTGAGGTGCGCGCC"
+        unrelated = "AAAAAAAAAAAAAAAAAAAA"
+        prefilter = ComplementarityFilter([oligo, complement, unrelated])
+        self.assertListEqual(prefilter.filter_pairs([(0, 1), (0, 2), (1, 2)]), [True, False, False])
+
+
+def get_evaluated(df: pd.DataFrame) -> pd.Series:
+    oligos = list(dict.fromkeys([*df["Seq#1"], *df["Seq#2"]]))
+    indices = {oligo: i for i, oligo in enumerate(oligos)}
+    prefilter = ComplementarityFilter(oligos)
+    return pd.Series(prefilter.filter_pairs(zip(df["Seq#1"].map(indices), df["Seq#2"].map(indices))), index=df.index)
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import io
+import threading
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from ...RNAUtil import CTScanner, CT_to_sscount_df, get_ct_stats, share_parsed_ct, parsed_ct_directory
+from ...util import ValidationError
+
+EXAMPLE_FILES = Path(__file__).parent.parent / "test_example_files"
+
+
+class Test(TestCase):
+    def test_chunks_match_whole_file(self):
+        path = EXAMPLE_FILES / "example_large.ct"
+        data = path.read_bytes()
+        scanner = CTScanner()
+        for start in range(0, len(data), 777): #chunks split lines
+            scanner.feed(data[start:start + 777])
+        self.assertEqual(scanner.validate(), get_ct_stats(path))
+
+    def test_malformed_line(self):
+        scanner = CTScanner()
+        scanner.feed("   3  ENERGY = -1.0  test\n    1 G       0    2    0    1\n    2 C  1\n    3 U       2    0    0    3")
+        self.assertEqual(tuple(scanner.get_stats()), (3, 1))
+        self.assertEqual(scanner.invalid_line, 3)
+        self.assertRaises(ValidationError, scanner.validate)
+
+    def test_broken_file(self):
+        scanner = CTScanner()
+        scanner.feed((EXAMPLE_FILES / "broken_file.ct").read_bytes())
+        self.assertRaises(ValidationError, scanner.validate)
+
+    def test_shared_parsed_ct(self):
+        data = (EXAMPLE_FILES / "example_small.ct").read_bytes()
+        expected, expected_count = CT_to_sscount_df(io.BytesIO(data))
+        with TemporaryDirectory() as directory, share_parsed_ct(Path(directory)):
+            CT_to_sscount_df(io.BytesIO(data))
+            self.assertEqual(len(list(Path(directory).glob("*.pickle"))), 1)
+            output = io.StringIO()
+            sscount_df, structure_count = CT_to_sscount_df(io.BytesIO(data), True, output) #read from the directory
+        self.assertTrue(sscount_df.equals(expected))
+        self.assertEqual(structure_count, expected_count)
+        self.assertEqual(output.getvalue().count("\n"), len(expected))
+
+    def test_shared_parsed_ct_per_thread(self):
+        first_entered, second_left = threading.Event(), threading.Event()
+        seen = dict()
+        def first():
+            with share_parsed_ct(Path("first")):
+                first_entered.set()
+                second_left.wait(5)
+                seen["first"] = parsed_ct_directory.get()
+        def second():
+            first_entered.wait(5)
+            with share_parsed_ct(Path("second")):
+                seen["second"] = parsed_ct_directory.get()
+            second_left.set()
+        threads = [threading.Thread(target=first), threading.Thread(target=second)]
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+        self.assertEqual(seen, dict(first=Path("first"), second=Path("second")))
+        self.assertIsNone(parsed_ct_directory.get())
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import random
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from ...PinMol import homology_index
+
+COMPLEMENT = str.maketrans("ACGU", "UGCA")
+
+
+def get_probe(target: str) -> str:
+    """:return: the probe that binds a target, which blast finds on the target's minus strand"""
+    return target.translate(COMPLEMENT)[::-1]
+
+
+class Test(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        random.seed(0)
+        self.transcripts = ["".join(random.choice("ACGU") for _ in range(random.randint(100, 1000))) for _ in range(50)]
+        self.fasta_path = Path(self.directory.name) / "transcripts.fa"
+        self.fasta_path.write_text("".join(f">transcript{i}\n{sequence[:60]}\n{sequence[60:]}\n" for i, sequence in enumerate(self.transcripts)))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_positives(self):
+        index = homology_index.get_index(self.fasta_path)
+        target = self.transcripts[3][200:220]
+        mismatched = target[:10] + ("A" if target[10] != "A" else "C") + target[11:]
+        results = homology_index.get_homology_results([get_probe(target), get_probe(mismatched), "ACGUN" * 4], index)
+        self.assertEqual(list(results.columns), ["Pick#", "Positives", "Gaps"])
+        self.assertEqual(list(results["Pick#"]), [1, 2, 3])
+        positives = list(results["Positives"])
+        self.assertLess(positives[0], 20) #hits across the whole probe aren't counted, like with blast
+        self.assertEqual(positives[1], 19)
+        self.assertEqual(positives[2], 0) #no seeds
+
+    def test_matches_brute_force(self):
+        index = homology_index.get_index(self.fasta_path)
+        for _ in range(10):
+            transcript = random.choice(self.transcripts)
+            start = random.randrange(len(transcript) - 20)
+            target = list(transcript[start:start + 20])
+            for _ in range(random.randint(1, 3)): target[random.randrange(20)] = random.choice("ACGU")
+            probe = get_probe("".join(target))
+            self.assertEqual(index.get_max_positives(probe), self.get_max_positives(probe), probe)
+
+    def test_index_is_rebuilt_when_fasta_changes(self):
+        index = homology_index.get_index(self.fasta_path)
+        self.assertEqual(index.info["sequences"], 50)
+        self.assertIs(type(homology_index.get_index(self.fasta_path).sequence), type(index.sequence))
+        with open(self.fasta_path, "a") as file:
+            file.write(">extra\nACGUACGUNNACGU\n")
+        self.assertEqual(homology_index.get_index(self.fasta_path).info["sequences"], 51)
+
+    def get_max_positives(self, probe: str) -> int:
+        """Extend every diagonal with a seed, one base at a time"""
+        query, k, best = get_probe(probe), homology_index.DEFAULT_K, 0
+        for transcript in self.transcripts:
+            for diagonal in range(-len(query) + 1, len(transcript)):
+                matches = [0 <= diagonal + i < len(transcript) and transcript[diagonal + i] == base for i, base in enumerate(query)]
+                if "1" * k not in "".join(str(int(match)) for match in matches): continue
+                score = positives = best_score = best_positives = 0
+                for match in matches:
+                    if score <= 0: score = positives = 0
+                    score += homology_index.MATCH_SCORE if match else homology_index.MISMATCH_SCORE
+                    positives += match
+                    if score > best_score: best_score, best_positives = score, positives
+                if best_positives < len(query): best = max(best, best_positives)
+        return best
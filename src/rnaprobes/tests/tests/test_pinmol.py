@@ -7,7 +7,10 @@ from unittest import TestCase
 import pytest
 
 from ...PinMol.pinmol import run
-from ...PinMol import pinmol
+from ...PinMol import pinmol, beacon_svgs
+from ... import hairpin_svg
+import io
+from xml.etree import ElementTree
 import shlex
 
 from rnaprobes.util import safe_remove_tree
@@ -24,24 +27,57 @@ test_file_path = test_dir / "test_example_files" / "PinMol"
 class Test(TestCase):
     def test_large(self):
         run_test(self, "example_large", "no_blast/large",
-                 r'-p 20 -f [fpath] --start 1 --end -1 -w -nb')
+                 r'-p 20 -f [fpath] --start 1 --end -1 -w -nb --render-svgs')
     def test_small(self):
         run_test(self, "example_small", "no_blast/small",
-                 r'-p 20 -f [fpath] --start 1 --end -1 -w -nb')
+                 r'-p 20 -f [fpath] --start 1 --end -1 -w -nb --render-svgs')
     def test_super_large(self):
         run_test(self, "example_super_large", "no_blast/super_large",
-                 r'-p 20 -f [fpath] --start 1 --end -1 -w -nb')
+                 r'-p 20 -f [fpath] --start 1 --end -1 -w -nb --render-svgs')
 
     def test_blast_program(self):
         run_test(self, "example_large", "blast/large",
-                 fr'-p 20 -f [fpath] --start 1 --end -1 -w -bf "{test_file_path / "blast" / "example_large_blast_result.xml"}"')
+                 fr'-p 20 -f [fpath] --start 1 --end -1 -w -bf "{test_file_path / "blast" / "example_large_blast_result.xml"}" --render-svgs')
 
     # def test_
+
+FOLDED_BEACON = ("""   12  ENERGY = -1.2  1 at base # 5 molecular beacon
+    1 G       0    2   12    1
+    2 C       1    3   11    2
+    3 G       2    4   10    3
+    4 A       3    5    0    4
+    5 A       4    6    0    5
+    6 U       5    7    0    6
+    7 U       6    8    0    7
+    8 A       7    9    0    8
+    9 A       8   10    0    9
+   10 C       9   11    3   10
+   11 G      10   12    2   11
+   12 C      11    0    1   12
+   12  ENERGY = -0.5  1 at base # 5 molecular beacon
+""")
+
+class TestBeaconSvgs(TestCase):
+    def test_structure_round_trip(self):
+        structure = beacon_svgs.read_ct(io.StringIO(FOLDED_BEACON))
+        self.assertEqual(structure.sequence, "GCGAAUUAACGC")
+        self.assertListEqual(structure.pairs, [(1, 12), (2, 11), (3, 10)])
+        self.assertEqual(beacon_svgs.to_ct(structure), "".join(FOLDED_BEACON.splitlines(keepends=True)[:13]))
+
+        svg = hairpin_svg.draw_svg(structure.sequence, structure.pairs, structure.title)
+        self.assertEqual(len(ElementTree.fromstring(svg).findall(".//{http://www.w3.org/2000/svg}circle")), 12)
+        self.assertIsNone(hairpin_svg.draw_svg("GCGAAAACGCGCGAAAACGC", [(1, 10), (2, 9), (11, 20), (12, 19)])) #two stem-loops, left to draw
+
+        file = io.StringIO()
+        beacon_svgs.dump({"example_1.svg": structure}, file)
+        file.seek(0)
+        self.assertDictEqual(beacon_svgs.load(file), {"example_1.svg": structure})
+
 class TestSlow(TestCase):
     @pytest.mark.slow
     def test_slow(self):
         run_test(self, "example_super_large", "no_blast/super_large",
-                 r'-p 20 -f [fpath] --start 1 --end -1 -w -nb')
+                 r'-p 20 -f [fpath] --start 1 --end -1 -w -nb --render-svgs')
 
 
 def run_test(tester: TestCase, file_stem: str, reference_dir_name: str,
@@ -72,8 +108,12 @@ def verify_program_data(tester: TestCase, file_stem: str, output_dir: Path, refe
 
     for svg_num in range(1, svg_max+1):
         ref_svg = reference_dir / svg_files_reference_dir / f"{file_stem}_{svg_num}.svg"
-        if ref_svg.exists():
-            assert_files_equal(tester, output_dir / svg_files_output_dir / f"{file_stem}_{svg_num}.svg", ref_svg)
+        if ref_svg.exists(): #the reference files were drawn by RNAstructure's draw, so only the bases must match
+            tester.assertEqual(get_svg_bases(output_dir / svg_files_output_dir / f"{file_stem}_{svg_num}.svg"), get_svg_bases(ref_svg))
+
+def get_svg_bases(path: Path) -> str:
+    texts = (element.text or "" for element in ElementTree.parse(path).iter() if element.tag.endswith("text"))
+    return "".join(text for text in texts if len(text) == 1 and text.isalpha())
 
 def assert_files_equal(tester: TestCase, test_path: Path, ref_path: Path):
     try:
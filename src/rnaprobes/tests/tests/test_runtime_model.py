@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import tempfile
+from argparse import Namespace
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+from ... import runtime_model
+from ...RNAUtil import CTStats
+
+
+class Test(TestCase):
+    def test_fit_recovers_power_law(self):
+        default = dict(coefficient=1, length_exponent=1, structure_exponent=0)
+        samples = [(length, structures, 2e-9 * length ** 3 * structures)
+                   for length in (500, 1000, 2000, 4000) for structures in (1, 5, 20)]
+        fitted = runtime_model.fit_stage(samples, default)
+        self.assertAlmostEqual(fitted["length_exponent"], 3, places=5)
+        self.assertAlmostEqual(fitted["structure_exponent"], 1, places=5)
+        self.assertAlmostEqual(fitted["coefficient"] / 2e-9, 1, places=5)
+
+    def test_few_samples_keep_exponents(self):
+        default = dict(coefficient=1, length_exponent=3, structure_exponent=0)
+        fitted = runtime_model.fit_stage([(1000, 20, 4.0)], default)
+        self.assertEqual(fitted["length_exponent"], 3)
+        self.assertAlmostEqual(fitted["coefficient"], 4.0 / 1000 ** 3)
+
+    def test_estimate_only_counts_running_stages(self):
+        stats = CTStats(3000, 20)
+        intermolecular = runtime_model.estimate("smFISH", stats, Namespace(intermolecular=True, csv_file=None))
+        hybeff = runtime_model.estimate("smFISH", stats, Namespace(intermolecular=False, csv_file=None))
+        self.assertAlmostEqual(intermolecular - hybeff, runtime_model.estimate_stage("smFISH", "bifold", stats))
+
+    def test_default_smFISH_delay_lengths(self):
+        def is_delayed(length: int, intermolecular: bool) -> bool:
+            with patch.object(runtime_model, "coefficients", runtime_model.DEFAULT_COEFFICIENTS): #not the ones fitted on this machine
+                return runtime_model.is_long_runtime("smFISH", CTStats(length, 1), Namespace(intermolecular=intermolecular, csv_file=None))
+        self.assertEqual([is_delayed(length, False) for length in (2400, 2600)], [False, True])
+        self.assertEqual([is_delayed(length, True) for length in (950, 1050)], [False, True])
+
+    def test_timings_are_trimmed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / runtime_model.TIMINGS_FILE_NAME
+            path.write_text("".join(f'{{"program": "TFOFinder", "number": {number}}}\n' for number in range(30)))
+            with patch.object(runtime_model, "MAX_RECORDS", 10):
+                runtime_model.trim_records(path)
+                self.assertEqual([record["number"] for record in runtime_model.read_records(path)], list(range(20, 30)))
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from pathlib import Path
+from unittest import TestCase
+
+import numpy as np
+
+from ...TFOFinder import tfofinder
+from ...RNAUtil import CT_to_sscount_df
+from ...util import DiscontinuousRange
+
+test_dir = Path(__file__).parent.parent
+example_file_path = test_dir / "test_example_files"
+
+class Test(TestCase):
+    def test_run_lengths(self):
+        mask = np.array([True, True, False, True, True, True, False, False, True])
+        self.assertListEqual(tfofinder.get_run_lengths(mask).tolist(), [2, 1, 0, 3, 2, 1, 0, 0, 1])
+
+    def test_probe_starts_match_brute_force(self):
+        for file_stem in ("example_small", "example_large"):
+            with self.subTest(file=file_stem), open(example_file_path / f"{file_stem}.ct") as file:
+                sscount_df, _ = CT_to_sscount_df(file)
+                probe_lengths = DiscontinuousRange.parse("4:30", tfofinder.probeMin, tfofinder.probeMax + 1)
+                for length, starts in tfofinder.get_consecutive_not_ss(probe_lengths, sscount_df):
+                    self.assertListEqual(starts.tolist(), brute_force_starts(sscount_df, length))
+
+def brute_force_starts(sscount_df, length: int) -> list[int]:
+    valid = [base in ("A", "G") and sscount != 20 for base, sscount in zip(sscount_df.base, sscount_df.sscount)]
+    return [i for i in range(len(valid) - length + 1) if all(valid[i:i + length])]
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from ...TFOFinder import batch, tfofinder
+from ...util import DiscontinuousRange
+
+test_dir = Path(__file__).parent.parent
+example_file_path = test_dir / "test_example_files"
+
+class Test(TestCase):
+    def test_batch_matches_single_runs(self):
+        files = [example_file_path / "example_small.ct", example_file_path / "example_large.ct"]
+        with tempfile.TemporaryDirectory() as batch_dir, tempfile.TemporaryDirectory() as single_dir:
+            manifest = Path(batch_dir) / "manifest.txt"
+            manifest.write_text("\n".join(str(file) for file in files) + "\n")
+            summary = batch.run(f"-m {manifest} -p 5,7:12 -o {batch_dir} -j 2 -q")
+            self.assertListEqual(summary.Error.tolist(), ["", ""])
+            self.assertTrue((Path(batch_dir) / batch.SUMMARY_FILE_NAME).exists())
+
+            for file in files:
+                with self.subTest(file=file.name):
+                    tfofinder.run(f"-f {file} -p 5,7:12 -o {single_dir} -q -w")
+                    result_name = f"{file.stem}_TFO_probes.txt"
+                    self.assertEqual((Path(batch_dir) / result_name).read_text(), (Path(single_dir) / result_name).read_text())
+
+    def test_failed_file_is_reported(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            probe_lengths = DiscontinuousRange.parse("5", tfofinder.probeMin, tfofinder.probeMax + 1)
+            summary = batch.calculate_batch([example_file_path / "broken_file.ct"], probe_lengths, Path(output_dir), workers=1)
+            self.assertNotEqual(summary.Error[0], "")
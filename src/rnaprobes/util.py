@@ -2,6 +2,8 @@
 from __future__ import annotations
 
 import functools
+import importlib
+import importlib.util
 import io
 import re
 import shutil
@@ -12,8 +14,10 @@ from datetime import timedelta
 from pathlib import Path
 import argparse
 import os
+import sys
 from typing import IO, Collection
 
+subprocess_listeners: list[Callable[[str, float], None]] = [] #called with the name and runtime in seconds of each external program run
 
 class ValidationError(Exception):
     pass
@@ -207,13 +211,14 @@ def is_in_bound(min, max, *values):
 
 
 def optional_argument(request, arg_name: str, cmd_line_name: str = None, default_value = None, type: Callable =None):
+    value = request.form.get(arg_name, "") #a missing field (e.g. left out of a batch manifest) is the same as an empty one
     if cmd_line_name is not None:
-        if request.form[arg_name] != "":
-            return f" {cmd_line_name} {request.form[arg_name]}"
+        if value != "":
+            return f" {cmd_line_name} {value}"
         else:
             return f" {cmd_line_name} {default_value}" if default_value is not None else ""
     elif default_value is not None:
-        return default_value if request.form[arg_name] == "" else type(request.form[arg_name])
+        return default_value if value == "" else type(value)
     else:
         raise ValueError("Must include either cmd_line_name or default_value (or both)")
 
@@ -274,14 +279,23 @@ def value_set_arg(*values, case_sensitive=False, number=False):
 
 def get_folder_as_zip(folder_path: Path) -> bytes:
     zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zipf:
+    write_folder_to_zip(folder_path, zip_buffer)
+    return zip_buffer.getvalue()
+
+def write_folder_to_zip(folder_path: Path, file, skip_directories: list[Path] = ()) -> None:
+    """
+    Zip a folder, one file at a time
+    :param file: the path or the binary file object to write the zip to
+    :param skip_directories: subfolders to leave out
+    """
+    skipped = {Path(directory).resolve() for directory in skip_directories}
+    with zipfile.ZipFile(file, 'w', zipfile.ZIP_DEFLATED) as zipf:
         for root, dirs, files in os.walk(folder_path):
-            for file in files:
-                abs_path = os.path.join(root, file)
+            dirs[:] = [name for name in dirs if Path(root, name).resolve() not in skipped]
+            for name in files:
+                abs_path = os.path.join(root, name)
                 rel_path = os.path.relpath(abs_path, start=folder_path)
                 zipf.write(abs_path, arcname=rel_path)
-    zip_buffer.seek(0)
-    return zip_buffer.getvalue()
 
 ParsedFile = namedtuple("ParsedFile", ["parent", "stem", "suffix"])
 def parse_file_input(filein: str | Path, output_dir = None) -> ParsedFile:
@@ -346,10 +360,38 @@ _Colors = dict(
 def print_style(msg, *colors):
     print("".join(_Colors[color.upper()] for color in colors) + msg + _Colors['ENDC'])
 
+def lazy_import(name: str, package: str = None):
+    """
+    Import a module without running it until one of its attributes is used, so importing its dependencies is deferred too
+    :param name: the module's name, relative to package if it starts with a "."
+    :return: the module (already imported modules are returned as they are)
+    """
+    name = importlib.util.resolve_name(name, package)
+    if name in sys.modules: return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+class LazyFunction:
+    """A module's function, imported on its first call. Unlike the function itself it can be pickled without importing the module"""
+    def __init__(self, module_name: str, function_name: str):
+        self.module_name = module_name
+        self.function_name = function_name
+
+    def __call__(self, *args, **kwargs):
+        return getattr(importlib.import_module(self.module_name), self.function_name)(*args, **kwargs)
+
+    def __repr__(self):
+        return f"LazyFunction({self.module_name}.{self.function_name})"
+
 if __name__ == "__main__":
     print("Util should not be ran unless debugging")
     def get_lines_r(f):
         with open(f, "rb") as file:
             print(list(read_lines_reversed(file)))
 
-    print("Debug") #place breakpoint here
\ No newline at end of file
+    print("Debug") #place breakpoint here
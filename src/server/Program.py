@@ -1,39 +1,75 @@
 from __future__ import annotations
-import base64
 import json
+import os
+import pickle
 import threading
+import time
 import uuid
 from collections.abc import Callable
+from contextlib import nullcontext
+from functools import partial
 from copyreg import constructor
 from keyword import kwlist
 from pathlib import Path
 from uuid import UUID
 
-from flask import Response, jsonify, render_template, abort
+from flask import Response, jsonify, render_template, abort, send_file, url_for
 
-from ..rnaprobes.RNAProbesUtil import ProgramObject
-from ..rnaprobes.util import safe_remove_tree, is_empty
+from ..rnaprobes.RNAProbesUtil import ProgramObject, listen_to_stages
+from .job_executor import Job, QueueFullError, format_wait, get_executor, set_job_factory
+from .result_cache import MAX_CACHED_RESULTS, coalescer, get_cache_key
+from .uploads import Upload, get_upload_hashes, ingest_uploads
+from . import pre_uploads
+from .pre_uploads import UploadExpiredError, add_uploads_from_tokens
+from .job_store import ACTIVE_STATES, COMPLETE, DELIVERED, FAILED, QUEUED, RUNNING, JobRecord, JobStore, get_job_store
+from .progress import ProgressRecorder, get_progress_data, stream_progress, stream_slots
+from .shared_jobs import WorkStealer, get_instance_id, get_shared_backend, package_job
+from . import metrics, lazy_svgs
+from .janitor import Janitor, SweepResult
+from ..rnaprobes.util import safe_remove_tree, lazy_import
 from ..rnaprobes.util import ValidationError
 import traceback
 
+RNAUtil = lazy_import("..rnaprobes.RNAUtil", __package__)
+
 IS_DELAYED = "_delayed_"
+ESTIMATED_COST = "_estimated_cost_"
+#programs ran while the user waits, at once in each webserver process. The webserver has threads for progress streams,
+#not to run more programs: each uses a lot of memory, and the server has 512 MB
+MAX_INLINE_RUNS = int(os.environ.get("RNAPROBES_INLINE_RUNS", 1))
+inline_runs = threading.BoundedSemaphore(max(1, MAX_INLINE_RUNS))
+
+files_root = Path(os.getcwd()) / "user-files"
+results_root = files_root / "results"
+def set_files_root(root: Path):
+    """
+    :param root: the folder holding all user files. Results of programs that aren't delayed are saved in its results folder
+    """
+    global files_root, results_root
+    files_root, results_root = root, root / "results"
+    janitor.root = root
+    pre_uploads.set_root(root)
 
 def send_error_response(error: BaseException, **kwargs):
     print(traceback.print_exc())
-    if isinstance(error, ValidationError):
+    if isinstance(error, UploadExpiredError): #the browser sends the file again
+        return str(error), 410
+    elif isinstance(error, ValidationError):
         return str(error), 400
+    elif isinstance(error, QueueFullError): #clients can retry once the server likely has room
+        return str(error), 503, {} if error.wait is None else {"Retry-After": str(max(1, round(error.wait)))}
     elif isinstance(error, Exception):
         return str(error), 500
     else:
         abort(500)
 
 class Program:
-    def _get_args(self, request, output_dir: Path, error_message: str="Something went wrong") -> tuple[dict, bool]:
+    def _get_args(self, request, output_dir: Path, uploads: dict[str, Upload], error_message: str="Something went wrong") -> tuple[dict, bool, float | None]:
         try:
-            kwargs : dict = self._get_args_raw(request, output_dir)
+            kwargs : dict = self._get_args_raw(request, output_dir, uploads)
             is_delayed = IS_DELAYED in kwargs
             kwargs.pop(IS_DELAYED, None)
-            return kwargs, is_delayed
+            return kwargs, is_delayed, kwargs.pop(ESTIMATED_COST, None)
         except Exception as e:
             raise ValidationError(f"{error_message}: {str(e)}") from e
 
@@ -44,43 +80,82 @@ class Program:
             raise ValidationError(f"{error_message}: {str(e)}") from e
 
     def _run_program(self, kwargs: dict, job_id: UUID, error_message: str= "Something went wrong", validate_err_msg: str=None, is_delayed: bool = False):
-        try:
-            return self._run_program_raw(**kwargs)
-        except ValidationError as e:
-            raise ValidationError(f"{validate_err_msg or error_message}: {str(e)}") from e
-        except Exception as e:
-            raise Exception(f"{error_message}: {str(e)}") from e
+        return run_with_error_messages(self._run_program_raw, kwargs, error_message, validate_err_msg, program_name=self.name)
 
 
-    def _get_response(self, result: ProgramObject, job_id, **kwargs) -> dict:
-        zip_bytes, zipfile_name = self.get_response_bytes(result, **kwargs)
-        return self._get_response_from_zip(job_id, zip_bytes, zipfile_name)
+    def _get_response(self, result: ProgramObject, job_id, cache_key: str = None, **kwargs) -> dict:
+        path = save_result(result, self.get_zip_name(), results_root / str(job_id))
+        store = get_job_store()
+        store.add(job_id, self.name, path.parent, cache_key=cache_key)
+        store.complete(job_id, path)
+        return self._get_response_from_path(job_id, path)
 
     def remove_directory(self, output_dir):
         safe_remove_tree(output_dir, self.root_dir)
 
-    def _get_program_object(self, is_delayed, kwargs: dict, job_id: UUID, output_dir: Path, validate_err_msg: str, runtime_err_msg: str):
+    def _get_program_object(self, is_delayed, kwargs: dict, job_id: UUID, output_dir: Path, validate_err_msg: str, runtime_err_msg: str,
+                            cache_key: str = None):
         constructor = DelayedRunnableProgram if is_delayed else RunnableProgram
-        return constructor(self, kwargs, job_id, output_dir, validate_err_msg, runtime_err_msg)
+        return constructor(self, kwargs, job_id, output_dir, validate_err_msg, runtime_err_msg, cache_key=cache_key)
+
+    def _get_reused_response(self, cache_key: str | None, kwargs: dict) -> dict | tuple[dict, int] | None:
+        """
+        Get the response of an identical request that is running or finished, so its result can be shared
+        :return: the response, or None if there isn't a reusable job
+        """
+        if cache_key is None: return None
+        job = get_job_store().find_reusable(cache_key)
+        if job is None: return None
+        if job.state in ACTIVE_STATES:
+            runnable = DelayedRunnableProgram(self, kwargs, UUID(job.id), Path(job.directory), "", "")
+            return runnable._get_running_response(get_executor().get_position(UUID(job.id)) or 0)
+        if not Path(job.result_path).exists(): return None
+        return self._get_response_from_path(UUID(job.id), Path(job.result_path))
 
-    def run(self, request, validate_err_msg: str, runtime_err_msg: str) -> dict | tuple[str, int]:
+    def run(self, request, validate_err_msg: str, runtime_err_msg: str, owner: str = None) -> dict | tuple[str, int]:
+        """
+        :param owner: who sent the request (e.g. the visitor id), used to share the job queue fairly
+        """
         kwargs = dict()
         output_dir, runnable = None, None
+        start = time.perf_counter()
         try:
             job_id, output_dir = self.set_id()
-            kwargs, is_delayed = self._get_args(request, output_dir)
+            uploads = add_uploads_from_tokens(request, ingest_uploads(request)) #the only time the uploads are read from the request
+            kwargs, is_delayed, cost = self._get_args(request, output_dir, uploads)
             kwargs = self._validate_args(kwargs, validate_err_msg) #join the result with kwargs
-            runnable = self._get_program_object(is_delayed, kwargs, job_id, output_dir, validate_err_msg, runtime_err_msg)
-            return runnable.run(self._run_program, self._get_response)
+            cache_key = get_cache_key(self.name, get_upload_hashes(uploads), kwargs)
+            with coalescer.share(cache_key if not is_delayed else None): #delayed jobs are shared through the job store
+                reused = self._get_reused_response(cache_key, kwargs)
+                if cache_key is not None: metrics.count("rnaprobes_cache_requests_total", "miss" if reused is None else "hit")
+                if reused is not None: return reused
+                runnable = self._get_program_object(is_delayed, kwargs, job_id, output_dir, validate_err_msg, runtime_err_msg, cache_key)
+                runnable.owner, runnable.cost = owner, cost
+                runnable.parsed_ct_dir = next((upload.parsed_ct_dir for upload in uploads.values() if upload.parsed_ct_dir), None)
+                return runnable.run(self._run_program, self._get_response)
         except BaseException as e:
+            count_error(self.name, e)
             return send_error_response(e, **kwargs)
         finally:
             if not (output_dir is None or isinstance(runnable, DelayedRunnableProgram)): self.remove_directory(output_dir)
+            metrics.observe("rnaprobes_request_duration_seconds", time.perf_counter() - start, self.name)
+
+    def prepare_delayed(self, request, uploads: dict[str, Upload], job_id: UUID, output_dir: Path, validate_err_msg: str,
+                        runtime_err_msg: str) -> DelayedRunnableProgram:
+        """
+        Get and validate the arguments of a job that is delayed regardless of its cost (e.g. one of a batch). Submit it with submit
+        :raises ValidationError: if the arguments are invalid
+        """
+        kwargs, _, cost = self._get_args(request, output_dir, uploads, validate_err_msg)
+        runnable = DelayedRunnableProgram(self, self._validate_args(kwargs, validate_err_msg), job_id, output_dir, validate_err_msg, runtime_err_msg)
+        runnable.cost = cost
+        return runnable
 
     def __init__ (self, name: str, get_args: Callable, validate_args: Callable, run_program: Callable, root_dir, output_dir : Path = None, folder_not_needed = False):
         """
         Create a Program object
-        :param get_args: Get all the args needed for validating and running the program. If some are not needed in validate or run_program,
+        :param get_args: Get all the args needed for validating and running the program, from the request, the output directory
+        and the request's ingested uploads (see uploads.ingest_uploads). If some are not needed in validate or run_program,
         add **ignore to the function signature
         :param validate_args: the function ran to make sure that all the arguments are valid
         :param run_program: run the program itself, returning a result
@@ -104,90 +179,339 @@ class Program:
             output_dir.mkdir(parents=True)
         return job_id, output_dir
 
-    def get_response_bytes(self, result: ProgramObject, **kwargs) -> tuple[bytes, str]:
-        return result.to_zip(f"{self.name}ResultsFor-[fname].zip")
+    def get_zip_name(self) -> str:
+        return f"{self.name}ResultsFor-[fname].zip"
 
-    def _get_response_from_zip(self, job_id: UUID, zip_bytes: bytes, zipfile_name: str):
-        zip_file_encoded = base64.b64encode(zip_bytes).decode("utf-8")
-        return dict(zip=zip_file_encoded, status="complete", html=render_template(
+    def _get_response_from_path(self, job_id: UUID, path: Path):
+        return dict(download_url=url_for("download_result", id=str(job_id)), files_url=url_for("result_files", id=str(job_id)),
+                    table_url=url_for("result_table", id=str(job_id)), file_url=url_for("result_file", id=str(job_id)), status="complete", html=render_template(
             'request-results/request-completed.html', program=self.name,
-            filename=zipfile_name, id=str(job_id)))
+            filename=path.name, id=str(job_id)))
     def set_extra_notification_string_callback(self, func: Callable[dict, str]):
         self.get_extra_notification = func
         return self
 
     def get_delayed_response(self, output_dir: Path, job_id: UUID):
-        return DelayedRunnableProgram.get_current_result(self, self._get_response_from_zip, output_dir, job_id)
+        return DelayedRunnableProgram.get_current_result(self, self._get_response_from_path, output_dir, job_id)
 
 class RunnableProgram:
-    def __init__(self, program: Program, kwargs: dict, job_id: UUID, output_dir: Path, validate_err_msg: str, runtime_err_msg: str):
+    def __init__(self, program: Program, kwargs: dict, job_id: UUID, output_dir: Path, validate_err_msg: str, runtime_err_msg: str,
+                 cache_key: str = None):
         self.program = program
+        self.cache_key = cache_key
+        self.owner = None
+        self.cost = None
         self.kwargs = kwargs
         self.job_id = job_id
         self.output_dir = output_dir
         self.runtime_err_msg = runtime_err_msg
         self.validate_err_msg=validate_err_msg
+        self.parsed_ct_dir = None #where the ct file may already be parsed (see RNAUtil.share_parsed_ct)
 
     def run(self, run_program, get_response):
-        result = run_program(self.kwargs, self.job_id, error_message=self.runtime_err_msg, validate_err_msg=self.validate_err_msg)
-        return get_response(result, self.job_id, **self.kwargs)
+        with inline_runs, RNAUtil.share_parsed_ct(self.parsed_ct_dir) if self.parsed_ct_dir is not None else nullcontext():
+            result = run_program(self.kwargs, self.job_id, error_message=self.runtime_err_msg, validate_err_msg=self.validate_err_msg)
+        return get_response(result, self.job_id, cache_key=self.cache_key, **self.kwargs)
 
 
 result_dir_name = "program-result"
-error_file_name = "error.json"
+job_file_name = "job.pickle"
+partial_file_name = ".partial.zip"
+INTERRUPTED_MESSAGE = "The job was stopped unexpectedly. Please run it again"
+DELETED_MESSAGE = "Your output has been deleted from the system (or was never ran). Please run it again"
 
 class DelayedRunnableProgram(RunnableProgram):
-    def run(self, run_program, get_response):
-        threading.Thread(target=self._run_in_background, args=(run_program, get_response)).start()
-
-        return self._get_running_response()
+    group_id = None #the batch the job is part of (see batch.py)
 
-    def _get_running_response(self):
-        return dict(id=str(self.job_id), status="running", html=render_template(
-            'request-results/request-received.html', program=self.program.name, delayed=True, extra_notification = self.program.get_extra_notification(self.kwargs))), 202
+    def run(self, run_program, get_response):
+        return self._get_running_response(self.submit())
 
-    def _run_in_background(self, run_program, get_response):
-        output_dir = self.output_dir / result_dir_name
-        output_dir.mkdir(exist_ok=False, parents=True) #if it exists, we have a collision
+    def submit(self, always_queue: bool = False) -> int:
+        """
+        Save the job and queue it
+        :param always_queue: skip admission control, see JobExecutor.admit
+        :return: the job's position in the queue
+        :raises QueueFullError: if the job was rejected, after which it is removed again
+        """
         try:
-            result = run_program(self.kwargs, self.job_id, error_message=self.runtime_err_msg, validate_err_msg=self.validate_err_msg)
-            bytes, name = self.program.get_response_bytes(result)
-            with open(output_dir / name, "wb") as zip_file:
-                zip_file.write(bytes)
-            result.cleanup()
-        except BaseException as e:
-            write_error_response(e, output_dir / error_file_name, **self.kwargs)
+            submit_all([self], always_queue)
+        except QueueFullError:
+            safe_remove_tree(self.output_dir, files_root) #the caller only removes the directory of programs that aren't delayed
+            raise
+        return get_executor().get_position(self.job_id) or 0
 
-    @staticmethod
-    def get_current_result(program: Program, get_response_from_zip, output_dir: Path, id: UUID):
-        if not output_dir.exists():
-            return 400, "Your output has been deleted from the system (or was never ran). Please run it again"
-        if not (output_dir / result_dir_name).exists() or is_empty(output_dir / result_dir_name):
-            return json.dumps(dict(status="running", id=str(id))), 202
+    def add_to_store(self, store: JobStore, tags: tuple[float, float]):
+        """
+        Save the job file, and queue the job in the job store
+        :param tags: the job's place in the queue, see JobExecutor.admit
+        """
+        run_program = self.program._run_program_raw
+        if self.parsed_ct_dir is not None: run_program = partial(run_sharing_parsed_ct, self.parsed_ct_dir, run_program)
+        save_job_file(self.output_dir, (run_program, self.kwargs, self.program.get_zip_name(), self.runtime_err_msg, self.validate_err_msg))
+        store.add(self.job_id, self.program.name, self.output_dir, cache_key=self.cache_key, group_id=self.group_id, owner=self.owner,
+                  cost=self.cost, tags=tags)
+
+    def publish(self):
+        """Let other machines run the job, if jobs are shared. A batch's jobs stay on the machine answering its status"""
+        shared = get_shared_backend() if self.group_id is None else None
+        if shared is None: return
+        publish_job(shared, self.job_id, self.program.name, self.output_dir)
+        if get_job_store().get(self.job_id).state != QUEUED: #another process of this machine started it before it was published
+            shared.start(str(self.job_id))
 
-        return DelayedRunnableProgram.send_final_result(program, get_response_from_zip, output_dir, id)
+    def _get_running_response(self, queue_position: int = 0):
+        wait = get_executor().get_estimated_wait(self.job_id) or 0
+        return dict(id=str(self.job_id), status="running", queue_position=queue_position, estimated_wait=round(wait),
+                    progress_url=url_for("progress_stream", id=str(self.job_id)), html=render_template(
+            'request-results/request-received.html', program=self.program.name, delayed=True, queue_position=queue_position,
+            estimated_wait=format_wait(wait), extra_notification = self.program.get_extra_notification(self.kwargs))), 202
 
     @staticmethod
-    def send_final_result(program: Program, get_response_from_zip, output_dir: Path, id: UUID):
-        result_dir = output_dir / result_dir_name
-        try:
-            if (result_dir / error_file_name).exists():
-                return send_error_from_file(result_dir / error_file_name)
-            else:
-                path = next(result_dir.iterdir())
-                with open(path, "rb") as file:
-                    return get_response_from_zip(id, file.read(), path.name)
-        finally:
+    def get_current_result(program: Program, get_response_from_path, output_dir: Path, id: UUID):
+        store = get_job_store()
+        job = store.get(id)
+        status = get_shared_status(id, job)
+        if status is not None: #the job is run (or was taken) by another machine
+            if status["state"] in ACTIVE_STATES:
+                return json.dumps(dict(status="running", id=str(id), progress=get_progress_data(status.get("progress"))["description"],
+                                       progress_url=url_for("progress_stream", id=str(id)))), 202
+            if status["state"] == FAILED:
+                return status["error_message"], status["error_code"]
+            job = fetch_shared_result(id, job, status)
+        if job is None:
+            return DELETED_MESSAGE, 400
+        if job.state in ACTIVE_STATES:
+            position = get_executor().get_position(id) #unknown if the job was submitted to another webserver process
+            queue_info = {} if position is None else dict(queue_position=position, estimated_wait=round(get_executor().get_estimated_wait(id) or 0))
+            return json.dumps(dict(status="running", id=str(id), progress=get_progress_data(job.progress)["description"],
+                                   progress_url=url_for("progress_stream", id=str(id)), **queue_info)), 202
+        if job.state == FAILED: #kept until it expires, since identical requests may be waiting on the same job
             program.remove_directory(output_dir)
+            return job.error_message, job.error_code
+        if not Path(job.result_path).exists():
+            return DELETED_MESSAGE, 400
+        store.transition(id, (COMPLETE,), DELIVERED)
+        return get_response_from_path(id, Path(job.result_path)) #the result is kept for download until it expires
+
+def submit_all(runnables: list[DelayedRunnableProgram], always_queue: bool = False):
+    """
+    Save and queue jobs of a single owner as a whole: either all of them are admitted, or none is
+    :param always_queue: skip admission control, see JobExecutor.admit
+    :raises QueueFullError: if the jobs were rejected. Their directories are kept
+    """
+    store, executor = get_job_store(), get_executor()
+    with store.transaction(): #no other process can admit a job in between
+        tags = executor.admit(runnables[0].owner, [runnable.cost for runnable in runnables], always_queue,
+                              is_batch=runnables[0].group_id is not None)
+        for runnable, job_tags in zip(runnables, tags): runnable.add_to_store(store, job_tags)
+    for runnable in runnables: runnable.publish()
+    executor.dispatch()
+
+def save_result(result: ProgramObject, zip_name: str, directory: Path) -> Path:
+    """
+    Write a result's zip straight to disk. The zip only gets its final name once it's complete
+    :return: the path of the zip
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    partial_path = directory / partial_file_name
+    with open(partial_path, "wb") as file:
+        name = result.write_zip(file, zip_name)
+    path = directory / name
+    os.replace(partial_path, path)
+    remove_expired_results()
+    return path
+
+def get_result_path(job_id: UUID) -> Path | None:
+    """:return: the path of a finished job's zip, or None if it isn't finished or was removed"""
+    job = get_job_store().get(job_id)
+    status = get_shared_status(job_id, job)
+    if status is not None and status["state"] == COMPLETE: job = fetch_shared_result(job_id, job, status)
+    if job is None or job.state not in (COMPLETE, DELIVERED) or not Path(job.result_path).exists(): return None
+    return Path(job.result_path)
+
+def get_result_download(job_id: UUID):
+    """
+    Send a finished job's zip, with its svg files drawn first if they weren't yet. Supports conditional and range
+    requests, and reads the file in chunks
+    """
+    path = get_result_path(job_id)
+    if path is None: return DELETED_MESSAGE, 404
+    lazy_svgs.add_to_zip(path)
+    return send_file(path, mimetype="application/zip", as_attachment=True, download_name=path.name, conditional=True, max_age=0)
+
+def get_progress_stream(job_id: UUID):
+    """
+    Stream a delayed job's progress as Server-Sent Events. Clients should poll the result instead if this fails
+    """
+    if get_job_progress(job_id)[0] is None:
+        return DELETED_MESSAGE, 404
+    if not stream_slots.acquire():
+        return "Too many progress streams are open, poll the result instead", 503
+    response = Response(stream_progress(lambda: get_job_progress(job_id)), mimetype="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    response.call_on_close(stream_slots.release)
+    return response
+
+def get_job_progress(job_id: UUID) -> tuple[str | None, str | None]:
+    """:return: the job's state (None if it's unknown) and its recorded progress"""
+    job = get_job_store().get(job_id)
+    status = get_shared_status(job_id, job)
+    if status is not None: return status["state"], status.get("progress")
+    return (None, None) if job is None else (job.state, job.progress)
+
+#region Shared jobs
+def publish_job(shared, job_id: UUID, program_name: str, job_dir: Path):
+    """Let other machines run a delayed job (and answer queries about it)"""
+    package = package_job(job_dir)
+    try:
+        shared.publish(str(job_id), package, dict(program=program_name, directory=str(job_dir.relative_to(files_root)), created=time.time()))
+    finally:
+        os.remove(package)
+
+def get_shared_status(job_id: UUID, job: JobRecord | None) -> dict | None:
+    """
+    :param job: the job's record in this machine's job store
+    :return: the job's shared status if jobs are shared and this machine doesn't know the job's current state (it doesn't
+    know the job, or another machine took it). None otherwise
+    """
+    shared = get_shared_backend()
+    if shared is None or (job is not None and job.state not in ACTIVE_STATES): return None
+    status = shared.get(str(job_id))
+    if status is None or (job is not None and status.get("owner") in (None, get_instance_id())): return None #not taken by another machine
+    return status
+
+def fetch_shared_result(job_id: UUID, job: JobRecord | None, status: dict) -> JobRecord | None:
+    """
+    Copy a job's result that another machine saved, and record it in this machine's job store
+    :return: the job's updated record, or None if the result is gone
+    """
+    directory = Path(job.directory) / result_dir_name if job is not None else results_root / str(job_id)
+    path = directory / status["result_name"]
+    if not get_shared_backend().fetch_result(str(job_id), path): return None
+    store = get_job_store()
+    if job is None: store.add(job_id, status["program"], directory)
+    store.transition(job_id, ACTIVE_STATES, COMPLETE, finished=time.time(), result_path=str(path))
+    return store.get(job_id)
+
+def take_shared_job(job_id: str, status: dict | None):
+    """
+    Run a job taken from the shared queue in this process
+    :param status: the job's shared status. None if it expired after the job was taken, which requeue_stale later cleans up
+    """
+    if status is None: return
+    job_dir = files_root / status["directory"]
+    get_shared_backend().fetch_package(job_id, job_dir)
+    store = get_job_store()
+    if store.get(UUID(job_id)) is None: store.add(UUID(job_id), status["program"], job_dir) #unless it's from this machine
+    get_executor().dispatch()
+
+work_stealer = WorkStealer(take_shared_job)
+def start_work_stealing():
+    """Start taking jobs from the shared queue whenever this process is idle. Does nothing unless jobs are shared"""
+    work_stealer.start()
+#endregion
+
+def count_error(program_name: str, error: BaseException):
+    if isinstance(error, ValidationError): metrics.count("rnaprobes_validation_failures_total", program_name)
+    elif isinstance(error, QueueFullError): metrics.count("rnaprobes_rejected_jobs_total", program_name)
+    elif isinstance(error, Exception): metrics.count("rnaprobes_runtime_errors_total", program_name)
+
+def get_metrics_text() -> str:
+    """:return: the metrics of all of this machine's processes, in the Prometheus text format"""
+    jobs = get_job_store().count_by_state()
+    return metrics.render(dict(rnaprobes_active_jobs=jobs.get(RUNNING, 0), rnaprobes_queued_jobs=jobs.get(QUEUED, 0),
+                               rnaprobes_user_files_bytes=metrics.get_directory_size(files_root)))
+
+def remove_expired_shared_jobs():
+    shared = get_shared_backend()
+    if shared is not None: shared.remove_expired()
+
+janitor = Janitor(files_root, get_job_store, MAX_CACHED_RESULTS, after_sweep=remove_expired_shared_jobs)
+def remove_expired_results(force: bool = False) -> SweepResult | None:
+    """
+    Clean up user-files (see janitor.Janitor.sweep). Ran at most once per janitor.SWEEP_INTERVAL_SECONDS unless forced
+    :return: what was removed, or None if it wasn't ran
+    """
+    return janitor.sweep(force)
+
+def start_janitor():
+    """Clean up user-files regularly in the background, even while no job finishes"""
+    janitor.start()
+
+def save_job_file(job_dir: Path, job_spec: tuple):
+    with open(job_dir / job_file_name, "wb") as file:
+        pickle.dump(job_spec, file)
+
+def create_job(job: JobRecord, claimer_pid: int) -> Job:
+    """Create the executor job that runs a claimed job, see job_executor.set_job_factory"""
+    store, job_id = get_job_store(), UUID(job.id)
+    return Job(job_id, run_in_background, (job_id, store.path, Path(job.directory), claimer_pid),
+               on_failure=lambda error: store.fail(job_id, INTERRUPTED_MESSAGE))
+set_job_factory(create_job)
+
+def recover_interrupted_jobs() -> tuple[int, int]:
+    """
+    Run the delayed jobs again whose webserver process stopped (e.g. after a restart), or mark them failed if they were
+    already interrupted before
+    :return: the number of recovered and failed jobs
+    """
+    store = get_job_store()
+    recovered, failed = store.claim_interrupted()
+    for job in recovered:
+        job_dir = Path(job.directory)
+        if not (job_dir / job_file_name).exists():
+            store.fail(job.id, INTERRUPTED_MESSAGE)
+    get_executor().dispatch()
+    return len(recovered), len(failed)
+
+def run_sharing_parsed_ct(parsed_ct_dir: Path, run_program: Callable, **kwargs):
+    with RNAUtil.share_parsed_ct(parsed_ct_dir):
+        return run_program(**kwargs)
+
+def run_with_error_messages(run_program: Callable, kwargs: dict, error_message: str = "Something went wrong", validate_err_msg: str = None,
+                            program_name: str = None):
+    """:param program_name: if given, the run's time and stage times are recorded in the metrics"""
+    try:
+        start = time.perf_counter()
+        result = run_program(**kwargs)
+        if program_name is not None:
+            metrics.observe("rnaprobes_run_duration_seconds", time.perf_counter() - start, program_name)
+            metrics.observe_stages(program_name, getattr(result, "stage_times", dict()))
+        return result
+    except ValidationError as e:
+        raise ValidationError(f"{validate_err_msg or error_message}: {str(e)}") from e
+    except Exception as e:
+        raise Exception(f"{error_message}: {str(e)}") from e
 
-def write_error_response(error: BaseException, file: Path, **kwargs):
-    to_serialize = dict(message = str(error) if isinstance(error, Exception) else "")
-    to_serialize["code"] = 400 if isinstance(error, ValidationError) else 500
-    msg = json.dumps(to_serialize)
-    with open(file, "w") as f:
-        f.write(msg)
-
-def send_error_from_file(path: Path):
-    with open(path, "r") as file:
-        data = json.load(file)
-        return data['message'], data['code'] if data['message'] != "" else data['code']
\ No newline at end of file
+def run_in_background(job_id: UUID, db_path: Path, job_dir: Path, claimer_pid: int):
+    """
+    Run a delayed program from its job file and save its zipped result (or its error). Ran in a job executor worker process
+    :param claimer_pid: the webserver process that claimed the job, see JobStore.claim_next
+    """
+    store = get_job_store(db_path)
+    if not store.is_claimed(job_id, claimer_pid): return #it was already finished or taken over
+    program_name = store.get(job_id).program
+    shared = get_shared_backend()
+    if shared is not None and shared.get(str(job_id)) is None: shared = None #not published (yet), e.g. a batch's job
+    if shared is not None and not shared.start(str(job_id)): #another machine took it, and answers queries about it
+        store.remove(job_id)
+        safe_remove_tree(job_dir, files_root)
+        return
+    try:
+        with open(job_dir / job_file_name, "rb") as file:
+            run_program, kwargs, zip_name, error_message, validate_err_msg = pickle.load(file)
+        with listen_to_stages(ProgressRecorder(job_id, store, shared)):
+            result = run_with_error_messages(run_program, kwargs, error_message, validate_err_msg, program_name=program_name)
+            with result.stage("zipping"):
+                path = save_result(result, zip_name, job_dir / result_dir_name)
+        result.remove_checkpoints() #kept until the result is saved, in case the job is interrupted before then
+        result.cleanup()
+        if shared is not None: shared.store_result(str(job_id), path)
+        store.complete(job_id, path) #only visible once the zip is fully written
+        if shared is not None: shared.update(str(job_id), state=COMPLETE, finished=time.time(), result_name=path.name)
+    except BaseException as e:
+        message, code = str(e) if isinstance(e, Exception) else "", 400 if isinstance(e, ValidationError) else 500
+        store.fail(job_id, message, code)
+        if shared is not None: shared.update(str(job_id), state=FAILED, finished=time.time(), error_message=message, error_code=code)
+        count_error(program_name, e)
+    finally:
+        metrics.flush() #the worker process may be stopped before its next regular flush
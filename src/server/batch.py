@@ -0,0 +1,243 @@
+# Batch submissions: many ct files, each ran with one or more programs, in a single request. Every (file, program) pair
+# of the manifest is a delayed job of its own, queued through the job executor under the submitter's share of the
+# workers. The jobs share a group id, which has an aggregate status and one combined result archive. A file is ingested
+# (hashed, measured and checked) once, and the programs ran on it share its parsed ct file
+from __future__ import annotations
+
+import json
+import os
+import time
+import uuid
+import zipfile
+from collections import namedtuple
+from collections.abc import Callable
+from pathlib import Path, PurePosixPath
+from uuid import UUID
+
+from flask import url_for
+from werkzeug.datastructures import MultiDict
+from werkzeug.utils import secure_filename
+
+from ..rnaprobes.util import ValidationError, lazy_import, safe_remove_tree
+from .job_executor import QueueFullError
+from .Program import submit_all
+from .job_store import ACTIVE_STATES, COMPLETE, DELIVERED, FAILED, JobRecord, get_job_store
+from .progress import describe
+from .uploads import CHUNK_SIZE, Upload, copy_upload, ingest
+from . import lazy_svgs
+
+runtime_model = lazy_import("..rnaprobes.runtime_model", __package__)
+
+MAX_BATCH_JOBS = int(os.environ.get("RNAPROBES_MAX_BATCH_JOBS", 50)) #a batch is admitted as one job, bounded by its cost (see JobExecutor.admit)
+MAX_BATCH_BYTES = int(float(os.environ.get("RNAPROBES_MAX_BATCH_MB", 100)) * 1024 * 1024) #total size of a batch's ct files
+BATCH_DIR_NAME = "batches" #user-files/batches/<group id>/<job id>
+FILES_FIELD, ZIP_FIELD, MANIFEST_FIELD = "ct-files", "batch-zip", "manifest" #form fields
+MANIFEST_FILE_NAME = "manifest.json" #the manifest, if it's in the zip instead of the form
+GROUP_FILE_NAME = "group.json"
+PARSED_CT_DIR_NAME = "parsed-ct"
+ARCHIVE_NAME = "BatchResults.zip"
+ERRORS_FILE_NAME = "errors.txt"
+RUNNING, COMPLETE_GROUP, PARTIAL, FAILED_GROUP = "running", "complete", "partial", "failed"
+EXPIRED = "expired" #the state of a job the janitor already removed
+
+BatchEntry = namedtuple("BatchEntry", ["file", "program", "parameters"])
+BatchRequest = namedtuple("BatchRequest", ["form"]) #stands in for the request in a program's get_args
+
+def get_group_dir(root: Path, group_id: UUID) -> Path:
+    return root / BATCH_DIR_NAME / str(group_id)
+
+def parse_manifest(text: str) -> list[BatchEntry]:
+    """
+    :param text: a JSON list (or an object with a "jobs" list) of {"file": ..., "program": ..., "parameters": {...}}. The
+    parameters are the form fields of /send-request for the program, fields left out get their default
+    :raises ValidationError: if the manifest is invalid
+    """
+    try:
+        manifest = json.loads(text)
+    except ValueError as e:
+        raise ValidationError(f"The manifest isn't valid JSON: {e}") from e
+    if isinstance(manifest, dict): manifest = manifest.get("jobs")
+    if not isinstance(manifest, list) or not manifest: raise ValidationError("The manifest must be a non-empty list of jobs")
+    if len(manifest) > MAX_BATCH_JOBS: raise ValidationError(f"A batch can have at most {MAX_BATCH_JOBS} jobs")
+    entries = []
+    for number, entry in enumerate(manifest, start=1):
+        if not isinstance(entry, dict) or not isinstance(entry.get("file"), str) or not isinstance(entry.get("program"), str):
+            raise ValidationError(f"Job {number} of the manifest must have a file and a program")
+        parameters = entry.get("parameters", dict())
+        if not isinstance(parameters, dict) or any(isinstance(value, (dict, list)) for value in parameters.values()):
+            raise ValidationError(f"The parameters of job {number} must map form fields to values")
+        entries.append(BatchEntry(get_file_name(entry["file"]), entry["program"], parameters))
+    return entries
+
+def get_file_name(path: str) -> str:
+    """:return: the name a file of the batch is known by: its sanitized name, without the folders of the zip"""
+    return secure_filename(PurePosixPath(path.replace("\\", "/")).name)
+
+def to_form(parameters: dict) -> MultiDict:
+    """Convert manifest parameters to form values: checkboxes are true (checked) or false (left out)"""
+    return MultiDict({name: "on" if value is True else str(value) for name, value in parameters.items() if value not in (False, None)})
+
+def read_batch_files(request) -> tuple[dict[str, Upload], str | None]:
+    """
+    Ingest the batch's ct files, uploaded as separate files and/or in a zip
+    :return: the files by name, and the manifest if the zip has one
+    :raises ValidationError: if there are too many files, they are too large, or two have the same name
+    """
+    files, manifest, total_size = dict(), None, 0
+    def add(upload: Upload):
+        nonlocal total_size
+        if upload.filename in files: raise ValidationError(f"Two files of the batch are named {upload.filename}")
+        if len(files) >= MAX_BATCH_JOBS: raise ValidationError(f"A batch can have at most {MAX_BATCH_JOBS} files")
+        total_size += upload.size
+        if total_size > MAX_BATCH_BYTES: raise ValidationError(f"The files of a batch can be at most {MAX_BATCH_BYTES // (1024 * 1024)} MB")
+        files[upload.filename] = upload
+
+    for file_storage in request.files.getlist(FILES_FIELD):
+        if file_storage: add(ingest(file_storage.stream, get_file_name(file_storage.filename), is_ct=True))
+    archive = request.files.get(ZIP_FIELD)
+    if archive:
+        try:
+            with zipfile.ZipFile(ingest(archive.stream, archive.filename).file) as zip_file:
+                members = [info for info in zip_file.infolist() if not info.is_dir()]
+                if sum(info.file_size for info in members) > MAX_BATCH_BYTES: #the sizes are enforced while reading
+                    raise ValidationError(f"The files of a batch can be at most {MAX_BATCH_BYTES // (1024 * 1024)} MB")
+                for info in members:
+                    name = get_file_name(info.filename)
+                    if name == MANIFEST_FILE_NAME:
+                        manifest = zip_file.read(info).decode("utf-8", errors="replace")
+                    elif name.lower().endswith(".ct"):
+                        with zip_file.open(info) as stream:
+                            add(ingest(stream, name, is_ct=True))
+        except (zipfile.BadZipFile, zipfile.LargeZipFile, NotImplementedError) as e:
+            raise ValidationError(f"Can't read the zip file: {e}") from e
+    if not files: raise ValidationError("A batch must include at least one ct file")
+    return files, manifest
+
+def get_manifest_text(request, zip_manifest: str | None) -> str:
+    manifest = request.form.get(MANIFEST_FIELD)
+    if not manifest and request.files.get(MANIFEST_FIELD): manifest = request.files[MANIFEST_FIELD].read().decode("utf-8", errors="replace")
+    manifest = manifest or zip_manifest
+    if not manifest: raise ValidationError(f"A batch needs a manifest, in the {MANIFEST_FIELD} field or as {MANIFEST_FILE_NAME} in the zip")
+    return manifest
+
+def submit_batch(request, get_program: Callable, root: Path, owner: str = None, validate_err_msg: str = "The given arguments are invalid",
+                 runtime_err_msg: str = "Something went wrong") -> dict:
+    """
+    Validate every job of a batch, then queue them all. Nothing is queued if any job is invalid
+    :param get_program: get a Program by its name
+    :param root: user-files
+    :param owner: who sent the batch (e.g. the visitor id). Its jobs are queued fairly against those of other visitors
+    :return: the group id, the jobs and the urls of the batch's status and combined result
+    :raises ValidationError: if the files, the manifest or any job's parameters are invalid
+    :raises QueueFullError: if the server (or the owner) doesn't have room for all of the batch's jobs
+    """
+    files, zip_manifest = read_batch_files(request)
+    entries = parse_manifest(get_manifest_text(request, zip_manifest))
+    group_id = uuid.uuid4()
+    group_dir = get_group_dir(root, group_id)
+    runnables = []
+    try:
+        for number, entry in enumerate(entries, start=1):
+            describe_job = f"Job {number} ({entry.file}, {entry.program})"
+            if entry.file not in files: raise ValidationError(f"{describe_job}: the file isn't in the batch")
+            try:
+                program = get_program(entry.program)
+            except KeyError:
+                raise ValidationError(f"{describe_job}: unknown program") from None
+            upload, job_id = files[entry.file], uuid.uuid4()
+            job_dir = group_dir / str(job_id)
+            job_dir.mkdir(parents=True)
+            try:
+                runnable = program.prepare_delayed(BatchRequest(to_form(entry.parameters)), {"ct-file": copy_upload(upload)}, job_id, job_dir,
+                                                   validate_err_msg, runtime_err_msg)
+            except ValidationError as e:
+                raise ValidationError(f"{describe_job}: {e}") from e
+            if runnable.cost is None: runnable.cost = runtime_model.estimate(program.name, upload.ct_stats, runnable.kwargs["arguments"])
+            runnable.owner, runnable.group_id = owner, group_id
+            runnable.parsed_ct_dir = group_dir / PARSED_CT_DIR_NAME
+            runnables.append((entry, runnable))
+        with open(group_dir / GROUP_FILE_NAME, "w") as file:
+            json.dump(dict(id=str(group_id), created=time.time(), jobs=[dict(id=str(runnable.job_id), file=entry.file, program=runnable.program.name)
+                                                                      for entry, runnable in runnables]), file)
+    except BaseException:
+        safe_remove_tree(group_dir, root)
+        raise
+    finally:
+        for upload in files.values(): upload.file.close()
+    try:
+        submit_all([runnable for _, runnable in runnables]) #the batch is admitted as a whole, so its jobs are never rejected one by one
+    except QueueFullError:
+        safe_remove_tree(group_dir, root)
+        raise
+    return dict(group_id=str(group_id), status="running", status_url=url_for("batch_status", id=str(group_id)),
+                download_url=url_for("batch_download", id=str(group_id)),
+                jobs=[dict(id=str(runnable.job_id), file=entry.file, program=runnable.program.name) for entry, runnable in runnables])
+
+def read_group(root: Path, group_id: UUID) -> dict | None:
+    try:
+        with open(get_group_dir(root, group_id) / GROUP_FILE_NAME, "r") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+def get_job_fraction(job: JobRecord | None) -> float:
+    """:return: how much of a job is done, from 0 to 1. A running job counts by its current stage's progress"""
+    if job is None or job.state not in ACTIVE_STATES: return 1
+    if not job.progress: return 0
+    progress = json.loads(job.progress)
+    if progress["event"] == "progress" and progress["total"]: return 0.5 * progress["done"] / progress["total"] #stages are not weighted, so it's only half
+    return 0
+
+def get_batch_status(root: Path, group_id: UUID) -> dict | None:
+    """:return: the state of the batch and of each of its jobs, with its overall progress from 0 to 1. None if it's unknown"""
+    group = read_group(root, group_id)
+    if group is None: return None
+    records = {job.id: job for job in get_job_store().get_group(group_id)}
+    jobs, counts, fraction = [], dict(), 0
+    for entry in group["jobs"]:
+        job = records.get(entry["id"])
+        state = EXPIRED if job is None else COMPLETE if job.state == DELIVERED else job.state
+        counts[state] = counts.get(state, 0) + 1
+        fraction += get_job_fraction(job)
+        details = dict(progress=describe(job.progress)) if state in ACTIVE_STATES else \
+                  dict(error=job.error_message) if state == FAILED else \
+                  dict(download_url=url_for("download_result", id=entry["id"])) if state == COMPLETE else dict()
+        jobs.append(dict(entry, state=state, **details))
+    return dict(group_id=str(group_id), status=get_group_state(counts), total=len(jobs), counts=counts,
+                progress=round(fraction / len(jobs), 3), download_url=url_for("batch_download", id=str(group_id)), jobs=jobs)
+
+def get_group_state(counts: dict[str, int]) -> str:
+    if any(counts.get(state) for state in ACTIVE_STATES): return RUNNING
+    if not counts.get(COMPLETE): return FAILED_GROUP
+    return COMPLETE_GROUP if len(counts) == 1 else PARTIAL
+
+def get_batch_archive(root: Path, group_id: UUID) -> tuple[Path | None, str | None, int]:
+    """
+    Get the zip of all of a finished batch's results, creating it on first use. The jobs' zips are stored as they are,
+    under the name of their ct file, and the errors of failed jobs are listed in errors.txt
+    :return: the archive's path, or None with an error message and status code
+    """
+    status = get_batch_status(root, group_id)
+    if status is None: return None, "This batch was deleted from the system (or was never ran)", 404
+    if status["status"] == RUNNING: return None, f"The batch is still running ({status['progress']:.0%} done)", 409
+    if status["status"] == FAILED_GROUP: return None, "No job of this batch has a result", 404
+    path = get_group_dir(root, group_id) / ARCHIVE_NAME
+    if path.exists(): return path, None, 200
+    records = {job.id: job for job in get_job_store().get_group(group_id)}
+    partial_path = path.with_suffix(f".{os.getpid()}.partial")
+    names, errors = set(), []
+    with zipfile.ZipFile(partial_path, "w", compression=zipfile.ZIP_STORED) as archive: #the results are zips already
+        for job in status["jobs"]:
+            if job["state"] == FAILED: errors.append(f"{job['file']} ({job['program']}): {job['error']}")
+            if job["state"] != COMPLETE: continue
+            result_path = Path(records[job["id"]].result_path)
+            if not result_path.exists(): continue #removed since
+            name = f"{Path(job['file']).stem}/{result_path.name}"
+            if name in names: name = f"{Path(job['file']).stem}/{job['id']}-{result_path.name}" #the same program ran twice on a file
+            names.add(name)
+            lazy_svgs.add_to_zip(result_path)
+            with open(result_path, "rb") as source, archive.open(name, "w") as destination:
+                while chunk := source.read(CHUNK_SIZE): destination.write(chunk)
+        if errors: archive.writestr(ERRORS_FILE_NAME, "\n".join(errors) + "\n")
+    os.replace(partial_path, path) #concurrent downloads may build it twice, but never read a partial one
+    return path, None, 200
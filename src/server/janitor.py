@@ -0,0 +1,158 @@
+# Keeps user-files from growing without bound: removes finished jobs once they expire, evicts the oldest finished jobs
+# while user-files is over its disk quota, and removes job directories that no job owns anymore (e.g. of a run that was
+# interrupted by a restart). Runs in a background thread of every webserver process, but only one process sweeps at a time
+from __future__ import annotations
+
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, namedtuple
+from collections.abc import Callable
+from pathlib import Path
+from uuid import UUID
+
+from ..rnaprobes.util import safe_remove_tree
+from . import metrics
+from .job_store import JobRecord, JobStore
+
+try:
+    import fcntl
+except ImportError: #on Windows, sweeps of different processes may overlap. Each job is still only removed once
+    fcntl = None
+
+RESULT_TTL_SECONDS = float(os.environ.get("RNAPROBES_RESULT_TTL_SECONDS", 60 * 60)) #how long results can be downloaded
+DISK_QUOTA_BYTES = int(float(os.environ.get("RNAPROBES_DISK_QUOTA_MB", 1024)) * 1024 * 1024) #for all of user-files, 0 for no quota
+ORPHAN_GRACE_SECONDS = float(os.environ.get("RNAPROBES_ORPHAN_GRACE_SECONDS", 60 * 60)) #runs that aren't delayed have a directory but no job
+SWEEP_INTERVAL_SECONDS = float(os.environ.get("RNAPROBES_JANITOR_INTERVAL_SECONDS", 60))
+LOCK_FILE_NAME = ".janitor.lock"
+EXPIRED, EVICTED, ORPHANED = "expired", "evicted", "orphaned"
+
+SweepResult = namedtuple("SweepResult", ["removed", "reclaimed_bytes"]) #Counters by reason
+
+def is_job_directory_name(name: str) -> bool:
+    try:
+        UUID(name)
+        return True
+    except ValueError:
+        return False
+
+class Janitor:
+    def __init__(self, root: Path, get_store: Callable[[], JobStore], max_kept: int, ttl: float = RESULT_TTL_SECONDS,
+                 quota: int = DISK_QUOTA_BYTES, orphan_grace: float = ORPHAN_GRACE_SECONDS, interval: float = SWEEP_INTERVAL_SECONDS,
+                 after_sweep: Callable[[], None] = None):
+        """
+        :param root: user-files. Job directories are the directories in its subdirectories (e.g. user-files/pinmol/<job id>),
+        or the directories in a batch's directory (user-files/batches/<group id>/<job id>)
+        :param max_kept: only this many of the most recently finished jobs are kept, besides the ttl
+        :param after_sweep: ran after every sweep, e.g. to clean up other storage
+        """
+        self.root = root
+        self.get_store = get_store
+        self.max_kept = max_kept
+        self.ttl = ttl
+        self.quota = quota
+        self.orphan_grace = orphan_grace
+        self.interval = interval
+        self.after_sweep = after_sweep
+        self.pid = None
+
+    def sweep(self, force: bool = False) -> SweepResult | None:
+        """
+        Remove expired jobs, then the oldest finished jobs while over the quota, then stale directories without a job
+        :param force: sweep even if the last sweep (of any process) was less than interval ago
+        :return: what was removed, or None if this process didn't sweep
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        lock_path = self.root / LOCK_FILE_NAME
+        if not lock_path.exists():
+            lock_path.touch()
+            os.utime(lock_path, (0, 0)) #its modification time is the time of the last sweep
+        with open(lock_path, "a") as lock_file:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return None #another process is sweeping
+            if not force and time.time() - os.fstat(lock_file.fileno()).st_mtime < self.interval: return None
+            os.utime(lock_path)
+            result = self._sweep(self.get_store())
+        if self.after_sweep is not None: self.after_sweep()
+        return result
+
+    def _sweep(self, store: JobStore) -> SweepResult:
+        result = SweepResult(Counter(), Counter())
+        now = time.time()
+        finished = store.get_finished()
+        expired_count = max(len(finished) - self.max_kept, 0)
+        kept = []
+        for index, job in enumerate(finished):
+            if index < expired_count or job.finished < now - self.ttl: self._remove_job(store, job, EXPIRED, result)
+            else: kept.append(job)
+
+        if self.quota > 0:
+            used = metrics.measure_directory(self.root)
+            for job in kept: #oldest first
+                if used <= self.quota: break
+                used -= self._remove_job(store, job, EVICTED, result)
+            if used > self.quota:
+                print(f"user-files uses {used} bytes, over its quota of {self.quota}, but only running jobs are left", file=sys.stderr)
+
+        job_directories = {Path(directory).name for directory in store.get_directories()} | store.get_group_ids() #a batch's directory is named by its group id
+        for directory in self.get_job_directories():
+            try:
+                if directory.name in job_directories or now - directory.stat().st_mtime < self.orphan_grace: continue
+            except FileNotFoundError:
+                continue
+            self._remove_directory(directory, ORPHANED, result)
+        return result
+
+    def get_job_directories(self) -> list[Path]:
+        return [directory for parent in self.root.iterdir() if parent.is_dir()
+                for directory in parent.iterdir() if directory.is_dir() and is_job_directory_name(directory.name)]
+
+    def _remove_job(self, store: JobStore, job: JobRecord, reason: str, result: SweepResult) -> int:
+        """:return: the bytes reclaimed"""
+        if not store.remove(job.id, state=job.state): return 0 #removed by another process, or it changed since
+        return self._remove_directory(Path(job.directory), reason, result)
+
+    def _remove_directory(self, directory: Path, reason: str, result: SweepResult) -> int:
+        size = metrics.measure_directory(directory)
+        try:
+            safe_remove_tree(directory, self.root)
+        except OSError:
+            return 0 #removed meanwhile, it's tried again on the next sweep otherwise
+        result.removed[reason] += 1
+        result.reclaimed_bytes[reason] += size
+        metrics.count("rnaprobes_janitor_removed_total", reason)
+        metrics.count("rnaprobes_janitor_reclaimed_bytes_total", reason, amount=size)
+        return size
+
+    def start(self):
+        """Sweep regularly in a background thread of this process"""
+        if self.pid == os.getpid(): return
+        self.pid = os.getpid()
+        threading.Thread(target=self._run, name="janitor", daemon=True).start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval * random.uniform(0.5, 1.5)) #spread out the processes
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Cleaning up user-files failed: {e}", file=sys.stderr)
+
+def format_bytes(size: float) -> str:
+    for unit in ("bytes", "KB", "MB"):
+        if size < 1024: return f"{size:.0f} {unit}" if unit == "bytes" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+def get_stats_text() -> str:
+    """:return: what the janitors of all of this machine's processes removed since the server started"""
+    totals = metrics.registry.read_all()
+    removed = {labels[0]: values[0] for (name, labels), values in totals.items() if name == "rnaprobes_janitor_removed_total"}
+    reclaimed = sum(values[0] for (name, _), values in totals.items() if name == "rnaprobes_janitor_reclaimed_bytes_total")
+    return (f"Cleanup: {sum(removed.values()):.0f} job directories removed ({removed.get(EXPIRED, 0):.0f} expired, "
+            f"{removed.get(EVICTED, 0):.0f} over quota, {removed.get(ORPHANED, 0):.0f} orphaned), {format_bytes(reclaimed)} reclaimed")
@@ -0,0 +1,276 @@
+# Runs delayed jobs in a bounded pool of worker processes, so long programs neither fight over the GIL of a webserver
+# worker nor pile up without limit. The queue is kept in the job store, so the bounds hold for all webserver processes.
+# Waiting jobs are ordered by weighted fair queuing across visitors
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from uuid import UUID
+
+from .job_store import QUEUED, RUNNING, JobRecord, JobStore, get_job_store
+
+MAX_WORKERS = int(os.environ.get("RNAPROBES_JOB_WORKERS", 1)) #each job can use a lot of memory, and the server has 512 MB
+MAX_QUEUED = int(os.environ.get("RNAPROBES_JOB_QUEUE_SIZE", 8)) #jobs waiting for a worker, not counting running jobs
+REJECT_WHEN_FULL = os.environ.get("RNAPROBES_JOB_REJECT_WHEN_FULL", "1") != "0"
+MAX_WAIT_SECONDS = float(os.environ.get("RNAPROBES_MAX_WAIT_SECONDS", 60 * 60)) #jobs that would wait longer are rejected
+MAX_JOBS_PER_OWNER = int(os.environ.get("RNAPROBES_MAX_JOBS_PER_VISITOR", 3)) #running and waiting jobs of a single visitor
+DISPATCH_INTERVAL_SECONDS = 5 #how often queued jobs are checked for, in case the process that would start them is gone
+DEFAULT_JOB_COST = 60 #seconds, for jobs without an estimate
+
+class QueueFullError(Exception):
+    """Raised when a job is rejected because the server (or the job's owner) is at capacity"""
+    def __init__(self, message: str, wait: float = None):
+        """:param wait: the estimated seconds until the server has room for the job, if known"""
+        super().__init__(message)
+        self.wait = wait
+
+class Job:
+    def __init__(self, job_id: UUID, func: Callable, args: tuple, on_failure: Callable[[BaseException], None] = None):
+        """
+        :param func: a picklable function, ran in a worker process
+        :param on_failure: ran in this process if the worker process dies while running the job
+        """
+        self.job_id = job_id
+        self.func = func
+        self.args = args
+        self.on_failure = on_failure
+
+def get_cost(job: JobRecord) -> float:
+    return DEFAULT_JOB_COST if job.cost is None else max(job.cost, 0)
+
+def get_remaining_cost(job: JobRecord, now: float) -> float:
+    return get_cost(job) if job.started is None else max(get_cost(job) - (now - job.started), 0)
+
+class JobExecutor:
+    """
+    A bounded queue in front of a process pool. The queue is the job store's queued jobs, shared by all webserver
+    processes of the machine: admission counts the jobs of every process, and a job is only started (by whichever process
+    claims it first) while fewer than max_workers jobs run on the machine.
+    Each process hands the jobs it claims to its own pool.
+    The queue is ordered by virtual finish time (weighted fair queuing): an owner's jobs are spaced out by their cost
+    divided by the owner's weight, so one owner submitting many long jobs can't starve the others.
+    """
+    def __init__(self, create_job: Callable[[JobRecord, int], Job], get_store: Callable[[], JobStore] = get_job_store,
+                 max_workers: int = MAX_WORKERS, max_queued: int = MAX_QUEUED, reject_when_full: bool = REJECT_WHEN_FULL,
+                 max_wait_seconds: float = MAX_WAIT_SECONDS, max_jobs_per_owner: int = MAX_JOBS_PER_OWNER):
+        """
+        :param create_job: creates the job to run for a claimed record, given the id of the process that claimed it
+        :param get_store: returns the job store holding the queue
+        """
+        self.create_job = create_job
+        self.get_store = get_store
+        self.max_workers = max(1, max_workers)
+        self.max_queued = max(0, max_queued)
+        self.reject_when_full = reject_when_full
+        self.max_wait_seconds = max_wait_seconds
+        self.max_jobs_per_owner = max_jobs_per_owner
+        self.weights: dict[str, float] = dict()
+        self._active: dict[UUID, Job] = dict() #jobs running in this process' pool
+        self._lock = threading.RLock() #reentrant, since a done callback can run immediately while starting a job
+        self._pool = None
+        self._dispatcher_pid = None
+        self.completed_count = 0
+        self.failed_count = 0
+        self.rejected_count = 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    def set_weight(self, owner: str, weight: float):
+        """Give an owner a larger (or smaller) share of the workers. The default weight is 1. Set the same weights in each process"""
+        self.weights[owner] = weight
+
+    def _get_tags(self, store: JobStore, owner: str | None, costs: list[float | None]) -> list[tuple[float, float]]:
+        """:return: the virtual start and finish times of new jobs of the owner, one after the other"""
+        tags, finish = [], max(store.get_virtual_time(), store.get_last_finish_tag(owner))
+        for cost in costs:
+            start, finish = finish, finish + (DEFAULT_JOB_COST if cost is None else max(cost, 0)) / self.weights.get(owner, 1)
+            tags.append((start, finish))
+        return tags
+
+    def _estimate_wait(self, jobs: list[JobRecord], ahead: list[JobRecord] = None) -> float:
+        """
+        Estimate how long a job waits for a worker
+        :param jobs: the running and queued jobs of the machine
+        :param ahead: the queued jobs that start before the job. Defaults to all queued jobs
+        """
+        running = [job for job in jobs if job.state == RUNNING]
+        if ahead is None: ahead = [job for job in jobs if job.state == QUEUED]
+        if len(running) + len(ahead) < self.max_workers: return 0
+        now = time.time()
+        return (sum(get_remaining_cost(job, now) for job in running) + sum(map(get_cost, ahead))) / self.max_workers
+
+    def _estimate_finish(self, jobs: list[JobRecord], job: JobRecord) -> float:
+        """:return: the estimated seconds until an active job finishes"""
+        if job.state == RUNNING: return get_remaining_cost(job, time.time())
+        queued = [other for other in jobs if other.state == QUEUED]
+        return self._estimate_wait(jobs, queued[:queued.index(job)]) + get_cost(job)
+
+    def _get_slots(self, jobs: list[JobRecord], all_jobs: list[JobRecord]) -> list[float]:
+        """
+        :param jobs: active jobs. Each job is a slot of its own, except that all the jobs of a batch share one
+        :param all_jobs: the running and queued jobs of the machine
+        :return: the estimated seconds until each slot is free, soonest first
+        """
+        finishes = dict()
+        for job in jobs:
+            slot = job.id if job.group_id is None else job.group_id
+            finishes[slot] = max(finishes.get(slot, 0), self._estimate_finish(all_jobs, job))
+        return sorted(finishes.values())
+
+    def admit(self, owner: str | None, costs: list[float | None], always_queue: bool = False, is_batch: bool = False) -> list[tuple[float, float]]:
+        """
+        Check whether more jobs of this owner can be queued, and place them in the queue. Call in a job store transaction
+        that also adds the jobs, so no other process can admit jobs in between
+        :param costs: the estimated runtime in seconds of each job, if known
+        :param always_queue: skip admission control (e.g. for jobs that were already accepted before)
+        :param is_batch: whether the jobs are a batch. A batch takes a single one of the owner's and the queue's slots, and
+        is bounded by its cost instead: it's rejected if the queue (with the batch) would take longer than max_wait_seconds
+        :return: the tags to add each job with, see JobStore.add
+        :raises QueueFullError: if the owner would have too many jobs, or if the queue would be too long (and
+        reject_when_full is set) or the jobs would wait longer than max_wait_seconds
+        """
+        store = self.get_store()
+        tags = self._get_tags(store, owner, costs)
+        if always_queue: return tags
+        jobs, count = store.get_active(), len(costs)
+        slots = 1 if is_batch else count
+        wait = self._estimate_wait(jobs, [job for job in jobs if job.state == QUEUED and (job.finish_tag or 0) <= tags[0][1]])
+        def reject(message: str, wait: float | None = wait):
+            self.rejected_count += 1
+            raise QueueFullError(message, wait)
+        owned = self._get_slots([job for job in jobs if owner is not None and job.owner == owner], jobs)
+        if owner is not None and len(owned) + slots > self.max_jobs_per_owner:
+            if slots > self.max_jobs_per_owner: reject(f"You can have at most {self.max_jobs_per_owner} jobs running or waiting. Please submit fewer jobs", None)
+            owner_wait = owned[len(owned) + slots - self.max_jobs_per_owner - 1]
+            if slots == 1: reject(f"You already have {self.max_jobs_per_owner} jobs (or batches) running or waiting. Please wait for them to finish", owner_wait)
+            reject(f"You can have at most {self.max_jobs_per_owner} jobs running or waiting, and already have {len(owned)}. "
+                   f"Please wait for yours to finish, or submit fewer jobs", owner_wait)
+        running = sum(1 for job in jobs if job.state == RUNNING)
+        busy = "The server is busy" if count == 1 else f"The server doesn't have room for {count} more jobs"
+        if is_batch:
+            now = time.time()
+            backlog = (sum(get_remaining_cost(job, now) for job in jobs) + sum(DEFAULT_JOB_COST if cost is None else max(cost, 0) for cost in costs)) / self.max_workers
+            if backlog > self.max_wait_seconds:
+                reject(f"{busy}, they would take {format_wait(backlog)} to run. Please try again later, or submit fewer jobs",
+                       backlog - self.max_wait_seconds)
+        queued = len(self._get_slots([job for job in jobs if job.state == QUEUED], jobs)) + slots - max(self.max_workers - running, 0) #the new jobs that can't start right away wait too
+        if queued <= 0: return tags
+        if queued > self.max_queued and self.reject_when_full:
+            reject(f"{busy} ({running} running, {len(jobs) - running} waiting, estimated wait {format_wait(wait)}). Please try again later")
+        if wait > self.max_wait_seconds:
+            reject(f"{busy}, the estimated wait is {format_wait(wait)}. Please try again later")
+        return tags
+
+    def dispatch(self):
+        """Start queued jobs in this process while the machine has fewer than max_workers running jobs"""
+        store = self.get_store()
+        with self._lock:
+            while (record := store.claim_next(self.max_workers)) is not None:
+                self._start(self.create_job(record, os.getpid()))
+            self._ensure_dispatcher()
+
+    def _ensure_dispatcher(self):
+        """
+        Check for queued jobs regularly. Jobs are normally started when one is submitted or finishes, but the process that
+        would have started them may have stopped
+        """
+        if self._dispatcher_pid == os.getpid(): return
+        self._dispatcher_pid = os.getpid()
+        threading.Thread(target=self._run_dispatcher, name="job-dispatcher", daemon=True).start()
+
+    def _run_dispatcher(self):
+        while True:
+            time.sleep(DISPATCH_INTERVAL_SECONDS)
+            try:
+                self.dispatch()
+            except Exception as e: #e.g. the database is locked for longer than its timeout
+                print(f"Dispatching jobs failed: {e}", file=sys.stderr)
+
+    def _start(self, job: Job):
+        """Start a job. Must hold the lock"""
+        self._active[job.job_id] = job
+        try:
+            future = self._get_pool().submit(job.func, *job.args)
+        except BrokenProcessPool: #a worker died since the last job, so the pool can't be used anymore
+            self._pool = None
+            future = self._get_pool().submit(job.func, *job.args)
+        except RuntimeError: #the interpreter is shutting down. The job store recovers the job on the next startup
+            self._active.pop(job.job_id, None)
+            return
+        future.add_done_callback(lambda finished: self._on_done(job, finished))
+
+    def _on_done(self, job: Job, future: Future):
+        error = future.exception()
+        if error is not None and job.on_failure is not None:
+            job.on_failure(error)
+        with self._lock:
+            self._active.pop(job.job_id, None)
+            if error is None: self.completed_count += 1
+            else: self.failed_count += 1
+            if isinstance(error, BrokenProcessPool): self._pool = None
+        self.dispatch()
+        with self._lock:
+            if not self._active and self._pool is not None: #an idle worker process would keep the memory of its last job
+                self._pool.shutdown(wait=False)
+                self._pool = None
+
+    def get_position(self, job_id: UUID) -> int | None:
+        """
+        :return: the job's position in the queue, 0 if it is running, or None if it isn't queued or running
+        """
+        return self.get_store().get_queue_position(job_id)
+
+    def get_estimated_wait(self, job_id: UUID) -> float | None:
+        """
+        :return: the estimated seconds until the job starts, or None if it isn't queued or running
+        """
+        jobs = self.get_store().get_active()
+        ids = [job.id for job in jobs]
+        if str(job_id) not in ids: return None
+        job = jobs[ids.index(str(job_id))]
+        if job.state == RUNNING: return 0
+        return self._estimate_finish(jobs, job) - get_cost(job)
+
+    def get_job_ids(self) -> list[UUID]:
+        """:return: the ids of the jobs running in this process and of the machine's waiting jobs"""
+        with self._lock:
+            active = list(self._active)
+        return active + [UUID(job.id) for job in self.get_store().get_active() if job.state == QUEUED]
+
+    def is_idle(self) -> bool:
+        """:return: whether a new job would start right away"""
+        counts = self.get_store().count_by_state()
+        return counts.get(QUEUED, 0) == 0 and counts.get(RUNNING, 0) < self.max_workers
+
+    def get_status(self) -> dict:
+        jobs = self.get_store().get_active()
+        queued = [job for job in jobs if job.state == QUEUED]
+        return dict(active=len(jobs) - len(queued), queued=len(queued), workers=self.max_workers, max_queued=self.max_queued,
+                    completed=self.completed_count, failed=self.failed_count, rejected=self.rejected_count,
+                    queued_seconds=round(sum(map(get_cost, queued))), owners=len({job.owner for job in jobs}))
+
+def format_wait(seconds: float) -> str:
+    minutes = round(seconds / 60)
+    return f"{minutes} minute{'s' if minutes != 1 else ''}" if minutes > 0 else "under a minute"
+
+job_factory = None
+def set_job_factory(create_job: Callable[[JobRecord, int], Job]):
+    """Set how the executor runs the jobs it claims, see JobExecutor"""
+    global job_factory
+    job_factory = create_job
+
+executor = None
+def get_executor() -> JobExecutor:
+    """Create the executor on first use, so that it's created after the webserver forks its workers"""
+    global executor
+    if executor is None:
+        executor = JobExecutor(job_factory)
+    return executor
@@ -0,0 +1,284 @@
+# Durable state of delayed jobs, kept in a local SQLite database so that status lookups are a single indexed query
+# and jobs interrupted by a restart can be found again
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from pathlib import Path
+from uuid import UUID
+
+QUEUED, RUNNING, COMPLETE, FAILED, DELIVERED = "queued", "running", "complete", "failed", "delivered"
+ACTIVE_STATES = (QUEUED, RUNNING)
+FINISHED_STATES = (COMPLETE, FAILED, DELIVERED)
+MAX_ATTEMPTS = 2 #a job interrupted this many times is marked failed instead of being recovered
+
+JobRecord = namedtuple("JobRecord", ["id", "program", "directory", "state", "created", "started", "finished", "result_path",
+                                     "error_message", "error_code", "owner_pid", "boot_id", "attempts", "cache_key", "progress", "group_id",
+                                     "owner", "cost", "start_tag", "finish_tag", "owner_start"])
+
+def get_boot_id() -> str:
+    """An id that changes when the machine restarts, so that process ids from before a restart aren't trusted"""
+    try:
+        with open("/proc/sys/kernel/random/boot_id", "r") as file:
+            return file.read().strip()
+    except OSError:
+        return ""
+
+def get_process_start(pid: int) -> str:
+    """
+    When a process started, in clock ticks since the machine started. Together with its id, this identifies a process
+    even when process ids are reused, e.g. by a restarted container (whose machine, and so boot id, stays the same)
+    :return: the start time, or "" if the process doesn't exist or it isn't known on this system
+    """
+    try:
+        with open(f"/proc/{pid}/stat", "r") as file:
+            return file.read().rpartition(")")[2].split()[19] #the process' name, in parentheses, may have spaces
+    except (OSError, IndexError):
+        return ""
+
+def is_process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True #exists, but owned by someone else
+    return True
+
+class JobStore:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._local = threading.local()
+        self.boot_id = get_boot_id()
+        self.process_start, self.process_start_pid = "", None #see _get_process_start
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("""CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY, program TEXT NOT NULL, directory TEXT NOT NULL, state TEXT NOT NULL, created REAL NOT NULL, started REAL,
+                finished REAL, result_path TEXT, error_message TEXT, error_code INTEGER, owner_pid INTEGER, boot_id TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0, cache_key TEXT, progress TEXT, group_id TEXT, owner TEXT, cost REAL,
+                start_tag REAL, finish_tag REAL, owner_start TEXT)""")
+            columns = {column[1] for column in connection.execute("PRAGMA table_info(jobs)")}
+            for column, column_type in (("progress", "TEXT"), ("group_id", "TEXT"), ("owner", "TEXT"), ("cost", "REAL"), ("start_tag", "REAL"),
+                                        ("finish_tag", "REAL"), ("owner_start", "TEXT")): #created before they were tracked
+                if column not in columns: connection.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+            connection.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, finished)")
+            connection.execute("CREATE INDEX IF NOT EXISTS jobs_cache_key ON jobs (cache_key)")
+            connection.execute("CREATE INDEX IF NOT EXISTS jobs_group_id ON jobs (group_id)")
+            connection.execute("CREATE INDEX IF NOT EXISTS jobs_owner ON jobs (owner, state)")
+            connection.execute("CREATE TABLE IF NOT EXISTS scheduler (name TEXT PRIMARY KEY, value REAL NOT NULL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection. Connections are never shared between threads or (forked) processes"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None) #autocommit, each statement is atomic
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection, self._local.pid = connection, os.getpid()
+        return connection
+
+    def _get_process_start(self) -> str:
+        """:return: when this process started, see get_process_start. The store may have been created before a fork"""
+        if self.process_start_pid != os.getpid():
+            self.process_start, self.process_start_pid = get_process_start(os.getpid()), os.getpid()
+        return self.process_start
+
+    @contextmanager
+    def transaction(self):
+        """
+        Run statements as one transaction, holding the database's write lock from the start, so what they read can't be
+        changed by other processes before they write
+        """
+        connection = self._connect()
+        if connection.in_transaction: #nested, part of the outer transaction
+            yield connection
+            return
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def add(self, job_id: UUID, program: str, directory: Path, cache_key: str = None, group_id: UUID = None, owner: str = None,
+            cost: float = None, tags: tuple[float, float] = None):
+        """
+        Add a queued job
+        :param directory: the job's folder, which holds everything needed to run it again
+        :param cache_key: identifies identical requests, which can reuse this job
+        :param group_id: the batch the job is part of, if any
+        :param owner: who submitted the job (e.g. the visitor id)
+        :param cost: the job's estimated runtime in seconds
+        :param tags: the job's virtual start and finish time, which order the queue (see claim_next). Jobs without come first
+        """
+        start_tag, finish_tag = tags or (None, None)
+        self._connect().execute("INSERT INTO jobs (id, program, directory, state, created, owner_pid, boot_id, cache_key, group_id, owner, cost, "
+                                "start_tag, finish_tag, owner_start) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                (str(job_id), program, str(directory), QUEUED, time.time(), os.getpid(), self.boot_id, cache_key,
+                                 None if group_id is None else str(group_id), owner, cost, start_tag, finish_tag, self._get_process_start()))
+
+    def get(self, job_id: UUID) -> JobRecord | None:
+        row = self._connect().execute(f"SELECT {', '.join(JobRecord._fields)} FROM jobs WHERE id = ?", (str(job_id),)).fetchone()
+        return None if row is None else JobRecord(*row)
+
+    def transition(self, job_id: UUID, from_states: tuple[str, ...], to_state: str, previous_owner: JobRecord = None, **fields) -> bool:
+        """
+        Atomically change a job's state, only if it's currently in one of from_states
+        :param previous_owner: if given, only change the job if it's still owned by the same process as in this record
+        :param fields: other columns to set
+        :return: whether the job was changed. False means another process got to it first (or it doesn't exist)
+        """
+        assignments = ", ".join(["state = ?"] + [f"{column} = ?" for column in fields])
+        conditions, parameters = f"id = ? AND state IN ({', '.join('?' * len(from_states))})", [str(job_id), *from_states]
+        if previous_owner is not None:
+            conditions += " AND owner_pid IS ? AND boot_id IS ? AND owner_start IS ?"
+            parameters += [previous_owner.owner_pid, previous_owner.boot_id, previous_owner.owner_start]
+        cursor = self._connect().execute(f"UPDATE jobs SET {assignments} WHERE {conditions}", (to_state, *fields.values(), *parameters))
+        return cursor.rowcount == 1
+
+    def get_active(self) -> list[JobRecord]:
+        """:return: the running and queued jobs, each in the order they are started"""
+        rows = self._connect().execute(f"SELECT {', '.join(JobRecord._fields)} FROM jobs WHERE state IN (?, ?) "
+                                       f"ORDER BY COALESCE(finish_tag, 0), rowid", ACTIVE_STATES).fetchall()
+        return list(map(JobRecord._make, rows))
+
+    def get_virtual_time(self) -> float:
+        """:return: the start tag of the last started job, see claim_next"""
+        row = self._connect().execute("SELECT value FROM scheduler WHERE name = 'virtual_time'").fetchone()
+        return 0.0 if row is None else row[0]
+
+    def get_last_finish_tag(self, owner: str) -> float:
+        """:return: the latest finish tag of the owner's running and queued jobs, or 0"""
+        row = self._connect().execute("SELECT MAX(finish_tag) FROM jobs WHERE owner IS ? AND state IN (?, ?)", (owner, *ACTIVE_STATES)).fetchone()
+        return row[0] or 0.0
+
+    def claim_next(self, max_running: int) -> JobRecord | None:
+        """
+        Start the next queued job in this process, unless max_running jobs are running already (in any process).
+        The job with the lowest finish tag is next (weighted fair queuing), and the virtual time moves to its start tag
+        :return: the started job, or None if none was started
+        """
+        with self.transaction() as connection:
+            if connection.execute("SELECT COUNT(*) FROM jobs WHERE state = ?", (RUNNING,)).fetchone()[0] >= max_running: return None
+            row = connection.execute("SELECT id, start_tag FROM jobs WHERE state = ? ORDER BY COALESCE(finish_tag, 0), rowid LIMIT 1",
+                                     (QUEUED,)).fetchone()
+            if row is None: return None
+            connection.execute("UPDATE jobs SET state = ?, started = ?, owner_pid = ?, boot_id = ?, owner_start = ? WHERE id = ?",
+                               (RUNNING, time.time(), os.getpid(), self.boot_id, self._get_process_start(), row[0]))
+            if row[1] is not None:
+                connection.execute("INSERT INTO scheduler (name, value) VALUES ('virtual_time', ?) "
+                                   "ON CONFLICT (name) DO UPDATE SET value = MAX(value, excluded.value)", (row[1],))
+        return self.get(UUID(row[0]))
+
+    def get_queue_position(self, job_id: UUID) -> int | None:
+        """:return: the job's position in the queue, starting at 1. 0 if it's running, None if it isn't active"""
+        job = self.get(job_id)
+        if job is None or job.state not in ACTIVE_STATES: return None
+        if job.state == RUNNING: return 0
+        return self._connect().execute("SELECT COUNT(*) FROM jobs WHERE state = ? AND (COALESCE(finish_tag, 0), rowid) <= "
+                                       "(SELECT COALESCE(finish_tag, 0), rowid FROM jobs WHERE id = ?)", (QUEUED, str(job_id))).fetchone()[0]
+
+    def is_claimed(self, job_id: UUID, owner_pid: int) -> bool:
+        """:return: whether the job is running, started by the process owner_pid (see claim_next)"""
+        job = self.get(job_id)
+        return job is not None and job.state == RUNNING and job.owner_pid == owner_pid and job.boot_id == self.boot_id
+
+    def complete(self, job_id: UUID, result_path: Path) -> bool:
+        return self.transition(job_id, ACTIVE_STATES, COMPLETE, finished=time.time(), result_path=str(result_path))
+
+    def fail(self, job_id: UUID, error_message: str, error_code: int = 500) -> bool:
+        return self.transition(job_id, ACTIVE_STATES, FAILED, finished=time.time(), error_message=error_message, error_code=error_code)
+
+    def set_progress(self, job_id: UUID, progress: str) -> bool:
+        """
+        :param progress: the latest progress of a running job, as JSON
+        :return: whether the job is still running
+        """
+        cursor = self._connect().execute("UPDATE jobs SET progress = ? WHERE id = ? AND state = ?", (progress, str(job_id), RUNNING))
+        return cursor.rowcount == 1
+
+    def find_reusable(self, cache_key: str) -> JobRecord | None:
+        """
+        :return: the newest job with this cache key that is running or finished successfully, or None
+        """
+        row = self._connect().execute(f"SELECT {', '.join(JobRecord._fields)} FROM jobs WHERE cache_key = ? AND state IN (?, ?, ?, ?) "
+                                      f"ORDER BY created DESC LIMIT 1", (cache_key, *ACTIVE_STATES, COMPLETE, DELIVERED)).fetchone()
+        return None if row is None else JobRecord(*row)
+
+    def remove(self, job_id: UUID, state: str = None) -> bool:
+        """
+        :param state: if given, only remove the job if it's in this state
+        :return: whether the job was removed
+        """
+        if state is None:
+            cursor = self._connect().execute("DELETE FROM jobs WHERE id = ?", (str(job_id),))
+        else:
+            cursor = self._connect().execute("DELETE FROM jobs WHERE id = ? AND state = ?", (str(job_id), state))
+        return cursor.rowcount == 1
+
+    def get_finished(self) -> list[JobRecord]:
+        """:return: the finished jobs, the one that finished first first"""
+        rows = self._connect().execute(f"SELECT {', '.join(JobRecord._fields)} FROM jobs WHERE state IN (?, ?, ?) "
+                                       f"ORDER BY finished", FINISHED_STATES).fetchall()
+        return list(map(JobRecord._make, rows))
+
+    def get_directories(self) -> set[str]:
+        """:return: the directories of all jobs"""
+        return {row[0] for row in self._connect().execute("SELECT directory FROM jobs").fetchall()}
+
+    def get_group(self, group_id: UUID) -> list[JobRecord]:
+        """:return: the jobs of a batch"""
+        rows = self._connect().execute(f"SELECT {', '.join(JobRecord._fields)} FROM jobs WHERE group_id = ?", (str(group_id),)).fetchall()
+        return list(map(JobRecord._make, rows))
+
+    def get_group_ids(self) -> set[str]:
+        """:return: the ids of the batches that still have a job"""
+        return {row[0] for row in self._connect().execute("SELECT DISTINCT group_id FROM jobs WHERE group_id IS NOT NULL").fetchall()}
+
+    def count_by_state(self) -> dict[str, int]:
+        return dict(self._connect().execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+
+    def is_interrupted(self, job: JobRecord) -> bool:
+        """:return: whether the job is active, but the process owning it is gone (a process with the same id may run since)"""
+        return job.state in ACTIVE_STATES and (job.boot_id != self.boot_id or not is_process_alive(job.owner_pid)
+                                               or get_process_start(job.owner_pid) != job.owner_start)
+
+    def claim_interrupted(self) -> tuple[list[JobRecord], list[JobRecord]]:
+        """
+        Find jobs whose webserver process is gone, and take them over
+        :return: the jobs to recover (now queued and owned by this process) and the jobs given up on (now failed)
+        """
+        rows = self._connect().execute(f"SELECT {', '.join(JobRecord._fields)} FROM jobs WHERE state IN (?, ?)", ACTIVE_STATES).fetchall()
+        recovered, failed = [], []
+        for job in map(JobRecord._make, rows):
+            if not self.is_interrupted(job): continue
+            if job.attempts + 1 >= MAX_ATTEMPTS:
+                if self.transition(job.id, (job.state,), FAILED, previous_owner=job, finished=time.time(), error_code=500,
+                                   error_message="The job was interrupted by a server restart. Please run it again"):
+                    failed.append(job)
+            elif self.transition(job.id, (job.state,), QUEUED, previous_owner=job, owner_pid=os.getpid(), boot_id=self.boot_id,
+                                 owner_start=self._get_process_start(), attempts=job.attempts + 1, started=None, progress=None):
+                recovered.append(job)
+        return recovered, failed
+
+db_path = None
+job_store = None
+def set_path(path: Path):
+    global db_path, job_store
+    db_path, job_store = Path(path), None
+
+def get_job_store(path: Path = None) -> JobStore:
+    """
+    :param path: the database path, needed in worker processes that may not have inherited set_path. Defaults to the set path
+    """
+    global job_store
+    path = Path(path or db_path)
+    if job_store is None or job_store.path != path:
+        job_store = JobStore(path)
+    return job_store
@@ -0,0 +1,98 @@
+# PinMol saves the structures of its beacons instead of drawing their svg files (see PinMol.beacon_svgs). An svg file is
+# drawn the first time it's viewed, and kept next to the result zip. When the zip is downloaded, the svg files it's
+# missing are drawn and added to it, so every download after the first is of a complete zip
+from __future__ import annotations
+
+import os
+import posixpath
+import shutil
+import sys
+import tempfile
+import threading
+import uuid
+import zipfile
+from pathlib import Path
+
+from ..rnaprobes.util import lazy_import
+
+beacon_svgs = lazy_import("..rnaprobes.PinMol.beacon_svgs", __package__)
+
+RENDERED_DIR_NAME = "rendered-svgs" #next to the result zip
+CHUNK_SIZE = 1024 * 1024
+_zip_lock = threading.Lock() #only one thread of a process rewrites zips at a time
+
+def get_pending_svgs(zip_file: zipfile.ZipFile) -> dict:
+    """:return: the structure of each svg file that isn't in the zip yet, by the name it has in the zip"""
+    names = set(zip_file.namelist())
+    pending = dict()
+    for name in names:
+        if not is_structures_file(name): continue
+        with zip_file.open(name) as file:
+            structures = beacon_svgs.load(file)
+        for svg_name, structure in structures.items():
+            svg_name = posixpath.join(posixpath.dirname(name), svg_name)
+            if svg_name not in names: pending[svg_name] = structure
+    return pending
+
+def is_structures_file(name: str) -> bool:
+    return name.endswith(beacon_svgs.STRUCTURES_FILE_SUFFIX)
+
+def list_pending(zip_path: Path) -> list[str]:
+    """:return: the names of the svg files that the result has, but that aren't in its zip yet"""
+    with zipfile.ZipFile(zip_path) as zip_file:
+        return sorted(get_pending_svgs(zip_file))
+
+def get_rendered_path(zip_path: Path, name: str) -> Path:
+    return zip_path.parent / RENDERED_DIR_NAME / name.replace("/", "_")
+
+def render(zip_path: Path, name: str, structure) -> Path:
+    """:return: the path of the drawn svg file, drawn unless it already was"""
+    path = get_rendered_path(zip_path, name)
+    if path.exists(): return path
+    path.parent.mkdir(exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=path.parent) as directory: #drawn apart, so a partial svg file is never used
+        os.replace(beacon_svgs.render_svg(structure, Path(directory) / "beacon.svg"), path)
+    return path
+
+def read_svg(zip_path: Path, name: str) -> bytes | None:
+    """:return: an svg file that isn't in the result zip yet, drawn unless it already was. None if there's no such svg file"""
+    with zipfile.ZipFile(zip_path) as zip_file:
+        structure = get_pending_svgs(zip_file).get(name)
+    if structure is None: return None
+    with open(render(zip_path, name, structure), "rb") as file:
+        return file.read()
+
+def add_to_zip(zip_path: Path) -> int:
+    """
+    Draw the svg files that the result zip is missing and add them to it. The zip is replaced at once, so it can be read
+    meanwhile. An svg file that can't be drawn is left out
+    :return: the number of svg files added
+    """
+    with _zip_lock:
+        with zipfile.ZipFile(zip_path) as zip_file:
+            pending = get_pending_svgs(zip_file)
+        if not pending: return 0
+        rendered = dict()
+        for name, structure in pending.items():
+            try:
+                rendered[name] = render(zip_path, name, structure)
+            except Exception as e:
+                print(f"Drawing {name} failed: {e}", file=sys.stderr)
+        if not rendered: return 0
+        partial_path = zip_path.with_name(f".{uuid.uuid4()}.partial.zip")
+        try:
+            with zipfile.ZipFile(zip_path) as source, zipfile.ZipFile(partial_path, "w", zipfile.ZIP_DEFLATED) as destination:
+                for info in source.infolist():
+                    copied_info = zipfile.ZipInfo(info.filename, info.date_time)
+                    copied_info.compress_type, copied_info.external_attr = zipfile.ZIP_DEFLATED, info.external_attr
+                    if info.is_dir():
+                        destination.writestr(copied_info, b"")
+                        continue
+                    with source.open(info) as source_file, destination.open(copied_info, "w", force_zip64=True) as destination_file:
+                        shutil.copyfileobj(source_file, destination_file, CHUNK_SIZE)
+                for name, path in rendered.items():
+                    destination.write(path, arcname=name)
+            os.replace(partial_path, zip_path)
+        finally:
+            if partial_path.exists(): partial_path.unlink()
+        return len(rendered)
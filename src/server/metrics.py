@@ -0,0 +1,215 @@
+# Operational metrics in the Prometheus text format, served at /metrics.
+# Every process (webserver workers and job executor workers) counts in memory, each thread in its own shard so that a
+# sample never takes a lock, and regularly writes a snapshot of its counts to its own file in METRICS_DIR. /metrics sums
+# the files of all processes, so the counts add up across gunicorn workers. Gauges are measured when /metrics is requested
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from collections import namedtuple
+from pathlib import Path
+
+from ..rnaprobes import util
+
+METRICS_DIR = Path(os.environ.get("RNAPROBES_METRICS_DIR", Path(tempfile.gettempdir()) / "rnaprobes-metrics"))
+FLUSH_INTERVAL_SECONDS = float(os.environ.get("RNAPROBES_METRICS_FLUSH_SECONDS", 5)) #how stale /metrics can be for other processes
+DISK_USAGE_INTERVAL_SECONDS = 60 #walking user-files is slow, so its size is only measured this often
+BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800) #seconds
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Metric = namedtuple("Metric", ["type", "help", "labels"])
+METRICS = {
+    "rnaprobes_request_duration_seconds": Metric("histogram", "Time to answer /send-request", ("program",)),
+    "rnaprobes_run_duration_seconds": Metric("histogram", "Time to run a program, in the webserver or in the background", ("program",)),
+    "rnaprobes_stage_duration_seconds": Metric("histogram", "Time spent in a stage of a program run", ("program", "stage")),
+    "rnaprobes_subprocess_duration_seconds": Metric("histogram", "Time spent in a run of an RNAstructure program", ("binary",)),
+    "rnaprobes_cache_requests_total": Metric("counter", "Requests that could reuse an earlier result, by whether one was found", ("result",)),
+    "rnaprobes_validation_failures_total": Metric("counter", "Requests and jobs that failed because of invalid input", ("program",)),
+    "rnaprobes_runtime_errors_total": Metric("counter", "Requests and jobs that failed because of an error while running", ("program",)),
+    "rnaprobes_rejected_jobs_total": Metric("counter", "Jobs rejected because the server was busy", ("program",)),
+    "rnaprobes_janitor_removed_total": Metric("counter", "Job directories removed by the janitor, by reason", ("reason",)),
+    "rnaprobes_janitor_reclaimed_bytes_total": Metric("counter", "Disk space freed by the janitor, by reason", ("reason",)),
+    "rnaprobes_active_jobs": Metric("gauge", "Jobs running on this machine", ()),
+    "rnaprobes_queued_jobs": Metric("gauge", "Jobs waiting for a worker on this machine", ()),
+    "rnaprobes_user_files_bytes": Metric("gauge", "Disk space used by user-files", ()),
+}
+
+class MetricsRegistry:
+    """
+    Counts of this process. A counter's values are [count], a histogram's are the count of each bucket (the last one
+    is +Inf, so they aren't cumulative) followed by the sum of the samples
+    """
+    def __init__(self, directory: Path = METRICS_DIR, flush_interval: float = FLUSH_INTERVAL_SECONDS):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset) #a forked process starts from zero, its parent keeps reporting its own counts
+
+    def _reset(self):
+        self._lock = threading.Lock() #only for creating shards and flushing, never for a sample
+        self._local = threading.local()
+        self._shards: list[dict[tuple, list[float]]] = []
+        self._path = None
+        self._flusher_pid = None
+
+    def _get_shard(self) -> dict[tuple, list[float]]:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = dict()
+            with self._lock:
+                self._shards.append(shard)
+            self._ensure_flusher()
+        return shard
+
+    def observe(self, name: str, value: float, *labels: str):
+        """Add a sample to a histogram"""
+        shard = self._get_shard()
+        values = shard.get((name, labels))
+        if values is None: values = shard[(name, labels)] = [0.0] * (len(BUCKETS) + 2)
+        values[bisect_left(BUCKETS, value)] += 1
+        values[-1] += value
+
+    def count(self, name: str, *labels: str, amount: float = 1):
+        """Increase a counter"""
+        shard = self._get_shard()
+        values = shard.get((name, labels))
+        if values is None: values = shard[(name, labels)] = [0.0]
+        values[0] += amount
+
+    def collect(self) -> dict[tuple, list[float]]:
+        """:return: the sum of this process' shards"""
+        with self._lock:
+            shards = list(self._shards)
+        totals = dict()
+        for shard in shards:
+            for key, values in list(shard.items()): #copied at once, so it doesn't matter if the shard's thread adds a key
+                add_values(totals, key, values)
+        return totals
+
+    def _ensure_flusher(self):
+        """Start the flusher thread in this process. Threads don't survive a fork, so it's started on first use"""
+        with self._lock:
+            if self._flusher_pid == os.getpid(): return
+            self._flusher_pid = os.getpid()
+        threading.Thread(target=self._run_flusher, name="metrics-flusher", daemon=True).start()
+
+    def _run_flusher(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """Write this process' counts to its file. Never throws"""
+        totals = self.collect()
+        if not totals: return
+        try:
+            with self._lock:
+                if self._path is None: #unique even if a later process gets the same pid
+                    self._path = self.directory / f"{os.getpid()}-{uuid.uuid4().hex[:8]}.json"
+                self.directory.mkdir(parents=True, exist_ok=True)
+                partial_path = self._path.with_suffix(".partial")
+                with open(partial_path, "w") as file:
+                    json.dump([[name, list(labels), values] for (name, labels), values in totals.items()], file)
+                os.replace(partial_path, self._path)
+        except OSError:
+            pass #metrics are best effort
+
+    def read_all(self) -> dict[tuple, list[float]]:
+        """:return: the sum of the counts of all processes, including this one's current counts"""
+        self.flush()
+        totals = dict()
+        for path in self.directory.glob("*.json"):
+            try:
+                with open(path, "r") as file:
+                    for name, labels, values in json.load(file):
+                        add_values(totals, (name, tuple(labels)), values)
+            except (OSError, ValueError):
+                continue #removed, or written by an older version
+        return totals
+
+def add_values(totals: dict[tuple, list[float]], key: tuple, values: list[float]):
+    current = totals.get(key)
+    totals[key] = list(values) if current is None else [a + b for a, b in zip(current, values)]
+
+def clear_directory(directory: Path = METRICS_DIR):
+    """Remove the files of earlier server runs. Call once when the server starts, before it forks"""
+    for path in directory.glob("*.*"):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def measure_directory(directory: Path) -> int:
+    """:return: the total size of the files in the directory in bytes"""
+    size = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            try:
+                size += os.stat(os.path.join(root, name)).st_size
+            except OSError:
+                pass #removed while walking
+    return size
+
+_directory_sizes: dict[Path, tuple[float, int]] = dict()
+def get_directory_size(directory: Path, max_age: float = DISK_USAGE_INTERVAL_SECONDS) -> int:
+    """:return: the total size of the files in the directory in bytes, measured at most max_age seconds ago"""
+    measured, size = _directory_sizes.get(directory, (0, 0))
+    if time.time() - measured < max_age: return size
+    size = measure_directory(directory)
+    _directory_sizes[directory] = (time.time(), size)
+    return size
+
+def format_labels(names: tuple[str, ...], values: tuple[str, ...], **extra: str) -> str:
+    pairs = list(zip(names, values)) + list(extra.items())
+    if not pairs: return ""
+    escape = lambda value: str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in pairs) + "}"
+
+def format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+def render(gauges: dict[str, float]) -> str:
+    """
+    :param gauges: the current value of each gauge
+    :return: all metrics in the Prometheus text format
+    """
+    totals = registry.read_all()
+    lines = []
+    for name, metric in METRICS.items():
+        lines += [f"# HELP {name} {metric.help}", f"# TYPE {name} {metric.type}"]
+        if metric.type == "gauge":
+            if name in gauges: lines.append(f"{name} {format_number(gauges[name])}")
+            continue
+        for (sample_name, labels), values in sorted(totals.items()):
+            if sample_name != name: continue
+            if metric.type == "counter":
+                lines.append(f"{name}{format_labels(metric.labels, labels)} {format_number(values[0])}")
+                continue
+            cumulative = 0
+            for bound, count in zip(BUCKETS + ("+Inf",), values):
+                cumulative += count
+                lines.append(f"{name}_bucket{format_labels(metric.labels, labels, le=str(bound))} {format_number(cumulative)}")
+            lines.append(f"{name}_sum{format_labels(metric.labels, labels)} {format_number(values[-1])}")
+            lines.append(f"{name}_count{format_labels(metric.labels, labels)} {format_number(cumulative)}")
+    return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+observe = registry.observe
+count = registry.count
+flush = registry.flush
+atexit.register(registry.flush)
+
+def observe_subprocess(program: str, seconds: float):
+    observe("rnaprobes_subprocess_duration_seconds", seconds, Path(str(program)).stem)
+util.subprocess_listeners.append(observe_subprocess)
+
+def observe_stages(program: str, stage_times: dict[str, float]):
+    """Record the stage times of a finished run (see ProgramObject.stage)"""
+    for stage, seconds in stage_times.items():
+        observe("rnaprobes_stage_duration_seconds", seconds, program, stage)
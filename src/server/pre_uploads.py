@@ -0,0 +1,151 @@
+# Speculative ct uploads: the request form sends the ct file as soon as it's chosen, and gets a token for it. The file
+# is ingested (hashed, measured and checked) while it's received, and parsed in the background while the user fills in
+# the rest of the form. /send-request then takes the token instead of the file, and the program reuses the parsed file.
+# Pre-uploads are kept on disk, so any webserver process can use a token, expire after a short TTL and are bounded in
+# number and total size. The form sends the file again if its token expired
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from uuid import UUID
+
+from ..rnaprobes.RNAProbesUtil import SPOOL_MAX_SIZE
+from ..rnaprobes.util import ValidationError, lazy_import
+from .uploads import CHUNK_SIZE, CT_FIELDS, Upload, UploadBuffer, ingest
+
+RNAUtil = lazy_import("..rnaprobes.RNAUtil", __package__)
+
+PRE_UPLOAD_TTL_SECONDS = float(os.environ.get("RNAPROBES_PRE_UPLOAD_TTL_SECONDS", 15 * 60)) #since it was uploaded or last used
+MAX_PRE_UPLOADS = int(os.environ.get("RNAPROBES_MAX_PRE_UPLOADS", 64))
+MAX_PRE_UPLOAD_BYTES = int(float(os.environ.get("RNAPROBES_MAX_PRE_UPLOAD_MB", 128)) * 1024 * 1024) #of all pre-uploads together
+MAX_PENDING_PARSES = 2 #per webserver process. Beyond this, a pre-upload isn't parsed ahead of time (its program parses it)
+PRE_UPLOAD_DIR_NAME = "pre-uploads" #user-files/pre-uploads/<token>
+TOKEN_FIELD_SUFFIX = "-token" #the form field of a ct file's token, e.g. ct-file-token
+FILE_NAME, INFO_FILE_NAME, PARSED_CT_DIR_NAME = "upload.ct", "upload.json", "parsed-ct"
+
+class UploadExpiredError(ValidationError):
+    """Raised when a request uses a pre-upload token that expired (or is unknown), so the file must be sent again"""
+    pass
+
+PreUpload = namedtuple("PreUpload", ["token", "upload"])
+
+class PreUploadStore:
+    def __init__(self, root: Path, ttl: float = PRE_UPLOAD_TTL_SECONDS, max_count: int = MAX_PRE_UPLOADS,
+                 max_bytes: int = MAX_PRE_UPLOAD_BYTES):
+        """:param root: the folder holding a folder per pre-upload"""
+        self.root = root
+        self.ttl = ttl
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._parser = None
+        self._parser_pid = None
+        self._pending_parses = 0
+
+    def add(self, stream, filename: str) -> PreUpload:
+        """
+        Ingest a ct file and start parsing it in the background
+        :raises ValidationError: if the file isn't a valid ct file, or is larger than all pre-uploads may be
+        """
+        upload = ingest(stream, filename, is_ct=True)
+        if upload.ct_error is not None: raise ValidationError(upload.ct_error)
+        if upload.size > self.max_bytes: raise ValidationError("The file is too large to upload ahead of time")
+        token = uuid.uuid4()
+        directory = self.root / str(token)
+        directory.mkdir(parents=True)
+        with upload.file as source, open(directory / FILE_NAME, "wb") as destination:
+            shutil.copyfileobj(source, destination, CHUNK_SIZE)
+        with open(directory / INFO_FILE_NAME, "w") as file: #written last, a pre-upload without it is incomplete
+            json.dump(dict(filename=upload.filename, sha256=upload.sha256, size=upload.size, ct_stats=list(upload.ct_stats)), file)
+        self.remove_expired(keep=token)
+        self._parse_in_background(directory)
+        return PreUpload(token, upload._replace(file=None))
+
+    def get(self, token: UUID) -> Upload:
+        """
+        :return: the pre-upload, with a buffer of its file. Using it extends its TTL
+        :raises UploadExpiredError: if the token expired or is unknown
+        """
+        directory = self.root / str(token)
+        try:
+            if time.time() - os.stat(directory).st_mtime > self.ttl: raise FileNotFoundError()
+            with open(directory / INFO_FILE_NAME, "r") as file:
+                info = json.load(file)
+            buffer = UploadBuffer(max_size=SPOOL_MAX_SIZE)
+            with open(directory / FILE_NAME, "rb") as file:
+                shutil.copyfileobj(file, buffer, CHUNK_SIZE)
+            buffer.seek(0)
+            os.utime(directory)
+        except (OSError, ValueError):
+            raise UploadExpiredError("The uploaded file has expired, please send it again") from None
+        return Upload(buffer, info["filename"], info["sha256"], info["size"], RNAUtil.CTStats(*info["ct_stats"]), None,
+                      parsed_ct_dir=directory / PARSED_CT_DIR_NAME)
+
+    def _parse_in_background(self, directory: Path):
+        """Parse the ct file with a single thread per process, skipped if it's already busy. It's only an optimization"""
+        with self._lock:
+            if self._pending_parses >= MAX_PENDING_PARSES: return
+            if self._parser_pid != os.getpid(): #threads don't survive a fork
+                self._parser, self._parser_pid = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pre-upload-parser"), os.getpid()
+            self._pending_parses += 1
+        self._parser.submit(self._parse, directory)
+
+    def _parse(self, directory: Path):
+        try:
+            with open(directory / FILE_NAME, "rb") as file, RNAUtil.share_parsed_ct(directory / PARSED_CT_DIR_NAME):
+                RNAUtil.CT_to_sscount_df(file)
+        except FileNotFoundError:
+            pass #removed meanwhile
+        except Exception as e:
+            print(f"Parsing a pre-upload failed: {e}", file=sys.stderr)
+        finally:
+            with self._lock:
+                self._pending_parses -= 1
+
+    def remove_expired(self, keep: UUID = None):
+        """Remove the expired pre-uploads, then the oldest ones while there are too many or they're too large"""
+        if not self.root.exists(): return
+        entries = []
+        for directory in self.root.iterdir():
+            try:
+                entries.append((os.stat(directory).st_mtime, directory, get_size(directory)))
+            except OSError:
+                continue #removed meanwhile
+        entries.sort()
+        count, size = len(entries), sum(entry[2] for entry in entries)
+        for modified, directory, directory_size in entries:
+            expired = time.time() - modified > self.ttl
+            if not (expired or count > self.max_count or size > self.max_bytes): break
+            if directory.name == str(keep) and not expired: continue
+            shutil.rmtree(directory, ignore_errors=True)
+            count, size = count - 1, size - directory_size
+
+def get_size(directory: Path) -> int:
+    return sum(path.stat().st_size for path in directory.rglob("*") if path.is_file())
+
+store = PreUploadStore(Path(os.getcwd()) / "user-files" / PRE_UPLOAD_DIR_NAME)
+def set_root(files_root: Path):
+    store.root = files_root / PRE_UPLOAD_DIR_NAME
+
+def add_uploads_from_tokens(request, uploads: dict[str, Upload]) -> dict[str, Upload]:
+    """
+    :return: the uploads, with the pre-upload of every ct field that has a token instead of a file
+    :raises UploadExpiredError: if a token expired
+    """
+    tokens = {name: request.form.get(name + TOKEN_FIELD_SUFFIX) for name in CT_FIELDS if name not in uploads}
+    for name, token in tokens.items():
+        if not token: continue
+        try:
+            token = UUID(token)
+        except ValueError:
+            raise UploadExpiredError("The uploaded file is unknown, please send it again") from None
+        uploads[name] = store.get(token)
+    return uploads
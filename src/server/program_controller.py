@@ -2,20 +2,27 @@ from __future__ import annotations
 
 import os
 from collections.abc import Callable
+from importlib.util import resolve_name
 from pathlib import Path
 from uuid import UUID
 
-from flask import Response, jsonify, make_response, request, Request
+from flask import Response, jsonify, make_response, request, Request, send_file
 
-from ..rnaprobes.RNAUtil import get_ct_nucleotide_length
 from .usage_tracker import add_run_to_db
-from .Program import Program, IS_DELAYED
-from ..rnaprobes.util import optional_argument, safe_remove_tree
-from ..rnaprobes.TFOFinder import tfofinder
-from ..rnaprobes.PinMol import pinmol
-from ..rnaprobes.smFISH import smFISH
+from . import job_store, batch
+from .Program import Program, IS_DELAYED, ESTIMATED_COST, DELETED_MESSAGE, set_files_root, get_result_download, get_result_path, \
+    get_progress_stream, send_error_response, count_error
+from . import result_tables, pre_uploads
+from ..rnaprobes.util import ValidationError
+from .uploads import Upload, get_ct_upload, save_upload
+from ..rnaprobes.util import optional_argument, safe_remove_tree, lazy_import, LazyFunction
+
+#the programs (and pandas, Biopython...) are only imported once used, see preload_programs
+TFOFINDER, PINMOL, SMFISH = (resolve_name(f"..rnaprobes.{name}", __package__) for name in ("TFOFinder.tfofinder", "PinMol.pinmol", "smFISH.smFISH"))
+tfofinder, pinmol, smFISH = lazy_import(TFOFINDER), lazy_import(PINMOL), lazy_import(SMFISH)
+RNAUtil = lazy_import("..rnaprobes.RNAUtil", __package__)
+runtime_model = lazy_import("..rnaprobes.runtime_model", __package__)
 
-from werkzeug.datastructures import FileStorage
 from werkzeug.utils import secure_filename
 from functools import partial
 import time, io, zipfile
@@ -23,6 +30,9 @@ import time, io, zipfile
 root = Path(os.getcwd())
 output_dir = root / "user-files"
 pinmol_output_dir, sm_fish_output_dir = output_dir / "pinmol", output_dir / "smfish"
+job_db_name = "jobs.sqlite3"
+job_store.set_path(output_dir / job_db_name)
+set_files_root(output_dir)
 
 def set_root(root_path: Path, output_file_path: str | Path = "user-files"):
     global root, output_dir, pinmol_output_dir, sm_fish_output_dir
@@ -31,6 +41,8 @@ def set_root(root_path: Path, output_file_path: str | Path = "user-files"):
     assert root_path.is_absolute(), "Given root must be an absolute path"
     assert root in output_dir.parents, "output_file_path must be a child of root"
     pinmol_output_dir, sm_fish_output_dir = output_dir / "pinmol", output_dir / "smfish"
+    job_store.set_path(output_dir / job_db_name)
+    set_files_root(output_dir)
 
 def close_file(func: Callable, *, file_arg_name: str = "filein", **kwargs):
     """
@@ -53,62 +65,70 @@ def get_zip_bytes(filename: str, **kwargs) -> bytes:
     file_obj.seek(0)
     return file_obj.getvalue()
 
-def save_to_file(file_storage: FileStorage, path: Path, parent_exist_ok = True):
-    path.parent.mkdir(parents=True, exist_ok=parent_exist_ok) #not really needed for smFISH
-    file_storage.save(path)
-
-def smFISH_long_runtime(req, file_path) -> bool:
-    nuc_length = get_ct_nucleotide_length(file_path)
-    intermolecular = req.form.get("smFISH-intermolecular")
-    return (nuc_length > 2500 and not intermolecular) or (nuc_length > 1000 and intermolecular)
-
-def smFISH_get_args(req, output_dir: Path) -> dict:
-    file_path = output_dir / secure_filename(req.files.get("ct-file").filename)
-    save_to_file(req.files.get("ct-file"), file_path)
-    extra_args = {}
-    if smFISH_long_runtime(req, file_path):
-        extra_args[IS_DELAYED] = True #already save to disk so don't have to clone stream
+def get_schedule_args(program: str, ct_stats, arguments, always_delay: bool = False) -> dict:
+    """
+    Route a request by its estimated cost: cheap requests run while the user waits, expensive ones go to the job queue
+    :param always_delay: queue the request regardless of its cost (e.g. it waits on an external service)
+    :return: the extra arguments marking the request as delayed (with its cost), or nothing if it runs immediately
+    """
+    cost = runtime_model.estimate(program, ct_stats, arguments)
+    if always_delay or cost > runtime_model.DELAYED_THRESHOLD_SECONDS:
+        return {IS_DELAYED: True, ESTIMATED_COST: cost}
+    return {}
+
+def tfofinder_get_args(req: Request, output_dir: Path, uploads: dict[str, Upload]) -> dict:
+    ct_file = get_ct_upload(uploads)
+    return dict(filein = ct_file.file,
+                probe_lengths = req.form.get("tfofinder-probe-length"),  #validation is in validate_arguments
+                filename = secure_filename(ct_file.filename),
+                arguments = tfofinder.parse_arguments("", from_command_line=False))
+
+def smFISH_get_args(req, output_dir: Path, uploads: dict[str, Upload]) -> dict:
+    ct_file = get_ct_upload(uploads)
+    file_path = output_dir / secure_filename(ct_file.filename)
+    save_upload(ct_file, file_path) #OligoWalk reads the file from disk
+    arguments = smFISH.parse_arguments("-d --resume " + ("-i" if req.form.get("smFISH-intermolecular") else "-ni"), from_command_line=False)
+    extra_args = get_schedule_args("smFISH", ct_file.ct_stats, arguments)
     to_return = dict(file_path = file_path,
         output_dir = output_dir,
-        arguments = smFISH.parse_arguments("-d " + ("-i" if req.form.get("smFISH-intermolecular") else "-ni"), from_command_line=False),
+        arguments = arguments,
+        ct_stats = ct_file.ct_stats,
         **extra_args)
     return to_return
 
-def pinmol_get_args(req: Request, output_dir: Path) -> dict:
-    blast_stream = req.files.get("blast-file").stream if req.files.get("blast-file") else None
-    arguments_string = (f"-w"
+def pinmol_get_args(req: Request, output_dir: Path, uploads: dict[str, Upload]) -> dict:
+    ct_file, blast_file = get_ct_upload(uploads), uploads.get("blast-file")
+    arguments_string = (f"-w --resume" #a job dir is new for each job, so it only resumes a job that was interrupted
                         f"{optional_argument(req, 'pinmol-start-base', '-s', default_value=1)}"
                         f"{optional_argument(req, 'pinmol-end-base', '-e', default_value=-1)}")
-    extra_args = {}
-    filein = req.files.get("ct-file").stream
     if req.form.get("blast-run"):
         arguments_string += f" -rb --email {req.form.get('email-input', 'NoEmail')} -d {req.form.get('database-input', '')} -t {req.form.get('txid-input', '')}"
-        extra_args[IS_DELAYED] = True
-        filein = io.BytesIO(filein.read()) #needed to because the stream will be closed otherwise
-        if blast_stream: blast_stream = io.BytesIO(blast_stream.read())
+    arguments = pinmol.parse_arguments(arguments_string, from_command_line=False)
+    extra_args = get_schedule_args("PinMol", ct_file.ct_stats, arguments, always_delay=arguments.run_blast)
 
-    return dict(filein= filein,
+    return dict(filein= ct_file.file, #the uploads outlive the request, and are pickled as a copy for delayed jobs
                 probe_length = req.form.get("pinmol-probe-length", type=int),
                 output_dir = output_dir,
-                filename = secure_filename(req.files.get("ct-file").filename),
-                blast_file_stream=blast_stream,
-                arguments = pinmol.parse_arguments(arguments_string, from_command_line=False),
+                filename = secure_filename(ct_file.filename),
+                blast_file_stream=blast_file.file if blast_file else None,
+                arguments = arguments,
                 **extra_args)
 
 program_dict = { #get args, validate args, return value
-    'tfofinder': Program("TFOFinder",
-                         lambda req, _: dict(filein = req.files.get("ct-file").stream,
-                                             probe_lengths = req.form.get("tfofinder-probe-length"),  #validation is in validate_arguments
-                                             filename = secure_filename(req.files.get("ct-file").filename),
-                                             arguments = tfofinder.parse_arguments("", from_command_line=False)),
-                         tfofinder.validate_arguments,
-                         partial(close_file, tfofinder.calculate_result), root_dir=output_dir, folder_not_needed=True),
-    'pinmol': Program("PinMol", pinmol_get_args, pinmol.validate_arguments, partial(close_file, pinmol.calculate_result), output_dir=pinmol_output_dir, root_dir=pinmol_output_dir)
-    .set_extra_notification_string_callback(lambda args: "Running blast."),
-    'smfish': Program("smFISH", smFISH_get_args, smFISH.validate_arguments, smFISH.calculate_result, output_dir=sm_fish_output_dir, root_dir=sm_fish_output_dir)
-        .set_extra_notification_string_callback(lambda args: smFISH.get_size_warning(args["nucleotide_length"]))
+    'tfofinder': Program("TFOFinder", tfofinder_get_args,
+                         LazyFunction(TFOFINDER, "validate_arguments"),
+                         partial(close_file, LazyFunction(TFOFINDER, "calculate_result")), root_dir=output_dir, folder_not_needed=True),
+    'pinmol': Program("PinMol", pinmol_get_args, LazyFunction(PINMOL, "validate_arguments"), partial(close_file, LazyFunction(PINMOL, "calculate_result")), output_dir=pinmol_output_dir, root_dir=pinmol_output_dir)
+    .set_extra_notification_string_callback(lambda args: "Running blast." if args["arguments"].run_blast else ""),
+    'smfish': Program("smFISH", smFISH_get_args, LazyFunction(SMFISH, "validate_arguments"), LazyFunction(SMFISH, "calculate_result"), output_dir=sm_fish_output_dir, root_dir=sm_fish_output_dir)
+        .set_extra_notification_string_callback(lambda args: smFISH.get_size_warning(args["ct_stats"], args["arguments"]))
 }
 
+def preload_programs():
+    """Import every program now. Used before forking webserver workers, so they share one copy of the programs' dependencies"""
+    for module in (RNAUtil, runtime_model, tfofinder, pinmol, smFISH):
+        getattr(module, "__file__")
+
 def get_program_object(prog_name: str) -> Program:
     return program_dict[prog_name.lower()]
 
@@ -116,25 +136,88 @@ def run_program(prog_name: str, user_id: str, error_message_validation: str ="So
     # import time
     # prev = time.time_ns()
     program = get_program_object(prog_name)
-    result =  program.run(request, error_message_validation, error_message_program)
+    result =  program.run(request, error_message_validation, error_message_program, owner=user_id)
     response = get_program_response(result, program.name)
     if 200 <= response.status_code < 300: log_program_success(program.name, user_id) #OK for DelayedProgram since it still verifies the arguments
     # print(((time.time_ns() - prev) // 1_000) / 1_000)
     return response
 
-def get_program_response(result: tuple[str, int] | Response | dict, program: str) -> Response:
+def get_program_response(result: tuple[str, int] | tuple[str, int, dict] | Response | dict, program: str) -> Response:
     if type(result) == Response: return result
     if type(result) == dict: return jsonify(**result)
     if type(result) == tuple:
         res = make_response(result[0])
         res.status_code = result[1]
+        if len(result) > 2: res.headers.update(result[2])
         return res
     raise TypeError("Result type not recognized. Type is " + str(type(result)))
 
 def log_program_success(program: str, user_id):
     add_run_to_db(user_id, program)
 
+def download_result(id: UUID):
+    return get_result_download(id)
+
+def pre_upload():
+    file_storage = request.files.get("ct-file")
+    if not file_storage: return "A ct file must be given", 400
+    try:
+        uploaded = pre_uploads.store.add(file_storage.stream, file_storage.filename)
+    except ValidationError as e:
+        return str(e), 400
+    ct_stats = uploaded.upload.ct_stats
+    return jsonify(token=str(uploaded.token), size=uploaded.upload.size, nucleotide_length=ct_stats.nucleotide_length,
+                   structure_count=ct_stats.structure_count, expires_in=round(pre_uploads.store.ttl))
+
+def result_files(id: UUID):
+    path = get_result_path(id)
+    if path is None: return DELETED_MESSAGE, 404
+    return jsonify(files=result_tables.list_files(path))
+
+def result_table(id: UUID, file: str, page: int, per_page: int, sort: str = None, descending: bool = False, query: str = None,
+                 column: str = None):
+    path = get_result_path(id)
+    if path is None: return DELETED_MESSAGE, 404
+    try:
+        return jsonify(**result_tables.get_table_page(path, file, page, per_page, sort, descending, query, column))
+    except ValidationError as e:
+        return str(e), 400
+
+def result_file(id: UUID, file: str):
+    path = get_result_path(id)
+    if path is None: return DELETED_MESSAGE, 404
+    try:
+        content, mimetype = result_tables.read_file(path, file)
+    except ValidationError as e:
+        return str(e), 404
+    return Response(content, mimetype=mimetype, headers={"Cache-Control": "private, max-age=3600"}) #a result never changes
+
+def progress_stream(id: UUID):
+    return get_progress_stream(id)
+
 def query_program(program_name: str, id: UUID):
     program = get_program_object(program_name)
     output_dir = program.output_dir / str(id)
-    return program.get_delayed_response(output_dir, id)
\ No newline at end of file
+    return program.get_delayed_response(output_dir, id)
+def run_batch(user_id: str, error_message_validation: str = "The given arguments are invalid",
+              error_message_program: str = "Something went wrong") -> Response:
+    try:
+        result = batch.submit_batch(request, get_program_object, output_dir, owner=user_id, validate_err_msg=error_message_validation,
+                                    runtime_err_msg=error_message_program)
+    except BaseException as e:
+        count_error("batch", e)
+        return get_program_response(send_error_response(e), "batch")
+    for job in result["jobs"]: log_program_success(job["program"], user_id)
+    response = jsonify(**result)
+    response.status_code = 202
+    return response
+
+def batch_status(id: UUID):
+    status = batch.get_batch_status(output_dir, id)
+    if status is None: return "This batch was deleted from the system (or was never ran)", 404
+    return jsonify(**status)
+
+def download_batch(id: UUID):
+    path, error_message, status_code = batch.get_batch_archive(output_dir, id)
+    if path is None: return error_message, status_code
+    return send_file(path, mimetype="application/zip", as_attachment=True, download_name=path.name, conditional=True, max_age=0)
@@ -0,0 +1,118 @@
+# Progress of delayed jobs: recorded from the program's stage events in the worker process, and streamed to the browser
+# as Server-Sent Events, so it doesn't have to keep polling /query-result
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from uuid import UUID
+
+from ..rnaprobes.RNAProbesUtil import StageEvent
+from .job_store import ACTIVE_STATES, JobStore
+
+MIN_PROGRESS_INTERVAL = 0.25 #seconds between recorded progress events of a stage. Started and finished are always recorded
+STREAM_POLL_SECONDS = 0.5
+STREAM_MAX_SECONDS = 5 * 60 #the browser reconnects after a stream ends, so a stream never holds a webserver thread for long
+KEEPALIVE_SECONDS = 15
+MAX_STREAMS = int(os.environ.get("RNAPROBES_MAX_PROGRESS_STREAMS", 0)) #per webserver process, 0 for half its threads. Clients fall back to polling beyond this
+WEBSERVER_THREADS = int(os.environ.get("RNAPROBES_THREADS", 8)) #per webserver process, see gunicorn.conf.py
+RETRY_MILLISECONDS = 2000
+
+STAGE_DESCRIPTIONS = {
+    "ct_parse": "Reading the ct file",
+    "probe_search": "Finding probes",
+    "probe_selection": "Selecting probes",
+    "oligoscreen": "Running oligoscreen",
+    "blast": "Checking BLAST results",
+    "beacons": "Designing beacons",
+    "oligowalk": "Running OligoWalk",
+    "selection": "Selecting probes",
+    "bifold": "Running bifold",
+    "zipping": "Zipping the results",
+}
+
+class ProgressRecorder:
+    """A stage listener that saves a job's latest stage event in the job store (and the shared job backend, if any)"""
+    def __init__(self, job_id: UUID, store: JobStore, shared=None):
+        self.job_id = job_id
+        self.store = store
+        self.shared = shared
+        self.last_progress = 0
+
+    def __call__(self, event: StageEvent):
+        if event.event == "progress":
+            if time.time() - self.last_progress < MIN_PROGRESS_INTERVAL and event.done != event.total: return
+            self.last_progress = time.time()
+        progress = json.dumps(dict(stage=event.stage, event=event.event, done=event.done, total=event.total))
+        self.store.set_progress(self.job_id, progress)
+        if self.shared is not None: self.shared.update(str(self.job_id), progress=progress)
+
+def describe(progress: str | None) -> str | None:
+    """
+    :param progress: a job's recorded progress
+    :return: a short description of it for users, or None if nothing was recorded yet
+    """
+    if not progress: return None
+    progress = json.loads(progress)
+    description = STAGE_DESCRIPTIONS.get(progress["stage"], progress["stage"])
+    if progress["event"] == "finished": return f"{description}: done"
+    if progress["event"] == "progress": return f"{description} ({progress['done']}/{progress['total']})"
+    return description
+
+def get_progress_data(progress: str | None) -> dict:
+    return dict(json.loads(progress), description=describe(progress)) if progress else dict(description="Waiting to start")
+
+def format_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def get_max_streams(threads: int) -> int:
+    """
+    :param threads: the threads of a webserver process
+    :return: how many progress streams the process may hold open. Always fewer than its threads, so other requests are still answered
+    """
+    return max(1, min(MAX_STREAMS or threads // 2, threads - 1))
+
+class StreamSlots:
+    """Counts the open progress streams of this process"""
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        """:return: whether a stream may be opened. If so, release once it's closed"""
+        with self._lock:
+            if self.count >= self.limit: return False
+            self.count += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.count = max(self.count - 1, 0)
+
+stream_slots = StreamSlots(get_max_streams(WEBSERVER_THREADS)) #set again from the webserver's actual settings in gunicorn.conf.py
+
+def stream_progress(get_progress: Callable[[], tuple[str | None, str | None]]) -> Iterator[str]:
+    """
+    Yield a job's progress as Server-Sent Events whenever it changes, then a finished event once the job is done
+    (its result is fetched with /query-result). Ends after STREAM_MAX_SECONDS, after which the browser reconnects.
+    Take a stream_slot before starting the stream, and release it once the response is closed
+    :param get_progress: get the job's state (None if the job is unknown) and recorded progress
+    """
+    start = last_sent = time.time()
+    last_progress = None
+    yield f"retry: {RETRY_MILLISECONDS}\n\n"
+    while time.time() - start < STREAM_MAX_SECONDS:
+        state, progress = current = get_progress()
+        if state not in ACTIVE_STATES:
+            yield format_event("finished", dict(state=state))
+            return
+        if current != last_progress:
+            yield format_event("progress", dict(state=state, **get_progress_data(progress)))
+            last_progress, last_sent = current, time.time()
+        elif time.time() - last_sent > KEEPALIVE_SECONDS:
+            yield ": keepalive\n\n"
+            last_sent = time.time()
+        time.sleep(STREAM_POLL_SECONDS)
@@ -0,0 +1,69 @@
+# Identify identical requests, so that they can share one computation (while running) and one result (once finished)
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from argparse import Namespace
+from contextlib import contextmanager
+from pathlib import Path
+
+RESULT_CACHE_ENABLED = os.environ.get("RNAPROBES_RESULT_CACHE", "1") != "0"
+MAX_CACHED_RESULTS = int(os.environ.get("RNAPROBES_MAX_CACHED_RESULTS", 200)) #finished jobs kept, besides the TTL
+COALESCE_TIMEOUT_SECONDS = 120 #how long an identical request waits for the running one before running by itself
+
+def _canonical_value(value):
+    if isinstance(value, Namespace):
+        return {key: _canonical_value(item) for key, item in sorted(vars(value).items())}
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_canonical_value(item) for item in value]
+    return str(value)
+
+def _is_job_specific(value) -> bool:
+    """Paths and streams differ between identical requests (their content is covered by the upload hashes)"""
+    return isinstance(value, Path) or hasattr(value, "read")
+
+def get_cache_key(program: str, upload_hashes: dict[str, str], kwargs: dict) -> str | None:
+    """
+    Get the key identifying a request: the program, the content of the uploaded files and the parsed arguments
+    :return: the key, or None if caching is disabled
+    """
+    if not RESULT_CACHE_ENABLED: return None
+    arguments = {key: _canonical_value(value) for key, value in sorted(kwargs.items()) if not _is_job_specific(value)}
+    canonical = json.dumps(dict(program=program, uploads=upload_hashes, arguments=arguments), sort_keys=True)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+class RequestCoalescer:
+    """Lets identical requests in this process wait for the first one instead of running at the same time"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight: dict[str, threading.Event] = dict()
+
+    @contextmanager
+    def share(self, key: str | None, timeout: float = COALESCE_TIMEOUT_SECONDS):
+        """
+        Use in a with expression around the computation. Yields True if this request should compute the result, or False
+        once the identical request that was already running has finished (or timed out)
+        """
+        if key is None:
+            yield True
+            return
+        with self._lock:
+            event = self._in_flight.get(key)
+            is_leader = event is None
+            if is_leader: event = self._in_flight[key] = threading.Event()
+        if not is_leader:
+            event.wait(timeout)
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            event.set()
+
+coalescer = RequestCoalescer()
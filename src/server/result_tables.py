@@ -0,0 +1,205 @@
+# Serves the files of a stored result zip one at a time, and its csv tables as sorted, filtered pages of JSON, so the
+# web UI only loads what it shows instead of downloading and unpacking the whole zip. A table is kept as its csv bytes
+# and the offset of each row, and only the rows of a page are parsed (a whole parsed table takes several times its size).
+# Tables are kept in a small per-process cache, bounded by their size, since a table is usually paged through (and
+# re-sorted) several times in a row
+from __future__ import annotations
+
+import csv
+import io
+import math
+import os
+import threading
+import zipfile
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+
+from ..rnaprobes.util import ValidationError
+from . import lazy_svgs
+
+MAX_CACHED_TABLE_BYTES = int(float(os.environ.get("RNAPROBES_TABLE_CACHE_MB", 16)) * 1024 * 1024) #per webserver process
+MAX_TABLE_BYTES = int(float(os.environ.get("RNAPROBES_MAX_TABLE_MB", 8)) * 1024 * 1024) #larger tables are only downloaded in the zip
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+TABLE_EXTENSIONS = (".csv",)
+MIMETYPES = {".svg": "image/svg+xml", ".xml": "application/xml", ".csv": "text/csv"} #everything else is sent as text
+
+class Table:
+    """
+    A csv file, kept as its bytes and the offset of each row. Rows are parsed when they're read, sort orders are computed
+    per column on first use
+    """
+    def __init__(self, columns: list[str], data: bytes, offsets: array):
+        self.columns = columns
+        self.data = data
+        self.offsets = offsets
+        self._sort_orders: dict[tuple[int, bool], array] = dict()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    @property
+    def size(self) -> int:
+        """:return: about how many bytes the table takes in memory"""
+        return len(self.data) + self.offsets.itemsize * (len(self.offsets) * (1 + len(self._sort_orders)))
+
+    def get_row(self, index: int) -> list[str]:
+        end = self.offsets[index + 1] if index + 1 < len(self.offsets) else len(self.data)
+        return next(read_csv(self.data[self.offsets[index]:end]), [])
+
+    def iter_rows(self):
+        """:return: every row, in the file's order"""
+        rows = read_csv(self.data[self.offsets[0]:] if self.offsets else b"")
+        return (row for row in rows if row)
+
+    def get_sort_order(self, column: int, descending: bool) -> array:
+        """:return: the row indices sorted by the column: numbers by value, then text (both reversed if descending), then empty cells"""
+        key = (column, descending)
+        if key not in self._sort_orders:
+            values = [get_sort_key(row[column] if column < len(row) else "") for row in self.iter_rows()]
+            filled = sorted((index for index, value in enumerate(values) if value[0] < 2), key=values.__getitem__, reverse=descending)
+            self._sort_orders[key] = array("q", filled + [index for index, value in enumerate(values) if value[0] == 2])
+        return self._sort_orders[key]
+
+def read_csv(data: bytes):
+    return csv.reader(io.TextIOWrapper(io.BytesIO(data), encoding="utf-8", errors="replace", newline=""))
+
+def index_rows(data: bytes) -> array:
+    """:return: the offset of each non-empty row of the csv file (a row may span several lines if a cell is quoted)"""
+    offsets, position = array("q"), 0
+    def get_lines():
+        nonlocal position
+        for line in io.BytesIO(data):
+            position += len(line)
+            yield line.decode("utf-8", errors="replace")
+    start = 0
+    for row in csv.reader(get_lines()):
+        if row: offsets.append(start)
+        start = position
+    return offsets
+
+def get_sort_key(value: str) -> tuple:
+    value = value.strip()
+    if value == "": return 2, 0, ""
+    try:
+        number = float(value)
+        return (0, number, "") if not math.isnan(number) else (1, 0, value)
+    except ValueError:
+        return 1, 0, value.lower()
+
+def is_number(value: str) -> bool:
+    try:
+        float(value)
+        return True
+    except ValueError:
+        return False
+
+def has_header(first_row: list[str]) -> bool:
+    """Result tables either have a header of names, or (like the sscount) none and a number in their first row"""
+    return not any(is_number(cell) for cell in first_row)
+
+def parse_table(data: bytes) -> Table:
+    offsets = index_rows(data)
+    table = Table([], data, offsets)
+    first_row = table.get_row(0) if offsets else []
+    if first_row and has_header(first_row): return Table(first_row, data, offsets[1:])
+    width = max((len(row) for row in table.iter_rows()), default=0)
+    table.columns = [f"Column {number}" for number in range(1, width + 1)]
+    return table
+
+def is_table(name: str) -> bool:
+    return name.lower().endswith(TABLE_EXTENSIONS)
+
+def list_files(zip_path: Path) -> list[dict]:
+    """
+    :return: the name and size of each file of the result, and whether it's served as a table. Svg files that aren't
+    drawn yet (see lazy_svgs) are listed without a size
+    """
+    with zipfile.ZipFile(zip_path) as zip_file:
+        files = [dict(name=info.filename, size=info.file_size, table=is_table(info.filename) and info.file_size <= MAX_TABLE_BYTES)
+                 for info in zip_file.infolist() if not info.is_dir() and not lazy_svgs.is_structures_file(info.filename)]
+    return files + [dict(name=name, size=None, table=False) for name in lazy_svgs.list_pending(zip_path)]
+
+def get_member(zip_file: zipfile.ZipFile, name: str) -> zipfile.ZipInfo:
+    """:raises ValidationError: if the zip has no file of that name"""
+    try:
+        return zip_file.getinfo(name)
+    except KeyError:
+        raise ValidationError(f"The result has no file named {name}") from None
+
+def read_file(zip_path: Path, name: str) -> tuple[bytes, str]:
+    """:return: a file of the result (drawn now if it's an svg file that wasn't yet), and its mimetype"""
+    with zipfile.ZipFile(zip_path) as zip_file:
+        content = zip_file.read(name) if name in zip_file.NameToInfo else None
+    if content is None: content = lazy_svgs.read_svg(zip_path, name) if name.lower().endswith(".svg") else None
+    if content is None: raise ValidationError(f"The result has no file named {name}")
+    return content, MIMETYPES.get(Path(name).suffix.lower(), "text/plain")
+
+class TableCache:
+    def __init__(self, max_bytes: int = MAX_CACHED_TABLE_BYTES):
+        """:param max_bytes: the most the cached tables take together, though the last table used is always kept"""
+        self.max_bytes = max_bytes
+        self._tables: OrderedDict[tuple, Table] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, zip_path: Path, name: str) -> Table:
+        """
+        :return: the parsed table, read from the zip unless it's cached. A rewritten zip is read again
+        :raises ValidationError: if the zip has no such table
+        """
+        key = (str(zip_path), os.stat(zip_path).st_mtime_ns, name)
+        with self._lock:
+            table = self._tables.get(key)
+            if table is not None:
+                self._tables.move_to_end(key)
+                return table
+        if not is_table(name): raise ValidationError(f"{name} isn't a table")
+        with zipfile.ZipFile(zip_path) as zip_file:
+            info = get_member(zip_file, name)
+            if info.file_size > MAX_TABLE_BYTES: raise ValidationError(f"{name} is too large to view, download the result instead")
+            table = parse_table(zip_file.read(info)) #parsed outside of the lock, two requests may parse the same table at once
+        with self._lock:
+            self._tables[key] = table
+        self.trim()
+        return table
+
+    def trim(self):
+        """Remove the least recently used tables while the cache is too large. Sort orders grow a table, so it's also trimmed after one is computed"""
+        with self._lock:
+            while len(self._tables) > 1 and sum(table.size for table in self._tables.values()) > self.max_bytes:
+                self._tables.popitem(last=False)
+
+table_cache = TableCache()
+
+def get_table_page(zip_path: Path, name: str, page: int = 1, per_page: int = DEFAULT_PAGE_SIZE, sort: str = None,
+                   descending: bool = False, query: str = None, column: str = None) -> dict:
+    """
+    Get a page of a table of the result zip
+    :param page: the page to get, starting at 1
+    :param sort: the column to sort by, the table's own order if None
+    :param query: only keep rows with a cell containing this text (ignoring case)
+    :param column: only search the query in this column
+    :return: the table's columns, the rows of the page and the number of matching rows and pages
+    :raises ValidationError: if the table, a column or the page is invalid
+    """
+    table = table_cache.get(zip_path, name)
+    def get_column_index(column_name: str) -> int:
+        if column_name not in table.columns: raise ValidationError(f"{name} has no column {column_name}")
+        return table.columns.index(column_name)
+    if not 1 <= per_page <= MAX_PAGE_SIZE: raise ValidationError(f"Pages must have 1 to {MAX_PAGE_SIZE} rows")
+    if page < 1: raise ValidationError("Pages start at 1")
+    if sort:
+        order = table.get_sort_order(get_column_index(sort), descending)
+        table_cache.trim()
+    else:
+        order = range(len(table))
+    if query:
+        query = query.lower()
+        searched = [get_column_index(column)] if column else None
+        matches = lambda row: any(query in cell.lower() for cell in (row if searched is None else [row[i] for i in searched if i < len(row)]))
+        matching = [matches(row) for row in table.iter_rows()]
+        order = [index for index in order if matching[index]]
+    start = (page - 1) * per_page
+    return dict(file=name, columns=table.columns, rows=[table.get_row(index) for index in order[start:start + per_page]],
+                page=page, per_page=per_page, total_rows=len(order), pages=max(math.ceil(len(order) / per_page), 1))
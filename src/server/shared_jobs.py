@@ -0,0 +1,357 @@
+# Delayed jobs shared between server machines: a queue any machine can take jobs from, the jobs' inputs and results, and
+# their status, so that any machine can run a job and answer queries about it. Backed by redis, or by a directory (e.g. a
+# shared volume, or for testing). Off unless RNAPROBES_SHARED_JOBS is set
+from __future__ import annotations
+
+import json
+import os
+import random
+import shutil
+import socket
+import sys
+import threading
+import time
+import zipfile
+from pathlib import Path
+
+from ..rnaprobes.util import write_folder_to_zip
+
+SHARED_JOBS = os.environ.get("RNAPROBES_SHARED_JOBS", "") #redis (uses REDIS_URL), or the path of a shared directory
+STEAL_INTERVAL_SECONDS = 2 #how often an idle webserver process looks for queued jobs of other machines
+LEASE_SECONDS = 10 * 60 #a running job whose machine hasn't been heard from for this long is queued again
+MAX_ATTEMPTS = 2
+SHARED_TTL_SECONDS = 2 * 60 * 60 #everything about a job is removed this long after it was last changed
+QUEUED, RUNNING, COMPLETE, FAILED = "queued", "running", "complete", "failed"
+
+def get_instance_id() -> str:
+    """Identifies this machine. Processes of one machine coordinate through the local job store instead"""
+    return os.environ.get("FLY_MACHINE_ID") or socket.gethostname()
+
+class SharedJobBackend:
+    """
+    Where shared jobs live. A job's status is a dict with at least program, directory (relative to the files root), state,
+    owner (the machine running it), created, and once finished, finished and result_name or error_message and error_code
+    """
+    def publish(self, job_id: str, package: Path, status: dict):
+        """Save a job's inputs (a zip of its directory) and status, and queue it"""
+        raise NotImplementedError
+
+    def start(self, job_id: str) -> bool:
+        """
+        Take a queued job off the queue to run it on this machine
+        :return: whether this machine should run the job. False if another machine took it
+        """
+        raise NotImplementedError
+
+    def steal(self) -> str | None:
+        """
+        Take the oldest queued job to run it on this machine
+        :return: the job's id, or None if nothing is queued
+        """
+        raise NotImplementedError
+
+    def heartbeat(self, job_ids: list[str]):
+        """Mark jobs as still running on this machine"""
+        raise NotImplementedError
+
+    def requeue_stale(self) -> list[str]:
+        """
+        Queue running jobs again whose machine hasn't sent a heartbeat for LEASE_SECONDS, or fail them after MAX_ATTEMPTS
+        :return: the requeued job ids
+        """
+        raise NotImplementedError
+
+    def get(self, job_id: str) -> dict | None:
+        raise NotImplementedError
+
+    def update(self, job_id: str, **fields):
+        raise NotImplementedError
+
+    def fetch_package(self, job_id: str, directory: Path):
+        """Unzip a job's inputs into its directory"""
+        raise NotImplementedError
+
+    def store_result(self, job_id: str, path: Path):
+        raise NotImplementedError
+
+    def fetch_result(self, job_id: str, path: Path) -> bool:
+        """:return: whether the result exists"""
+        raise NotImplementedError
+
+    def remove_expired(self) -> int:
+        """:return: the number of removed jobs"""
+        return 0
+
+class DirectoryBackend(SharedJobBackend):
+    """
+    Keeps shared jobs in a directory. Taking a job from the queue is an atomic rename of its queue entry, so the directory
+    must be on a single filesystem
+    """
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.jobs, self.queue, self.running = self.root / "jobs", self.root / "queue", self.root / "running"
+        for directory in (self.jobs, self.queue, self.running):
+            directory.mkdir(parents=True, exist_ok=True)
+
+    def _queue_entry(self, job_id: str, created: float) -> Path:
+        return self.queue / f"{created:017.6f}-{job_id}" #sorts by creation time
+
+    def publish(self, job_id: str, package: Path, status: dict):
+        (self.jobs / job_id).mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(package, self.jobs / job_id / "package.zip")
+        self._write_status(job_id, dict(status, state=QUEUED, owner=None, attempts=0))
+        self._queue_entry(job_id, status["created"]).touch()
+
+    def _take(self, entry: Path) -> bool:
+        job_id = entry.name.partition("-")[2]
+        try:
+            os.rename(entry, self.running / job_id) #only one machine's rename succeeds
+        except FileNotFoundError:
+            return False
+        os.utime(self.running / job_id) #the entry kept its publish time, which would make a job that waited long look stale
+        self.update(job_id, state=RUNNING, owner=get_instance_id())
+        return True
+
+    def start(self, job_id: str) -> bool:
+        entries = list(self.queue.glob(f"*-{job_id}"))
+        if entries and self._take(entries[0]): return True
+        status = self.get(job_id)
+        return status is not None and status["state"] == RUNNING and status["owner"] == get_instance_id()
+
+    def steal(self) -> str | None:
+        for entry in sorted(self.queue.iterdir()):
+            if self._take(entry): return entry.name.partition("-")[2]
+        return None
+
+    def heartbeat(self, job_ids: list[str]):
+        for job_id in job_ids:
+            if (self.running / job_id).exists(): os.utime(self.running / job_id)
+
+    def requeue_stale(self) -> list[str]:
+        requeued = []
+        for entry in list(self.running.iterdir()):
+            try:
+                if time.time() - entry.stat().st_mtime < LEASE_SECONDS: continue
+                os.remove(entry) #only one machine requeues it
+            except FileNotFoundError:
+                continue
+            status = self.get(entry.name)
+            if status is None or status["state"] != RUNNING: continue
+            if status["attempts"] + 1 >= MAX_ATTEMPTS:
+                self.update(entry.name, state=FAILED, finished=time.time(), error_code=500,
+                            error_message="The job's server stopped unexpectedly. Please run it again")
+                continue
+            self.update(entry.name, state=QUEUED, owner=None, attempts=status["attempts"] + 1)
+            self._queue_entry(entry.name, status["created"]).touch()
+            requeued.append(entry.name)
+        return requeued
+
+    def get(self, job_id: str) -> dict | None:
+        try:
+            with open(self.jobs / job_id / "status.json", "r") as file:
+                return json.load(file)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write_status(self, job_id: str, status: dict):
+        partial_path = self.jobs / job_id / f".status-{os.getpid()}-{threading.get_ident()}.json"
+        with open(partial_path, "w") as file:
+            json.dump(status, file)
+        os.replace(partial_path, self.jobs / job_id / "status.json")
+
+    def update(self, job_id: str, **fields):
+        status = self.get(job_id)
+        if status is None: return
+        self._write_status(job_id, dict(status, **fields))
+        if fields.get("state") in (COMPLETE, FAILED):
+            try:
+                os.remove(self.running / job_id)
+            except FileNotFoundError:
+                pass
+
+    def fetch_package(self, job_id: str, directory: Path):
+        with zipfile.ZipFile(self.jobs / job_id / "package.zip", "r") as package:
+            package.extractall(directory)
+
+    def store_result(self, job_id: str, path: Path):
+        shutil.copyfile(path, self.jobs / job_id / ".result.zip")
+        os.replace(self.jobs / job_id / ".result.zip", self.jobs / job_id / "result.zip")
+
+    def fetch_result(self, job_id: str, path: Path) -> bool:
+        if not (self.jobs / job_id / "result.zip").exists(): return False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(self.jobs / job_id / "result.zip", path)
+        return True
+
+    def remove_expired(self) -> int:
+        removed = 0
+        for directory in list(self.jobs.iterdir()):
+            status_path = directory / "status.json"
+            try:
+                if time.time() - status_path.stat().st_mtime < SHARED_TTL_SECONDS: continue
+            except FileNotFoundError:
+                continue
+            if (self.running / directory.name).exists(): continue
+            shutil.rmtree(directory, ignore_errors=True)
+            removed += 1
+        return removed
+
+# Takes a job off the queue (the given one, or else the oldest) and marks it running, in one step so that a machine
+# stopping in between can't lose the job. KEYS: queue, running. ARGV: now, state, owner, status key prefix, [job id]
+TAKE_SCRIPT = """
+local job_id = ARGV[5]
+if job_id then
+    if redis.call('ZREM', KEYS[1], job_id) == 0 then return false end
+else
+    local popped = redis.call('ZPOPMIN', KEYS[1])
+    if #popped == 0 then return false end
+    job_id = popped[1]
+end
+redis.call('ZADD', KEYS[2], ARGV[1], job_id)
+redis.call('HSET', ARGV[4] .. ':' .. job_id .. ':status', 'state', ARGV[2], 'owner', ARGV[3])
+return job_id
+"""
+
+class RedisBackend(SharedJobBackend):
+    """
+    Keeps shared jobs in redis: each job's status in a hash, its inputs and result as strings, the queue in a sorted set by
+    creation time and running jobs in a sorted set by heartbeat. Every key expires after SHARED_TTL_SECONDS
+    """
+    prefix = "rnaprobes:jobs"
+
+    def __init__(self, client):
+        self.client = client
+        self.queue, self.running = f"{self.prefix}:queue", f"{self.prefix}:running"
+        self._take_script = client.register_script(TAKE_SCRIPT)
+
+    def _key(self, job_id: str, part: str = "status") -> str:
+        return f"{self.prefix}:{job_id}:{part}"
+
+    def publish(self, job_id: str, package: Path, status: dict):
+        pipe = self.client.pipeline()
+        pipe.set(self._key(job_id, "package"), package.read_bytes(), ex=SHARED_TTL_SECONDS)
+        pipe.hset(self._key(job_id), mapping={key: json.dumps(value) for key, value in dict(status, state=QUEUED, owner=None, attempts=0).items()})
+        pipe.expire(self._key(job_id), SHARED_TTL_SECONDS)
+        pipe.zadd(self.queue, {job_id: status["created"]})
+        pipe.execute()
+
+    def _take(self, job_id: str = None) -> str | None:
+        """
+        :param job_id: the job to take, or None for the oldest queued job
+        :return: the taken job's id, or None if it wasn't queued (or nothing was)
+        """
+        args = [time.time(), json.dumps(RUNNING), json.dumps(get_instance_id()), self.prefix] + ([job_id] if job_id is not None else [])
+        taken = self._take_script(keys=[self.queue, self.running], args=args)
+        return taken.decode() if isinstance(taken, bytes) else taken
+
+    def start(self, job_id: str) -> bool:
+        if self._take(job_id) is not None: return True #only one machine takes it
+        status = self.get(job_id)
+        return status is not None and status["state"] == RUNNING and status["owner"] == get_instance_id()
+
+    def steal(self) -> str | None:
+        return self._take()
+
+    def heartbeat(self, job_ids: list[str]):
+        if job_ids: self.client.zadd(self.running, {job_id: time.time() for job_id in job_ids}, xx=True)
+
+    def requeue_stale(self) -> list[str]:
+        requeued = []
+        for job_id in (job_id.decode() for job_id in self.client.zrangebyscore(self.running, 0, time.time() - LEASE_SECONDS)):
+            if self.client.zrem(self.running, job_id) != 1: continue #only one machine requeues it
+            status = self.get(job_id)
+            if status is None or status["state"] != RUNNING: continue
+            if status["attempts"] + 1 >= MAX_ATTEMPTS:
+                self.update(job_id, state=FAILED, finished=time.time(), error_code=500,
+                            error_message="The job's server stopped unexpectedly. Please run it again")
+                continue
+            self.update(job_id, state=QUEUED, owner=None, attempts=status["attempts"] + 1)
+            self.client.zadd(self.queue, {job_id: status["created"]})
+            requeued.append(job_id)
+        return requeued
+
+    def get(self, job_id: str) -> dict | None:
+        status = self.client.hgetall(self._key(job_id))
+        return {key.decode(): json.loads(value) for key, value in status.items()} if status else None
+
+    def update(self, job_id: str, **fields):
+        pipe = self.client.pipeline()
+        pipe.hset(self._key(job_id), mapping={key: json.dumps(value) for key, value in fields.items()})
+        pipe.expire(self._key(job_id), SHARED_TTL_SECONDS)
+        if fields.get("state") in (COMPLETE, FAILED): pipe.zrem(self.running, job_id)
+        pipe.execute()
+
+    def fetch_package(self, job_id: str, directory: Path):
+        package = self.client.get(self._key(job_id, "package"))
+        if package is None: raise FileNotFoundError(f"The inputs of job {job_id} have expired")
+        directory.mkdir(parents=True, exist_ok=True)
+        with open(directory / ".package.zip", "wb") as file:
+            file.write(package)
+        with zipfile.ZipFile(directory / ".package.zip", "r") as package_zip:
+            package_zip.extractall(directory)
+        os.remove(directory / ".package.zip")
+
+    def store_result(self, job_id: str, path: Path):
+        self.client.set(self._key(job_id, "result"), path.read_bytes(), ex=SHARED_TTL_SECONDS)
+
+    def fetch_result(self, job_id: str, path: Path) -> bool:
+        result = self.client.get(self._key(job_id, "result"))
+        if result is None: return False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(result)
+        return True
+
+def package_job(job_dir: Path) -> Path:
+    """Zip a job's directory (its job file and inputs) next to it, so another machine can run it"""
+    package = job_dir.parent / f".{job_dir.name}-package.zip"
+    write_folder_to_zip(job_dir, package)
+    return package
+
+backend = None
+def get_shared_backend() -> SharedJobBackend | None:
+    """:return: the backend, or None if jobs aren't shared"""
+    global backend
+    if backend is None and SHARED_JOBS:
+        if SHARED_JOBS == "redis":
+            from redis import Redis
+            backend = RedisBackend(Redis.from_url(os.environ.get("REDIS_URL", "")))
+        else:
+            backend = DirectoryBackend(Path(SHARED_JOBS))
+    return backend
+
+def set_shared_backend(new_backend: SharedJobBackend | None):
+    global backend
+    backend = new_backend
+
+class WorkStealer:
+    """
+    Runs in each webserver process while jobs are shared: keeps the process' running jobs alive, queues jobs of stopped
+    machines again, and takes queued jobs whenever the process' job executor is idle
+    """
+    def __init__(self, take_job):
+        """:param take_job: called with a stolen job's id and status (None if it has expired), to run it in this process"""
+        self.take_job = take_job
+        self.pid = None
+
+    def start(self):
+        if self.pid == os.getpid() or get_shared_backend() is None: return
+        self.pid = os.getpid()
+        threading.Thread(target=self._run, name="work-stealer", daemon=True).start()
+
+    def _run(self):
+        from .job_executor import get_executor
+        while True:
+            time.sleep(STEAL_INTERVAL_SECONDS * random.uniform(0.5, 1.5)) #spread out the processes
+            try:
+                self.step(get_shared_backend(), get_executor())
+            except Exception as e: #the backend may be down for a while
+                print(f"Work stealing failed: {e}", file=sys.stderr)
+
+    def step(self, shared: SharedJobBackend, executor) -> str | None:
+        """:return: the id of the stolen job, if any"""
+        shared.heartbeat([str(job_id) for job_id in executor.get_job_ids()])
+        shared.requeue_stale()
+        if not executor.is_idle(): return None
+        job_id = shared.steal()
+        if job_id is not None: self.take_job(job_id, shared.get(job_id))
+        return job_id
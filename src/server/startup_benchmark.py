@@ -0,0 +1,123 @@
+# Measure the webserver's cold start: how long importing the app takes (and which modules that time goes to), and how
+# long a freshly started server takes to answer its first / and /send-request. Run from the repository root with
+# python -m src.server.startup_benchmark
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import Counter
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+IMPORT_BUDGET_SECONDS = float(os.environ.get("RNAPROBES_IMPORT_BUDGET_SECONDS", 0.5)) #for importing the app and answering /, not the programs
+INDEX_STATEMENT = "import app; app.app.test_client().get('/')" #the imports a server without preloaded programs pays before its first / response
+EXAMPLE_FILE = ROOT / "src" / "rnaprobes" / "tests" / "test_example_files" / "example_small.ct"
+_import_time_line = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+def get_import_breakdown(statement: str = "import app") -> tuple[float, Counter]:
+    """
+    Run the statement in a new interpreter with -X importtime
+    :return: the total seconds spent importing, and the seconds spent in each package (not counting its imports of other packages)
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=ROOT, capture_output=True, text=True,
+                            env=dict(os.environ, RNAPROBES_RECOVER_AFTER_FORK="1"))
+    if result.returncode != 0: raise RuntimeError(f"Importing failed:\n{result.stderr}")
+    total, packages = 0.0, Counter()
+    for match in map(_import_time_line.match, result.stderr.splitlines()):
+        if match is None: continue
+        own, cumulative, indent, name = int(match[1]) / 1e6, int(match[2]) / 1e6, match[3], match[4]
+        if len(indent) == 1: total += cumulative #imported directly by the statement
+        packages[get_package_name(name)] += own
+    return total, packages
+
+def get_package_name(module: str) -> str:
+    """Group the modules of this repository by program, and other modules by their top level package"""
+    parts = module.split(".")
+    return ".".join(parts[:3]) if parts[0] == "src" else parts[0]
+
+def get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def get_server_command(server: str, port: int, workers: int) -> list[str]:
+    if server == "gunicorn":
+        return [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "-b", f"127.0.0.1:{port}", "-w", str(workers), "app:app"]
+    return [sys.executable, "-m", "flask", "--app", "app", "run", "--port", str(port)]
+
+def wait_for_response(request: urllib.request.Request, start: float, timeout: float) -> float:
+    """
+    Retry the request until it succeeds
+    :return: the seconds from start until the first successful response
+    """
+    while time.perf_counter() - start < timeout:
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                response.read()
+                return time.perf_counter() - start
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.01)
+    raise TimeoutError(f"No successful response to {request.full_url} after {timeout} seconds")
+
+def get_tfofinder_request(url: str, ct_file: Path) -> urllib.request.Request:
+    boundary = uuid.uuid4().hex
+    body = (f'--{boundary}\r\nContent-Disposition: form-data; name="tfofinder-probe-length"\r\n\r\n9:12\r\n'
+            f'--{boundary}\r\nContent-Disposition: form-data; name="ct-file"; filename="{ct_file.name}"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n').encode() + ct_file.read_bytes() + f"\r\n--{boundary}--\r\n".encode()
+    return urllib.request.Request(f"{url}/send-request?program=TFOFinder", data=body, method="POST",
+                                  headers={"Content-Type": f"multipart/form-data; boundary={boundary}"})
+
+def measure_startup(server: str, workers: int, timeout: float) -> tuple[float, float]:
+    """
+    Start a server and request / and then /send-request (a small TFOFinder run) as soon as it answers
+    :return: the seconds from starting the server to the first successful / and /send-request responses
+    """
+    port = get_free_port()
+    url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    process = subprocess.Popen(get_server_command(server, port, workers), cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                               env=dict(os.environ, RNAPROBES_RECORD_TIMINGS="0"))
+    try:
+        index_time = wait_for_response(urllib.request.Request(url + "/"), start, timeout)
+        return index_time, wait_for_response(get_tfofinder_request(url, EXAMPLE_FILE), start, timeout)
+    finally:
+        process.terminate()
+        process.wait()
+
+def run(args: list[str]) -> bool:
+    """:return: whether importing the app and answering / (without preloading the programs) is within the budget"""
+    arguments = create_arg_parser().parse_args(args)
+    total, packages = get_import_breakdown(INDEX_STATEMENT)
+    print(f"Importing the app and answering /: {total:.3f} seconds (budget {arguments.budget:.3f})")
+    for package, seconds in packages.most_common(arguments.top):
+        print(f"  {seconds:.3f}  {package}")
+    programs_total, _ = get_import_breakdown("import app; from src.server.program_controller import preload_programs; preload_programs()")
+    print(f"Importing the app and preloading the programs: {programs_total:.3f} seconds")
+
+    for server in arguments.servers:
+        times = [measure_startup(server, arguments.workers, arguments.timeout) for _ in range(arguments.repeat)]
+        print(f"{server}: first / after {min(t[0] for t in times):.3f} seconds, first /send-request after {min(t[1] for t in times):.3f} seconds"
+              f" (best of {arguments.repeat})")
+    return total <= arguments.budget
+
+def create_arg_parser():
+    parser = argparse.ArgumentParser(prog="startup_benchmark", description="Measure the import time and cold start of the webserver.")
+    parser.add_argument("-b", "--budget", type=float, default=IMPORT_BUDGET_SECONDS, help="The allowed seconds of imports for answering /")
+    parser.add_argument("-s", "--servers", nargs="*", choices=["gunicorn", "flask"], default=["gunicorn"],
+                        help="The servers to measure the first responses of. Give none to only measure imports")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="The number of gunicorn workers")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="How many times to start each server")
+    parser.add_argument("-t", "--timeout", type=float, default=60, help="Seconds to wait for each response")
+    parser.add_argument("--top", type=int, default=15, help="How many packages to show in the import breakdown")
+    return parser
+
+if __name__ == "__main__":
+    sys.exit(0 if run(sys.argv[1:]) else 1)
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from unittest import TestCase
+
+from ..janitor import EVICTED, EXPIRED, ORPHANED, Janitor
+from ..job_store import JobStore
+
+
+class Test(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = Path(self.directory.name) / "user-files"
+        self.store = JobStore(Path(self.directory.name) / "jobs.db") #outside of user-files, so it isn't counted in the quota
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def create_janitor(self, **kwargs) -> Janitor:
+        return Janitor(self.root, lambda: self.store, **dict(dict(max_kept=10, ttl=60 * 60, quota=0, orphan_grace=60 * 60, interval=0), **kwargs))
+
+    def make_directory(self, parent: str, size: int = 1000, age: float = 0, name: uuid.UUID = None) -> Path:
+        directory = self.root / parent / str(name or uuid.uuid4())
+        directory.mkdir(parents=True)
+        (directory / "result.zip").write_bytes(b"x" * size)
+        if age: os.utime(directory, (time.time() - age, time.time() - age))
+        return directory
+
+    def make_job(self, finished_ago: float = None, size: int = 1000, parent: str = "pinmol", group_id: uuid.UUID = None) -> Path:
+        """:param finished_ago: how long ago the job finished, or None for a running job"""
+        job_id = uuid.uuid4()
+        directory = self.make_directory(parent, size, name=job_id)
+        self.store.add(job_id, "PinMol", directory, group_id=group_id)
+        if finished_ago is None:
+            self.store.claim_next(10)
+        else:
+            self.store.complete(job_id, directory / "result.zip")
+            self.store._connect().execute("UPDATE jobs SET finished = ? WHERE id = ?", (time.time() - finished_ago, str(job_id)))
+        return directory
+
+    def test_expires_jobs(self):
+        old, older_recent, newest = self.make_job(2 * 60 * 60), self.make_job(60), self.make_job(30)
+        running = self.make_job()
+        result = self.create_janitor(max_kept=1).sweep(force=True)
+        self.assertEqual(result.removed, {EXPIRED: 2})
+        self.assertEqual([directory.exists() for directory in (old, older_recent, newest, running)], [False, False, True, True])
+        self.assertEqual(len(self.store.get_finished()), 1)
+
+    def test_evicts_oldest_over_quota(self):
+        oldest, newer = self.make_job(300), self.make_job(200)
+        running = self.make_job()
+        result = self.create_janitor(quota=2500).sweep(force=True)
+        self.assertEqual(result.removed, {EVICTED: 1})
+        self.assertEqual([directory.exists() for directory in (oldest, newer, running)], [False, True, True])
+        self.create_janitor(quota=500).sweep(force=True) #running jobs are never evicted
+        self.assertEqual([directory.exists() for directory in (newer, running)], [False, True])
+
+    def test_removes_orphans_after_grace(self):
+        orphan, fresh = self.make_directory("smfish", age=2 * 60 * 60), self.make_directory("smfish")
+        owned = self.make_job(60)
+        os.utime(owned, (0, 0))
+        result = self.create_janitor().sweep(force=True)
+        self.assertEqual(result.removed, {ORPHANED: 1})
+        self.assertEqual([directory.exists() for directory in (orphan, fresh, owned)], [False, True, True])
+
+    def test_keeps_batch_directory_while_it_has_jobs(self):
+        group_id = uuid.uuid4()
+        job = self.make_job(parent=f"batches/{group_id}", group_id=group_id)
+        group_directory = job.parent
+        os.utime(group_directory, (0, 0))
+        self.create_janitor().sweep(force=True)
+        self.assertTrue(job.exists())
+        self.store.remove(uuid.UUID(job.name))
+        os.utime(group_directory, (0, 0))
+        self.assertEqual(self.create_janitor().sweep(force=True).removed, {ORPHANED: 1})
+        self.assertFalse(group_directory.exists())
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from unittest import TestCase
+
+from ..job_executor import Job, JobExecutor, QueueFullError
+from ..job_store import COMPLETE, QUEUED, RUNNING, JobRecord, JobStore
+
+
+def complete_job(db_path: Path, job_id: uuid.UUID):
+    JobStore(db_path).complete(job_id, Path("result.zip"))
+
+
+class Test(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = JobStore(Path(self.directory.name) / "jobs.db")
+        self.started = []
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def create_job(self, job: JobRecord, claimer_pid: int) -> Job:
+        self.started.append(job.id)
+        return Job(uuid.UUID(job.id), complete_job, (self.store.path, uuid.UUID(job.id)))
+
+    def create_executor(self, **kwargs) -> JobExecutor:
+        """An executor of another webserver process, sharing the job store"""
+        return JobExecutor(self.create_job, lambda: self.store, **dict(dict(max_workers=1, max_queued=2, max_jobs_per_owner=3), **kwargs))
+
+    def submit(self, executor: JobExecutor, owner: str = None, cost: float = None) -> uuid.UUID:
+        return self.submit_all(executor, owner, [cost])[0]
+
+    def submit_all(self, executor: JobExecutor, owner: str, costs: list[float | None], group_id: uuid.UUID = None) -> list[uuid.UUID]:
+        job_ids = [uuid.uuid4() for _ in costs]
+        with self.store.transaction():
+            tags = executor.admit(owner, costs, is_batch=group_id is not None)
+            for job_id, cost, job_tags in zip(job_ids, costs, tags):
+                self.store.add(job_id, "PinMol", Path(self.directory.name) / str(job_id), group_id=group_id, owner=owner, cost=cost,
+                               tags=job_tags)
+        return job_ids
+
+    def test_capacity_is_shared(self):
+        first, second = self.create_executor(), self.create_executor()
+        self.submit(first, "a")
+        self.submit(second, "b")
+        self.submit(first, "c") #one can run right away, two wait
+        with self.assertRaises(QueueFullError) as error:
+            self.submit(second, "d")
+        self.assertGreater(error.exception.wait, 0)
+        self.assertEqual(len(self.store.get_active()), 3)
+
+    def test_owner_limit_is_shared(self):
+        first, second = self.create_executor(max_queued=10), self.create_executor(max_queued=10)
+        for executor in (first, second, first): self.submit(executor, "a")
+        with self.assertRaises(QueueFullError):
+            self.submit(second, "a")
+        self.submit(second, "b")
+
+    def test_batch_is_admitted_whole(self):
+        first, second = self.create_executor(max_queued=3), self.create_executor(max_queued=3)
+        self.submit_all(first, "a", [60, 60])
+        with self.assertRaises(QueueFullError) as error: #more than the owner can ever have
+            self.submit_all(second, "a", [60] * 4)
+        self.assertIsNone(error.exception.wait)
+        with self.assertRaises(QueueFullError) as error: #until a's first job finishes
+            self.submit_all(second, "a", [60, 60])
+        self.assertAlmostEqual(error.exception.wait, 60, delta=1)
+        with self.assertRaises(QueueFullError) as error: #more than the queue has room for
+            self.submit_all(second, "b", [60] * 3)
+        self.assertAlmostEqual(error.exception.wait, 60, delta=1) #b's first job would only wait for a's first one
+        self.assertEqual(len(self.store.get_active()), 2)
+        self.submit_all(second, "b", [60] * 2)
+        self.assertEqual(len(self.store.get_active()), 4)
+
+    def test_batch_takes_one_slot(self):
+        first, second = self.create_executor(max_wait_seconds=3600), self.create_executor(max_wait_seconds=3600)
+        self.submit_all(first, "a", [60] * 20, uuid.uuid4()) #more jobs than the owner and the queue have room for
+        self.submit(second, "a")
+        self.submit(second, "b")
+        self.assertEqual(len(self.store.get_active()), 22)
+        with self.assertRaises(QueueFullError) as error: #the queue is full with a's batch, a's job and b's job
+            self.submit(first, "c")
+        self.assertGreater(error.exception.wait, 0)
+        with self.assertRaises(QueueFullError) as error: #longer than the wait allowed
+            self.submit_all(second, "d", [60] * 50, uuid.uuid4())
+        self.assertGreater(error.exception.wait, 0)
+
+    def test_claims_up_to_max_workers(self):
+        first, second = self.create_executor(max_workers=2), self.create_executor(max_workers=2)
+        ids = [self.submit(first) for _ in range(3)]
+        self.assertEqual(self.store.claim_next(2).id, str(ids[0]))
+        self.assertEqual(self.store.claim_next(2).id, str(ids[1]))
+        self.assertIsNone(self.store.claim_next(2))
+        self.assertEqual([first.get_position(job_id) for job_id in ids], [0, 0, 1])
+        self.assertFalse(second.is_idle())
+        self.assertEqual(second.get_status()["active"], 2)
+
+    def test_fair_queuing(self):
+        first, second = self.create_executor(max_queued=10, max_jobs_per_owner=10), self.create_executor(max_queued=10)
+        flood = [self.submit(first, "a", cost=60) for _ in range(4)]
+        other = self.submit(second, "b", cost=60) #queued after a's jobs, but only waits for a's first one
+        self.assertEqual(second.get_position(other), 2)
+        self.assertAlmostEqual(second.get_estimated_wait(other), 60, delta=1)
+        started = [self.store.claim_next(1).id]
+        for _ in range(4):
+            self.store.complete(uuid.UUID(started[-1]), Path("result.zip"))
+            started.append(self.store.claim_next(1).id)
+        self.assertEqual(started, [str(job_id) for job_id in (flood[0], other, *flood[1:])])
+
+    def test_estimated_wait(self):
+        executor = self.create_executor(max_queued=10)
+        ids = [self.submit(executor, cost=cost) for cost in (100, 50, 20)]
+        self.store.claim_next(1)
+        self.assertEqual(executor.get_estimated_wait(ids[0]), 0)
+        self.assertAlmostEqual(executor.get_estimated_wait(ids[1]), 100, delta=1)
+        self.assertAlmostEqual(executor.get_estimated_wait(ids[2]), 150, delta=1)
+        self.assertIsNone(executor.get_estimated_wait(uuid.uuid4()))
+
+    def test_dispatch_runs_queued_jobs(self):
+        first, second = self.create_executor(), self.create_executor()
+        ids = [self.submit(first), self.submit(second)]
+        second.dispatch() #runs both, one after the other
+        deadline = time.time() + 30
+        while time.time() < deadline and any(self.store.get(job_id).state in (QUEUED, RUNNING) for job_id in ids):
+            time.sleep(0.05)
+        self.assertEqual([self.store.get(job_id).state for job_id in ids], [COMPLETE, COMPLETE])
+        self.assertEqual(self.started, [str(job_id) for job_id in ids])
+        while time.time() < deadline and second._pool is not None: time.sleep(0.05)
+        self.assertIsNone(second._pool) #no worker process is kept once the jobs are done
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import uuid
+from pathlib import Path
+from unittest import TestCase
+
+from ..job_store import QUEUED, JobStore, get_process_start
+
+
+class Test(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = JobStore(Path(self.directory.name) / "jobs.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_reused_process_id_is_interrupted(self):
+        if not get_process_start(os.getpid()): self.skipTest("process start times are only known on Linux")
+        alive, reused = uuid.uuid4(), uuid.uuid4()
+        for job_id in (alive, reused): self.store.add(job_id, "PinMol", Path(self.directory.name) / str(job_id))
+        self.store.claim_next(2)
+        self.assertFalse(self.store.is_interrupted(self.store.get(alive)))
+        #the job's process stopped with the container, and a process of the restarted one got the same id
+        self.store._connect().execute("UPDATE jobs SET owner_start = '0' WHERE id = ?", (str(reused),))
+        self.assertTrue(self.store.is_interrupted(self.store.get(reused)))
+        recovered, failed = self.store.claim_interrupted()
+        self.assertEqual([job.id for job in recovered], [str(reused)])
+        self.assertEqual(self.store.get(reused).state, QUEUED)
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from unittest import TestCase
+
+from ..progress import StreamSlots, get_max_streams
+
+
+class Test(TestCase):
+    def test_streams_leave_threads_free(self):
+        self.assertEqual(get_max_streams(8), 4)
+        for threads in (1, 2, 3, 8, 32):
+            self.assertLess(get_max_streams(threads), max(threads, 2))
+
+    def test_stream_slots(self):
+        slots = StreamSlots(2)
+        self.assertEqual([slots.acquire() for _ in range(3)], [True, True, False])
+        slots.release()
+        self.assertTrue(slots.acquire())
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from unittest import TestCase
+
+from ..Program import take_shared_job
+from ..shared_jobs import COMPLETE, FAILED, LEASE_SECONDS, MAX_ATTEMPTS, QUEUED, RUNNING, DirectoryBackend, WorkStealer, get_instance_id
+
+
+class Test(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = Path(self.directory.name)
+        self.backend = DirectoryBackend(self.root / "shared")
+        self.package = self.root / "package.zip"
+        with zipfile.ZipFile(self.package, "w") as package:
+            package.writestr("job.pickle", b"job")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def publish(self, job_id: str, created: float):
+        self.backend.publish(job_id, self.package, dict(program="TFOFinder", directory=f"tfo/{job_id}", created=created))
+
+    def expire_lease(self, job_id: str):
+        stale = time.time() - LEASE_SECONDS - 1
+        os.utime(self.backend.running / job_id, (stale, stale))
+
+    def test_publish_and_steal(self):
+        self.publish("b", 2)
+        self.publish("a", 1)
+        self.assertEqual(self.backend.get("a")["state"], QUEUED)
+        self.assertEqual(self.backend.steal(), "a") #the oldest first
+        self.assertEqual(self.backend.get("a")["state"], RUNNING)
+        self.assertEqual(self.backend.get("a")["owner"], get_instance_id())
+        self.assertTrue(self.backend.start("b"))
+        self.assertTrue(self.backend.start("b")) #already taken by this machine
+        self.assertIsNone(self.backend.steal())
+        self.backend.fetch_package("a", self.root / "job")
+        self.assertEqual((self.root / "job" / "job.pickle").read_bytes(), b"job")
+
+    def test_requeue_stale(self):
+        self.publish("a", 1)
+        self.backend.steal()
+        self.backend.heartbeat(["a"])
+        self.assertEqual(self.backend.requeue_stale(), []) #still alive
+        self.expire_lease("a")
+        self.assertEqual(self.backend.requeue_stale(), ["a"])
+        self.assertEqual(self.backend.get("a")["state"], QUEUED)
+        self.assertEqual(self.backend.get("a")["attempts"], 1)
+        self.assertEqual(self.backend.steal(), "a")
+
+    def test_long_queued_job_is_not_stale(self):
+        self.publish("a", 1)
+        queued_long = time.time() - LEASE_SECONDS - 60
+        os.utime(next(self.backend.queue.iterdir()), (queued_long, queued_long))
+        self.assertTrue(self.backend.start("a"))
+        self.assertEqual(self.backend.requeue_stale(), [])
+        self.assertEqual(self.backend.get("a")["state"], RUNNING)
+
+    def test_fails_after_max_attempts(self):
+        self.publish("a", 1)
+        for _ in range(MAX_ATTEMPTS - 1):
+            self.assertEqual(self.backend.steal(), "a")
+            self.expire_lease("a")
+            self.assertEqual(self.backend.requeue_stale(), ["a"])
+        self.backend.steal()
+        self.expire_lease("a")
+        self.assertEqual(self.backend.requeue_stale(), [])
+        self.assertEqual(self.backend.get("a")["state"], FAILED)
+        self.assertIsNone(self.backend.steal())
+
+    def test_finished_jobs_are_not_requeued(self):
+        self.publish("a", 1)
+        self.backend.steal()
+        self.backend.update("a", state=COMPLETE, finished=time.time(), result_name="result.zip")
+        self.assertEqual(self.backend.requeue_stale(), [])
+        self.assertEqual(self.backend.get("a")["state"], COMPLETE)
+
+    def test_steal_expired_job(self):
+        class IdleExecutor:
+            def get_job_ids(self): return []
+            def is_idle(self): return True
+        self.publish("a", 1)
+        self.backend.get = lambda job_id: None #expired right after it was taken
+        self.assertEqual(WorkStealer(take_shared_job).step(self.backend, IdleExecutor()), "a") #nothing to run
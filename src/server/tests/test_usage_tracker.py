@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import threading
+from unittest import TestCase
+
+from ..usage_tracker import MIGRATED_KEY, MemoryRedis, UsageTracker, migrate_user_sets
+
+
+class FailingRedis(MemoryRedis):
+    """Fails the first failures pipelines it executes, then works"""
+    def __init__(self, failures: int, error: Exception):
+        super().__init__()
+        self.failures = failures
+        self.error = error
+        self.executed = 0
+
+    def pipeline(self, transaction: bool = True):
+        pipeline = super().pipeline(transaction)
+        execute = pipeline.execute
+        def execute_or_fail():
+            if self.failures > 0:
+                self.failures -= 1
+                raise self.error
+            self.executed += 1
+            return execute()
+        pipeline.execute = execute_or_fail
+        return pipeline
+
+
+class Test(TestCase):
+    def test_batches_runs(self):
+        db = FailingRedis(0, TimeoutError())
+        tracker = UsageTracker(db, flush_interval=60)
+        for user_id, program in [("a", "PinMol"), ("a", "PinMol"), ("b", "PinMol"), ("a", "smFISH")]:
+            tracker.add_run(user_id, program)
+        self.assertTrue(tracker.flush())
+        self.assertEqual(db.executed, 1) #a single round trip
+        self.assertEqual(db.hgetall("program_runs"), {b"PinMol": b"3", b"smFISH": b"1"})
+        self.assertEqual(db.hget("program:PinMol:users", "a"), b"2")
+        self.assertEqual(tracker.pending_count, 0)
+        self.assertTrue(tracker.flush()) #nothing to write
+        self.assertEqual(db.executed, 1)
+
+    def test_unique_user_counts(self):
+        db = MemoryRedis()
+        tracker = UsageTracker(db, flush_interval=60)
+        for user_id, program in [("a", "PinMol"), ("b", "PinMol"), ("a", "TFOFinder")]:
+            tracker.add_run(user_id, program)
+        tracker.flush()
+        tracker.add_run("c", "PinMol")
+        tracker.add_run("a", "PinMol")
+        tracker.flush()
+        self.assertEqual(db.pfcount("users:all"), 3)
+        self.assertEqual(db.pfcount("users:PinMol"), 3)
+        self.assertEqual(db.pfcount("users:TFOFinder"), 1)
+        self.assertEqual(db.pfcount("users:smFISH"), 0)
+
+    def test_failed_batch_is_requeued(self):
+        for error in (ConnectionError(), TimeoutError(), ValueError("a response error")):
+            db = FailingRedis(1, error)
+            tracker = UsageTracker(db, flush_interval=60)
+            tracker.add_run("a", "PinMol")
+            self.assertFalse(tracker.flush())
+            self.assertEqual(tracker.pending_count, 1)
+            tracker.add_run("b", "PinMol")
+            self.assertTrue(tracker.flush())
+            self.assertEqual(db.hgetall("program_runs"), {b"PinMol": b"2"})
+
+    def test_drops_events_past_limit(self):
+        tracker = UsageTracker(FailingRedis(10, ConnectionError()), flush_interval=60, max_pending=4)
+        for _ in range(6): tracker.add_run("a", "PinMol")
+        self.assertEqual(tracker.pending_count, 4)
+        self.assertEqual(tracker.dropped_count, 2)
+
+    def test_flusher_survives_errors(self):
+        tracker = UsageTracker(MemoryRedis(), flush_interval=0.01)
+        calls, flushed_again = [], threading.Event()
+        def flush():
+            calls.append(1)
+            if len(calls) == 1: raise RuntimeError("unexpected")
+            flushed_again.set()
+            return True
+        tracker.flush = flush
+        tracker.add_run("a", "PinMol") #starts the flusher thread
+        self.assertTrue(flushed_again.wait(5))
+
+    def test_migration_after_first_flush(self):
+        db = MemoryRedis()
+        db.sadd("all_users", "a", "b")
+        db.sadd("program:PinMol", "a")
+        tracker = UsageTracker(db, flush_interval=60) #the migration failed at startup, and users were counted since
+        tracker.add_run("c", "PinMol")
+        tracker.flush()
+        migrate_user_sets(db)
+        self.assertEqual(db.pfcount("users:all"), 3)
+        self.assertEqual(db.pfcount("users:PinMol"), 2)
+        self.assertIsNotNone(db.get(MIGRATED_KEY))
+        db.sadd("all_users", "d") #only migrated once
+        migrate_user_sets(db)
+        self.assertEqual(db.pfcount("users:all"), 3)
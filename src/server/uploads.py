@@ -0,0 +1,85 @@
+# Reads each uploaded file exactly once, while spooling it: hashes it and, for ct files, measures and checks it. The
+# programs' get_args, validate_arguments and runners reuse the results instead of reading the upload again
+from __future__ import annotations
+
+import hashlib
+import io
+import shutil
+from collections import namedtuple
+from pathlib import Path
+from tempfile import SpooledTemporaryFile
+
+from ..rnaprobes.RNAProbesUtil import SPOOL_MAX_SIZE
+from ..rnaprobes.util import ValidationError, lazy_import
+
+RNAUtil = lazy_import("..rnaprobes.RNAUtil", __package__)
+
+CHUNK_SIZE = 1024 * 1024
+CT_FIELDS = ("ct-file",) #form fields holding ct files
+
+class UploadBuffer(SpooledTemporaryFile):
+    """An upload, kept in memory unless it's large. Pickled (e.g. with a delayed job's arguments) as a BytesIO of its content"""
+    def __reduce__(self):
+        position = self.tell()
+        self.seek(0)
+        content = self.read()
+        self.seek(position)
+        return io.BytesIO, (content,)
+
+#ct_stats and ct_error are only set for ct files. parsed_ct_dir is where the ct file may already be parsed (see RNAUtil.share_parsed_ct)
+Upload = namedtuple("Upload", ["file", "filename", "sha256", "size", "ct_stats", "ct_error", "parsed_ct_dir"], defaults=(None,))
+
+def ingest(stream, filename: str, is_ct: bool = False, max_memory: int = SPOOL_MAX_SIZE) -> Upload:
+    """
+    Spool an upload, hashing it and (if it's a ct file) measuring it on the way
+    :param stream: the uploaded file's stream, read to its end
+    :return: the Upload. Its file is at the start
+    """
+    file = UploadBuffer(max_size=max_memory)
+    digest, size = hashlib.sha256(), 0
+    scanner = RNAUtil.CTScanner() if is_ct else None
+    while chunk := stream.read(CHUNK_SIZE):
+        digest.update(chunk)
+        file.write(chunk)
+        size += len(chunk)
+        if scanner is not None: scanner.feed(chunk)
+    file.seek(0)
+    ct_stats, ct_error = None, None
+    if scanner is not None:
+        try:
+            ct_stats = scanner.validate()
+        except ValidationError as e:
+            ct_error = str(e)
+    return Upload(file, filename, digest.hexdigest(), size, ct_stats, ct_error)
+
+def ingest_uploads(request) -> dict[str, Upload]:
+    """:return: the form name of every uploaded file mapped to its Upload. File inputs left empty are skipped"""
+    return {name: ingest(file_storage.stream, file_storage.filename, is_ct=name in CT_FIELDS)
+            for name, file_storage in request.files.items() if file_storage}
+
+def get_upload_hashes(uploads: dict[str, Upload]) -> dict[str, str]:
+    """:return: the form name of each file mapped to the sha256 of its content"""
+    return {name: upload.sha256 for name, upload in uploads.items()}
+
+def get_ct_upload(uploads: dict[str, Upload], name: str = "ct-file") -> Upload:
+    """:raises ValidationError: if the ct file is missing or invalid"""
+    upload = uploads.get(name)
+    if upload is None: raise ValidationError("A ct file must be given")
+    if upload.ct_error is not None: raise ValidationError(upload.ct_error)
+    return upload
+
+def save_upload(upload: Upload, path: Path):
+    """Write an upload to a file (e.g. for programs that pass the file to RNAstructure), and close its buffer"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with upload.file as source, open(path, "wb") as destination:
+        source.seek(0)
+        shutil.copyfileobj(source, destination, CHUNK_SIZE)
+
+def copy_upload(upload: Upload) -> Upload:
+    """:return: the upload with a copy of its buffer, e.g. for each program ran on the same file. Its hash and ct stats are reused"""
+    file = UploadBuffer(max_size=SPOOL_MAX_SIZE)
+    upload.file.seek(0)
+    shutil.copyfileobj(upload.file, file, CHUNK_SIZE)
+    upload.file.seek(0)
+    file.seek(0)
+    return upload._replace(file=file)
@@ -1,14 +1,116 @@
 from __future__ import annotations
+import atexit
 import os
 import sys
+import threading
+from collections import Counter
 
 IS_WEB_APP = os.environ.get("IS_WEB_APP")
-USE_REDIS = bool(IS_WEB_APP)
-REDIS_ERROR = "" if IS_WEB_APP else "Not running as WebApp"
-if USE_REDIS:
+USAGE_BACKEND = os.environ.get("RNAPROBES_USAGE_BACKEND", "redis" if IS_WEB_APP else "") #redis, memory, or empty for none
+FLUSH_INTERVAL_SECONDS = float(os.environ.get("RNAPROBES_USAGE_FLUSH_SECONDS", 5)) #at most this much usage is lost on a crash
+MAX_PENDING_EVENTS = 10_000 #events kept while the database is unreachable, newer events are dropped past this
+PROGRAMS = ("TFOFinder", "PinMol", "smFISH")
+MIGRATED_KEY = "rnaprobes:usage:migrated" #set once the unique user sets were copied, see migrate_user_sets
+
+class RedisError(Exception): #replaced by redis' errors when redis is used
+    pass
+
+class ConnectionError(RedisError):
+    pass
+
+class MemoryPipeline:
+    def __init__(self, db: MemoryRedis):
+        self.db = db
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue_command(*args):
+            self.commands.append((name, args))
+            return self
+        return queue_command
+
+    def execute(self) -> list:
+        with self.db.lock:
+            return [getattr(self.db, name)(*args) for name, args in self.commands]
+
+class MemoryRedis:
+    """
+    An in-process stand-in for the few redis commands used here, for running without a database (and testing).
+    The HyperLogLogs are exact sets, since they never get big here
+    """
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.hashes: dict[str, Counter] = dict()
+        self.logs: dict[str, set] = dict()
+        self.sets: dict[str, set] = dict()
+        self.strings: dict[str, bytes] = dict()
+
+    def pipeline(self, transaction: bool = True) -> MemoryPipeline:
+        return MemoryPipeline(self)
+
+    def ping(self):
+        return True
+
+    def hincrby(self, name: str, key: str, amount: int = 1) -> int:
+        with self.lock:
+            counts = self.hashes.setdefault(name, Counter())
+            counts[key] += amount
+            return counts[key]
+
+    def hget(self, name: str, key: str):
+        with self.lock:
+            value = self.hashes.get(name, Counter()).get(key)
+            return None if value is None else str(value).encode()
+
+    def hgetall(self, name: str) -> dict:
+        with self.lock:
+            return {key.encode(): str(value).encode() for key, value in self.hashes.get(name, Counter()).items()}
+
+    def pfadd(self, name: str, *values) -> int:
+        with self.lock:
+            log = self.logs.setdefault(name, set())
+            size = len(log)
+            log.update(values)
+            return int(len(log) != size)
+
+    def pfcount(self, *names) -> int:
+        with self.lock:
+            return len(set().union(*(self.logs.get(name, set()) for name in names)))
+
+    def sadd(self, name: str, *values) -> int:
+        with self.lock:
+            members = self.sets.setdefault(name, set())
+            size = len(members)
+            members.update(values)
+            return len(members) - size
+
+    def sscan_iter(self, name: str, count: int = None):
+        with self.lock:
+            return iter(list(self.sets.get(name, set())))
+
+    def exists(self, *names) -> int:
+        with self.lock:
+            return sum(1 for name in names if any(name in keys for keys in (self.hashes, self.logs, self.sets, self.strings)))
+
+    def get(self, name: str):
+        with self.lock:
+            return self.strings.get(name)
+
+    def set(self, name: str, value, nx: bool = False):
+        with self.lock:
+            if nx and name in self.strings: return None
+            self.strings[name] = str(value).encode()
+            return True
+
+USE_REDIS = bool(USAGE_BACKEND)
+REDIS_ERROR = "" if USE_REDIS else "Not running as WebApp"
+r = None
+if USAGE_BACKEND == "memory":
+    r = MemoryRedis()
+elif USE_REDIS:
     try:
         from redis import Redis
-        from redis.exceptions import ConnectionError
+        from redis.exceptions import ConnectionError, RedisError
         r = Redis.from_url(os.environ.get("REDIS_URL", ""))
         r.ping()
     except ImportError:
@@ -22,29 +124,119 @@ if USE_REDIS:
     except ConnectionError:
         print("Can't connect to redis database, ping failed", file=sys.stderr) #fine to keep trying, may have been a one-off issue
 
+def migrate_user_sets(db):
+    """
+    Copy the unique user sets used before into HyperLogLogs, once. The sets are left as they were. Users counted since
+    (if an earlier migration failed) are kept, since adding to a HyperLogLog twice counts once
+    """
+    if db.get(MIGRATED_KEY) is not None: return
+    for set_key, log_key in [("all_users", "users:all")] + [(f"program:{program}", f"users:{program}") for program in PROGRAMS]:
+        if not db.exists(set_key): continue
+        members = list(db.sscan_iter(set_key, count=1000))
+        for start in range(0, len(members), 1000):
+            db.pfadd(log_key, *members[start:start + 1000])
+    db.set(MIGRATED_KEY, 1, nx=True)
 
-def add_run_to_db(user_id: str, program_name: str):
-    if USE_REDIS:
+class UsageTracker:
+    """
+    Buffers usage events in this process and writes them in batches with a single pipelined round trip, from a
+    background thread. Runs are summed per user and program, so a batch is small no matter how many runs it holds
+    """
+    def __init__(self, db, flush_interval: float = FLUSH_INTERVAL_SECONDS, max_pending: int = MAX_PENDING_EVENTS):
+        self.db = db
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.pending: Counter[tuple[str, str]] = Counter()
+        self.pending_count = 0
+        self.dropped_count = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock() #only one flush at a time, so that a failed batch is put back in order
+        self._wake = threading.Event()
+        self._thread_pid = None
+
+    def add_run(self, user_id: str, program_name: str):
+        with self._lock:
+            if self.pending_count >= self.max_pending:
+                self.dropped_count += 1
+                return
+            self.pending[(user_id, program_name)] += 1
+            self.pending_count += 1
+            if self.pending_count >= self.max_pending // 2: self._wake.set()
+        self._ensure_flusher()
+
+    def _ensure_flusher(self):
+        """Start the flusher thread in this process. Threads don't survive a fork, so it's started on first use"""
+        if self._thread_pid == os.getpid(): return
+        with self._lock:
+            if self._thread_pid == os.getpid(): return
+            self._thread_pid = os.getpid()
+        threading.Thread(target=self._run_flusher, name="usage-flusher", daemon=True).start()
+
+    def _run_flusher(self):
+        while True: #never exits, or events would pile up until they're dropped
+            try:
+                self._wake.wait(self.flush_interval)
+                self._wake.clear()
+                self.flush()
+            except Exception as e:
+                print(f"Flushing usage events failed: {e}", file=sys.stderr)
+
+    def flush(self) -> bool:
+        """
+        Write the pending events
+        :return: whether the write succeeded. If not, the events are kept for the next flush
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self.pending, self.pending_count = self.pending, Counter(), 0
+            if not batch: return True
+            try:
+                pipe = self.db.pipeline(transaction=False)
+                runs = Counter()
+                for (user_id, program_name), count in batch.items():
+                    #pipe.hincrby(f"user:{user_id}:programs", program_name, count) #get runs per user
+                    pipe.hincrby(f"program:{program_name}:users", user_id, count) #get users per program
+                    runs[program_name] += count
+                for program_name, count in runs.items():
+                    pipe.hincrby("program_runs", program_name, count) #get runs per program
+                    pipe.pfadd(f"users:{program_name}", *{user_id for user_id, program in batch if program == program_name}) #users for each program
+                pipe.pfadd("users:all", *{user_id for user_id, _ in batch}) #unique user IDs
+                pipe.execute()
+                return True
+            except Exception as e: #keep the events for the next flush, don't stop requests if DB is down
+                print("Can't connect to redis database for program results, connection failed." if isinstance(e, ConnectionError)
+                      else f"Writing program results to the redis database failed: {e!r}", file=sys.stderr)
+                with self._lock:
+                    batch.update(self.pending)
+                    self.pending, self.pending_count = batch, sum(batch.values())
+                return False
+
+tracker = UsageTracker(r) if USE_REDIS else None
+if tracker is not None:
+    atexit.register(tracker.flush)
+    if USAGE_BACKEND == "redis":
         try:
-            #r.hincrby(f"user:{user_id}:programs", program_name, 1) #get runs per user
-            r.hincrby(f"program:{program_name}:users", user_id, 1) #get users per program
+            migrate_user_sets(r)
+        except RedisError:
+            pass #the sets are migrated on the next start
 
-            r.hincrby(f"program_runs", program_name, 1)  # get users per program
 
-            r.sadd("all_users", user_id)  # unique user IDs
-            r.sadd(f"program:{program_name}", user_id)  # users for each program
-        except ConnectionError: #don't stop request if DB is down
-            print("Can't connect to redis database for program result, connection failed.", file=sys.stderr)
+def add_run_to_db(user_id: str, program_name: str):
+    if tracker is not None:
+        tracker.add_run(user_id, program_name)
 
 def get_stats():
     if not USE_REDIS: return "Can't connect to database. " + REDIS_ERROR
     try:
-        return f"""Total Users: {r.scard('all_users')}
-TFOFinder: Users - {r.scard('program:TFOFinder')}, Runs - {int(r.hget('program_runs', 'TFOFinder') or 0)}
-PinMol: Users - {r.scard('program:PinMol')}, Runs - {int(r.hget('program_runs', 'PinMol') or 0)}
-smFISH: Users - {r.scard('program:smFISH')}, Runs - {int(r.hget('program_runs', 'smFISH') or 0)}"""
-    except ConnectionError:
-        print("Can't connect to redis database for stats, connection failed.", file=sys.stderr)
+        tracker.flush()
+        pipe = r.pipeline(transaction=False)
+        pipe.pfcount("users:all")
+        for program in PROGRAMS: pipe.pfcount(f"users:{program}")
+        pipe.hgetall("program_runs")
+        total_users, *program_users, runs = pipe.execute()
+        runs = {key.decode(): int(value) for key, value in runs.items()}
+        return "\n".join([f"Total Users: {total_users}"] +
+                         [f"{program}: Users - {users}, Runs - {runs.get(program, 0)}" for program, users in zip(PROGRAMS, program_users)])
+    except RedisError as e:
+        print(f"Can't read stats from the redis database: {e!r}", file=sys.stderr)
         return "Can't connect to database, connection failed"
-
-
@@ -1,32 +0,0 @@
-/*
-BSD 3-Clause License
-
-Copyright (c) 2023, Gildas Lormeau
-
-Redistribution and use in source and binary forms, with or without
-modification, are permitted provided that the following conditions are met:
-
-1. Redistributions of source code must retain the above copyright notice, this
-   list of conditions and the following disclaimer.
-
-2. Redistributions in binary form must reproduce the above copyright notice,
-   this list of conditions and the following disclaimer in the documentation
-   and/or other materials provided with the distribution.
-
-3. Neither the name of the copyright holder nor the names of its
-   contributors may be used to endorse or promote products derived from
-   this software without specific prior written permission.
-
-THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
-AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
-IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
-DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
-FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
-DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
-SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
-CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
-OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
-OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
-*/
-
-((e,t)=>{"object"==typeof exports&&"undefined"!=typeof module?t(exports):"function"==typeof define&&define.amd?define(["exports"],t):t((e="undefined"!=typeof globalThis?globalThis:e||self).zip={})})(this,function(e){"use strict";const{Array:t,Object:n,String:r,Number:s,BigInt:i,Math:a,Date:o,Map:c,Set:l,Response:u,URL:f,Error:d,Uint8Array:w,Uint16Array:p,Uint32Array:h,DataView:g,Blob:m,Promise:y,TextEncoder:b,TextDecoder:S,document:z,crypto:k,btoa:x,TransformStream:v,ReadableStream:A,WritableStream:C,CompressionStream:F,DecompressionStream:E,navigator:D,Worker:R}="undefined"!=typeof globalThis?globalThis:this||self;var W=void 0!==z?z.currentScript:null;const _=4294967295,I=65535,T=67324752,L=134695760,N=L,U=33639248,q=101010256,O=101075792,P=117853008,M=22,H=21589,V=2048,B="/",j=30,Z=new o(2107,11,31),G=new o(1980,0,1),Y=void 0,K="undefined",X="function";class Q{constructor(e){return class extends v{constructor(t,n){const r=new e(n);super({transform(e,t){t.enqueue(r.append(e))},flush(e){const t=r.flush();t&&e.enqueue(t)}})}}}}let J=2;try{typeof D!=K&&D.hardwareConcurrency&&(J=D.hardwareConcurrency)}catch(e){}const $={chunkSize:524288,maxWorkers:J,terminateWorkerTimeout:5e3,useWebWorkers:!0,useCompressionStream:!0,workerScripts:Y,CompressionStreamNative:typeof F!=K&&F,DecompressionStreamNative:typeof E!=K&&E},ee=n.assign({},$);function te(){return ee}function ne(e){return a.max(e.chunkSize,64)}function re(e){const{baseURL:n,chunkSize:r,maxWorkers:s,terminateWorkerTimeout:i,useCompressionStream:a,useWebWorkers:o,Deflate:c,Inflate:l,CompressionStream:u,DecompressionStream:f,workerScripts:w}=e;if(se("baseURL",n),se("chunkSize",r),se("maxWorkers",s),se("terminateWorkerTimeout",i),se("useCompressionStream",a),se("useWebWorkers",o),c&&(ee.CompressionStream=new Q(c)),l&&(ee.DecompressionStream=new Q(l)),se("CompressionStream",u),se("DecompressionStream",f),w!==Y){const{deflate:e,inflate:n}=w;if((e||n)&&(ee.workerScripts||(ee.workerScripts={})),e){if(!t.isArray(e))throw new d("workerScripts.deflate must be an array");ee.workerScripts.deflate=e}if(n){if(!t.isArray(n))throw new d("workerScripts.inflate must be an array");ee.workerScripts.inflate=n}}}function se(e,t){t!==Y&&(ee[e]=t)}function ie(e,t,r){return class{constructor(s){const i=this;var a,o;a=s,o="level",(typeof n.hasOwn===X?n.hasOwn(a,o):a.hasOwnProperty(o))&&s.level===Y&&delete s.level,i.codec=new e(n.assign({},t,s)),r(i.codec,e=>{if(i.pendingData){const t=i.pendingData;i.pendingData=new w(t.length+e.length);const{pendingData:n}=i;n.set(t,0),n.set(e,t.length)}else i.pendingData=new w(e)})}append(e){return this.codec.push(e),s(this)}flush(){return this.codec.push(new w,!0),s(this)}};function s(e){if(e.pendingData){const t=e.pendingData;return e.pendingData=null,t}return new w}}const ae=[];for(let e=0;256>e;e++){let t=e;for(let e=0;8>e;e++)1&t?t=t>>>1^3988292384:t>>>=1;ae[e]=t}class oe{constructor(e){this.crc=e||-1}append(e){let t=0|this.crc;for(let n=0,r=0|e.length;r>n;n++)t=t>>>8^ae[255&(t^e[n])];this.crc=t}get(){return~this.crc}}class ce extends v{constructor(){let e;const t=new oe;super({transform(e,n){t.append(e),n.enqueue(e)},flush(){const n=new w(4);new g(n.buffer).setUint32(0,t.get()),e.value=n}}),e=this}}function le(e){if(typeof b==K){const t=new w((e=unescape(encodeURIComponent(e))).length);for(let n=0;n<t.length;n++)t[n]=e.charCodeAt(n);return t}return(new b).encode(e)}const ue={concat(e,t){if(0===e.length||0===t.length)return e.concat(t);const n=e[e.length-1],r=ue.getPartial(n);return 32===r?e.concat(t):ue._shiftRight(t,r,0|n,e.slice(0,e.length-1))},bitLength(e){const t=e.length;if(0===t)return 0;const n=e[t-1];return 32*(t-1)+ue.getPartial(n)},clamp(e,t){if(32*e.length<t)return e;const n=(e=e.slice(0,a.ceil(t/32))).length;return t&=31,n>0&&t&&(e[n-1]=ue.partial(t,e[n-1]&2147483648>>t-1,1)),e},partial:(e,t,n)=>32===e?t:(n?0|t:t<<32-e)+1099511627776*e,getPartial:e=>a.round(e/1099511627776)||32,_shiftRight(e,t,n,r){for(void 0===r&&(r=[]);t>=32;t-=32)r.push(n),n=0;if(0===t)return r.concat(e);for(let s=0;s<e.length;s++)r.push(n|e[s]>>>t),n=e[s]<<32-t;const s=e.length?e[e.length-1]:0,i=ue.getPartial(s);return r.push(ue.partial(t+i&31,t+i>32?n:r.pop(),1)),r}},fe={bytes:{fromBits(e){const t=ue.bitLength(e)/8,n=new w(t);let r;for(let s=0;t>s;s++)3&s||(r=e[s/4]),n[s]=r>>>24,r<<=8;return n},toBits(e){const t=[];let n,r=0;for(n=0;n<e.length;n++)r=r<<8|e[n],3&~n||(t.push(r),r=0);return 3&n&&t.push(ue.partial(8*(3&n),r)),t}}},de=class{constructor(e){const t=this;t.blockSize=512,t._init=[1732584193,4023233417,2562383102,271733878,3285377520],t._key=[1518500249,1859775393,2400959708,3395469782],e?(t._h=e._h.slice(0),t._buffer=e._buffer.slice(0),t._length=e._length):t.reset()}reset(){const e=this;return e._h=e._init.slice(0),e._buffer=[],e._length=0,e}update(e){const t=this;"string"==typeof e&&(e=fe.utf8String.toBits(e));const n=t._buffer=ue.concat(t._buffer,e),r=t._length,s=t._length=r+ue.bitLength(e);if(s>9007199254740991)throw new d("Cannot hash more than 2^53 - 1 bits");const i=new h(n);let a=0;for(let e=t.blockSize+r-(t.blockSize+r&t.blockSize-1);s>=e;e+=t.blockSize)t._block(i.subarray(16*a,16*(a+1))),a+=1;return n.splice(0,16*a),t}finalize(){const e=this;let t=e._buffer;const n=e._h;t=ue.concat(t,[ue.partial(1,1)]);for(let e=t.length+2;15&e;e++)t.push(0);for(t.push(a.floor(e._length/4294967296)),t.push(0|e._length);t.length;)e._block(t.splice(0,16));return e.reset(),n}_f(e,t,n,r){return e>19?e>39?e>59?e>79?void 0:t^n^r:t&n|t&r|n&r:t^n^r:t&n|~t&r}_S(e,t){return t<<e|t>>>32-e}_block(e){const n=this,r=n._h,s=t(80);for(let t=0;16>t;t++)s[t]=e[t];let i=r[0],o=r[1],c=r[2],l=r[3],u=r[4];for(let e=0;79>=e;e++){16>e||(s[e]=n._S(1,s[e-3]^s[e-8]^s[e-14]^s[e-16]));const t=n._S(5,i)+n._f(e,o,c,l)+u+s[e]+n._key[a.floor(e/20)]|0;u=l,l=c,c=n._S(30,o),o=i,i=t}r[0]=r[0]+i|0,r[1]=r[1]+o|0,r[2]=r[2]+c|0,r[3]=r[3]+l|0,r[4]=r[4]+u|0}},we={getRandomValues(e){const t=new h(e.buffer),n=e=>{let t=987654321;const n=4294967295;return()=>(t=36969*(65535&t)+(t>>16)&n,(((t<<16)+(e=18e3*(65535&e)+(e>>16)&n)&n)/4294967296+.5)*(a.random()>.5?1:-1))};for(let r,s=0;s<e.length;s+=4){const e=n(4294967296*(r||a.random()));r=987654071*e(),t[s/4]=4294967296*e()|0}return e}},pe={importKey:e=>new pe.hmacSha1(fe.bytes.toBits(e)),pbkdf2(e,t,n,r){if(n=n||1e4,0>r||0>n)throw new d("invalid params to pbkdf2");const s=1+(r>>5)<<2;let i,a,o,c,l;const u=new ArrayBuffer(s),f=new g(u);let w=0;const p=ue;for(t=fe.bytes.toBits(t),l=1;(s||1)>w;l++){for(i=a=e.encrypt(p.concat(t,[l])),o=1;n>o;o++)for(a=e.encrypt(a),c=0;c<a.length;c++)i[c]^=a[c];for(o=0;(s||1)>w&&o<i.length;o++)f.setInt32(w,i[o]),w+=4}return u.slice(0,r/8)},hmacSha1:class{constructor(e){const t=this,n=t._hash=de,r=[[],[]];t._baseHash=[new n,new n];const s=t._baseHash[0].blockSize/32;e.length>s&&(e=(new n).update(e).finalize());for(let t=0;s>t;t++)r[0][t]=909522486^e[t],r[1][t]=1549556828^e[t];t._baseHash[0].update(r[0]),t._baseHash[1].update(r[1]),t._resultHash=new n(t._baseHash[0])}reset(){const e=this;e._resultHash=new e._hash(e._baseHash[0]),e._updated=!1}update(e){this._updated=!0,this._resultHash.update(e)}digest(){const e=this,t=e._resultHash.finalize(),n=new e._hash(e._baseHash[1]).update(t).finalize();return e.reset(),n}encrypt(e){if(this._updated)throw new d("encrypt on already updated hmac called!");return this.update(e),this.digest(e)}}},he=typeof k!=K&&typeof k.getRandomValues==X,ge="Invalid password",me="Invalid signature",ye="zipjs-abort-check-password";function be(e){return he?k.getRandomValues(e):we.getRandomValues(e)}const Se=16,ze={name:"PBKDF2"},ke=n.assign({hash:{name:"HMAC"}},ze),xe=n.assign({iterations:1e3,hash:{name:"SHA-1"}},ze),ve=["deriveBits"],Ae=[8,12,16],Ce=[16,24,32],Fe=10,Ee=[0,0,0,0],De=typeof k!=K,Re=De&&k.subtle,We=De&&typeof Re!=K,_e=fe.bytes,Ie=class{constructor(e){const t=this;t._tables=[[[],[],[],[],[]],[[],[],[],[],[]]],t._tables[0][0][0]||t._precompute();const n=t._tables[0][4],r=t._tables[1],s=e.length;let i,a,o,c=1;if(4!==s&&6!==s&&8!==s)throw new d("invalid aes key size");for(t._key=[a=e.slice(0),o=[]],i=s;4*s+28>i;i++){let e=a[i-1];(i%s===0||8===s&&i%s===4)&&(e=n[e>>>24]<<24^n[e>>16&255]<<16^n[e>>8&255]<<8^n[255&e],i%s===0&&(e=e<<8^e>>>24^c<<24,c=c<<1^283*(c>>7))),a[i]=a[i-s]^e}for(let e=0;i;e++,i--){const t=a[3&e?i:i-4];o[e]=4>=i||4>e?t:r[0][n[t>>>24]]^r[1][n[t>>16&255]]^r[2][n[t>>8&255]]^r[3][n[255&t]]}}encrypt(e){return this._crypt(e,0)}decrypt(e){return this._crypt(e,1)}_precompute(){const e=this._tables[0],t=this._tables[1],n=e[4],r=t[4],s=[],i=[];let a,o,c,l;for(let e=0;256>e;e++)i[(s[e]=e<<1^283*(e>>7))^e]=e;for(let u=a=0;!n[u];u^=o||1,a=i[a]||1){let i=a^a<<1^a<<2^a<<3^a<<4;i=i>>8^255&i^99,n[u]=i,r[i]=u,l=s[c=s[o=s[u]]];let f=16843009*l^65537*c^257*o^16843008*u,d=257*s[i]^16843008*i;for(let n=0;4>n;n++)e[n][u]=d=d<<24^d>>>8,t[n][i]=f=f<<24^f>>>8}for(let n=0;5>n;n++)e[n]=e[n].slice(0),t[n]=t[n].slice(0)}_crypt(e,t){if(4!==e.length)throw new d("invalid aes block size");const n=this._key[t],r=n.length/4-2,s=[0,0,0,0],i=this._tables[t],a=i[0],o=i[1],c=i[2],l=i[3],u=i[4];let f,w,p,h=e[0]^n[0],g=e[t?3:1]^n[1],m=e[2]^n[2],y=e[t?1:3]^n[3],b=4;for(let e=0;r>e;e++)f=a[h>>>24]^o[g>>16&255]^c[m>>8&255]^l[255&y]^n[b],w=a[g>>>24]^o[m>>16&255]^c[y>>8&255]^l[255&h]^n[b+1],p=a[m>>>24]^o[y>>16&255]^c[h>>8&255]^l[255&g]^n[b+2],y=a[y>>>24]^o[h>>16&255]^c[g>>8&255]^l[255&m]^n[b+3],b+=4,h=f,g=w,m=p;for(let e=0;4>e;e++)s[t?3&-e:e]=u[h>>>24]<<24^u[g>>16&255]<<16^u[m>>8&255]<<8^u[255&y]^n[b++],f=h,h=g,g=m,m=y,y=f;return s}},Te=class{constructor(e,t){this._prf=e,this._initIv=t,this._iv=t}reset(){this._iv=this._initIv}update(e){return this.calculate(this._prf,e,this._iv)}incWord(e){if(255&~(e>>24))e+=1<<24;else{let t=e>>16&255,n=e>>8&255,r=255&e;255===t?(t=0,255===n?(n=0,255===r?r=0:++r):++n):++t,e=0,e+=t<<16,e+=n<<8,e+=r}return e}incCounter(e){0===(e[0]=this.incWord(e[0]))&&(e[1]=this.incWord(e[1]))}calculate(e,t,n){let r;if(!(r=t.length))return[];const s=ue.bitLength(t);for(let s=0;r>s;s+=4){this.incCounter(n);const r=e.encrypt(n);t[s]^=r[0],t[s+1]^=r[1],t[s+2]^=r[2],t[s+3]^=r[3]}return ue.clamp(t,s)}},Le=pe.hmacSha1;let Ne=De&&We&&typeof Re.importKey==X,Ue=De&&We&&typeof Re.deriveBits==X;class qe extends v{constructor({password:e,rawPassword:t,signed:r,encryptionStrength:s,checkPasswordOnly:i}){super({start(){n.assign(this,{ready:new y(e=>this.resolveReady=e),password:He(e,t),signed:r,strength:s-1,pending:new w})},async transform(e,t){const n=this,{password:r,strength:s,resolveReady:a,ready:o}=n;r?(await(async(e,t,n,r)=>{const s=await Me(e,t,n,Be(r,0,Ae[t])),i=Be(r,Ae[t]);if(s[0]!=i[0]||s[1]!=i[1])throw new d(ge)})(n,s,r,Be(e,0,Ae[s]+2)),e=Be(e,Ae[s]+2),i?t.error(new d(ye)):a()):await o;const c=new w(e.length-Fe-(e.length-Fe)%Se);t.enqueue(Pe(n,e,c,0,Fe,!0))},async flush(e){const{signed:t,ctr:n,hmac:r,pending:s,ready:i}=this;if(r&&n){await i;const a=Be(s,0,s.length-Fe),o=Be(s,s.length-Fe);let c=new w;if(a.length){const e=Ze(_e,a);r.update(e);const t=n.update(e);c=je(_e,t)}if(t){const e=Be(je(_e,r.digest()),0,Fe);for(let t=0;Fe>t;t++)if(e[t]!=o[t])throw new d(me)}e.enqueue(c)}}})}}class Oe extends v{constructor({password:e,rawPassword:t,encryptionStrength:r}){let s;super({start(){n.assign(this,{ready:new y(e=>this.resolveReady=e),password:He(e,t),strength:r-1,pending:new w})},async transform(e,t){const n=this,{password:r,strength:s,resolveReady:i,ready:a}=n;let o=new w;r?(o=await(async(e,t,n)=>{const r=be(new w(Ae[t]));return Ve(r,await Me(e,t,n,r))})(n,s,r),i()):await a;const c=new w(o.length+e.length-e.length%Se);c.set(o,0),t.enqueue(Pe(n,e,c,o.length,0))},async flush(e){const{ctr:t,hmac:n,pending:r,ready:i}=this;if(n&&t){await i;let a=new w;if(r.length){const e=t.update(Ze(_e,r));n.update(e),a=je(_e,e)}s.signature=je(_e,n.digest()).slice(0,Fe),e.enqueue(Ve(a,s.signature))}}}),s=this}}function Pe(e,t,n,r,s,i){const{ctr:a,hmac:o,pending:c}=e,l=t.length-s;let u;for(c.length&&(t=Ve(c,t),n=((e,t)=>{if(t&&t>e.length){const n=e;(e=new w(t)).set(n,0)}return e})(n,l-l%Se)),u=0;l-Se>=u;u+=Se){const e=Ze(_e,Be(t,u,u+Se));i&&o.update(e);const s=a.update(e);i||o.update(s),n.set(je(_e,s),u+r)}return e.pending=Be(t,u),n}async function Me(e,r,s,i){e.password=null;const a=await(async(e,t,n,r,s)=>{if(!Ne)return pe.importKey(t);try{return await Re.importKey("raw",t,n,!1,s)}catch(e){return Ne=!1,pe.importKey(t)}})(0,s,ke,0,ve),o=await(async(e,t,n)=>{if(!Ue)return pe.pbkdf2(t,e.salt,xe.iterations,n);try{return await Re.deriveBits(e,t,n)}catch(r){return Ue=!1,pe.pbkdf2(t,e.salt,xe.iterations,n)}})(n.assign({salt:i},xe),a,8*(2*Ce[r]+2)),c=new w(o),l=Ze(_e,Be(c,0,Ce[r])),u=Ze(_e,Be(c,Ce[r],2*Ce[r])),f=Be(c,2*Ce[r]);return n.assign(e,{keys:{key:l,authentication:u,passwordVerification:f},ctr:new Te(new Ie(l),t.from(Ee)),hmac:new Le(u)}),f}function He(e,t){return t===Y?le(e):t}function Ve(e,t){let n=e;return e.length+t.length&&(n=new w(e.length+t.length),n.set(e,0),n.set(t,e.length)),n}function Be(e,t,n){return e.subarray(t,n)}function je(e,t){return e.fromBits(t)}function Ze(e,t){return e.toBits(t)}class Ge extends v{constructor({password:e,passwordVerification:t,checkPasswordOnly:r}){super({start(){n.assign(this,{password:e,passwordVerification:t}),Qe(this,e)},transform(e,t){const n=this;if(n.password){const t=Ke(n,e.subarray(0,12));if(n.password=null,t[11]!=n.passwordVerification)throw new d(ge);e=e.subarray(12)}r?t.error(new d(ye)):t.enqueue(Ke(n,e))}})}}class Ye extends v{constructor({password:e,passwordVerification:t}){super({start(){n.assign(this,{password:e,passwordVerification:t}),Qe(this,e)},transform(e,t){const n=this;let r,s;if(n.password){n.password=null;const t=be(new w(12));t[11]=n.passwordVerification,r=new w(e.length+t.length),r.set(Xe(n,t),0),s=12}else r=new w(e.length),s=0;r.set(Xe(n,e),s),t.enqueue(r)}})}}function Ke(e,t){const n=new w(t.length);for(let r=0;r<t.length;r++)n[r]=$e(e)^t[r],Je(e,n[r]);return n}function Xe(e,t){const n=new w(t.length);for(let r=0;r<t.length;r++)n[r]=$e(e)^t[r],Je(e,t[r]);return n}function Qe(e,t){const r=[305419896,591751049,878082192];n.assign(e,{keys:r,crcKey0:new oe(r[0]),crcKey2:new oe(r[2])});for(let n=0;n<t.length;n++)Je(e,t.charCodeAt(n))}function Je(e,t){let[n,r,s]=e.keys;e.crcKey0.append([t]),n=~e.crcKey0.get(),r=tt(a.imul(tt(r+et(n)),134775813)+1),e.crcKey2.append([r>>>24]),s=~e.crcKey2.get(),e.keys=[n,r,s]}function $e(e){const t=2|e.keys[2];return et(a.imul(t,1^t)>>>8)}function et(e){return 255&e}function tt(e){return 4294967295&e}const nt="Invalid uncompressed size",rt="deflate-raw";class st extends v{constructor(e,{chunkSize:t,CompressionStream:n,CompressionStreamNative:r}){super({});const{compressed:s,encrypted:i,useCompressionStream:a,zipCrypto:o,signed:c,level:l}=e,u=this;let f,d,w=super.readable;i&&!o||!c||(f=new ce,w=ct(w,f)),s&&(w=ot(w,a,{level:l,chunkSize:t},r,n)),i&&(o?w=ct(w,new Ye(e)):(d=new Oe(e),w=ct(w,d))),at(u,w,()=>{let e;i&&!o&&(e=d.signature),i&&!o||!c||(e=new g(f.value.buffer).getUint32(0)),u.signature=e})}}class it extends v{constructor(e,{chunkSize:t,DecompressionStream:n,DecompressionStreamNative:r}){super({});const{zipCrypto:s,encrypted:i,signed:a,signature:o,compressed:c,useCompressionStream:l}=e;let u,f,w=super.readable;i&&(s?w=ct(w,new Ge(e)):(f=new qe(e),w=ct(w,f))),c&&(w=ot(w,l,{chunkSize:t},r,n)),i&&!s||!a||(u=new ce,w=ct(w,u)),at(this,w,()=>{if((!i||s)&&a){const e=new g(u.value.buffer);if(o!=e.getUint32(0,!1))throw new d(me)}})}}function at(e,t,r){t=ct(t,new v({flush:r})),n.defineProperty(e,"readable",{get:()=>t})}function ot(e,t,n,r,s){try{e=ct(e,new(t&&r?r:s)(rt,n))}catch(r){if(!t)throw r;e=ct(e,new s(rt,n))}return e}function ct(e,t){return e.pipeThrough(t)}const lt="data",ut="close",ft="deflate",dt="inflate";class wt extends v{constructor(e,t){super({});const r=this,{codecType:s}=e;let i;s.startsWith(ft)?i=st:s.startsWith(dt)&&(i=it),r.outputSize=0;let a=0;const o=new i(e,t),c=super.readable,l=new v({transform(e,t){e&&e.length&&(a+=e.length,t.enqueue(e))},flush(){n.assign(r,{inputSize:a})}}),u=new v({transform(t,n){if(t&&t.length&&(n.enqueue(t),r.outputSize+=t.length,e.outputSize&&r.outputSize>e.outputSize))throw new d(nt)},flush(){const{signature:e}=o;n.assign(r,{signature:e,inputSize:a})}});n.defineProperty(r,"readable",{get:()=>c.pipeThrough(l).pipeThrough(o).pipeThrough(u)})}}class pt extends v{constructor(e){let t;super({transform:function n(r,s){if(t){const e=new w(t.length+r.length);e.set(t),e.set(r,t.length),r=e,t=null}r.length>e?(s.enqueue(r.slice(0,e)),n(r.slice(e),s)):t=r},flush(e){t&&t.length&&e.enqueue(t)}})}}let ht=typeof R!=K;class gt{constructor(e,{readable:t,writable:r},{options:s,config:i,streamOptions:a,useWebWorkers:o,transferStreams:c,scripts:l},u){const{signal:f}=a;return n.assign(e,{busy:!0,readable:t.pipeThrough(new pt(i.chunkSize)).pipeThrough(new mt(a),{signal:f}),writable:r,options:n.assign({},s),scripts:l,transferStreams:c,terminate:()=>new y(t=>{const{worker:n,busy:r}=e;n?(r?e.resolveTerminated=t:(n.terminate(),t()),e.interface=null):t()}),onTaskFinished(){const{resolveTerminated:t}=e;t&&(e.resolveTerminated=null,e.terminated=!0,e.worker.terminate(),t()),e.busy=!1,u(e)}}),(o&&ht?St:bt)(e,i)}}class mt extends v{constructor({onstart:e,onprogress:t,size:n,onend:r}){let s=0;super({async start(){e&&await yt(e,n)},async transform(e,r){s+=e.length,t&&await yt(t,s,n),r.enqueue(e)},async flush(){r&&await yt(r,s)}})}}async function yt(e,...t){try{await e(...t)}catch(e){}}function bt(e,t){return{run:()=>(async({options:e,readable:t,writable:n,onTaskFinished:r},s)=>{let i;try{i=new wt(e,s),await t.pipeThrough(i).pipeTo(n,{preventClose:!0,preventAbort:!0});const{signature:r,inputSize:a,outputSize:o}=i;return{signature:r,inputSize:a,outputSize:o}}catch(e){throw i&&(e.outputSize=i.outputSize),e}finally{r()}})(e,t)}}function St(e,t){const{baseURL:r,chunkSize:s}=t;if(!e.interface){let i;try{i=((e,t,r)=>{const s={type:"module"};let i,a;typeof e==X&&(e=e());try{i=new f(e,t)}catch(t){i=e}if(zt)try{a=new R(i)}catch(e){zt=!1,a=new R(i,s)}else a=new R(i,s);return a.addEventListener("message",e=>(async({data:e},t)=>{const{type:r,value:s,messageId:i,result:a,error:o}=e,{reader:c,writer:l,resolveResult:u,rejectResult:f,onTaskFinished:p}=t;try{if(o){const{message:e,stack:t,code:r,name:s,outputSize:i}=o,a=new d(e);n.assign(a,{stack:t,code:r,name:s,outputSize:i}),h(a)}else{if("pull"==r){const{value:e,done:n}=await c.read();xt({type:lt,value:e,done:n,messageId:i},t)}r==lt&&(await l.ready,await l.write(new w(s)),xt({type:"ack",messageId:i},t)),r==ut&&h(null,a)}}catch(o){xt({type:ut,messageId:i},t),h(o)}function h(e,t){e?f(e):u(t),l&&l.releaseLock(),p()}})(e,r)),a})(e.scripts[0],r,e)}catch(n){return ht=!1,bt(e,t)}n.assign(e,{worker:i,interface:{run:()=>(async(e,t)=>{let r,s;const i=new y((e,t)=>{r=e,s=t});n.assign(e,{reader:null,writer:null,resolveResult:r,rejectResult:s,result:i});const{readable:a,options:o,scripts:c}=e,{writable:l,closed:u}=(e=>{let t;const n=new y(e=>t=e);return{writable:new C({async write(t){const n=e.getWriter();await n.ready,await n.write(t),n.releaseLock()},close(){t()},abort:t=>e.getWriter().abort(t)}),closed:n}})(e.writable),f=xt({type:"start",scripts:c.slice(1),options:o,config:t,readable:a,writable:l},e);f||n.assign(e,{reader:a.getReader(),writer:l.getWriter()});const d=await i;return f||await l.getWriter().close(),await u,d})(e,{chunkSize:s})}})}return e.interface}let zt=!0,kt=!0;function xt(e,{worker:t,writer:n,onTaskFinished:r,transferStreams:s}){try{const{value:n,readable:r,writable:i}=e,a=[];if(n&&(n.byteLength<n.buffer.byteLength?e.value=n.buffer.slice(0,n.byteLength):e.value=n.buffer,a.push(e.value)),s&&kt?(r&&a.push(r),i&&a.push(i)):e.readable=e.writable=null,a.length)try{return t.postMessage(e,a),!0}catch(n){kt=!1,e.readable=e.writable=null,t.postMessage(e)}else t.postMessage(e)}catch(e){throw n&&n.releaseLock(),r(),e}}let vt=[];const At=[];let Ct=0;async function Ft(e,t){const{options:n,config:r}=t,{transferStreams:i,useWebWorkers:a,useCompressionStream:o,codecType:c,compressed:l,signed:u,encrypted:f}=n,{workerScripts:d,maxWorkers:w}=r;t.transferStreams=i||i===Y;const p=!(l||u||f||t.transferStreams);return t.useWebWorkers=!p&&(a||a===Y&&r.useWebWorkers),t.scripts=t.useWebWorkers&&d?d[c]:[],n.useCompressionStream=o||o===Y&&r.useCompressionStream,(await(async()=>{const n=vt.find(e=>!e.busy);if(n)return Et(n),new gt(n,e,t,h);if(vt.length<w){const n={indexWorker:Ct};return Ct++,vt.push(n),new gt(n,e,t,h)}return new y(n=>At.push({resolve:n,stream:e,workerOptions:t}))})()).run();function h(e){if(At.length){const[{resolve:t,stream:n,workerOptions:r}]=At.splice(0,1);t(new gt(e,n,r,h))}else e.worker?(Et(e),((e,t)=>{const{config:n}=t,{terminateWorkerTimeout:r}=n;s.isFinite(r)&&r>=0&&(e.terminated?e.terminated=!1:e.terminateTimeout=setTimeout(async()=>{vt=vt.filter(t=>t!=e);try{await e.terminate()}catch(e){}},r))})(e,t)):vt=vt.filter(t=>t!=e)}}function Et(e){const{terminateTimeout:t}=e;t&&(clearTimeout(t),e.terminateTimeout=null)}const Dt="HTTP error ",Rt="HTTP Range not supported",Wt="Writer iterator completed too soon",_t="Writer not initialized",It="Range",Tt="GET",Lt="bytes",Nt=65536,Ut="writable";class qt{constructor(){this.size=0}init(){this.initialized=!0}}class Ot extends qt{get readable(){const e=this,{chunkSize:t=Nt}=e,n=new A({start(){this.chunkOffset=0},async pull(r){const{offset:s=0,size:i,diskNumberStart:o}=n,{chunkOffset:c}=this,l=i===Y?t:a.min(t,i-c),u=await ln(e,s+c,l,o);r.enqueue(u),c+t>i||i===Y&&!u.length&&l?r.close():this.chunkOffset+=t}});return n}}class Pt extends qt{constructor(){super();const e=this,t=new C({write(t){if(!e.initialized)throw new d(_t);return e.writeUint8Array(t)}});n.defineProperty(e,Ut,{get:()=>t})}writeUint8Array(){}}class Mt extends Ot{constructor(e){super(),n.assign(this,{blob:e,size:e.size})}async readUint8Array(e,t){const n=this,r=e+t,s=e||r<n.size?n.blob.slice(e,r):n.blob;let i=await s.arrayBuffer();return i.byteLength>t&&(i=i.slice(e,r)),new w(i)}}class Ht extends qt{constructor(e){super();const t=new v,r=[];e&&r.push(["Content-Type",e]),n.defineProperty(this,Ut,{get:()=>t.writable}),this.blob=new u(t.readable,{headers:r}).blob()}getData(){return this.blob}}class Vt extends Ot{constructor(e,t){super(),jt(this,e,t)}async init(){await Zt(this,en,Xt),super.init()}readUint8Array(e,t){return Gt(this,e,t,en,Xt)}}class Bt extends Ot{constructor(e,t){super(),jt(this,e,t)}async init(){await Zt(this,tn,Qt),super.init()}readUint8Array(e,t){return Gt(this,e,t,tn,Qt)}}function jt(e,t,r){const{preventHeadRequest:s,useRangeHeader:i,forceRangeRequests:a,combineSizeEocd:o}=r;delete(r=n.assign({},r)).preventHeadRequest,delete r.useRangeHeader,delete r.forceRangeRequests,delete r.combineSizeEocd,delete r.useXHR,n.assign(e,{url:t,options:r,preventHeadRequest:s,useRangeHeader:i,forceRangeRequests:a,combineSizeEocd:o})}async function Zt(e,t,n){const{url:r,preventHeadRequest:i,useRangeHeader:a,forceRangeRequests:o,combineSizeEocd:c}=e;if((e=>{const{baseURL:t}=te(),{protocol:n}=new f(e,t);return"http:"==n||"https:"==n})(r)&&(a||o)&&(void 0===i||i)){const r=await t(Tt,e,Yt(e,c?-22:void 0));if(!o&&r.headers.get("Accept-Ranges")!=Lt)throw new d(Rt);{let i;c&&(e.eocdCache=new w(await r.arrayBuffer()));const a=r.headers.get("Content-Range");if(a){const e=a.trim().split(/\s*\/\s*/);if(e.length){const t=e[1];t&&"*"!=t&&(i=s(t))}}i===Y?await $t(e,t,n):e.size=i}}else await $t(e,t,n)}async function Gt(e,t,n,r,s){const{useRangeHeader:i,forceRangeRequests:a,eocdCache:o,size:c,options:l}=e;if(i||a){if(o&&t==c-M&&n==M)return o;if(c>t){t+n>c&&(n=c-t);const s=await r(Tt,e,Yt(e,t,n));if(206!=s.status)throw new d(Rt);return new w(await s.arrayBuffer())}return new w}{const{data:r}=e;return r||await s(e,l),new w(e.data.subarray(t,t+n))}}function Yt(e,t=0,r=1){return n.assign({},Kt(e),{[It]:Lt+"="+(0>t?t:t+"-"+(t+r-1))})}function Kt({options:e}){const{headers:t}=e;if(t)return Symbol.iterator in t?n.fromEntries(t):t}async function Xt(e){await Jt(e,en)}async function Qt(e){await Jt(e,tn)}async function Jt(e,t){const n=await t(Tt,e,Kt(e));e.data=new w(await n.arrayBuffer()),e.size||(e.size=e.data.length)}async function $t(e,t,n){if(e.preventHeadRequest)await n(e,e.options);else{const r=(await t("HEAD",e,Kt(e))).headers.get("Content-Length");r?e.size=s(r):await n(e,e.options)}}async function en(e,{options:t,url:r},s){const i=await fetch(r,n.assign({},t,{method:e,headers:s}));if(400>i.status)return i;throw 416==i.status?new d(Rt):new d(Dt+(i.statusText||i.status))}function tn(e,{url:t},r){return new y((s,i)=>{const a=new XMLHttpRequest;if(a.addEventListener("load",()=>{if(400>a.status){const e=[];a.getAllResponseHeaders().trim().split(/[\r\n]+/).forEach(t=>{const n=t.trim().split(/\s*:\s*/);n[0]=n[0].trim().replace(/^[a-z]|-[a-z]/g,e=>e.toUpperCase()),e.push(n)}),s({status:a.status,arrayBuffer:()=>a.response,headers:new c(e)})}else i(416==a.status?new d(Rt):new d(Dt+(a.statusText||a.status)))},!1),a.addEventListener("error",e=>i(e.detail?e.detail.error:new d("Network error")),!1),a.open(e,t),r)for(const e of n.entries(r))a.setRequestHeader(e[0],e[1]);a.responseType="arraybuffer",a.send()})}class nn extends Ot{constructor(e,t={}){super(),n.assign(this,{url:e,reader:t.useXHR?new Bt(e,t):new Vt(e,t)})}set size(e){}get size(){return this.reader.size}async init(){await this.reader.init(),super.init()}readUint8Array(e,t){return this.reader.readUint8Array(e,t)}}class rn extends Ot{constructor(e){super(),this.readers=e}async init(){const e=this,{readers:t}=e;e.lastDiskNumber=0,e.lastDiskOffset=0,await y.all(t.map(async(n,r)=>{await n.init(),r!=t.length-1&&(e.lastDiskOffset+=n.size),e.size+=n.size})),super.init()}async readUint8Array(e,t,n=0){const r=this,{readers:s}=this;let i,o=n;-1==o&&(o=s.length-1);let c=e;for(;s[o]&&c>=s[o].size;)c-=s[o].size,o++;const l=s[o];if(l){const s=l.size;if(c+t>s){const a=s-c;i=new w(t);const o=await ln(l,c,a);i.set(o,0);const u=await r.readUint8Array(e+a,t-a,n);i.set(u,a),o.length+u.length<t&&(i=i.subarray(0,o.length+u.length))}else i=await ln(l,c,t)}else i=new w;return r.lastDiskNumber=a.max(o,r.lastDiskNumber),i}}class sn extends qt{constructor(e,t=4294967295){super();const r=this;let s,i,a;n.assign(r,{diskNumber:0,diskOffset:0,size:0,maxSize:t,availableSize:t});const o=new C({async write(t){const{availableSize:n}=r;if(a)t.length<n?await c(t):(await c(t.subarray(0,n)),await l(),r.diskOffset+=s.size,r.diskNumber++,a=null,await this.write(t.subarray(n)));else{const{value:n,done:o}=await e.next();if(o&&!n)throw new d(Wt);s=n,s.size=0,s.maxSize&&(r.maxSize=s.maxSize),r.availableSize=r.maxSize,await cn(s),i=n.writable,a=i.getWriter(),await this.write(t)}},async close(){await a.ready,await l()}});async function c(e){const t=e.length;t&&(await a.ready,await a.write(e),s.size+=t,r.size+=t,r.availableSize-=t)}async function l(){await a.close()}n.defineProperty(r,Ut,{get:()=>o})}}class an{constructor(e){return t.isArray(e)&&(e=new rn(e)),e instanceof A&&(e={readable:e}),e}}class on{constructor(e){return e.writable===Y&&typeof e.next==X&&(e=new sn(e)),e instanceof C&&(e={writable:e}),e.size===Y&&(e.size=0),e instanceof sn||n.assign(e,{diskNumber:0,diskOffset:0,availableSize:1/0,maxSize:1/0}),e}}async function cn(e,t){if(!e.init||e.initialized)return y.resolve();await e.init(t)}function ln(e,t,n,r){return e.readUint8Array(t,n,r)}const un=rn,fn=sn,dn="\0☺☻♥♦♣♠•◘○◙♂♀♪♫☼►◄↕‼¶§▬↨↑↓→←∟↔▲▼ !\"#$%&'()*+,-./0123456789:;<=>?@ABCDEFGHIJKLMNOPQRSTUVWXYZ[\\]^_`abcdefghijklmnopqrstuvwxyz{|}~⌂ÇüéâäàåçêëèïîìÄÅÉæÆôöòûùÿÖÜ¢£¥₧ƒáíóúñÑªº¿⌐¬½¼¡«»░▒▓│┤╡╢╖╕╣║╗╝╜╛┐└┴┬├─┼╞╟╚╔╩╦╠═╬╧╨╤╥╙╘╒╓╫╪┘┌█▄▌▐▀αßΓπΣσµτΦΘΩδ∞φε∩≡±≥≤⌠⌡÷≈°∙·√ⁿ²■ ".split("");function wn(e,t){return t&&"cp437"==t.trim().toLowerCase()?(e=>{{let t="";for(let n=0;n<e.length;n++)t+=dn[e[n]];return t}})(e):new S(t).decode(e)}const pn="filename",hn="rawFilename",gn="comment",mn="rawComment",yn="uncompressedSize",bn="compressedSize",Sn="offset",zn="diskNumberStart",kn="lastModDate",xn="rawLastModDate",vn="lastAccessDate",An="creationDate",Cn="internalFileAttribute",Fn="internalFileAttributes",En="externalFileAttribute",Dn="externalFileAttributes",Rn="msDosCompatible",Wn="zip64",_n="encrypted",In="version",Tn="versionMadeBy",Ln="zipCrypto",Nn="directory",Un="executable",qn="compressionMethod",On="signature",Pn="extraField",Mn=[pn,hn,bn,yn,kn,xn,gn,mn,vn,An,Sn,zn,zn,Cn,Fn,En,Dn,Rn,Wn,_n,In,Tn,Ln,Nn,Un,qn,On,Pn,"bitFlag","filenameUTF8","commentUTF8","rawExtraField","extraFieldZip64","extraFieldUnicodePath","extraFieldUnicodeComment","extraFieldAES","extraFieldNTFS","extraFieldExtendedTimestamp"];class Hn{constructor(e){Mn.forEach(t=>this[t]=e[t])}}const Vn="password",Bn="rawPassword",jn="passThrough",Zn="signal",Gn="useWebWorkers",Yn="useCompressionStream",Kn="preventClose",Xn="supportZip64SplitFile",Qn="offset",Jn="usdz",$n="File format is not recognized",er="End of central directory not found",tr="End of Zip64 central directory locator not found",nr="Central directory header not found",rr="Local file header not found",sr="Zip64 extra field not found",ir="File contains encrypted entry",ar="Encryption method not supported",or="Compression method not supported",cr="Split zip file",lr="Overlapping entry found",ur="utf-8",fr="cp437",dr=[[yn,_],[bn,_],[Sn,_],[zn,I]],wr={[I]:{getValue:vr,bytes:4},[_]:{getValue:Ar,bytes:8}};class pr{constructor(e,t={}){n.assign(this,{reader:new an(e),options:t,config:te(),readRanges:[]})}async*getEntriesGenerator(e={}){const t=this;let{reader:r}=t;const{config:s}=t;if(await cn(r),r.size!==Y&&r.readUint8Array||(r=new Mt(await new u(r.readable).blob()),await cn(r)),r.size<M)throw new d($n);r.chunkSize=ne(s);const i=await(async(e,t,n)=>{const r=new w(4);var s;return s=t,Cr(r).setUint32(0,s,!0),await i(22)||await i(a.min(1048582,n));async function i(t){const s=n-t,i=await ln(e,s,t);for(let e=i.length-22;e>=0;e--)if(i[e]==r[0]&&i[e+1]==r[1]&&i[e+2]==r[2]&&i[e+3]==r[3])return{offset:s+e,buffer:i.slice(e,e+22).buffer}}})(r,q,r.size);if(!i)throw vr(Cr(await ln(r,0,4)))==L?new d(cr):new d(er);const o=Cr(i);let c=vr(o,12),l=vr(o,16);const f=i.offset,p=xr(o,20),h=f+M+p;let g=xr(o,4);const m=r.lastDiskNumber||0;let b=xr(o,6),S=xr(o,8),z=0,k=0;if(l==_||c==_||S==I||b==I){const e=Cr(await ln(r,i.offset-20,20));if(vr(e,0)==P){l=Ar(e,8);let t=await ln(r,l,56,-1),n=Cr(t);const s=i.offset-20-56;if(vr(n,0)!=O&&l!=s){const e=l;l=s,l>e&&(z=l-e),t=await ln(r,l,56,-1),n=Cr(t)}if(vr(n,0)!=O)throw new d(tr);g==I&&(g=vr(n,16)),b==I&&(b=vr(n,20)),S==I&&(S=Ar(n,32)),c==_&&(c=Ar(n,40)),l-=c}}if(l<r.size||(z=r.size-l-c-M,l=r.size-c-M),m!=g)throw new d(cr);if(0>l)throw new d($n);let x=0,A=await ln(r,l,c,b),C=Cr(A);if(c){const e=i.offset-c;if(vr(C,x)!=U&&l!=e){const t=l;l=e,l>t&&(z+=l-t),A=await ln(r,l,c,b),C=Cr(A)}}const F=i.offset-l-(r.lastDiskOffset||0);if(c==F||0>F||(c=F,A=await ln(r,l,c,b),C=Cr(A)),0>l||l>=r.size)throw new d($n);const E=br(t,e,"filenameEncoding"),D=br(t,e,"commentEncoding");for(let i=0;S>i;i++){const o=new hr(r,s,t.options);if(vr(C,x)!=U)throw new d(nr);gr(o,C,x+6);const c=!!o.bitFlag.languageEncodingFlag,l=x+46,f=l+o.filenameLength,w=f+o.extraFieldLength,p=xr(C,x+4),h=!(p>>8),g=p>>8==3,m=A.subarray(l,f),b=xr(C,x+32),F=w+b,R=A.subarray(w,F),W=c,_=c,I=vr(C,x+38),T=h&&!(16&~kr(C,x+38))||g&&16384==(I>>16&61440)||m.length&&47==m[m.length-1],L=g&&!!(I>>16&73),N=vr(C,x+42)+z;n.assign(o,{versionMadeBy:p,msDosCompatible:h,compressedSize:0,uncompressedSize:0,commentLength:b,directory:T,offset:N,diskNumberStart:xr(C,x+34),internalFileAttributes:xr(C,x+36),externalFileAttributes:I,rawFilename:m,filenameUTF8:W,commentUTF8:_,rawExtraField:A.subarray(f,w),executable:L}),o.internalFileAttribute=o.internalFileAttributes,o.externalFileAttribute=o.externalFileAttributes;const q=br(t,e,"decodeText")||wn,O=W?ur:E||fr,P=_?ur:D||fr;let M=q(m,O);M===Y&&(M=wn(m,O));let H=q(R,P);H===Y&&(H=wn(R,P)),n.assign(o,{rawComment:R,filename:M,comment:H,directory:T||M.endsWith(B)}),k=a.max(N,k),mr(o,o,C,x+6),o.zipCrypto=o.encrypted&&!o.extraFieldAES;const V=new Hn(o);V.getData=(e,n)=>o.getData(e,V,t.readRanges,n),V.arrayBuffer=async e=>{const n=new v,[r]=await y.all([new u(n.readable).arrayBuffer(),o.getData(n,V,t.readRanges,e)]);return r},x=F;const{onprogress:j}=e;if(j)try{await j(i+1,S,new Hn(o))}catch(e){}yield V}const R=br(t,e,"extractPrependedData"),W=br(t,e,"extractAppendedData");return R&&(t.prependedData=k>0?await ln(r,0,k):new w),t.comment=p?await ln(r,f+M,p):new w,W&&(t.appendedData=h<r.size?await ln(r,h,r.size-h):new w),!0}async getEntries(e={}){const t=[];for await(const n of this.getEntriesGenerator(e))t.push(n);return t}async close(){}}class hr{constructor(e,t,r){n.assign(this,{reader:e,config:t,options:r})}async getData(e,t,r,s={}){const i=this,{reader:a,offset:o,diskNumberStart:c,extraFieldAES:l,extraFieldZip64:u,compressionMethod:f,config:p,bitFlag:h,signature:g,rawLastModDate:m,uncompressedSize:y,compressedSize:b}=i,{dataDescriptor:S}=h,z=t.localDirectory={},k=Cr(await ln(a,o,j,c));let x=br(i,s,Vn),v=br(i,s,Bn);const A=br(i,s,jn);if(x=x&&x.length&&x,v=v&&v.length&&v,l&&99!=l.originalCompressionMethod)throw new d(or);if(0!=f&&8!=f&&!A)throw new d(or);if(vr(k,0)!=T)throw new d(rr);gr(z,k,4);const{extraFieldLength:F,filenameLength:E,lastAccessDate:D,creationDate:R}=z;z.rawExtraField=F?await ln(a,o+j+E,F,c):new w,mr(i,z,k,4,!0),n.assign(t,{lastAccessDate:D,creationDate:R});const W=i.encrypted&&z.encrypted&&!A,_=W&&!l;if(A||(t.zipCrypto=_),W){if(!_&&l.strength===Y)throw new d(ar);if(!x&&!v)throw new d(ir)}const I=o+j+E+F,L=b,U=a.readable;n.assign(U,{diskNumberStart:c,offset:I,size:L});const q=br(i,s,Zn),O=br(i,s,"checkPasswordOnly");let P=br(i,s,"checkOverlappingEntry");const M=br(i,s,"checkOverlappingEntryOnly");M&&(P=!0);const{onstart:H,onprogress:V,onend:B}=s,Z={options:{codecType:dt,password:x,rawPassword:v,zipCrypto:_,encryptionStrength:l&&l.strength,signed:br(i,s,"checkSignature")&&!A,passwordVerification:_&&(S?m>>>8&255:g>>>24&255),outputSize:y,signature:g,compressed:0!=f&&!A,encrypted:i.encrypted&&!A,useWebWorkers:br(i,s,Gn),useCompressionStream:br(i,s,Yn),transferStreams:br(i,s,"transferStreams"),checkPasswordOnly:O},config:p,streamOptions:{signal:q,size:L,onstart:H,onprogress:V,onend:B}};let G;P&&await(async({reader:e,fileEntry:t,offset:n,diskNumberStart:r,signature:s,compressedSize:i,uncompressedSize:a,dataOffset:o,dataDescriptor:c,extraFieldZip64:l,readRanges:u})=>{let f=0;if(r)for(let t=0;r>t;t++)f+=e.readers[t].size;let w=0;if(c&&(w=l?20:12),w){const n=await ln(e,o+i,w+4,r);if(vr(Cr(n),0)==N){const e=vr(Cr(n),4);let r,o;l?(r=Ar(Cr(n),8),o=Ar(Cr(n),16)):(r=vr(Cr(n),8),o=vr(Cr(n),12)),(t.encrypted&&!t.zipCrypto||e==s)&&r==i&&o==a&&(w+=4)}}const p={start:f+n,end:f+o+i+w,fileEntry:t};for(const e of u)if(e.fileEntry!=t&&p.start>=e.start&&p.start<e.end){const t=new d(lr);throw t.overlappingEntry=e.fileEntry,t}u.push(p)})({reader:a,fileEntry:t,offset:o,diskNumberStart:c,signature:g,compressedSize:b,uncompressedSize:y,dataOffset:I,dataDescriptor:S||z.bitFlag.dataDescriptor,extraFieldZip64:u||z.extraFieldZip64,readRanges:r});try{if(!M){O&&(e=new C),e=new on(e),await cn(e,A?b:y),({writable:G}=e);const{outputSize:t}=await Ft({readable:U,writable:G},Z);if(e.size+=t,t!=(A?b:y))throw new d(nt)}}catch(t){if(t.outputSize!==Y&&(e.size+=t.outputSize),!O||t.message!=ye)throw t}finally{br(i,s,Kn)||!G||G.locked||await G.getWriter().close()}return O||M?Y:e.getData?e.getData():G}}function gr(e,t,r){const s=e.rawBitFlag=xr(t,r+2),i=!(1&~s),a=vr(t,r+6);n.assign(e,{encrypted:i,version:xr(t,r),bitFlag:{level:(6&s)>>1,dataDescriptor:!(8&~s),languageEncodingFlag:(s&V)==V},rawLastModDate:a,lastModDate:Sr(a),filenameLength:xr(t,r+22),extraFieldLength:xr(t,r+24)})}function mr(e,t,r,s,i){const{rawExtraField:a}=t,l=t.extraField=new c,u=Cr(new w(a));let f=0;try{for(;f<a.length;){const e=xr(u,f),t=xr(u,f+2);l.set(e,{type:e,data:a.slice(f+4,f+4+t)}),f+=4+t}}catch(e){}const p=xr(r,s+4);n.assign(t,{signature:vr(r,s+10),compressedSize:vr(r,s+14),uncompressedSize:vr(r,s+18)});const h=l.get(1);h&&(((e,t)=>{t.zip64=!0;const n=Cr(e.data),r=dr.filter(([e,n])=>t[e]==n);for(let s=0,i=0;s<r.length;s++){const[a,o]=r[s];if(t[a]==o){const r=wr[o];t[a]=e[a]=r.getValue(n,i),i+=r.bytes}else if(e[a])throw new d(sr)}})(h,t),t.extraFieldZip64=h);const g=l.get(28789);g&&(yr(g,pn,hn,t,e),t.extraFieldUnicodePath=g);const m=l.get(25461);m&&(yr(m,gn,mn,t,e),t.extraFieldUnicodeComment=m);const y=l.get(39169);y?(((e,t,r)=>{const s=Cr(e.data),i=kr(s,4);n.assign(e,{vendorVersion:kr(s,0),vendorId:kr(s,2),strength:i,originalCompressionMethod:r,compressionMethod:xr(s,5)}),t.compressionMethod=e.compressionMethod})(y,t,p),t.extraFieldAES=y):t.compressionMethod=p;const b=l.get(10);b&&(((e,t)=>{const r=Cr(e.data);let s,i=4;try{for(;i<e.data.length&&!s;){const t=xr(r,i),n=xr(r,i+2);1==t&&(s=e.data.slice(i+4,i+4+n)),i+=4+n}}catch(e){}try{if(s&&24==s.length){const r=Cr(s),i=r.getBigUint64(0,!0),a=r.getBigUint64(8,!0),o=r.getBigUint64(16,!0);n.assign(e,{rawLastModDate:i,rawLastAccessDate:a,rawCreationDate:o});const c={lastModDate:zr(i),lastAccessDate:zr(a),creationDate:zr(o)};n.assign(e,c),n.assign(t,c)}}catch(e){}})(b,t),t.extraFieldNTFS=b);const S=l.get(H);S&&(((e,t,n)=>{const r=Cr(e.data),s=kr(r,0),i=[],a=[];n?(1&~s||(i.push(kn),a.push(xn)),2&~s||(i.push(vn),a.push("rawLastAccessDate")),4&~s||(i.push(An),a.push("rawCreationDate"))):5>e.data.length||(i.push(kn),a.push(xn));let c=1;i.forEach((n,s)=>{if(e.data.length>=c+4){const i=vr(r,c);t[n]=e[n]=new o(1e3*i);const l=a[s];e[l]=i}c+=4})})(S,t,i),t.extraFieldExtendedTimestamp=S);const z=l.get(6534);z&&(t.extraFieldUSDZ=z)}function yr(e,t,r,s,i){const a=Cr(e.data),o=new oe;o.append(i[r]);const c=Cr(new w(4));c.setUint32(0,o.get(),!0);const l=vr(a,1);n.assign(e,{version:kr(a,0),[t]:wn(e.data.subarray(5)),valid:!i.bitFlag.languageEncodingFlag&&l==vr(c,0)}),e.valid&&(s[t]=e[t],s[t+"UTF8"]=!0)}function br(e,t,n){return t[n]===Y?e.options[n]:t[n]}function Sr(e){const t=(4294901760&e)>>16,n=65535&e;try{return new o(1980+((65024&t)>>9),((480&t)>>5)-1,31&t,(63488&n)>>11,(2016&n)>>5,2*(31&n),0)}catch(e){}}function zr(e){return new o(s(e/i(1e4)-i(116444736e5)))}function kr(e,t){return e.getUint8(t)}function xr(e,t){return e.getUint16(t,!0)}function vr(e,t){return e.getUint32(t,!0)}function Ar(e,t){return s(e.getBigUint64(t,!0))}function Cr(e){return new g(e.buffer)}const Fr="File already exists",Er="Zip file comment exceeds 64KB",Dr="File entry comment exceeds 64KB",Rr="File entry name exceeds 64KB",Wr="Version exceeds 65535",_r="The strength must equal 1, 2, or 3",Ir="Extra field type exceeds 65535",Tr="Extra field data exceeds 64KB",Lr="Zip64 is not supported (make sure 'keepOrder' is set to 'true')",Nr="Undefined uncompressed size",Ur="Zip file not empty",qr=new w([7,0,2,0,65,69,3,0,0]);let Or=0;const Pr=[];class Mr{constructor(e,t={}){const r=(e=new on(e)).availableSize!==Y&&e.availableSize>0&&e.availableSize!==1/0&&e.maxSize!==Y&&e.maxSize>0&&e.maxSize!==1/0;n.assign(this,{writer:e,addSplitZipSignature:r,options:t,config:te(),files:new c,filenames:new l,offset:t[Qn]===Y?e.size||e.writable.size||0:t[Qn],pendingEntriesSize:0,pendingAddFileCalls:new l,bufferedWrites:0})}async prependZip(e){if(this.filenames.size)throw new d(Ur);e=new an(e);const t=new pr(e.readable),r=await t.getEntries();await t.close(),await e.readable.pipeTo(this.writer.writable,{preventClose:!0,preventAbort:!0}),this.writer.size=this.offset=e.size,this.filenames=new l(r.map(e=>e.filename)),this.files=new c(r.map(e=>{const{version:t,compressionMethod:r,lastModDate:s,lastAccessDate:i,creationDate:a,rawFilename:o,bitFlag:c,encrypted:l,uncompressedSize:u,compressedSize:f,diskOffset:d,diskNumber:p,zip64:h}=e;let{rawExtraFieldZip64:g,rawExtraFieldAES:m,rawExtraFieldExtendedTimestamp:y,rawExtraFieldNTFS:b,rawExtraField:S}=e;const{level:z,languageEncodingFlag:k,dataDescriptor:x}=c;g=g||new w,m=m||new w,y=y||new w,b=b||new w,S=S||new w;const v=$r(g,m,y,b,S),A=h&&u>_,C=h&&f>_,{headerArray:F,headerView:E}=es({version:t,bitFlag:ts(z,k,x,l,r),compressionMethod:r,uncompressedSize:u,compressedSize:f,lastModDate:s,rawFilename:o,zip64CompressedSize:C,zip64UncompressedSize:A,extraFieldLength:v});return n.assign(e,{zip64UncompressedSize:A,zip64CompressedSize:C,zip64Offset:h&&this.offset-d>_,zip64DiskNumberStart:h&&p>I,rawExtraFieldZip64:g,rawExtraFieldAES:m,rawExtraFieldExtendedTimestamp:y,rawExtraFieldNTFS:b,rawExtraField:S,extendedTimestamp:y.length>0||b.length>0,extraFieldExtendedTimestampFlag:1+(i?2:0)+(a?4:0),headerArray:F,headerView:E}),[e.filename,e]}))}async add(e="",r,s={}){const c=this,{pendingAddFileCalls:l,config:f}=c;let h;Or<f.maxWorkers?Or++:await new y(e=>Pr.push(e));try{if(e=e.trim(),c.filenames.has(e))throw new d(Fr);return c.filenames.add(e),h=(async(e,r,s,c)=>{r=r.trim();const l=jr(e,c,Rn),f=jr(e,c,Tn,l?20:768),h=jr(e,c,Un);if(f>I)throw new d(Wr);let g=jr(e,c,Dn,0);0===g&&(g=jr(e,c,En,0)),!c[Nn]&&r.endsWith(B)&&(c[Nn]=!0),jr(e,c,Nn)?(r.endsWith(B)||(r+=B),0===g&&(g=16,l||(g|=16877<<16))):l||0!==g||(g=h?493<<16:27525120);const m=jr(e,c,"encodeText",le);let b=m(r);if(b===Y&&(b=le(r)),$r(b)>I)throw new d(Rr);const S=c[gn]||"";let z=m(S);if(z===Y&&(z=le(S)),$r(z)>I)throw new d(Dr);const k=jr(e,c,In,20);if(k>I)throw new d(Wr);const x=jr(e,c,kn,new o),A=jr(e,c,vn),C=jr(e,c,An);let F=jr(e,c,Fn,0);0===F&&(F=jr(e,c,Cn,0));const E=jr(e,c,jn);let D,R;E||(D=jr(e,c,Vn),R=jr(e,c,Bn));const W=jr(e,c,"encryptionStrength",3),U=jr(e,c,Ln),q=jr(e,c,"extendedTimestamp",!0),O=jr(e,c,"keepOrder",!0),P=jr(e,c,"level"),M=jr(e,c,Gn),V=jr(e,c,"bufferedWrite"),K=jr(e,c,"dataDescriptorSignature",!1),X=jr(e,c,Zn),Q=jr(e,c,"useUnicodeFileNames",!0),J=jr(e,c,Yn),$=jr(e,c,qn);let ee=jr(e,c,"dataDescriptor");V&&ee===Y&&(ee=!1),(ee===Y||U)&&(ee=!0);let te=jr(e,c,Wn);if(!U&&(D!==Y||R!==Y)&&(1>W||W>3))throw new d(_r);let re=new w;const se=c[Pn];if(se){let e=0,t=0;se.forEach(t=>e+=4+$r(t)),re=new w(e),se.forEach((e,n)=>{if(n>I)throw new d(Ir);if($r(e)>I)throw new d(Tr);Qr(re,new p([n]),t),Qr(re,new p([$r(e)]),t+2),Qr(re,e,t+4),t+=4+$r(e)})}let ie=0,ae=0,oe=0;if(E&&(oe=c[yn],oe===Y))throw new d(Nr);const ce=!0===te;s&&(s=new an(s),await cn(s),E?(c.uncompressedSize=oe,ie=Zr(oe)):s.size===Y?(ee=!0,(te||te===Y)&&(te=!0,oe=ie=4294967296)):(c.uncompressedSize=oe=s.size,ie=Zr(oe)));const{diskOffset:ue,diskNumber:fe,maxSize:de}=e.writer,we=ce||oe>_,pe=ce||ie>_,he=ce||e.offset+e.pendingEntriesSize-ue>_,ge=jr(e,c,Xn,!0)&&ce||fe+a.ceil(e.pendingEntriesSize/de)>I;if(he||we||pe||ge){if(!1===te||!O)throw new d(Lr);te=!0}te=te||!1;const me=jr(e,c,_n),ye=(e=>{const{rawFilename:t,lastModDate:n,lastAccessDate:r,creationDate:s,level:o,zip64:c,zipCrypto:l,useUnicodeFileNames:u,dataDescriptor:f,directory:d,rawExtraField:p,encryptionStrength:h,extendedTimestamp:g,passThrough:m,encrypted:y,zip64UncompressedSize:b,zip64CompressedSize:S,zip64Offset:z,zip64DiskNumberStart:k,uncompressedSize:x,offset:v,diskNumberStart:A}=e;let{version:C,compressionMethod:F}=e;const E=!d&&(o>0||o===Y&&0!==F);let D;const R=m||!E,W=c&&(e.bufferedWrite||!b&&!S||R);if(c){let e=4;b&&(e+=8),S&&(e+=8),z&&(e+=8),k&&(e+=4),D=new w(e);const t=Jr(D);if(Yr(t,0,1),Yr(t,2,$r(D)-4),W){const e=Jr(D);let t=4;b&&(Xr(e,t,i(x)),t+=8),S&&R&&(Xr(e,t,i(x)),t+=8),z&&(Xr(e,t,i(v)),t+=8),k&&(Kr(e,t,A),t+=4)}}else D=new w;let _,I,L,N;if(y&&!l){_=new w($r(qr)+2);const e=Jr(_);Yr(e,0,39169),Qr(_,qr,2),Gr(e,8,h)}else _=new w;if(g){L=new w(9+(r?4:0)+(s?4:0));const e=Jr(L);Yr(e,0,H),Yr(e,2,$r(L)-4),N=1+(r?2:0)+(s?4:0),Gr(e,4,N);let t=5;Kr(e,t,a.floor(n.getTime()/1e3)),t+=4,r&&(Kr(e,t,a.floor(r.getTime()/1e3)),t+=4),s&&Kr(e,t,a.floor(s.getTime()/1e3));try{I=new w(36);const e=Jr(I),t=Br(n);Yr(e,0,10),Yr(e,2,32),Yr(e,8,1),Yr(e,10,24),Xr(e,12,t),Xr(e,20,Br(r)||t),Xr(e,28,Br(s)||t)}catch(e){I=new w}}else I=L=new w;F===Y&&(F=E?8:0),c&&(C=C>45?C:45),y&&!l&&(C=C>51?C:51,_[9]=F,F=99);const U=W?$r(D):0,q=U+$r(_,L,I,p),{headerArray:O,headerView:P,rawLastModDate:M}=es({version:C,bitFlag:ts(o,u,f,y,F),compressionMethod:F,uncompressedSize:x,lastModDate:G>n?G:n>Z?Z:n,rawFilename:t,zip64CompressedSize:S,zip64UncompressedSize:b,extraFieldLength:q});let V=j;const B=new w(V+$r(t)+q),K=Jr(B);return Kr(K,0,T),Qr(B,O,4),Qr(B,t,V),V+=$r(t),W&&Qr(B,D,V),V+=U,Qr(B,_,V),V+=$r(_),Qr(B,L,V),V+=$r(L),Qr(B,I,V),V+=$r(I),Qr(B,p,V),f&&(Kr(K,18,0),Kr(K,22,0)),{localHeaderArray:B,localHeaderView:K,headerArray:O,headerView:P,lastModDate:n,rawLastModDate:M,encrypted:y,compressed:E,version:C,compressionMethod:F,extraFieldExtendedTimestampFlag:N,rawExtraFieldZip64:D,localExtraFieldZip64Length:U,rawExtraFieldExtendedTimestamp:L,rawExtraFieldNTFS:I,rawExtraFieldAES:_,extraFieldLength:q}})(c=n.assign({},c,{rawFilename:b,rawComment:z,version:k,versionMadeBy:f,lastModDate:x,lastAccessDate:A,creationDate:C,rawExtraField:re,zip64:te,zip64UncompressedSize:we,zip64CompressedSize:pe,zip64Offset:he,zip64DiskNumberStart:ge,password:D,rawPassword:R,level:J||e.config.CompressionStream!==Y||e.config.CompressionStreamNative!==Y?P:0,useWebWorkers:M,encryptionStrength:W,extendedTimestamp:q,zipCrypto:U,bufferedWrite:V,keepOrder:O,useUnicodeFileNames:Q,dataDescriptor:ee,dataDescriptorSignature:K,signal:X,msDosCompatible:l,internalFileAttribute:F,internalFileAttributes:F,externalFileAttribute:g,externalFileAttributes:g,useCompressionStream:J,passThrough:E,encrypted:!!(D&&$r(D)||R&&$r(R))||E&&me,signature:c[On],compressionMethod:$,uncompressedSize:oe,offset:e.offset-ue,diskNumberStart:fe})),be=(({zip64:e,dataDescriptor:t,dataDescriptorSignature:n})=>{let r,s=new w,i=0,a=e?20:12;return n&&(a+=4),t&&(s=new w(a),r=Jr(s),n&&(i=4,Kr(r,0,N))),{dataDescriptorArray:s,dataDescriptorView:r,dataDescriptorOffset:i}})(c),Se=$r(ye.localHeaderArray,be.dataDescriptorArray);let ze;ae=Se+ie,e.options[Jn]&&(ae+=ae+64),e.pendingEntriesSize+=ae;try{ze=await(async(e,r,s,a,o)=>{const{files:c,writer:l}=e,{keepOrder:f,dataDescriptor:p,signal:h}=o,{headerInfo:g}=a,m=e.options[Jn],b=t.from(c.values()).pop();let S,z,k,x,A,C,F,E={};c.set(r,E);try{let t;f&&(t=b&&b.lock,E.lock=new y(e=>k=e)),!(o.bufferedWrite||e.writerLocked||e.bufferedWrites&&f)&&p||m?(C=l,await D()):(C=new v,C.size=0,S=!0,e.bufferedWrites++,await cn(l)),await cn(C);const{writable:z,diskOffset:W}=l;if(e.addSplitZipSignature){delete e.addSplitZipSignature;const t=new w(4);Kr(Jr(t),0,L),await Vr(l,t),e.offset+=4}m&&((e,t)=>{const{headerInfo:n}=e;let{localHeaderArray:r,extraFieldLength:s}=n,i=Jr(r),a=64-(t+$r(r))%64;4>a&&(a+=64);const o=new w(a),c=Jr(o);Yr(c,0,6534),Yr(c,2,a-2);const l=r;n.localHeaderArray=r=new w($r(l)+a),Qr(r,l),Qr(r,o,$r(l)),i=Jr(r),Yr(i,28,s+a),e.metadataSize+=a})(a,e.offset-W);const{localHeaderView:I,localHeaderArray:T}=g;S||(await t,await R(z));const{diskNumber:N}=l;A=!0,E.diskNumberStart=N,S?F=new u(C.readable).blob():await Vr(C,T),E=await(async(e,t,{diskNumberStart:r,lock:s},a,o,c)=>{const{headerInfo:l,dataDescriptorInfo:u,metadataSize:f}=a,{headerArray:d,headerView:w,lastModDate:p,rawLastModDate:h,encrypted:g,compressed:m,version:y,compressionMethod:b,rawExtraFieldZip64:S,localExtraFieldZip64Length:z,rawExtraFieldExtendedTimestamp:k,extraFieldExtendedTimestampFlag:x,rawExtraFieldNTFS:v,rawExtraFieldAES:A}=l,{dataDescriptorArray:C}=u,{rawFilename:F,lastAccessDate:E,creationDate:D,password:R,rawPassword:W,level:_,zip64:I,zip64UncompressedSize:T,zip64CompressedSize:L,zip64Offset:N,zip64DiskNumberStart:U,zipCrypto:q,dataDescriptor:O,directory:P,executable:M,versionMadeBy:H,rawComment:V,rawExtraField:B,useWebWorkers:j,onstart:Z,onprogress:G,onend:K,signal:X,encryptionStrength:Q,extendedTimestamp:J,msDosCompatible:$,internalFileAttributes:ee,externalFileAttributes:te,useCompressionStream:re,passThrough:se}=c,ie={lock:s,versionMadeBy:H,zip64:I,directory:!!P,executable:!!M,filenameUTF8:!0,rawFilename:F,commentUTF8:!0,rawComment:V,rawExtraFieldZip64:S,localExtraFieldZip64Length:z,rawExtraFieldExtendedTimestamp:k,rawExtraFieldNTFS:v,rawExtraFieldAES:A,rawExtraField:B,extendedTimestamp:J,msDosCompatible:$,internalFileAttributes:ee,externalFileAttributes:te,diskNumberStart:r};let{signature:ae,uncompressedSize:oe}=c,ce=0;se||(oe=0);const{writable:le}=t;if(e){e.chunkSize=ne(o);const n=e.readable,r=e.size,s={options:{codecType:ft,level:_,rawPassword:W,password:R,encryptionStrength:Q,zipCrypto:g&&q,passwordVerification:g&&q&&h>>8&255,signed:!se,compressed:m&&!se,encrypted:g&&!se,useWebWorkers:j,useCompressionStream:re,transferStreams:!1},config:o,streamOptions:{signal:X,size:r,onstart:Z,onprogress:G,onend:K}};try{const e=await Ft({readable:n,writable:le},s);ce=e.outputSize,t.size+=ce,se||(oe=e.inputSize,ae=e.signature)}catch(e){throw e.outputSize!==Y&&(t.size+=e.outputSize),e}}return(({signature:e,compressedSize:t,uncompressedSize:n,headerInfo:r,dataDescriptorInfo:s},{zip64:a,zipCrypto:o,dataDescriptor:c})=>{const{headerView:l,encrypted:u}=r,{dataDescriptorView:f,dataDescriptorOffset:d}=s;u&&!o||e===Y||(Kr(l,10,e),c&&Kr(f,d,e)),a?c&&(Xr(f,d+4,i(t)),Xr(f,d+12,i(n))):(Kr(l,14,t),Kr(l,18,n),c&&(Kr(f,d+4,t),Kr(f,d+8,n)))})({signature:ae,compressedSize:ce,uncompressedSize:oe,headerInfo:l,dataDescriptorInfo:u},c),O&&await Vr(t,C),n.assign(ie,{uncompressedSize:oe,compressedSize:ce,lastModDate:p,rawLastModDate:h,creationDate:D,lastAccessDate:E,encrypted:g,zipCrypto:q,size:f+ce,compressionMethod:b,version:y,headerArray:d,headerView:w,signature:ae,extraFieldExtendedTimestampFlag:x,zip64UncompressedSize:T,zip64CompressedSize:L,zip64Offset:N,zip64DiskNumberStart:U}),ie})(s,C,E,a,e.config,o);const{zip64:U}=E;if(A=!1,c.set(r,E),E.filename=r,S){const[n]=await y.all([F,C.writable.getWriter().close(),t]);await D(),x=!0,E.diskNumberStart=l.diskNumber,E.offset=e.offset-l.diskOffset,U&&Hr(E),(({rawFilename:e,encrypted:t,zip64:n,localExtraFieldZip64Length:r,signature:s,compressedSize:a,uncompressedSize:o,offset:c,diskNumberStart:l,zip64UncompressedSize:u,zip64CompressedSize:f,zip64Offset:d,zip64DiskNumberStart:w},p,{dataDescriptor:h})=>{if(h||(t||Kr(p,14,s),n||(Kr(p,18,a),Kr(p,22,o))),n&&r){let t=j+$r(e)+4;u&&(Xr(p,t,i(o)),t+=8),f&&(Xr(p,t,i(a)),t+=8),d&&(Xr(p,t,i(c)),t+=8),w&&Kr(p,t,l)}})(E,I,o),await R(z),await Vr(l,T),await n.stream().pipeTo(z,{preventClose:!0,preventAbort:!0,signal:h}),l.size+=C.size,x=!1}else E.offset=e.offset-W,U&&Hr(E);if(E.offset>_&&!U)throw new d(Lr);return e.offset+=E.size,E}catch(t){if(S&&x||!S&&A){if(e.hasCorruptedEntries=!0,t)try{t.corruptedEntry=!0}catch(e){}S?e.offset+=C.size:e.offset=C.size}throw c.delete(r),t}finally{S&&e.bufferedWrites--,k&&k(),z&&z()}async function D(){e.writerLocked=!0;const{lockWriter:t}=e;e.lockWriter=new y(t=>z=()=>{e.writerLocked=!1,t()}),await t}async function R(e){$r(g.localHeaderArray)>l.availableSize&&(l.availableSize=0,await Vr(e,new w))}})(e,r,s,{headerInfo:ye,dataDescriptorInfo:be,metadataSize:Se},c)}finally{e.pendingEntriesSize-=ae}return n.assign(ze,{name:r,comment:S,extraField:se}),new Hn(ze)})(c,e,r,s),l.add(h),await h}catch(t){throw c.filenames.delete(e),t}finally{l.delete(h);const e=Pr.shift();e?e():Or--}}remove(e){const{filenames:t,files:n}=this;if("string"==typeof e&&(e=n.get(e)),e&&e.filename!==Y){const{filename:r}=e;if(t.has(r)&&n.has(r))return t.delete(r),n.delete(r),!0}return!1}async close(e=new w,n={}){const{pendingAddFileCalls:r,writer:s}=this,{writable:o}=s;for(;r.size;)await y.allSettled(t.from(r));return await(async(e,n,r)=>{const{files:s,writer:o}=e,{diskOffset:c}=o;let{diskNumber:l}=o,u=0,f=0,p=e.offset-c,h=s.size;for(const[,e]of s){const{rawFilename:t,rawExtraFieldZip64:n,rawExtraFieldAES:r,rawComment:s,rawExtraFieldNTFS:i,rawExtraField:o,extendedTimestamp:c,extraFieldExtendedTimestampFlag:l,lastModDate:u}=e;let d;if(c){d=new w(9);const e=Jr(d);Yr(e,0,H),Yr(e,2,5),Gr(e,4,l),Kr(e,5,a.floor(u.getTime()/1e3))}else d=new w;e.rawExtraFieldExtendedTimestamp=d,f+=46+$r(t,s,n,r,i,d,o)}const g=new w(f),m=Jr(g);await cn(o);let y=0;for(const[e,n]of t.from(s.values()).entries()){const{offset:t,rawFilename:i,rawExtraFieldZip64:a,rawExtraFieldAES:c,rawExtraFieldExtendedTimestamp:l,rawExtraFieldNTFS:f,rawExtraField:d,rawComment:w,versionMadeBy:p,headerArray:h,headerView:b,zip64:S,zip64UncompressedSize:z,zip64CompressedSize:k,zip64DiskNumberStart:x,zip64Offset:v,internalFileAttributes:A,externalFileAttributes:C,diskNumberStart:F,uncompressedSize:E,compressedSize:D}=n,R=$r(a,c,l,f,d);Kr(m,u,U),Yr(m,u+4,p),z||Kr(b,18,E),k||Kr(b,14,D),Qr(g,h,u+6);let W=u+j;if(Yr(m,W,R),W+=2,Yr(m,W,$r(w)),W+=2,Yr(m,W,S&&x?I:F),W+=2,Yr(m,W,A),W+=2,C&&Kr(m,W,C),W+=4,Kr(m,W,S&&v?_:t),W+=4,Qr(g,i,W),W+=$r(i),Qr(g,a,W),W+=$r(a),Qr(g,c,W),W+=$r(c),Qr(g,l,W),W+=$r(l),Qr(g,f,W),W+=$r(f),Qr(g,d,W),W+=$r(d),Qr(g,w,W),u-y>o.availableSize&&(o.availableSize=0,await Vr(o,g.slice(y,u)),y=u),u=W,r.onprogress)try{await r.onprogress(e+1,s.size,new Hn(n))}catch(e){}}await Vr(o,y?g.slice(y):g);let b=o.diskNumber;const{availableSize:S}=o;M>S&&b++;let z=jr(e,r,Wn);if(p>_||f>_||h>I||b>I){if(!1===z)throw new d(Lr);z=!0}const k=new w(z?98:M),x=Jr(k);u=0,z&&(Kr(x,0,O),Xr(x,4,i(44)),Yr(x,12,45),Yr(x,14,45),Kr(x,16,b),Kr(x,20,l),Xr(x,24,i(h)),Xr(x,32,i(h)),Xr(x,40,i(f)),Xr(x,48,i(p)),Kr(x,56,P),Xr(x,64,i(p)+i(f)),Kr(x,72,b+1),jr(e,r,Xn,!0)&&(b=I,l=I),h=I,p=_,f=_,u+=76),Kr(x,u,q),Yr(x,u+4,b),Yr(x,u+6,l),Yr(x,u+8,h),Yr(x,u+10,h),Kr(x,u+12,f),Kr(x,u+16,p);const v=$r(n);if(v){if(v>I)throw new d(Er);Yr(x,u+20,v)}await Vr(o,k),v&&await Vr(o,n)})(this,e,n),jr(this,n,Kn)||await o.getWriter().close(),s.getData?s.getData():o}}function Hr({compressedSize:e,uncompressedSize:t,offset:n,diskNumberStart:r,zip64UncompressedSize:s,zip64CompressedSize:a,zip64Offset:o,zip64DiskNumberStart:c,rawExtraFieldZip64:l}){const u=Jr(l);let f=4;s&&(Xr(u,f,i(t)),f+=8),a&&(Xr(u,f,i(e)),f+=8),o&&(Xr(u,f,i(n)),f+=8),c&&Kr(u,f,r)}async function Vr(e,t){const{writable:n}=e,r=n.getWriter();try{await r.ready,e.size+=$r(t),await r.write(t)}finally{r.releaseLock()}}function Br(e){if(e)return(i(e.getTime())+i(116444736e5))*i(1e4)}function jr(e,t,n,r){const s=t[n]===Y?e.options[n]:t[n];return s===Y?r:s}function Zr(e){return e+5*(a.floor(e/16383)+1)}function Gr(e,t,n){e.setUint8(t,n)}function Yr(e,t,n){e.setUint16(t,n,!0)}function Kr(e,t,n){e.setUint32(t,n,!0)}function Xr(e,t,n){e.setBigUint64(t,n,!0)}function Qr(e,t,n){e.set(t,n)}function Jr(e){return new g(e.buffer)}function $r(...e){let t=0;return e.forEach(e=>e&&(t+=e.length)),t}function es({version:e,bitFlag:t,compressionMethod:n,uncompressedSize:r,compressedSize:s,lastModDate:i,rawFilename:a,zip64CompressedSize:o,zip64UncompressedSize:c,extraFieldLength:l}){const u=new w(26),f=Jr(u);Yr(f,0,e),Yr(f,2,t),Yr(f,4,n);const d=new h(1),p=Jr(d);Yr(p,0,(i.getHours()<<6|i.getMinutes())<<5|i.getSeconds()/2),Yr(p,2,(i.getFullYear()-1980<<4|i.getMonth()+1)<<5|i.getDate());const g=d[0];return Kr(f,6,g),(o||s!==Y)&&Kr(f,14,o?_:s),(c||r!==Y)&&Kr(f,18,c?_:r),Yr(f,22,$r(a)),Yr(f,24,l),{headerArray:u,headerView:f,rawLastModDate:g}}function ts(e,t,n,r,s){let i=0;return t&&(i|=V),n&&(i|=8),8!=s&&9!=s||(0>e||e>3||(i|=6),e>3&&5>=e&&(i|=4),9==e&&(i|=2)),r&&(i|=1),i}let ns;try{ns=void 0===z&&"undefined"==typeof location?require("url").pathToFileURL(__filename).href:void 0===z?location.href:W&&"SCRIPT"===W.tagName.toUpperCase()&&W.src||new f("zip.min.js",z.baseURI).href}catch(e){}re({baseURL:ns}),((e,t={})=>{const n='const{Array:e,Object:t,Number:n,Math:r,Error:s,Uint8Array:i,Uint16Array:o,Uint32Array:c,Int32Array:f,Map:a,DataView:l,Promise:u,TextEncoder:w,crypto:h,postMessage:d,TransformStream:p,ReadableStream:y,WritableStream:m,CompressionStream:b,DecompressionStream:g}=self,k=void 0,v="undefined",S="function";class z{constructor(e){return class extends p{constructor(t,n){const r=new e(n);super({transform(e,t){t.enqueue(r.append(e))},flush(e){const t=r.flush();t&&e.enqueue(t)}})}}}}const C=[];for(let e=0;256>e;e++){let t=e;for(let e=0;8>e;e++)1&t?t=t>>>1^3988292384:t>>>=1;C[e]=t}class x{constructor(e){this.t=e||-1}append(e){let t=0|this.t;for(let n=0,r=0|e.length;r>n;n++)t=t>>>8^C[255&(t^e[n])];this.t=t}get(){return~this.t}}class A extends p{constructor(){let e;const t=new x;super({transform(e,n){t.append(e),n.enqueue(e)},flush(){const n=new i(4);new l(n.buffer).setUint32(0,t.get()),e.value=n}}),e=this}}const I={concat(e,t){if(0===e.length||0===t.length)return e.concat(t);const n=e[e.length-1],r=I.i(n);return 32===r?e.concat(t):I.o(t,r,0|n,e.slice(0,e.length-1))},l(e){const t=e.length;if(0===t)return 0;const n=e[t-1];return 32*(t-1)+I.i(n)},u(e,t){if(32*e.length<t)return e;const n=(e=e.slice(0,r.ceil(t/32))).length;return t&=31,n>0&&t&&(e[n-1]=I.h(t,e[n-1]&2147483648>>t-1,1)),e},h:(e,t,n)=>32===e?t:(n?0|t:t<<32-e)+1099511627776*e,i:e=>r.round(e/1099511627776)||32,o(e,t,n,r){for(void 0===r&&(r=[]);t>=32;t-=32)r.push(n),n=0;if(0===t)return r.concat(e);for(let s=0;s<e.length;s++)r.push(n|e[s]>>>t),n=e[s]<<32-t;const s=e.length?e[e.length-1]:0,i=I.i(s);return r.push(I.h(t+i&31,t+i>32?n:r.pop(),1)),r}},_={bytes:{p(e){const t=I.l(e)/8,n=new i(t);let r;for(let s=0;t>s;s++)3&s||(r=e[s/4]),n[s]=r>>>24,r<<=8;return n},m(e){const t=[];let n,r=0;for(n=0;n<e.length;n++)r=r<<8|e[n],3&~n||(t.push(r),r=0);return 3&n&&t.push(I.h(8*(3&n),r)),t}}},P=class{constructor(e){const t=this;t.blockSize=512,t.k=[1732584193,4023233417,2562383102,271733878,3285377520],t.v=[1518500249,1859775393,2400959708,3395469782],e?(t.S=e.S.slice(0),t.C=e.C.slice(0),t.A=e.A):t.reset()}reset(){const e=this;return e.S=e.k.slice(0),e.C=[],e.A=0,e}update(e){const t=this;"string"==typeof e&&(e=_.I.m(e));const n=t.C=I.concat(t.C,e),r=t.A,i=t.A=r+I.l(e);if(i>9007199254740991)throw new s("Cannot hash more than 2^53 - 1 bits");const o=new c(n);let f=0;for(let e=t.blockSize+r-(t.blockSize+r&t.blockSize-1);i>=e;e+=t.blockSize)t._(o.subarray(16*f,16*(f+1))),f+=1;return n.splice(0,16*f),t}P(){const e=this;let t=e.C;const n=e.S;t=I.concat(t,[I.h(1,1)]);for(let e=t.length+2;15&e;e++)t.push(0);for(t.push(r.floor(e.A/4294967296)),t.push(0|e.A);t.length;)e._(t.splice(0,16));return e.reset(),n}D(e,t,n,r){return e>19?e>39?e>59?e>79?void 0:t^n^r:t&n|t&r|n&r:t^n^r:t&n|~t&r}V(e,t){return t<<e|t>>>32-e}_(t){const n=this,s=n.S,i=e(80);for(let e=0;16>e;e++)i[e]=t[e];let o=s[0],c=s[1],f=s[2],a=s[3],l=s[4];for(let e=0;79>=e;e++){16>e||(i[e]=n.V(1,i[e-3]^i[e-8]^i[e-14]^i[e-16]));const t=n.V(5,o)+n.D(e,c,f,a)+l+i[e]+n.v[r.floor(e/20)]|0;l=a,a=f,f=n.V(30,c),c=o,o=t}s[0]=s[0]+o|0,s[1]=s[1]+c|0,s[2]=s[2]+f|0,s[3]=s[3]+a|0,s[4]=s[4]+l|0}},D={getRandomValues(e){const t=new c(e.buffer),n=e=>{let t=987654321;const n=4294967295;return()=>(t=36969*(65535&t)+(t>>16)&n,(((t<<16)+(e=18e3*(65535&e)+(e>>16)&n)&n)/4294967296+.5)*(r.random()>.5?1:-1))};for(let s,i=0;i<e.length;i+=4){const e=n(4294967296*(s||r.random()));s=987654071*e(),t[i/4]=4294967296*e()|0}return e}},V={importKey:e=>new V.R(_.bytes.m(e)),B(e,t,n,r){if(n=n||1e4,0>r||0>n)throw new s("invalid params to pbkdf2");const i=1+(r>>5)<<2;let o,c,f,a,u;const w=new ArrayBuffer(i),h=new l(w);let d=0;const p=I;for(t=_.bytes.m(t),u=1;(i||1)>d;u++){for(o=c=e.encrypt(p.concat(t,[u])),f=1;n>f;f++)for(c=e.encrypt(c),a=0;a<c.length;a++)o[a]^=c[a];for(f=0;(i||1)>d&&f<o.length;f++)h.setInt32(d,o[f]),d+=4}return w.slice(0,r/8)},R:class{constructor(e){const t=this,n=t.M=P,r=[[],[]];t.U=[new n,new n];const s=t.U[0].blockSize/32;e.length>s&&(e=(new n).update(e).P());for(let t=0;s>t;t++)r[0][t]=909522486^e[t],r[1][t]=1549556828^e[t];t.U[0].update(r[0]),t.U[1].update(r[1]),t.K=new n(t.U[0])}reset(){const e=this;e.K=new e.M(e.U[0]),e.N=!1}update(e){this.N=!0,this.K.update(e)}digest(){const e=this,t=e.K.P(),n=new e.M(e.U[1]).update(t).P();return e.reset(),n}encrypt(e){if(this.N)throw new s("encrypt on already updated hmac called!");return this.update(e),this.digest(e)}}},R=typeof h!=v&&typeof h.getRandomValues==S,B="Invalid password",E="Invalid signature",M="zipjs-abort-check-password";function U(e){return R?h.getRandomValues(e):D.getRandomValues(e)}const K=16,N={name:"PBKDF2"},O=t.assign({hash:{name:"HMAC"}},N),T=t.assign({iterations:1e3,hash:{name:"SHA-1"}},N),W=["deriveBits"],j=[8,12,16],H=[16,24,32],L=10,F=[0,0,0,0],q=typeof h!=v,G=q&&h.subtle,J=q&&typeof G!=v,Q=_.bytes,X=class{constructor(e){const t=this;t.O=[[[],[],[],[],[]],[[],[],[],[],[]]],t.O[0][0][0]||t.T();const n=t.O[0][4],r=t.O[1],i=e.length;let o,c,f,a=1;if(4!==i&&6!==i&&8!==i)throw new s("invalid aes key size");for(t.v=[c=e.slice(0),f=[]],o=i;4*i+28>o;o++){let e=c[o-1];(o%i===0||8===i&&o%i===4)&&(e=n[e>>>24]<<24^n[e>>16&255]<<16^n[e>>8&255]<<8^n[255&e],o%i===0&&(e=e<<8^e>>>24^a<<24,a=a<<1^283*(a>>7))),c[o]=c[o-i]^e}for(let e=0;o;e++,o--){const t=c[3&e?o:o-4];f[e]=4>=o||4>e?t:r[0][n[t>>>24]]^r[1][n[t>>16&255]]^r[2][n[t>>8&255]]^r[3][n[255&t]]}}encrypt(e){return this.W(e,0)}decrypt(e){return this.W(e,1)}T(){const e=this.O[0],t=this.O[1],n=e[4],r=t[4],s=[],i=[];let o,c,f,a;for(let e=0;256>e;e++)i[(s[e]=e<<1^283*(e>>7))^e]=e;for(let l=o=0;!n[l];l^=c||1,o=i[o]||1){let i=o^o<<1^o<<2^o<<3^o<<4;i=i>>8^255&i^99,n[l]=i,r[i]=l,a=s[f=s[c=s[l]]];let u=16843009*a^65537*f^257*c^16843008*l,w=257*s[i]^16843008*i;for(let n=0;4>n;n++)e[n][l]=w=w<<24^w>>>8,t[n][i]=u=u<<24^u>>>8}for(let n=0;5>n;n++)e[n]=e[n].slice(0),t[n]=t[n].slice(0)}W(e,t){if(4!==e.length)throw new s("invalid aes block size");const n=this.v[t],r=n.length/4-2,i=[0,0,0,0],o=this.O[t],c=o[0],f=o[1],a=o[2],l=o[3],u=o[4];let w,h,d,p=e[0]^n[0],y=e[t?3:1]^n[1],m=e[2]^n[2],b=e[t?1:3]^n[3],g=4;for(let e=0;r>e;e++)w=c[p>>>24]^f[y>>16&255]^a[m>>8&255]^l[255&b]^n[g],h=c[y>>>24]^f[m>>16&255]^a[b>>8&255]^l[255&p]^n[g+1],d=c[m>>>24]^f[b>>16&255]^a[p>>8&255]^l[255&y]^n[g+2],b=c[b>>>24]^f[p>>16&255]^a[y>>8&255]^l[255&m]^n[g+3],g+=4,p=w,y=h,m=d;for(let e=0;4>e;e++)i[t?3&-e:e]=u[p>>>24]<<24^u[y>>16&255]<<16^u[m>>8&255]<<8^u[255&b]^n[g++],w=p,p=y,y=m,m=b,b=w;return i}},Y=class{constructor(e,t){this.j=e,this.H=t,this.L=t}reset(){this.L=this.H}update(e){return this.F(this.j,e,this.L)}q(e){if(255&~(e>>24))e+=1<<24;else{let t=e>>16&255,n=e>>8&255,r=255&e;255===t?(t=0,255===n?(n=0,255===r?r=0:++r):++n):++t,e=0,e+=t<<16,e+=n<<8,e+=r}return e}G(e){0===(e[0]=this.q(e[0]))&&(e[1]=this.q(e[1]))}F(e,t,n){let r;if(!(r=t.length))return[];const s=I.l(t);for(let s=0;r>s;s+=4){this.G(n);const r=e.encrypt(n);t[s]^=r[0],t[s+1]^=r[1],t[s+2]^=r[2],t[s+3]^=r[3]}return I.u(t,s)}},Z=V.R;let $=q&&J&&typeof G.importKey==S,ee=q&&J&&typeof G.deriveBits==S;class te extends p{constructor({password:e,rawPassword:n,signed:r,encryptionStrength:o,checkPasswordOnly:c}){super({start(){t.assign(this,{ready:new u(e=>this.J=e),password:ie(e,n),signed:r,X:o-1,pending:new i})},async transform(e,t){const n=this,{password:r,X:o,J:f,ready:a}=n;r?(await(async(e,t,n,r)=>{const i=await se(e,t,n,ce(r,0,j[t])),o=ce(r,j[t]);if(i[0]!=o[0]||i[1]!=o[1])throw new s(B)})(n,o,r,ce(e,0,j[o]+2)),e=ce(e,j[o]+2),c?t.error(new s(M)):f()):await a;const l=new i(e.length-L-(e.length-L)%K);t.enqueue(re(n,e,l,0,L,!0))},async flush(e){const{signed:t,Y:n,Z:r,pending:o,ready:c}=this;if(r&&n){await c;const f=ce(o,0,o.length-L),a=ce(o,o.length-L);let l=new i;if(f.length){const e=ae(Q,f);r.update(e);const t=n.update(e);l=fe(Q,t)}if(t){const e=ce(fe(Q,r.digest()),0,L);for(let t=0;L>t;t++)if(e[t]!=a[t])throw new s(E)}e.enqueue(l)}}})}}class ne extends p{constructor({password:e,rawPassword:n,encryptionStrength:r}){let s;super({start(){t.assign(this,{ready:new u(e=>this.J=e),password:ie(e,n),X:r-1,pending:new i})},async transform(e,t){const n=this,{password:r,X:s,J:o,ready:c}=n;let f=new i;r?(f=await(async(e,t,n)=>{const r=U(new i(j[t]));return oe(r,await se(e,t,n,r))})(n,s,r),o()):await c;const a=new i(f.length+e.length-e.length%K);a.set(f,0),t.enqueue(re(n,e,a,f.length,0))},async flush(e){const{Y:t,Z:n,pending:r,ready:o}=this;if(n&&t){await o;let c=new i;if(r.length){const e=t.update(ae(Q,r));n.update(e),c=fe(Q,e)}s.signature=fe(Q,n.digest()).slice(0,L),e.enqueue(oe(c,s.signature))}}}),s=this}}function re(e,t,n,r,s,o){const{Y:c,Z:f,pending:a}=e,l=t.length-s;let u;for(a.length&&(t=oe(a,t),n=((e,t)=>{if(t&&t>e.length){const n=e;(e=new i(t)).set(n,0)}return e})(n,l-l%K)),u=0;l-K>=u;u+=K){const e=ae(Q,ce(t,u,u+K));o&&f.update(e);const s=c.update(e);o||f.update(s),n.set(fe(Q,s),u+r)}return e.pending=ce(t,u),n}async function se(n,r,s,o){n.password=null;const c=await(async(e,t,n,r,s)=>{if(!$)return V.importKey(t);try{return await G.importKey("raw",t,n,!1,s)}catch(e){return $=!1,V.importKey(t)}})(0,s,O,0,W),f=await(async(e,t,n)=>{if(!ee)return V.B(t,e.salt,T.iterations,n);try{return await G.deriveBits(e,t,n)}catch(r){return ee=!1,V.B(t,e.salt,T.iterations,n)}})(t.assign({salt:o},T),c,8*(2*H[r]+2)),a=new i(f),l=ae(Q,ce(a,0,H[r])),u=ae(Q,ce(a,H[r],2*H[r])),w=ce(a,2*H[r]);return t.assign(n,{keys:{key:l,$:u,passwordVerification:w},Y:new Y(new X(l),e.from(F)),Z:new Z(u)}),w}function ie(e,t){return t===k?(e=>{if(typeof w==v){const t=new i((e=unescape(encodeURIComponent(e))).length);for(let n=0;n<t.length;n++)t[n]=e.charCodeAt(n);return t}return(new w).encode(e)})(e):t}function oe(e,t){let n=e;return e.length+t.length&&(n=new i(e.length+t.length),n.set(e,0),n.set(t,e.length)),n}function ce(e,t,n){return e.subarray(t,n)}function fe(e,t){return e.p(t)}function ae(e,t){return e.m(t)}class le extends p{constructor({password:e,passwordVerification:n,checkPasswordOnly:r}){super({start(){t.assign(this,{password:e,passwordVerification:n}),de(this,e)},transform(e,t){const n=this;if(n.password){const t=we(n,e.subarray(0,12));if(n.password=null,t[11]!=n.passwordVerification)throw new s(B);e=e.subarray(12)}r?t.error(new s(M)):t.enqueue(we(n,e))}})}}class ue extends p{constructor({password:e,passwordVerification:n}){super({start(){t.assign(this,{password:e,passwordVerification:n}),de(this,e)},transform(e,t){const n=this;let r,s;if(n.password){n.password=null;const t=U(new i(12));t[11]=n.passwordVerification,r=new i(e.length+t.length),r.set(he(n,t),0),s=12}else r=new i(e.length),s=0;r.set(he(n,e),s),t.enqueue(r)}})}}function we(e,t){const n=new i(t.length);for(let r=0;r<t.length;r++)n[r]=ye(e)^t[r],pe(e,n[r]);return n}function he(e,t){const n=new i(t.length);for(let r=0;r<t.length;r++)n[r]=ye(e)^t[r],pe(e,t[r]);return n}function de(e,n){const r=[305419896,591751049,878082192];t.assign(e,{keys:r,ee:new x(r[0]),te:new x(r[2])});for(let t=0;t<n.length;t++)pe(e,n.charCodeAt(t))}function pe(e,t){let[n,s,i]=e.keys;e.ee.append([t]),n=~e.ee.get(),s=be(r.imul(be(s+me(n)),134775813)+1),e.te.append([s>>>24]),i=~e.te.get(),e.keys=[n,s,i]}function ye(e){const t=2|e.keys[2];return me(r.imul(t,1^t)>>>8)}function me(e){return 255&e}function be(e){return 4294967295&e}const ge="deflate-raw";class ke extends p{constructor(e,{chunkSize:t,CompressionStream:n,CompressionStreamNative:r}){super({});const{compressed:s,encrypted:i,useCompressionStream:o,zipCrypto:c,signed:f,level:a}=e,u=this;let w,h,d=super.readable;i&&!c||!f||(w=new A,d=Ce(d,w)),s&&(d=ze(d,o,{level:a,chunkSize:t},r,n)),i&&(c?d=Ce(d,new ue(e)):(h=new ne(e),d=Ce(d,h))),Se(u,d,()=>{let e;i&&!c&&(e=h.signature),i&&!c||!f||(e=new l(w.value.buffer).getUint32(0)),u.signature=e})}}class ve extends p{constructor(e,{chunkSize:t,DecompressionStream:n,DecompressionStreamNative:r}){super({});const{zipCrypto:i,encrypted:o,signed:c,signature:f,compressed:a,useCompressionStream:u}=e;let w,h,d=super.readable;o&&(i?d=Ce(d,new le(e)):(h=new te(e),d=Ce(d,h))),a&&(d=ze(d,u,{chunkSize:t},r,n)),o&&!i||!c||(w=new A,d=Ce(d,w)),Se(this,d,()=>{if((!o||i)&&c){const e=new l(w.value.buffer);if(f!=e.getUint32(0,!1))throw new s(E)}})}}function Se(e,n,r){n=Ce(n,new p({flush:r})),t.defineProperty(e,"readable",{get:()=>n})}function ze(e,t,n,r,s){try{e=Ce(e,new(t&&r?r:s)(ge,n))}catch(r){if(!t)throw r;e=Ce(e,new s(ge,n))}return e}function Ce(e,t){return e.pipeThrough(t)}const xe="data",Ae="close";class Ie extends p{constructor(e,n){super({});const r=this,{codecType:i}=e;let o;i.startsWith("deflate")?o=ke:i.startsWith("inflate")&&(o=ve),r.outputSize=0;let c=0;const f=new o(e,n),a=super.readable,l=new p({transform(e,t){e&&e.length&&(c+=e.length,t.enqueue(e))},flush(){t.assign(r,{inputSize:c})}}),u=new p({transform(t,n){if(t&&t.length&&(n.enqueue(t),r.outputSize+=t.length,e.outputSize&&r.outputSize>e.outputSize))throw new s("Invalid uncompressed size")},flush(){const{signature:e}=f;t.assign(r,{signature:e,inputSize:c})}});t.defineProperty(r,"readable",{get:()=>a.pipeThrough(l).pipeThrough(f).pipeThrough(u)})}}class _e extends p{constructor(e){let t;super({transform:function n(r,s){if(t){const e=new i(t.length+r.length);e.set(t),e.set(r,t.length),r=e,t=null}r.length>e?(s.enqueue(r.slice(0,e)),n(r.slice(e),s)):t=r},flush(e){t&&t.length&&e.enqueue(t)}})}}const Pe=new a,De=new a;let Ve,Re=0,Be=!0;async function Ee(e){try{const{options:t,scripts:r,config:s}=e;if(r&&r.length)try{Be?importScripts.apply(k,r):await Me(r)}catch(e){Be=!1,await Me(r)}self.initCodec&&self.initCodec(),s.CompressionStreamNative=self.CompressionStream,s.DecompressionStreamNative=self.DecompressionStream,self.Deflate&&(s.CompressionStream=new z(self.Deflate)),self.Inflate&&(s.DecompressionStream=new z(self.Inflate));const i={highWaterMark:1},o=e.readable||new y({async pull(e){const t=new u(e=>Pe.set(Re,e));Ue({type:"pull",messageId:Re}),Re=(Re+1)%n.MAX_SAFE_INTEGER;const{value:r,done:s}=await t;e.enqueue(r),s&&e.close()}},i),c=e.writable||new m({async write(e){let t;const r=new u(e=>t=e);De.set(Re,t),Ue({type:xe,value:e,messageId:Re}),Re=(Re+1)%n.MAX_SAFE_INTEGER,await r}},i),f=new Ie(t,s);Ve=new AbortController;const{signal:a}=Ve;await o.pipeThrough(f).pipeThrough(new _e(s.chunkSize)).pipeTo(c,{signal:a,preventClose:!0,preventAbort:!0}),await c.getWriter().close();const{signature:l,inputSize:w,outputSize:h}=f;Ue({type:Ae,result:{signature:l,inputSize:w,outputSize:h}})}catch(e){e.outputSize=0,Ke(e)}}async function Me(e){for(const t of e)await import(t)}function Ue(e){let{value:t}=e;if(t)if(t.length)try{t=new i(t),e.value=t.buffer,d(e,[e.value])}catch(t){d(e)}else d(e);else d(e)}function Ke(e=new s("Unknown error")){const{message:t,stack:n,code:r,name:i,outputSize:o}=e;d({error:{message:t,stack:n,code:r,name:i,outputSize:o}})}addEventListener("message",({data:e})=>{const{type:t,messageId:n,value:r,done:s}=e;try{if("start"==t&&Ee(e),t==xe){const e=Pe.get(n);Pe.delete(n),e({value:new i(r),done:s})}if("ack"==t){const e=De.get(n);De.delete(n),e()}t==Ae&&Ve.abort()}catch(e){Ke(e)}});const Ne=-2;function Oe(t){return Te(t.map(([t,n])=>new e(t).fill(n,0,t)))}function Te(t){return t.reduce((t,n)=>t.concat(e.isArray(n)?Te(n):n),[])}const We=[0,1,2,3].concat(...Oe([[2,4],[2,5],[4,6],[4,7],[8,8],[8,9],[16,10],[16,11],[32,12],[32,13],[64,14],[64,15],[2,0],[1,16],[1,17],[2,18],[2,19],[4,20],[4,21],[8,22],[8,23],[16,24],[16,25],[32,26],[32,27],[64,28],[64,29]]));function je(){const e=this;function t(e,t){let n=0;do{n|=1&e,e>>>=1,n<<=1}while(--t>0);return n>>>1}e.ne=n=>{const s=e.re,i=e.ie.se,o=e.ie.oe;let c,f,a,l=-1;for(n.ce=0,n.fe=573,c=0;o>c;c++)0!==s[2*c]?(n.ae[++n.ce]=l=c,n.le[c]=0):s[2*c+1]=0;for(;2>n.ce;)a=n.ae[++n.ce]=2>l?++l:0,s[2*a]=1,n.le[a]=0,n.ue--,i&&(n.we-=i[2*a+1]);for(e.he=l,c=r.floor(n.ce/2);c>=1;c--)n.de(s,c);a=o;do{c=n.ae[1],n.ae[1]=n.ae[n.ce--],n.de(s,1),f=n.ae[1],n.ae[--n.fe]=c,n.ae[--n.fe]=f,s[2*a]=s[2*c]+s[2*f],n.le[a]=r.max(n.le[c],n.le[f])+1,s[2*c+1]=s[2*f+1]=a,n.ae[1]=a++,n.de(s,1)}while(n.ce>=2);n.ae[--n.fe]=n.ae[1],(t=>{const n=e.re,r=e.ie.se,s=e.ie.pe,i=e.ie.ye,o=e.ie.me;let c,f,a,l,u,w,h=0;for(l=0;15>=l;l++)t.be[l]=0;for(n[2*t.ae[t.fe]+1]=0,c=t.fe+1;573>c;c++)f=t.ae[c],l=n[2*n[2*f+1]+1]+1,l>o&&(l=o,h++),n[2*f+1]=l,f>e.he||(t.be[l]++,u=0,i>f||(u=s[f-i]),w=n[2*f],t.ue+=w*(l+u),r&&(t.we+=w*(r[2*f+1]+u)));if(0!==h){do{for(l=o-1;0===t.be[l];)l--;t.be[l]--,t.be[l+1]+=2,t.be[o]--,h-=2}while(h>0);for(l=o;0!==l;l--)for(f=t.be[l];0!==f;)a=t.ae[--c],a>e.he||(n[2*a+1]!=l&&(t.ue+=(l-n[2*a+1])*n[2*a],n[2*a+1]=l),f--)}})(n),((e,n,r)=>{const s=[];let i,o,c,f=0;for(i=1;15>=i;i++)s[i]=f=f+r[i-1]<<1;for(o=0;n>=o;o++)c=e[2*o+1],0!==c&&(e[2*o]=t(s[c]++,c))})(s,e.he,n.be)}}function He(e,t,n,r,s){const i=this;i.se=e,i.pe=t,i.ye=n,i.oe=r,i.me=s}je.ge=[0,1,2,3,4,5,6,7].concat(...Oe([[2,8],[2,9],[2,10],[2,11],[4,12],[4,13],[4,14],[4,15],[8,16],[8,17],[8,18],[8,19],[16,20],[16,21],[16,22],[16,23],[32,24],[32,25],[32,26],[31,27],[1,28]])),je.ke=[0,1,2,3,4,5,6,7,8,10,12,14,16,20,24,28,32,40,48,56,64,80,96,112,128,160,192,224,0],je.ve=[0,1,2,3,4,6,8,12,16,24,32,48,64,96,128,192,256,384,512,768,1024,1536,2048,3072,4096,6144,8192,12288,16384,24576],je.Se=e=>256>e?We[e]:We[256+(e>>>7)],je.ze=[0,0,0,0,0,0,0,0,1,1,1,1,2,2,2,2,3,3,3,3,4,4,4,4,5,5,5,5,0],je.Ce=[0,0,0,0,1,1,2,2,3,3,4,4,5,5,6,6,7,7,8,8,9,9,10,10,11,11,12,12,13,13],je.xe=[0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,2,3,7],je.Ae=[16,17,18,0,8,7,9,6,10,5,11,4,12,3,13,2,14,1,15];const Le=Oe([[144,8],[112,9],[24,7],[8,8]]);He.Ie=Te([12,140,76,204,44,172,108,236,28,156,92,220,60,188,124,252,2,130,66,194,34,162,98,226,18,146,82,210,50,178,114,242,10,138,74,202,42,170,106,234,26,154,90,218,58,186,122,250,6,134,70,198,38,166,102,230,22,150,86,214,54,182,118,246,14,142,78,206,46,174,110,238,30,158,94,222,62,190,126,254,1,129,65,193,33,161,97,225,17,145,81,209,49,177,113,241,9,137,73,201,41,169,105,233,25,153,89,217,57,185,121,249,5,133,69,197,37,165,101,229,21,149,85,213,53,181,117,245,13,141,77,205,45,173,109,237,29,157,93,221,61,189,125,253,19,275,147,403,83,339,211,467,51,307,179,435,115,371,243,499,11,267,139,395,75,331,203,459,43,299,171,427,107,363,235,491,27,283,155,411,91,347,219,475,59,315,187,443,123,379,251,507,7,263,135,391,71,327,199,455,39,295,167,423,103,359,231,487,23,279,151,407,87,343,215,471,55,311,183,439,119,375,247,503,15,271,143,399,79,335,207,463,47,303,175,431,111,367,239,495,31,287,159,415,95,351,223,479,63,319,191,447,127,383,255,511,0,64,32,96,16,80,48,112,8,72,40,104,24,88,56,120,4,68,36,100,20,84,52,116,3,131,67,195,35,163,99,227].map((e,t)=>[e,Le[t]]));const Fe=Oe([[30,5]]);function qe(e,t,n,r,s){const i=this;i._e=e,i.Pe=t,i.De=n,i.Ve=r,i.Re=s}He.Be=Te([0,16,8,24,4,20,12,28,2,18,10,26,6,22,14,30,1,17,9,25,5,21,13,29,3,19,11,27,7,23].map((e,t)=>[e,Fe[t]])),He.Ee=new He(He.Ie,je.ze,257,286,15),He.Me=new He(He.Be,je.Ce,0,30,15),He.Ue=new He(null,je.xe,0,19,7);const Ge=[new qe(0,0,0,0,0),new qe(4,4,8,4,1),new qe(4,5,16,8,1),new qe(4,6,32,32,1),new qe(4,4,16,16,2),new qe(8,16,32,32,2),new qe(8,16,128,128,2),new qe(8,32,128,256,2),new qe(32,128,258,1024,2),new qe(32,258,258,4096,2)],Je=["need dictionary","stream end","","","stream error","data error","","buffer error","",""],Qe=113,Xe=666,Ye=262;function Ze(e,t,n,r){const s=e[2*t],i=e[2*n];return i>s||s==i&&r[t]<=r[n]}function $e(){const e=this;let t,n,s,c,f,a,l,u,w,h,d,p,y,m,b,g,k,v,S,z,C,x,A,I,_,P,D,V,R,B,E,M,U;const K=new je,N=new je,O=new je;let T,W,j,H,L,F;function q(){let t;for(t=0;286>t;t++)E[2*t]=0;for(t=0;30>t;t++)M[2*t]=0;for(t=0;19>t;t++)U[2*t]=0;E[512]=1,e.ue=e.we=0,W=j=0}function G(e,t){let n,r=-1,s=e[1],i=0,o=7,c=4;0===s&&(o=138,c=3),e[2*(t+1)+1]=65535;for(let f=0;t>=f;f++)n=s,s=e[2*(f+1)+1],++i<o&&n==s||(c>i?U[2*n]+=i:0!==n?(n!=r&&U[2*n]++,U[32]++):i>10?U[36]++:U[34]++,i=0,r=n,0===s?(o=138,c=3):n==s?(o=6,c=3):(o=7,c=4))}function J(t){e.Ke[e.pending++]=t}function Q(e){J(255&e),J(e>>>8&255)}function X(e,t){let n;const r=t;F>16-r?(n=e,L|=n<<F&65535,Q(L),L=n>>>16-F,F+=r-16):(L|=e<<F&65535,F+=r)}function Y(e,t){const n=2*e;X(65535&t[n],65535&t[n+1])}function Z(e,t){let n,r,s=-1,i=e[1],o=0,c=7,f=4;for(0===i&&(c=138,f=3),n=0;t>=n;n++)if(r=i,i=e[2*(n+1)+1],++o>=c||r!=i){if(f>o)do{Y(r,U)}while(0!==--o);else 0!==r?(r!=s&&(Y(r,U),o--),Y(16,U),X(o-3,2)):o>10?(Y(18,U),X(o-11,7)):(Y(17,U),X(o-3,3));o=0,s=r,0===i?(c=138,f=3):r==i?(c=6,f=3):(c=7,f=4)}}function $(){16==F?(Q(L),L=0,F=0):8>F||(J(255&L),L>>>=8,F-=8)}function ee(t,n){let s,i,o;if(e.Ne[W]=t,e.Oe[W]=255&n,W++,0===t?E[2*n]++:(j++,t--,E[2*(je.ge[n]+256+1)]++,M[2*je.Se(t)]++),!(8191&W)&&D>2){for(s=8*W,i=C-k,o=0;30>o;o++)s+=M[2*o]*(5+je.Ce[o]);if(s>>>=3,j<r.floor(W/2)&&s<r.floor(i/2))return!0}return W==T-1}function te(t,n){let r,s,i,o,c=0;if(0!==W)do{r=e.Ne[c],s=e.Oe[c],c++,0===r?Y(s,t):(i=je.ge[s],Y(i+256+1,t),o=je.ze[i],0!==o&&(s-=je.ke[i],X(s,o)),r--,i=je.Se(r),Y(i,n),o=je.Ce[i],0!==o&&(r-=je.ve[i],X(r,o)))}while(W>c);Y(256,t),H=t[513]}function ne(){F>8?Q(L):F>0&&J(255&L),L=0,F=0}function re(t,n,r){X(0+(r?1:0),3),((t,n)=>{ne(),H=8,Q(n),Q(~n),e.Ke.set(u.subarray(t,t+n),e.pending),e.pending+=n})(t,n)}function se(n){((t,n,r)=>{let s,i,o=0;D>0?(K.ne(e),N.ne(e),o=(()=>{let t;for(G(E,K.he),G(M,N.he),O.ne(e),t=18;t>=3&&0===U[2*je.Ae[t]+1];t--);return e.ue+=14+3*(t+1),t})(),s=e.ue+3+7>>>3,i=e.we+3+7>>>3,i>s||(s=i)):s=i=n+5,n+4>s||-1==t?i==s?(X(2+(r?1:0),3),te(He.Ie,He.Be)):(X(4+(r?1:0),3),((e,t,n)=>{let r;for(X(e-257,5),X(t-1,5),X(n-4,4),r=0;n>r;r++)X(U[2*je.Ae[r]+1],3);Z(E,e-1),Z(M,t-1)})(K.he+1,N.he+1,o+1),te(E,M)):re(t,n,r),q(),r&&ne()})(0>k?-1:k,C-k,n),k=C,t.Te()}function ie(){let e,n,r,s;do{if(s=w-A-C,0===s&&0===C&&0===A)s=f;else if(-1==s)s--;else if(C>=f+f-Ye){u.set(u.subarray(f,f+f),0),x-=f,C-=f,k-=f,e=y,r=e;do{n=65535&d[--r],d[r]=f>n?0:n-f}while(0!==--e);e=f,r=e;do{n=65535&h[--r],h[r]=f>n?0:n-f}while(0!==--e);s+=f}if(0===t.We)return;e=t.je(u,C+A,s),A+=e,3>A||(p=255&u[C],p=(p<<g^255&u[C+1])&b)}while(Ye>A&&0!==t.We)}function oe(e){let t,n,r=_,s=C,i=I;const o=C>f-Ye?C-(f-Ye):0;let c=B;const a=l,w=C+258;let d=u[s+i-1],p=u[s+i];R>I||(r>>=2),c>A&&(c=A);do{if(t=e,u[t+i]==p&&u[t+i-1]==d&&u[t]==u[s]&&u[++t]==u[s+1]){s+=2,t++;do{}while(u[++s]==u[++t]&&u[++s]==u[++t]&&u[++s]==u[++t]&&u[++s]==u[++t]&&u[++s]==u[++t]&&u[++s]==u[++t]&&u[++s]==u[++t]&&u[++s]==u[++t]&&w>s);if(n=258-(w-s),s=w-258,n>i){if(x=e,i=n,n>=c)break;d=u[s+i-1],p=u[s+i]}}}while((e=65535&h[e&a])>o&&0!==--r);return i>A?A:i}e.le=[],e.be=[],e.ae=[],E=[],M=[],U=[],e.de=(t,n)=>{const r=e.ae,s=r[n];let i=n<<1;for(;i<=e.ce&&(i<e.ce&&Ze(t,r[i+1],r[i],e.le)&&i++,!Ze(t,s,r[i],e.le));)r[n]=r[i],n=i,i<<=1;r[n]=s},e.He=(t,S,x,W,j,G)=>(W||(W=8),j||(j=8),G||(G=0),t.Le=null,-1==S&&(S=6),1>j||j>9||8!=W||9>x||x>15||0>S||S>9||0>G||G>2?Ne:(t.Fe=e,a=x,f=1<<a,l=f-1,m=j+7,y=1<<m,b=y-1,g=r.floor((m+3-1)/3),u=new i(2*f),h=[],d=[],T=1<<j+6,e.Ke=new i(4*T),s=4*T,e.Ne=new o(T),e.Oe=new i(T),D=S,V=G,(t=>(t.qe=t.Ge=0,t.Le=null,e.pending=0,e.Je=0,n=Qe,c=0,K.re=E,K.ie=He.Ee,N.re=M,N.ie=He.Me,O.re=U,O.ie=He.Ue,L=0,F=0,H=8,q(),(()=>{w=2*f,d[y-1]=0;for(let e=0;y-1>e;e++)d[e]=0;P=Ge[D].Pe,R=Ge[D]._e,B=Ge[D].De,_=Ge[D].Ve,C=0,k=0,A=0,v=I=2,z=0,p=0})(),0))(t))),e.Qe=()=>42!=n&&n!=Qe&&n!=Xe?Ne:(e.Oe=null,e.Ne=null,e.Ke=null,d=null,h=null,u=null,e.Fe=null,n==Qe?-3:0),e.Xe=(e,t,n)=>{let r=0;return-1==t&&(t=6),0>t||t>9||0>n||n>2?Ne:(Ge[D].Re!=Ge[t].Re&&0!==e.qe&&(r=e.Ye(1)),D!=t&&(D=t,P=Ge[D].Pe,R=Ge[D]._e,B=Ge[D].De,_=Ge[D].Ve),V=n,r)},e.Ze=(e,t,r)=>{let s,i=r,o=0;if(!t||42!=n)return Ne;if(3>i)return 0;for(i>f-Ye&&(i=f-Ye,o=r-i),u.set(t.subarray(o,o+i),0),C=i,k=i,p=255&u[0],p=(p<<g^255&u[1])&b,s=0;i-3>=s;s++)p=(p<<g^255&u[s+2])&b,h[s&l]=d[p],d[p]=s;return 0},e.Ye=(r,i)=>{let o,w,m,_,R;if(i>4||0>i)return Ne;if(!r.$e||!r.et&&0!==r.We||n==Xe&&4!=i)return r.Le=Je[4],Ne;if(0===r.tt)return r.Le=Je[7],-5;var B;if(t=r,_=c,c=i,42==n&&(w=8+(a-8<<4)<<8,m=(D-1&255)>>1,m>3&&(m=3),w|=m<<6,0!==C&&(w|=32),w+=31-w%31,n=Qe,J((B=w)>>8&255),J(255&B)),0!==e.pending){if(t.Te(),0===t.tt)return c=-1,0}else if(0===t.We&&_>=i&&4!=i)return t.Le=Je[7],-5;if(n==Xe&&0!==t.We)return r.Le=Je[7],-5;if(0!==t.We||0!==A||0!=i&&n!=Xe){switch(R=-1,Ge[D].Re){case 0:R=(e=>{let n,r=65535;for(r>s-5&&(r=s-5);;){if(1>=A){if(ie(),0===A&&0==e)return 0;if(0===A)break}if(C+=A,A=0,n=k+r,(0===C||C>=n)&&(A=C-n,C=n,se(!1),0===t.tt))return 0;if(C-k>=f-Ye&&(se(!1),0===t.tt))return 0}return se(4==e),0===t.tt?4==e?2:0:4==e?3:1})(i);break;case 1:R=(e=>{let n,r=0;for(;;){if(Ye>A){if(ie(),Ye>A&&0==e)return 0;if(0===A)break}if(3>A||(p=(p<<g^255&u[C+2])&b,r=65535&d[p],h[C&l]=d[p],d[p]=C),0===r||(C-r&65535)>f-Ye||2!=V&&(v=oe(r)),3>v)n=ee(0,255&u[C]),A--,C++;else if(n=ee(C-x,v-3),A-=v,v>P||3>A)C+=v,v=0,p=255&u[C],p=(p<<g^255&u[C+1])&b;else{v--;do{C++,p=(p<<g^255&u[C+2])&b,r=65535&d[p],h[C&l]=d[p],d[p]=C}while(0!==--v);C++}if(n&&(se(!1),0===t.tt))return 0}return se(4==e),0===t.tt?4==e?2:0:4==e?3:1})(i);break;case 2:R=(e=>{let n,r,s=0;for(;;){if(Ye>A){if(ie(),Ye>A&&0==e)return 0;if(0===A)break}if(3>A||(p=(p<<g^255&u[C+2])&b,s=65535&d[p],h[C&l]=d[p],d[p]=C),I=v,S=x,v=2,0!==s&&P>I&&f-Ye>=(C-s&65535)&&(2!=V&&(v=oe(s)),5>=v&&(1==V||3==v&&C-x>4096)&&(v=2)),3>I||v>I)if(0!==z){if(n=ee(0,255&u[C-1]),n&&se(!1),C++,A--,0===t.tt)return 0}else z=1,C++,A--;else{r=C+A-3,n=ee(C-1-S,I-3),A-=I-1,I-=2;do{++C>r||(p=(p<<g^255&u[C+2])&b,s=65535&d[p],h[C&l]=d[p],d[p]=C)}while(0!==--I);if(z=0,v=2,C++,n&&(se(!1),0===t.tt))return 0}}return 0!==z&&(n=ee(0,255&u[C-1]),z=0),se(4==e),0===t.tt?4==e?2:0:4==e?3:1})(i)}if(2!=R&&3!=R||(n=Xe),0==R||2==R)return 0===t.tt&&(c=-1),0;if(1==R){if(1==i)X(2,3),Y(256,He.Ie),$(),9>1+H+10-F&&(X(2,3),Y(256,He.Ie),$()),H=7;else if(re(0,0,!1),3==i)for(o=0;y>o;o++)d[o]=0;if(t.Te(),0===t.tt)return c=-1,0}}return 4!=i?0:1}}function et(){const e=this;e.nt=0,e.rt=0,e.We=0,e.qe=0,e.tt=0,e.Ge=0}function tt(e){const t=new et,n=(o=e&&e.chunkSize?e.chunkSize:65536)+5*(r.floor(o/16383)+1);var o;const c=new i(n);let f=e?e.level:-1;void 0===f&&(f=-1),t.He(f),t.$e=c,this.append=(e,r)=>{let o,f,a=0,l=0,u=0;const w=[];if(e.length){t.nt=0,t.et=e,t.We=e.length;do{if(t.rt=0,t.tt=n,o=t.Ye(0),0!=o)throw new s("deflating: "+t.Le);t.rt&&(t.rt==n?w.push(new i(c)):w.push(c.subarray(0,t.rt))),u+=t.rt,r&&t.nt>0&&t.nt!=a&&(r(t.nt),a=t.nt)}while(t.We>0||0===t.tt);return w.length>1?(f=new i(u),w.forEach(e=>{f.set(e,l),l+=e.length})):f=w[0]?new i(w[0]):new i,f}},this.flush=()=>{let e,r,o=0,f=0;const a=[];do{if(t.rt=0,t.tt=n,e=t.Ye(4),1!=e&&0!=e)throw new s("deflating: "+t.Le);n-t.tt>0&&a.push(c.slice(0,t.rt)),f+=t.rt}while(t.We>0||0===t.tt);return t.Qe(),r=new i(f),a.forEach(e=>{r.set(e,o),o+=e.length}),r}}et.prototype={He(e,t){const n=this;return n.Fe=new $e,t||(t=15),n.Fe.He(n,e,t)},Ye(e){const t=this;return t.Fe?t.Fe.Ye(t,e):Ne},Qe(){const e=this;if(!e.Fe)return Ne;const t=e.Fe.Qe();return e.Fe=null,t},Xe(e,t){const n=this;return n.Fe?n.Fe.Xe(n,e,t):Ne},Ze(e,t){const n=this;return n.Fe?n.Fe.Ze(n,e,t):Ne},je(e,t,n){const r=this;let s=r.We;return s>n&&(s=n),0===s?0:(r.We-=s,e.set(r.et.subarray(r.nt,r.nt+s),t),r.nt+=s,r.qe+=s,s)},Te(){const e=this;let t=e.Fe.pending;t>e.tt&&(t=e.tt),0!==t&&(e.$e.set(e.Fe.Ke.subarray(e.Fe.Je,e.Fe.Je+t),e.rt),e.rt+=t,e.Fe.Je+=t,e.Ge+=t,e.tt-=t,e.Fe.pending-=t,0===e.Fe.pending&&(e.Fe.Je=0))}};const nt=-2,rt=-3,st=-5,it=[0,1,3,7,15,31,63,127,255,511,1023,2047,4095,8191,16383,32767,65535],ot=[96,7,256,0,8,80,0,8,16,84,8,115,82,7,31,0,8,112,0,8,48,0,9,192,80,7,10,0,8,96,0,8,32,0,9,160,0,8,0,0,8,128,0,8,64,0,9,224,80,7,6,0,8,88,0,8,24,0,9,144,83,7,59,0,8,120,0,8,56,0,9,208,81,7,17,0,8,104,0,8,40,0,9,176,0,8,8,0,8,136,0,8,72,0,9,240,80,7,4,0,8,84,0,8,20,85,8,227,83,7,43,0,8,116,0,8,52,0,9,200,81,7,13,0,8,100,0,8,36,0,9,168,0,8,4,0,8,132,0,8,68,0,9,232,80,7,8,0,8,92,0,8,28,0,9,152,84,7,83,0,8,124,0,8,60,0,9,216,82,7,23,0,8,108,0,8,44,0,9,184,0,8,12,0,8,140,0,8,76,0,9,248,80,7,3,0,8,82,0,8,18,85,8,163,83,7,35,0,8,114,0,8,50,0,9,196,81,7,11,0,8,98,0,8,34,0,9,164,0,8,2,0,8,130,0,8,66,0,9,228,80,7,7,0,8,90,0,8,26,0,9,148,84,7,67,0,8,122,0,8,58,0,9,212,82,7,19,0,8,106,0,8,42,0,9,180,0,8,10,0,8,138,0,8,74,0,9,244,80,7,5,0,8,86,0,8,22,192,8,0,83,7,51,0,8,118,0,8,54,0,9,204,81,7,15,0,8,102,0,8,38,0,9,172,0,8,6,0,8,134,0,8,70,0,9,236,80,7,9,0,8,94,0,8,30,0,9,156,84,7,99,0,8,126,0,8,62,0,9,220,82,7,27,0,8,110,0,8,46,0,9,188,0,8,14,0,8,142,0,8,78,0,9,252,96,7,256,0,8,81,0,8,17,85,8,131,82,7,31,0,8,113,0,8,49,0,9,194,80,7,10,0,8,97,0,8,33,0,9,162,0,8,1,0,8,129,0,8,65,0,9,226,80,7,6,0,8,89,0,8,25,0,9,146,83,7,59,0,8,121,0,8,57,0,9,210,81,7,17,0,8,105,0,8,41,0,9,178,0,8,9,0,8,137,0,8,73,0,9,242,80,7,4,0,8,85,0,8,21,80,8,258,83,7,43,0,8,117,0,8,53,0,9,202,81,7,13,0,8,101,0,8,37,0,9,170,0,8,5,0,8,133,0,8,69,0,9,234,80,7,8,0,8,93,0,8,29,0,9,154,84,7,83,0,8,125,0,8,61,0,9,218,82,7,23,0,8,109,0,8,45,0,9,186,0,8,13,0,8,141,0,8,77,0,9,250,80,7,3,0,8,83,0,8,19,85,8,195,83,7,35,0,8,115,0,8,51,0,9,198,81,7,11,0,8,99,0,8,35,0,9,166,0,8,3,0,8,131,0,8,67,0,9,230,80,7,7,0,8,91,0,8,27,0,9,150,84,7,67,0,8,123,0,8,59,0,9,214,82,7,19,0,8,107,0,8,43,0,9,182,0,8,11,0,8,139,0,8,75,0,9,246,80,7,5,0,8,87,0,8,23,192,8,0,83,7,51,0,8,119,0,8,55,0,9,206,81,7,15,0,8,103,0,8,39,0,9,174,0,8,7,0,8,135,0,8,71,0,9,238,80,7,9,0,8,95,0,8,31,0,9,158,84,7,99,0,8,127,0,8,63,0,9,222,82,7,27,0,8,111,0,8,47,0,9,190,0,8,15,0,8,143,0,8,79,0,9,254,96,7,256,0,8,80,0,8,16,84,8,115,82,7,31,0,8,112,0,8,48,0,9,193,80,7,10,0,8,96,0,8,32,0,9,161,0,8,0,0,8,128,0,8,64,0,9,225,80,7,6,0,8,88,0,8,24,0,9,145,83,7,59,0,8,120,0,8,56,0,9,209,81,7,17,0,8,104,0,8,40,0,9,177,0,8,8,0,8,136,0,8,72,0,9,241,80,7,4,0,8,84,0,8,20,85,8,227,83,7,43,0,8,116,0,8,52,0,9,201,81,7,13,0,8,100,0,8,36,0,9,169,0,8,4,0,8,132,0,8,68,0,9,233,80,7,8,0,8,92,0,8,28,0,9,153,84,7,83,0,8,124,0,8,60,0,9,217,82,7,23,0,8,108,0,8,44,0,9,185,0,8,12,0,8,140,0,8,76,0,9,249,80,7,3,0,8,82,0,8,18,85,8,163,83,7,35,0,8,114,0,8,50,0,9,197,81,7,11,0,8,98,0,8,34,0,9,165,0,8,2,0,8,130,0,8,66,0,9,229,80,7,7,0,8,90,0,8,26,0,9,149,84,7,67,0,8,122,0,8,58,0,9,213,82,7,19,0,8,106,0,8,42,0,9,181,0,8,10,0,8,138,0,8,74,0,9,245,80,7,5,0,8,86,0,8,22,192,8,0,83,7,51,0,8,118,0,8,54,0,9,205,81,7,15,0,8,102,0,8,38,0,9,173,0,8,6,0,8,134,0,8,70,0,9,237,80,7,9,0,8,94,0,8,30,0,9,157,84,7,99,0,8,126,0,8,62,0,9,221,82,7,27,0,8,110,0,8,46,0,9,189,0,8,14,0,8,142,0,8,78,0,9,253,96,7,256,0,8,81,0,8,17,85,8,131,82,7,31,0,8,113,0,8,49,0,9,195,80,7,10,0,8,97,0,8,33,0,9,163,0,8,1,0,8,129,0,8,65,0,9,227,80,7,6,0,8,89,0,8,25,0,9,147,83,7,59,0,8,121,0,8,57,0,9,211,81,7,17,0,8,105,0,8,41,0,9,179,0,8,9,0,8,137,0,8,73,0,9,243,80,7,4,0,8,85,0,8,21,80,8,258,83,7,43,0,8,117,0,8,53,0,9,203,81,7,13,0,8,101,0,8,37,0,9,171,0,8,5,0,8,133,0,8,69,0,9,235,80,7,8,0,8,93,0,8,29,0,9,155,84,7,83,0,8,125,0,8,61,0,9,219,82,7,23,0,8,109,0,8,45,0,9,187,0,8,13,0,8,141,0,8,77,0,9,251,80,7,3,0,8,83,0,8,19,85,8,195,83,7,35,0,8,115,0,8,51,0,9,199,81,7,11,0,8,99,0,8,35,0,9,167,0,8,3,0,8,131,0,8,67,0,9,231,80,7,7,0,8,91,0,8,27,0,9,151,84,7,67,0,8,123,0,8,59,0,9,215,82,7,19,0,8,107,0,8,43,0,9,183,0,8,11,0,8,139,0,8,75,0,9,247,80,7,5,0,8,87,0,8,23,192,8,0,83,7,51,0,8,119,0,8,55,0,9,207,81,7,15,0,8,103,0,8,39,0,9,175,0,8,7,0,8,135,0,8,71,0,9,239,80,7,9,0,8,95,0,8,31,0,9,159,84,7,99,0,8,127,0,8,63,0,9,223,82,7,27,0,8,111,0,8,47,0,9,191,0,8,15,0,8,143,0,8,79,0,9,255],ct=[80,5,1,87,5,257,83,5,17,91,5,4097,81,5,5,89,5,1025,85,5,65,93,5,16385,80,5,3,88,5,513,84,5,33,92,5,8193,82,5,9,90,5,2049,86,5,129,192,5,24577,80,5,2,87,5,385,83,5,25,91,5,6145,81,5,7,89,5,1537,85,5,97,93,5,24577,80,5,4,88,5,769,84,5,49,92,5,12289,82,5,13,90,5,3073,86,5,193,192,5,24577],ft=[3,4,5,6,7,8,9,10,11,13,15,17,19,23,27,31,35,43,51,59,67,83,99,115,131,163,195,227,258,0,0],at=[0,0,0,0,0,0,0,0,1,1,1,1,2,2,2,2,3,3,3,3,4,4,4,4,5,5,5,5,0,112,112],lt=[1,2,3,4,5,7,9,13,17,25,33,49,65,97,129,193,257,385,513,769,1025,1537,2049,3073,4097,6145,8193,12289,16385,24577],ut=[0,0,0,0,1,1,2,2,3,3,4,4,5,5,6,6,7,7,8,8,9,9,10,10,11,11,12,12,13,13];function wt(){let e,t,n,r,s,i;function o(e,t,o,c,f,a,l,u,w,h,d){let p,y,m,b,g,k,v,S,z,C,x,A,I,_,P;C=0,g=o;do{n[e[t+C]]++,C++,g--}while(0!==g);if(n[0]==o)return l[0]=-1,u[0]=0,0;for(S=u[0],k=1;15>=k&&0===n[k];k++);for(v=k,k>S&&(S=k),g=15;0!==g&&0===n[g];g--);for(m=g,S>g&&(S=g),u[0]=S,_=1<<k;g>k;k++,_<<=1)if(0>(_-=n[k]))return rt;if(0>(_-=n[g]))return rt;for(n[g]+=_,i[1]=k=0,C=1,I=2;0!==--g;)i[I]=k+=n[C],I++,C++;g=0,C=0;do{0!==(k=e[t+C])&&(d[i[k]++]=g),C++}while(++g<o);for(o=i[m],i[0]=g=0,C=0,b=-1,A=-S,s[0]=0,x=0,P=0;m>=v;v++)for(p=n[v];0!==p--;){for(;v>A+S;){if(b++,A+=S,P=m-A,P=P>S?S:P,(y=1<<(k=v-A))>p+1&&(y-=p+1,I=v,P>k))for(;++k<P&&(y<<=1)>n[++I];)y-=n[I];if(P=1<<k,h[0]+P>1440)return rt;s[b]=x=h[0],h[0]+=P,0!==b?(i[b]=g,r[0]=k,r[1]=S,k=g>>>A-S,r[2]=x-s[b-1]-k,w.set(r,3*(s[b-1]+k))):l[0]=x}for(r[1]=v-A,o>C?d[C]<c?(r[0]=256>d[C]?0:96,r[2]=d[C++]):(r[0]=a[d[C]-c]+16+64,r[2]=f[d[C++]-c]):r[0]=192,y=1<<v-A,k=g>>>A;P>k;k+=y)w.set(r,3*(x+k));for(k=1<<v-1;0!==(g&k);k>>>=1)g^=k;for(g^=k,z=(1<<A)-1;(g&z)!=i[b];)b--,A-=S,z=(1<<A)-1}return 0!==_&&1!=m?st:0}function c(o){let c;for(e||(e=[],t=[],n=new f(16),r=[],s=new f(15),i=new f(16)),t.length<o&&(t=[]),c=0;o>c;c++)t[c]=0;for(c=0;16>c;c++)n[c]=0;for(c=0;3>c;c++)r[c]=0;s.set(n.subarray(0,15),0),i.set(n.subarray(0,16),0)}this.st=(n,r,s,i,f)=>{let a;return c(19),e[0]=0,a=o(n,0,19,19,null,null,s,r,i,e,t),a==rt?f.Le="oversubscribed dynamic bit lengths tree":a!=st&&0!==r[0]||(f.Le="incomplete dynamic bit lengths tree",a=rt),a},this.it=(n,r,s,i,f,a,l,u,w)=>{let h;return c(288),e[0]=0,h=o(s,0,n,257,ft,at,a,i,u,e,t),0!=h||0===i[0]?(h==rt?w.Le="oversubscribed literal/length tree":-4!=h&&(w.Le="incomplete literal/length tree",h=rt),h):(c(288),h=o(s,n,r,0,lt,ut,l,f,u,e,t),0!=h||0===f[0]&&n>257?(h==rt?w.Le="oversubscribed distance tree":h==st?(w.Le="incomplete distance tree",h=rt):-4!=h&&(w.Le="empty distance tree with lengths",h=rt),h):0)}}function ht(){const e=this;let t,n,r,s,i=0,o=0,c=0,f=0,a=0,l=0,u=0,w=0,h=0,d=0;function p(e,t,n,r,s,i,o,c){let f,a,l,u,w,h,d,p,y,m,b,g,k,v,S,z;d=c.nt,p=c.We,w=o.ot,h=o.ct,y=o.write,m=y<o.read?o.read-y-1:o.end-y,b=it[e],g=it[t];do{for(;20>h;)p--,w|=(255&c.ft(d++))<<h,h+=8;if(f=w&b,a=n,l=r,z=3*(l+f),0!==(u=a[z]))for(;;){if(w>>=a[z+1],h-=a[z+1],16&u){for(u&=15,k=a[z+2]+(w&it[u]),w>>=u,h-=u;15>h;)p--,w|=(255&c.ft(d++))<<h,h+=8;for(f=w&g,a=s,l=i,z=3*(l+f),u=a[z];;){if(w>>=a[z+1],h-=a[z+1],16&u){for(u&=15;u>h;)p--,w|=(255&c.ft(d++))<<h,h+=8;if(v=a[z+2]+(w&it[u]),w>>=u,h-=u,m-=k,v>y){S=y-v;do{S+=o.end}while(0>S);if(u=o.end-S,k>u){if(k-=u,y-S>0&&u>y-S)do{o.lt[y++]=o.lt[S++]}while(0!==--u);else o.lt.set(o.lt.subarray(S,S+u),y),y+=u,S+=u,u=0;S=0}}else S=y-v,y-S>0&&2>y-S?(o.lt[y++]=o.lt[S++],o.lt[y++]=o.lt[S++],k-=2):(o.lt.set(o.lt.subarray(S,S+2),y),y+=2,S+=2,k-=2);if(y-S>0&&k>y-S)do{o.lt[y++]=o.lt[S++]}while(0!==--k);else o.lt.set(o.lt.subarray(S,S+k),y),y+=k,S+=k,k=0;break}if(64&u)return c.Le="invalid distance code",k=c.We-p,k=k>h>>3?h>>3:k,p+=k,d-=k,h-=k<<3,o.ot=w,o.ct=h,c.We=p,c.qe+=d-c.nt,c.nt=d,o.write=y,rt;f+=a[z+2],f+=w&it[u],z=3*(l+f),u=a[z]}break}if(64&u)return 32&u?(k=c.We-p,k=k>h>>3?h>>3:k,p+=k,d-=k,h-=k<<3,o.ot=w,o.ct=h,c.We=p,c.qe+=d-c.nt,c.nt=d,o.write=y,1):(c.Le="invalid literal/length code",k=c.We-p,k=k>h>>3?h>>3:k,p+=k,d-=k,h-=k<<3,o.ot=w,o.ct=h,c.We=p,c.qe+=d-c.nt,c.nt=d,o.write=y,rt);if(f+=a[z+2],f+=w&it[u],z=3*(l+f),0===(u=a[z])){w>>=a[z+1],h-=a[z+1],o.lt[y++]=a[z+2],m--;break}}else w>>=a[z+1],h-=a[z+1],o.lt[y++]=a[z+2],m--}while(m>=258&&p>=10);return k=c.We-p,k=k>h>>3?h>>3:k,p+=k,d-=k,h-=k<<3,o.ot=w,o.ct=h,c.We=p,c.qe+=d-c.nt,c.nt=d,o.write=y,0}e.init=(e,i,o,c,f,a)=>{t=0,u=e,w=i,r=o,h=c,s=f,d=a,n=null},e.ut=(e,y,m)=>{let b,g,k,v,S,z,C,x=0,A=0,I=0;for(I=y.nt,v=y.We,x=e.ot,A=e.ct,S=e.write,z=S<e.read?e.read-S-1:e.end-S;;)switch(t){case 0:if(z>=258&&v>=10&&(e.ot=x,e.ct=A,y.We=v,y.qe+=I-y.nt,y.nt=I,e.write=S,m=p(u,w,r,h,s,d,e,y),I=y.nt,v=y.We,x=e.ot,A=e.ct,S=e.write,z=S<e.read?e.read-S-1:e.end-S,0!=m)){t=1==m?7:9;break}c=u,n=r,o=h,t=1;case 1:for(b=c;b>A;){if(0===v)return e.ot=x,e.ct=A,y.We=v,y.qe+=I-y.nt,y.nt=I,e.write=S,e.wt(y,m);m=0,v--,x|=(255&y.ft(I++))<<A,A+=8}if(g=3*(o+(x&it[b])),x>>>=n[g+1],A-=n[g+1],k=n[g],0===k){f=n[g+2],t=6;break}if(16&k){a=15&k,i=n[g+2],t=2;break}if(!(64&k)){c=k,o=g/3+n[g+2];break}if(32&k){t=7;break}return t=9,y.Le="invalid literal/length code",m=rt,e.ot=x,e.ct=A,y.We=v,y.qe+=I-y.nt,y.nt=I,e.write=S,e.wt(y,m);case 2:for(b=a;b>A;){if(0===v)return e.ot=x,e.ct=A,y.We=v,y.qe+=I-y.nt,y.nt=I,e.write=S,e.wt(y,m);m=0,v--,x|=(255&y.ft(I++))<<A,A+=8}i+=x&it[b],x>>=b,A-=b,c=w,n=s,o=d,t=3;case 3:for(b=c;b>A;){if(0===v)return e.ot=x,e.ct=A,y.We=v,y.qe+=I-y.nt,y.nt=I,e.write=S,e.wt(y,m);m=0,v--,x|=(255&y.ft(I++))<<A,A+=8}if(g=3*(o+(x&it[b])),x>>=n[g+1],A-=n[g+1],k=n[g],16&k){a=15&k,l=n[g+2],t=4;break}if(!(64&k)){c=k,o=g/3+n[g+2];break}return t=9,y.Le="invalid distance code",m=rt,e.ot=x,e.ct=A,y.We=v,y.qe+=I-y.nt,y.nt=I,e.write=S,e.wt(y,m);case 4:for(b=a;b>A;){if(0===v)return e.ot=x,e.ct=A,y.We=v,y.qe+=I-y.nt,y.nt=I,e.write=S,e.wt(y,m);m=0,v--,x|=(255&y.ft(I++))<<A,A+=8}l+=x&it[b],x>>=b,A-=b,t=5;case 5:for(C=S-l;0>C;)C+=e.end;for(;0!==i;){if(0===z&&(S==e.end&&0!==e.read&&(S=0,z=S<e.read?e.read-S-1:e.end-S),0===z&&(e.write=S,m=e.wt(y,m),S=e.write,z=S<e.read?e.read-S-1:e.end-S,S==e.end&&0!==e.read&&(S=0,z=S<e.read?e.read-S-1:e.end-S),0===z)))return e.ot=x,e.ct=A,y.We=v,y.qe+=I-y.nt,y.nt=I,e.write=S,e.wt(y,m);e.lt[S++]=e.lt[C++],z--,C==e.end&&(C=0),i--}t=0;break;case 6:if(0===z&&(S==e.end&&0!==e.read&&(S=0,z=S<e.read?e.read-S-1:e.end-S),0===z&&(e.write=S,m=e.wt(y,m),S=e.write,z=S<e.read?e.read-S-1:e.end-S,S==e.end&&0!==e.read&&(S=0,z=S<e.read?e.read-S-1:e.end-S),0===z)))return e.ot=x,e.ct=A,y.We=v,y.qe+=I-y.nt,y.nt=I,e.write=S,e.wt(y,m);m=0,e.lt[S++]=f,z--,t=0;break;case 7:if(A>7&&(A-=8,v++,I--),e.write=S,m=e.wt(y,m),S=e.write,z=S<e.read?e.read-S-1:e.end-S,e.read!=e.write)return e.ot=x,e.ct=A,y.We=v,y.qe+=I-y.nt,y.nt=I,e.write=S,e.wt(y,m);t=8;case 8:return m=1,e.ot=x,e.ct=A,y.We=v,y.qe+=I-y.nt,y.nt=I,e.write=S,e.wt(y,m);case 9:return m=rt,e.ot=x,e.ct=A,y.We=v,y.qe+=I-y.nt,y.nt=I,e.write=S,e.wt(y,m);default:return m=nt,e.ot=x,e.ct=A,y.We=v,y.qe+=I-y.nt,y.nt=I,e.write=S,e.wt(y,m)}},e.ht=()=>{}}wt.dt=(e,t,n,r)=>(e[0]=9,t[0]=5,n[0]=ot,r[0]=ct,0);const dt=[16,17,18,0,8,7,9,6,10,5,11,4,12,3,13,2,14,1,15];function pt(e,t){const n=this;let r,s=0,o=0,c=0,a=0;const l=[0],u=[0],w=new ht;let h=0,d=new f(4320);const p=new wt;n.ct=0,n.ot=0,n.lt=new i(t),n.end=t,n.read=0,n.write=0,n.reset=(e,t)=>{t&&(t[0]=0),6==s&&w.ht(e),s=0,n.ct=0,n.ot=0,n.read=n.write=0},n.reset(e,null),n.wt=(e,t)=>{let r,s,i;return s=e.rt,i=n.read,r=(i>n.write?n.end:n.write)-i,r>e.tt&&(r=e.tt),0!==r&&t==st&&(t=0),e.tt-=r,e.Ge+=r,e.$e.set(n.lt.subarray(i,i+r),s),s+=r,i+=r,i==n.end&&(i=0,n.write==n.end&&(n.write=0),r=n.write-i,r>e.tt&&(r=e.tt),0!==r&&t==st&&(t=0),e.tt-=r,e.Ge+=r,e.$e.set(n.lt.subarray(i,i+r),s),s+=r,i+=r),e.rt=s,n.read=i,t},n.ut=(e,t)=>{let i,f,y,m,b,g,k,v;for(m=e.nt,b=e.We,f=n.ot,y=n.ct,g=n.write,k=g<n.read?n.read-g-1:n.end-g;;){let S,z,C,x,A,I,_,P;switch(s){case 0:for(;3>y;){if(0===b)return n.ot=f,n.ct=y,e.We=b,e.qe+=m-e.nt,e.nt=m,n.write=g,n.wt(e,t);t=0,b--,f|=(255&e.ft(m++))<<y,y+=8}switch(i=7&f,h=1&i,i>>>1){case 0:f>>>=3,y-=3,i=7&y,f>>>=i,y-=i,s=1;break;case 1:S=[],z=[],C=[[]],x=[[]],wt.dt(S,z,C,x),w.init(S[0],z[0],C[0],0,x[0],0),f>>>=3,y-=3,s=6;break;case 2:f>>>=3,y-=3,s=3;break;case 3:return f>>>=3,y-=3,s=9,e.Le="invalid block type",t=rt,n.ot=f,n.ct=y,e.We=b,e.qe+=m-e.nt,e.nt=m,n.write=g,n.wt(e,t)}break;case 1:for(;32>y;){if(0===b)return n.ot=f,n.ct=y,e.We=b,e.qe+=m-e.nt,e.nt=m,n.write=g,n.wt(e,t);t=0,b--,f|=(255&e.ft(m++))<<y,y+=8}if((~f>>>16&65535)!=(65535&f))return s=9,e.Le="invalid stored block lengths",t=rt,n.ot=f,n.ct=y,e.We=b,e.qe+=m-e.nt,e.nt=m,n.write=g,n.wt(e,t);o=65535&f,f=y=0,s=0!==o?2:0!==h?7:0;break;case 2:if(0===b)return n.ot=f,n.ct=y,e.We=b,e.qe+=m-e.nt,e.nt=m,n.write=g,n.wt(e,t);if(0===k&&(g==n.end&&0!==n.read&&(g=0,k=g<n.read?n.read-g-1:n.end-g),0===k&&(n.write=g,t=n.wt(e,t),g=n.write,k=g<n.read?n.read-g-1:n.end-g,g==n.end&&0!==n.read&&(g=0,k=g<n.read?n.read-g-1:n.end-g),0===k)))return n.ot=f,n.ct=y,e.We=b,e.qe+=m-e.nt,e.nt=m,n.write=g,n.wt(e,t);if(t=0,i=o,i>b&&(i=b),i>k&&(i=k),n.lt.set(e.je(m,i),g),m+=i,b-=i,g+=i,k-=i,0!==(o-=i))break;s=0!==h?7:0;break;case 3:for(;14>y;){if(0===b)return n.ot=f,n.ct=y,e.We=b,e.qe+=m-e.nt,e.nt=m,n.write=g,n.wt(e,t);t=0,b--,f|=(255&e.ft(m++))<<y,y+=8}if(c=i=16383&f,(31&i)>29||(i>>5&31)>29)return s=9,e.Le="too many length or distance symbols",t=rt,n.ot=f,n.ct=y,e.We=b,e.qe+=m-e.nt,e.nt=m,n.write=g,n.wt(e,t);if(i=258+(31&i)+(i>>5&31),!r||r.length<i)r=[];else for(v=0;i>v;v++)r[v]=0;f>>>=14,y-=14,a=0,s=4;case 4:for(;4+(c>>>10)>a;){for(;3>y;){if(0===b)return n.ot=f,n.ct=y,e.We=b,e.qe+=m-e.nt,e.nt=m,n.write=g,n.wt(e,t);t=0,b--,f|=(255&e.ft(m++))<<y,y+=8}r[dt[a++]]=7&f,f>>>=3,y-=3}for(;19>a;)r[dt[a++]]=0;if(l[0]=7,i=p.st(r,l,u,d,e),0!=i)return(t=i)==rt&&(r=null,s=9),n.ot=f,n.ct=y,e.We=b,e.qe+=m-e.nt,e.nt=m,n.write=g,n.wt(e,t);a=0,s=5;case 5:for(;i=c,258+(31&i)+(i>>5&31)>a;){let o,w;for(i=l[0];i>y;){if(0===b)return n.ot=f,n.ct=y,e.We=b,e.qe+=m-e.nt,e.nt=m,n.write=g,n.wt(e,t);t=0,b--,f|=(255&e.ft(m++))<<y,y+=8}if(i=d[3*(u[0]+(f&it[i]))+1],w=d[3*(u[0]+(f&it[i]))+2],16>w)f>>>=i,y-=i,r[a++]=w;else{for(v=18==w?7:w-14,o=18==w?11:3;i+v>y;){if(0===b)return n.ot=f,n.ct=y,e.We=b,e.qe+=m-e.nt,e.nt=m,n.write=g,n.wt(e,t);t=0,b--,f|=(255&e.ft(m++))<<y,y+=8}if(f>>>=i,y-=i,o+=f&it[v],f>>>=v,y-=v,v=a,i=c,v+o>258+(31&i)+(i>>5&31)||16==w&&1>v)return r=null,s=9,e.Le="invalid bit length repeat",t=rt,n.ot=f,n.ct=y,e.We=b,e.qe+=m-e.nt,e.nt=m,n.write=g,n.wt(e,t);w=16==w?r[v-1]:0;do{r[v++]=w}while(0!==--o);a=v}}if(u[0]=-1,A=[],I=[],_=[],P=[],A[0]=9,I[0]=6,i=c,i=p.it(257+(31&i),1+(i>>5&31),r,A,I,_,P,d,e),0!=i)return i==rt&&(r=null,s=9),t=i,n.ot=f,n.ct=y,e.We=b,e.qe+=m-e.nt,e.nt=m,n.write=g,n.wt(e,t);w.init(A[0],I[0],d,_[0],d,P[0]),s=6;case 6:if(n.ot=f,n.ct=y,e.We=b,e.qe+=m-e.nt,e.nt=m,n.write=g,1!=(t=w.ut(n,e,t)))return n.wt(e,t);if(t=0,w.ht(e),m=e.nt,b=e.We,f=n.ot,y=n.ct,g=n.write,k=g<n.read?n.read-g-1:n.end-g,0===h){s=0;break}s=7;case 7:if(n.write=g,t=n.wt(e,t),g=n.write,k=g<n.read?n.read-g-1:n.end-g,n.read!=n.write)return n.ot=f,n.ct=y,e.We=b,e.qe+=m-e.nt,e.nt=m,n.write=g,n.wt(e,t);s=8;case 8:return t=1,n.ot=f,n.ct=y,e.We=b,e.qe+=m-e.nt,e.nt=m,n.write=g,n.wt(e,t);case 9:return t=rt,n.ot=f,n.ct=y,e.We=b,e.qe+=m-e.nt,e.nt=m,n.write=g,n.wt(e,t);default:return t=nt,n.ot=f,n.ct=y,e.We=b,e.qe+=m-e.nt,e.nt=m,n.write=g,n.wt(e,t)}}},n.ht=e=>{n.reset(e,null),n.lt=null,d=null},n.yt=(e,t,r)=>{n.lt.set(e.subarray(t,t+r),0),n.read=n.write=r},n.bt=()=>1==s?1:0}const yt=13,mt=[0,0,255,255];function bt(){const e=this;function t(e){return e&&e.gt?(e.qe=e.Ge=0,e.Le=null,e.gt.mode=7,e.gt.kt.reset(e,null),0):nt}e.mode=0,e.method=0,e.vt=[0],e.St=0,e.marker=0,e.zt=0,e.Ct=t=>(e.kt&&e.kt.ht(t),e.kt=null,0),e.xt=(n,r)=>(n.Le=null,e.kt=null,8>r||r>15?(e.Ct(n),nt):(e.zt=r,n.gt.kt=new pt(n,1<<r),t(n),0)),e.At=(e,t)=>{let n,r;if(!e||!e.gt||!e.et)return nt;const s=e.gt;for(t=4==t?st:0,n=st;;)switch(s.mode){case 0:if(0===e.We)return n;if(n=t,e.We--,e.qe++,8!=(15&(s.method=e.ft(e.nt++)))){s.mode=yt,e.Le="unknown compression method",s.marker=5;break}if(8+(s.method>>4)>s.zt){s.mode=yt,e.Le="invalid win size",s.marker=5;break}s.mode=1;case 1:if(0===e.We)return n;if(n=t,e.We--,e.qe++,r=255&e.ft(e.nt++),((s.method<<8)+r)%31!=0){s.mode=yt,e.Le="incorrect header check",s.marker=5;break}if(!(32&r)){s.mode=7;break}s.mode=2;case 2:if(0===e.We)return n;n=t,e.We--,e.qe++,s.St=(255&e.ft(e.nt++))<<24&4278190080,s.mode=3;case 3:if(0===e.We)return n;n=t,e.We--,e.qe++,s.St+=(255&e.ft(e.nt++))<<16&16711680,s.mode=4;case 4:if(0===e.We)return n;n=t,e.We--,e.qe++,s.St+=(255&e.ft(e.nt++))<<8&65280,s.mode=5;case 5:return 0===e.We?n:(n=t,e.We--,e.qe++,s.St+=255&e.ft(e.nt++),s.mode=6,2);case 6:return s.mode=yt,e.Le="need dictionary",s.marker=0,nt;case 7:if(n=s.kt.ut(e,n),n==rt){s.mode=yt,s.marker=0;break}if(0==n&&(n=t),1!=n)return n;n=t,s.kt.reset(e,s.vt),s.mode=12;case 12:return e.We=0,1;case yt:return rt;default:return nt}},e.It=(e,t,n)=>{let r=0,s=n;if(!e||!e.gt||6!=e.gt.mode)return nt;const i=e.gt;return s<1<<i.zt||(s=(1<<i.zt)-1,r=n-s),i.kt.yt(t,r,s),i.mode=7,0},e._t=e=>{let n,r,s,i,o;if(!e||!e.gt)return nt;const c=e.gt;if(c.mode!=yt&&(c.mode=yt,c.marker=0),0===(n=e.We))return st;for(r=e.nt,s=c.marker;0!==n&&4>s;)e.ft(r)==mt[s]?s++:s=0!==e.ft(r)?0:4-s,r++,n--;return e.qe+=r-e.nt,e.nt=r,e.We=n,c.marker=s,4!=s?rt:(i=e.qe,o=e.Ge,t(e),e.qe=i,e.Ge=o,c.mode=7,0)},e.Pt=e=>e&&e.gt&&e.gt.kt?e.gt.kt.bt():nt}function gt(){}function kt(e){const t=new gt,n=e&&e.chunkSize?r.floor(2*e.chunkSize):131072,o=new i(n);let c=!1;t.xt(),t.$e=o,this.append=(e,r)=>{const f=[];let a,l,u=0,w=0,h=0;if(0!==e.length){t.nt=0,t.et=e,t.We=e.length;do{if(t.rt=0,t.tt=n,0!==t.We||c||(t.nt=0,c=!0),a=t.At(0),c&&a===st){if(0!==t.We)throw new s("inflating: bad input")}else if(0!==a&&1!==a)throw new s("inflating: "+t.Le);if((c||1===a)&&t.We===e.length)throw new s("inflating: bad input");t.rt&&(t.rt===n?f.push(new i(o)):f.push(o.subarray(0,t.rt))),h+=t.rt,r&&t.nt>0&&t.nt!=u&&(r(t.nt),u=t.nt)}while(t.We>0||0===t.tt);return f.length>1?(l=new i(h),f.forEach(e=>{l.set(e,w),w+=e.length})):l=f[0]?new i(f[0]):new i,l}},this.flush=()=>{t.Ct()}}gt.prototype={xt(e){const t=this;return t.gt=new bt,e||(e=15),t.gt.xt(t,e)},At(e){const t=this;return t.gt?t.gt.At(t,e):nt},Ct(){const e=this;if(!e.gt)return nt;const t=e.gt.Ct(e);return e.gt=null,t},_t(){const e=this;return e.gt?e.gt._t(e):nt},It(e,t){const n=this;return n.gt?n.gt.It(n,e,t):nt},ft(e){return this.et[e]},je(e,t){return this.et.subarray(e,e+t)}},self.initCodec=()=>{self.Deflate=tt,self.Inflate=kt};\n',r=()=>t.useDataURI?"data:text/javascript,"+encodeURIComponent(n):f.createObjectURL(new m([n],{type:"text/javascript"}));e({workerScripts:{inflate:[r],deflate:[r]}})})(re),e.BlobReader=Mt,e.BlobWriter=Ht,e.Data64URIReader=class extends Ot{constructor(e){super();let t=e.length;for(;"="==e.charAt(t-1);)t--;const r=e.indexOf(",")+1;n.assign(this,{dataURI:e,dataStart:r,size:a.floor(.75*(t-r))})}readUint8Array(e,t){const{dataStart:n,dataURI:r}=this,s=new w(t),i=4*a.floor(e/3),o=atob(r.substring(i+n,4*a.ceil((e+t)/3)+n)),c=e-3*a.floor(i/4);let l=0;for(let e=c;c+t>e&&e<o.length;e++)s[e-c]=o.charCodeAt(e),l++;return l<s.length?s.subarray(0,l):s}},e.Data64URIWriter=class extends Pt{constructor(e){super(),n.assign(this,{data:"data:"+(e||"")+";base64,",pending:[]})}writeUint8Array(e){const t=this;let n=0,s=t.pending;const i=t.pending.length;for(t.pending="",n=0;n<3*a.floor((i+e.length)/3)-i;n++)s+=r.fromCharCode(e[n]);for(;n<e.length;n++)t.pending+=r.fromCharCode(e[n]);s.length&&(s.length>2?t.data+=x(s):t.pending+=s)}getData(){return this.data+x(this.pending)}},e.ERR_BAD_FORMAT=$n,e.ERR_CENTRAL_DIRECTORY_NOT_FOUND=nr,e.ERR_DUPLICATED_NAME=Fr,e.ERR_ENCRYPTED=ir,e.ERR_EOCDR_LOCATOR_ZIP64_NOT_FOUND=tr,e.ERR_EOCDR_NOT_FOUND=er,e.ERR_EXTRAFIELD_ZIP64_NOT_FOUND=sr,e.ERR_HTTP_RANGE=Rt,e.ERR_INVALID_COMMENT=Er,e.ERR_INVALID_ENCRYPTION_STRENGTH=_r,e.ERR_INVALID_ENTRY_COMMENT=Dr,e.ERR_INVALID_ENTRY_NAME=Rr,e.ERR_INVALID_EXTRAFIELD_DATA=Tr,e.ERR_INVALID_EXTRAFIELD_TYPE=Ir,e.ERR_INVALID_PASSWORD=ge,e.ERR_INVALID_SIGNATURE=me,e.ERR_INVALID_UNCOMPRESSED_SIZE=nt,e.ERR_INVALID_VERSION=Wr,e.ERR_ITERATOR_COMPLETED_TOO_SOON=Wt,e.ERR_LOCAL_FILE_HEADER_NOT_FOUND=rr,e.ERR_OVERLAPPING_ENTRY=lr,e.ERR_SPLIT_ZIP_FILE=cr,e.ERR_UNDEFINED_UNCOMPRESSED_SIZE=Nr,e.ERR_UNSUPPORTED_COMPRESSION=or,e.ERR_UNSUPPORTED_ENCRYPTION=ar,e.ERR_UNSUPPORTED_FORMAT=Lr,e.ERR_WRITER_NOT_INITIALIZED=_t,e.ERR_ZIP_NOT_EMPTY=Ur,e.GenericReader=an,e.GenericWriter=on,e.HttpRangeReader=class extends nn{constructor(e,t={}){t.useRangeHeader=!0,super(e,t)}},e.HttpReader=nn,e.Reader=Ot,e.SplitDataReader=rn,e.SplitDataWriter=sn,e.SplitZipReader=un,e.SplitZipWriter=fn,e.TextReader=class extends Mt{constructor(e){super(new m([e],{type:"text/plain"}))}},e.TextWriter=class extends Ht{constructor(e){super(e),n.assign(this,{encoding:e,utf8:!e||"utf-8"==e.toLowerCase()})}async getData(){const{encoding:e,utf8:t}=this,r=await super.getData();if(r.text&&t)return r.text();{const t=new FileReader;return new y((s,i)=>{n.assign(t,{onload:({target:e})=>s(e.result),onerror:()=>i(t.error)}),t.readAsText(r,e)})}}},e.Uint8ArrayReader=class extends Ot{constructor(e){super(),e=new w(e.buffer,e.byteOffset,e.byteLength),n.assign(this,{array:e,size:e.length})}readUint8Array(e,t){return this.array.slice(e,e+t)}},e.Uint8ArrayWriter=class extends Pt{init(e=0){n.assign(this,{offset:0,array:new w(e)}),super.init()}writeUint8Array(e){const t=this;if(t.offset+e.length>t.array.length){const n=t.array;t.array=new w(n.length+e.length),t.array.set(n)}t.array.set(e,t.offset),t.offset+=e.length}getData(){return this.array}},e.Writer=Pt,e.ZipReader=pr,e.ZipReaderStream=class{constructor(e={}){const{readable:t,writable:n}=new v,r=new pr(t,e).getEntriesGenerator();this.readable=new A({async pull(e){const{done:t,value:n}=await r.next();if(t)return e.close();const s={...n,readable:(()=>{const{readable:e,writable:t}=new v;if(n.getData)return n.getData(t),e})()};delete s.getData,e.enqueue(s)}}),this.writable=n}},e.ZipWriter=Mr,e.ZipWriterStream=class{constructor(e={}){const{readable:t,writable:n}=new v;this.readable=t,this.zipWriter=new Mr(n,e)}transform(e){const{readable:t,writable:n}=new v({flush:()=>{this.zipWriter.close()}});return this.zipWriter.add(e,t),{readable:this.readable,writable:n}}writable(e){const{readable:t,writable:n}=new v;return this.zipWriter.add(e,t),n}close(e,t={}){return this.zipWriter.close(e,t)}},e.configure=re,e.getMimeType=()=>"application/octet-stream",e.initShimAsyncCodec=(e,t={},n)=>({Deflate:ie(e.Deflate,t.deflate,n),Inflate:ie(e.Inflate,t.inflate,n)}),e.initStream=cn,e.readUint8Array=ln,e.terminateWorkers=async()=>{await y.allSettled(vt.map(e=>(Et(e),e.terminate())))}});